@@ -46,6 +46,19 @@ except Exception as e:
     print("LD_LIBRARY_PATH:", os.environ.get("LD_LIBRARY_PATH"))
     HIK_AVAILABLE = False
 
+# จับเวลา capture/decode ลง histogram เดียวกับแอป (ต้องมี src บน sys.path; ไม่มี = ไม่จับเวลา)
+try:
+    from contextlib import nullcontext
+    from components import timing
+    _CAPTURE_STAGE = timing.stage("capture")
+    _DECODE_STAGE = timing.stage("decode")
+except ImportError:
+    _CAPTURE_STAGE = _DECODE_STAGE = None
+
+
+def _span(stage):
+    return stage.time() if stage is not None else nullcontext()
+
 class USBCameraWorker(QThread):
     """Worker สำหรับกล้อง USB ทั่วไป"""
     frame_ready = Signal(np.ndarray)
@@ -88,7 +101,8 @@ class USBCameraWorker(QThread):
         print(f"USB camera properties: {w}x{h} fps={fps}")
 
         while self.running:
-            ret, frame = self.cap.read()
+            with _span(_CAPTURE_STAGE):
+                ret, frame = self.cap.read()
             if ret:
                 self.frame_ready.emit(frame)
             else:
@@ -194,23 +208,25 @@ class HikrobotCameraWorker(QThread):
             # capture loop
             stData = MV_FRAME_OUT()
             while self.running and not self.isInterruptionRequested():
-                ret = self.cam.MV_CC_GetImageBuffer(stData, self.timeout_ms)
+                with _span(_CAPTURE_STAGE):
+                    ret = self.cam.MV_CC_GetImageBuffer(stData, self.timeout_ms)
                 if ret == 0:
                     try:
-                        fh = int(stData.stFrameInfo.nHeight)
-                        fw = int(stData.stFrameInfo.nWidth)
-                        fl = int(stData.stFrameInfo.nFrameLen)
-                        # create buffer and copy
-                        frame_data = (c_ubyte * fl)()
-                        memmove(byref(frame_data), stData.pBufAddr, fl)
-                        arr = np.frombuffer(frame_data, dtype=np.uint8)
-                        # try to reshape to H,W,3; if pixel format different, caller may adapt
-                        if arr.size >= fh * fw * 3:
-                            img = arr[:fh * fw * 3].reshape((fh, fw, 3))
-                            img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-                        else:
-                            # fallback to single-channel or whatever available
-                            img_bgr = arr.reshape((fh, fw))
+                        with _span(_DECODE_STAGE):
+                            fh = int(stData.stFrameInfo.nHeight)
+                            fw = int(stData.stFrameInfo.nWidth)
+                            fl = int(stData.stFrameInfo.nFrameLen)
+                            # create buffer and copy
+                            frame_data = (c_ubyte * fl)()
+                            memmove(byref(frame_data), stData.pBufAddr, fl)
+                            arr = np.frombuffer(frame_data, dtype=np.uint8)
+                            # try to reshape to H,W,3; if pixel format different, caller may adapt
+                            if arr.size >= fh * fw * 3:
+                                img = arr[:fh * fw * 3].reshape((fh, fw, 3))
+                                img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+                            else:
+                                # fallback to single-channel or whatever available
+                                img_bgr = arr.reshape((fh, fw))
                         self.frame_ready.emit(img_bgr)
                         QThread.msleep(10)
                     except Exception as e:
@@ -0,0 +1,191 @@
+"""
+Batch evaluation แบบ headless: รัน two-template matching กับทุกภาพในโฟลเดอร์ด้วย process pool
+matcher สร้างครั้งเดียวต่อ worker แล้วเขียนผล (CSV / JSON lines / JSON) ทันทีที่แต่ละภาพเสร็จ
+
+ตัวอย่าง:
+    python demo/batch_eval.py image_comppressor_picture -o results.csv
+    python demo/batch_eval.py /data/run42 --recursive --workers 8 --format jsonl -o run42.jsonl
+    python demo/batch_eval.py image_comppressor_picture --roi --backend builtin
+    python demo/batch_eval.py image_comppressor_picture --coarse 8 --backend builtin
+"""
+import argparse
+import csv
+import glob
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+FIELDS = ("file", "found", "count1", "count2", "c1_x", "c1_y", "c2_x", "c2_y", "angle", "score",
+          "read_ms", "pyramid_ms", "coarse_ms", "template1_ms", "template2_ms", "match_ms", "error")
+
+_matcher = None  # ต่อ worker process
+
+
+def _init_worker(opts):
+    global _matcher
+    import cv2
+    # หนึ่ง process ต่อ core อยู่แล้ว ไม่ให้ OpenCV แตก thread ซ้อนอีก
+    cv2.setNumThreads(1)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    from vision.backend import load_matching
+    mt = load_matching(opts["backend"])
+    params1 = mt.MatchingParams(maxCount=1, scoreThreshold=opts["score1"], iouThreshold=0.8, angle=opts["angle1"])
+    params2 = mt.MatchingParams(maxCount=1, scoreThreshold=opts["score2"], iouThreshold=0.6, angle=opts["angle2"])
+    if opts["coarse"]:
+        from vision.coarse_fine import CoarseToFineMatcher
+        _matcher = CoarseToFineMatcher.from_files(opts["template1"], opts["template2"], mt=mt,
+                                                  params1=params1, params2=params2, scale=opts["coarse"])
+    elif opts["roi"]:
+        from vision.roi_search import TwoStageMatcher, load_roi_config
+        _matcher = TwoStageMatcher.from_files(opts["template1"], opts["template2"], mt=mt,
+                                              params1=params1, params2=params2,
+                                              roi_cfg=load_roi_config(opts["config"]))
+    else:
+        from vision.pose import TwoTemplateMatcher
+        _matcher = TwoTemplateMatcher.from_files(opts["template1"], opts["template2"], mt=mt,
+                                                 params1=params1, params2=params2)
+
+
+def _evaluate(path):
+    import cv2
+    row = dict.fromkeys(FIELDS, "")
+    row["file"] = path
+    try:
+        t0 = time.perf_counter()
+        img = cv2.imread(path)
+        t1 = time.perf_counter()
+        row["read_ms"] = round((t1 - t0) * 1000.0, 3)
+        if img is None:
+            raise ValueError("cannot read image")
+        pose = _matcher.match(img)
+        row["match_ms"] = round((time.perf_counter() - t1) * 1000.0, 3)
+        for k in ("pyramid_ms", "coarse_ms", "template1_ms", "template2_ms"):
+            if k in _matcher.last_timing:
+                row[k] = round(_matcher.last_timing[k], 3)
+        row["count1"], row["count2"] = _matcher.last_counts
+        row["found"] = int(pose is not None)
+        if pose is not None:
+            row["c1_x"], row["c1_y"] = (round(v, 3) for v in pose["c1"])
+            row["c2_x"], row["c2_y"] = (round(v, 3) for v in pose["c2"])
+            row["angle"] = round(pose["angle"], 4)
+            row["score"] = round(pose["score"], 4)
+    except Exception as e:
+        row["found"] = 0
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def collect_images(folder, recursive=False):
+    pattern = os.path.join(folder, "**", "*") if recursive else os.path.join(folder, "*")
+    files = [f for f in glob.glob(pattern, recursive=recursive) if f.lower().endswith(IMAGE_EXTS)]
+    return sorted(files)
+
+
+class _Writer:
+    """เขียนผลทีละแถวแล้ว flush (ดูไฟล์ระหว่างรันได้)"""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self.rows = 0
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=FIELDS)
+            self._csv.writeheader()
+        elif fmt == "json":
+            stream.write("[\n")
+
+    def write(self, row):
+        if self.fmt == "csv":
+            self._csv.writerow(row)
+        elif self.fmt == "jsonl":
+            self.stream.write(json.dumps(row) + "\n")
+        else:
+            self.stream.write((",\n" if self.rows else "") + "  " + json.dumps(row))
+        self.rows += 1
+        self.stream.flush()
+
+    def close(self):
+        if self.fmt == "json":
+            self.stream.write("\n]\n")
+        self.stream.flush()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless batch evaluation of the two-template matcher")
+    ap.add_argument("folder")
+    ap.add_argument("-o", "--output", default="-", help="ไฟล์ผลลัพธ์ (- = stdout)")
+    ap.add_argument("--format", choices=("csv", "jsonl", "json"), default=None,
+                    help="ค่าเริ่มต้นตามนามสกุลของ --output (csv)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--recursive", action="store_true")
+    ap.add_argument("--backend", choices=("auto", "native", "builtin"), default=None)
+    ap.add_argument("--template1", default=None)
+    ap.add_argument("--template2", default=None)
+    ap.add_argument("--angle1", type=float, default=5.0)
+    ap.add_argument("--angle2", type=float, default=1.0)
+    ap.add_argument("--score1", type=float, default=0.6)
+    ap.add_argument("--score2", type=float, default=0.4)
+    ap.add_argument("--roi", action="store_true", help="ค้นสองขั้นใน ROI ตาม [PROGRAMS]")
+    ap.add_argument("--config", default=None, help="config.ini สำหรับ --roi")
+    ap.add_argument("--coarse", type=int, default=0, metavar="SCALE",
+                    help="หา template1 บนภาพย่อ 1/SCALE ก่อน (4 หรือ 8) แล้ว match ภาพเต็มรอบ candidate")
+    args = ap.parse_args(argv)
+
+    from vision.pose import DEFAULT_TEMPLATE1, DEFAULT_TEMPLATE2
+
+    files = collect_images(args.folder, args.recursive)
+    if not files:
+        raise SystemExit(f"No images in {args.folder}")
+    fmt = args.format
+    if fmt is None:
+        ext = os.path.splitext(args.output)[1].lower()
+        fmt = {".jsonl": "jsonl", ".json": "json"}.get(ext, "csv")
+    opts = {
+        "backend": args.backend,
+        "template1": args.template1 or DEFAULT_TEMPLATE1,
+        "template2": args.template2 or DEFAULT_TEMPLATE2,
+        "angle1": args.angle1, "angle2": args.angle2,
+        "score1": args.score1, "score2": args.score2,
+        "roi": args.roi, "config": args.config, "coarse": args.coarse,
+    }
+    workers = max(1, min(args.workers, len(files)))
+    log = sys.stderr if args.output == "-" else sys.stdout
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    writer = _Writer(stream, fmt)
+
+    found = errors = 0
+    match_ms = []
+    t_start = time.perf_counter()
+    try:
+        with mp.Pool(workers, initializer=_init_worker, initargs=(opts,)) as pool:
+            t_ready = time.perf_counter()
+            for row in pool.imap_unordered(_evaluate, files, chunksize=max(1, min(16, len(files) // (workers * 4)))):
+                writer.write(row)
+                found += row["found"] == 1
+                errors += bool(row["error"])
+                if row["match_ms"] != "":
+                    match_ms.append(row["match_ms"])
+    finally:
+        writer.close()
+        if stream is not sys.stdout:
+            stream.close()
+    elapsed = time.perf_counter() - t_start
+    run = time.perf_counter() - t_ready
+
+    print(f"images: {len(files)}  found: {found}  errors: {errors}  workers: {workers}", file=log)
+    if match_ms:
+        match_ms.sort()
+        p95 = match_ms[min(len(match_ms) - 1, int(0.95 * len(match_ms)))]
+        print(f"match: mean={sum(match_ms) / len(match_ms):.1f} ms  p95={p95:.1f} ms (per worker)", file=log)
+    print(f"throughput: {len(files) / run:.1f} img/s  (wall {elapsed:.1f} s incl. worker start-up)", file=log)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+เทียบ coarse-to-fine (vision.coarse_fine) ที่ 1/4 และ 1/8 กับ match ทั้งเฟรมเต็มความละเอียด
+บนภาพใน image_comppressor_picture: เวลา (แยกขั้น) และความต่างของ pose จากผลเต็มความละเอียด
+
+    python demo/bench_coarse_fine.py
+    python demo/bench_coarse_fine.py --scales 4 --candidates 1
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.coarse_fine import CoarseToFineMatcher  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def _angle_diff(a, b):
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark coarse-to-fine vs full-resolution matching")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--scales", default="4,8")
+    ap.add_argument("--candidates", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    images = [cv2.imread(f) for f in files]
+    p1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    p2 = sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+
+    full = TwoTemplateMatcher.from_files(mt=sm, params1=p1, params2=p2)
+    full.match(images[0])  # เฟรมแรกสร้าง FFT ของ kernel
+    ref, full_ms = [], []
+    for img in images:
+        ref.append(full.match(img))
+        full_ms.append(full.last_timing["wall_ms"])
+    full.release()
+    print(f"full resolution : found {sum(p is not None for p in ref)}/{len(images)}  "
+          f"mean {np.mean(full_ms):.1f} ms  p95 {np.percentile(full_ms, 95):.1f} ms")
+
+    for scale in (int(s) for s in args.scales.split(",")):
+        cf = CoarseToFineMatcher.from_files(mt=sm, params1=p1, params2=p2, scale=scale,
+                                            coarse_candidates=args.candidates)
+        cf.match(images[0])
+        timing, d1, d2, da = [], [], [], []
+        found = missed = extra = 0
+        for img, r in zip(images, ref):
+            pose = cf.match(img)
+            timing.append(cf.last_timing)
+            found += pose is not None
+            if r is not None and pose is None:
+                missed += 1
+            elif r is None and pose is not None:
+                extra += 1
+            elif r is not None:
+                d1.append(math.dist(r["c1"], pose["c1"]))
+                d2.append(math.dist(r["c2"], pose["c2"]))
+                da.append(_angle_diff(r["angle"], pose["angle"]))
+        cf.release()
+        wall = [t["wall_ms"] for t in timing]
+        stages = "  ".join(f"{k[:-3]} {np.mean([t[k] for t in timing]):.1f}"
+                           for k in ("coarse_ms", "template1_ms", "template2_ms"))
+        print(f"\ncoarse 1/{scale}      : found {found}/{len(images)} (missed {missed}, extra {extra})  "
+              f"mean {np.mean(wall):.1f} ms  p95 {np.percentile(wall, 95):.1f} ms  "
+              f"speed-up x{np.mean(full_ms) / np.mean(wall):.2f}")
+        print(f"  stages ms: {stages}")
+        if d1:
+            print(f"  vs full: c1 max {max(d1):.2f} px  c2 median {np.median(d2):.2f} px  "
+                  f"angle median {np.median(da):.2f}°  angle > 1°: {sum(a > 1.0 for a in da)}/{len(da)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+ทดสอบ change gate (vision.frame_gate) แบบจำลองโหมดต่อเนื่อง: แต่ละภาพใน image_comppressor_picture
+ถูกส่งซ้ำ --repeat เฟรม (+ noise แบบกล้อง) ก่อนเปลี่ยนเป็นภาพถัดไป (= หุ่นหยิบแล้ววางชิ้นใหม่)
+เทียบกับ match ทุกเฟรม: hit rate, เวลาที่ประหยัด, และเฟรมที่ gate ตอบผลของภาพก่อนหน้า (ควรเป็น 0)
+
+    python demo/bench_frame_gate.py
+    python demo/bench_frame_gate.py --repeat 20 --noise 4 --ratio 0.01
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.frame_gate import FrameGate, changed_fraction, thumbnail  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the frame change gate")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--repeat", type=int, default=10, help="จำนวนเฟรมต่อภาพ (ฉากนิ่ง)")
+    ap.add_argument("--noise", type=float, default=3.0, help="sigma ของ noise กล้อง (ระดับเทา)")
+    ap.add_argument("--pixel", type=int, default=8)
+    ap.add_argument("--ratio", type=float, default=0.002)
+    ap.add_argument("--limit", type=int, default=12, help="จำนวนภาพที่ใช้ (0 = ทั้งหมด)")
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if args.limit:
+        files = files[:args.limit]
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    p1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    p2 = sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+    base = TwoTemplateMatcher.from_files(mt=sm, params1=p1, params2=p2)
+    gate = FrameGate(base, pixel_threshold=args.pixel, changed_ratio=args.ratio, max_age_s=0)
+    rng = np.random.default_rng(0)
+
+    # ความต่างระหว่างภาพที่เปลี่ยนจริง เทียบกับเกณฑ์ (ดูว่าห่างจากเกณฑ์แค่ไหน)
+    thumbs = [thumbnail(cv2.imread(f)) for f in files]
+    between = [changed_fraction(a, b, args.pixel) for a, b in zip(thumbs, thumbs[1:])]
+    print(f"changed fraction between consecutive images: min {min(between):.3f}  median {np.median(between):.3f}"
+          f"  (threshold {args.ratio})")
+
+    direct_ms, gated_ms, stale = [], [], 0
+    for f in files:
+        img = cv2.imread(f)
+        truth = None
+        for i in range(args.repeat):
+            frame = np.clip(img + rng.normal(0.0, args.noise, img.shape), 0, 255).astype(np.uint8)
+            t0 = time.perf_counter()
+            pose = base.match(frame)
+            direct_ms.append((time.perf_counter() - t0) * 1000.0)
+            if i == 0:
+                truth = pose
+            t0 = time.perf_counter()
+            gated = gate.match(frame)
+            gated_ms.append((time.perf_counter() - t0) * 1000.0)
+            # เทียบกับผลของเฟรมแรกของภาพนี้ (match ซ้ำบนเฟรม noise ต่างกันเองได้ โดยเฉพาะมุมของ template2)
+            if (gated is None) != (truth is None) or (truth is not None and (
+                    math.dist(gated["c1"], truth["c1"]) > 2.0 or abs(gated["angle"] - truth["angle"]) > 2.0)):
+                stale += 1
+        print(f"{os.path.basename(f)}  {'found' if truth is not None else 'no part'}  "
+              f"last change {gate.last_change:.4f}")
+
+    st = gate.stats()
+    print(f"\nframes: {len(gated_ms)}  gate hits: {st['gate_hits']}  hit rate {st['gate_hit_rate']:.1%}"
+          f"  gate check {st['gate_ms']:.2f} ms/frame")
+    print(f"match every frame: {np.sum(direct_ms) / 1000.0:.2f} s  ({np.mean(direct_ms):.1f} ms/frame)")
+    print(f"with change gate : {np.sum(gated_ms) / 1000.0:.2f} s  ({np.mean(gated_ms):.1f} ms/frame)"
+          f"  saved {st['gate_saved_ms'] / 1000.0:.2f} s")
+    print(f"stale results (gate answered, pose differs > 2 px / 2°): {stale}")
+    base.release()
+
+
+if __name__ == "__main__":
+    main()
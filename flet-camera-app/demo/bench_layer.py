@@ -0,0 +1,146 @@
+"""
+ทดสอบการตรวจทั้งชั้น (vision.pallet) เทียบกับถ่าย+ค้นทีละชิ้น
+ภาพในโฟลเดอร์มีชิ้นเดียวต่อภาพ จึงตัดรอบชิ้นงานมาเรียงเป็นภาพชั้นจำลอง rows x cols
+
+    python demo/bench_layer.py
+    python demo/bench_layer.py --rows 3 --cols 4 --score2 0.3
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.nms import rotated_nms  # noqa: E402
+from vision.pallet import LayerMatcher  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def _loop_nms(quads, scores, thr):
+    """NMS แบบเดิม (loop ทุกคู่, กรอบแกนตรง) ไว้เทียบเวลา"""
+    kept, boxes = [], []
+    for k in np.argsort(-scores):
+        q = quads[k]
+        b = (q[:, 0].min(), q[:, 1].min(), q[:, 0].max(), q[:, 1].max())
+        ok = True
+        for o in boxes:
+            ix = max(0.0, min(b[2], o[2]) - max(b[0], o[0]))
+            iy = max(0.0, min(b[3], o[3]) - max(b[1], o[1]))
+            inter = ix * iy
+            union = (b[2] - b[0]) * (b[3] - b[1]) + (o[2] - o[0]) * (o[3] - o[1]) - inter
+            if union > 0 and inter / union > thr:
+                ok = False
+                break
+        if ok:
+            kept.append(k)
+            boxes.append(b)
+    return kept
+
+
+def build_layer(files, single, rows, cols, tile, min_score=0.0):
+    """
+    ตัดภาพ tile x tile รอบ c2 ของแต่ละภาพมาเรียงเป็นตาราง (วนใช้ภาพซ้ำถ้าไม่พอ); คืน (ภาพ, [(row, col, c1, c2)])
+    ใช้เฉพาะภาพที่ค้นชิ้นเดียวได้ score >= min_score (ชิ้นที่ score ก้ำกึ่งอาจหลุดเมื่อถูก crop)
+    """
+    parts = []
+    for f in files:
+        img = cv2.imread(f)
+        pose = single.match(img) if img is not None else None
+        if pose is not None and pose["score"] >= min_score:
+            parts.append((img, pose))
+    layer = np.zeros((rows * tile, cols * tile, 3), np.uint8)
+    truth = []
+    for k in range(rows * cols if parts else 0):
+        img, pose = parts[k % len(parts)]
+        h, w = img.shape[:2]
+        x0 = int(np.clip(round(pose["c2"][0]) - tile // 2, 0, w - tile))
+        y0 = int(np.clip(round(pose["c2"][1]) - tile // 2, 0, h - tile))
+        r, c = divmod(k, cols)
+        layer[r * tile:(r + 1) * tile, c * tile:(c + 1) * tile] = img[y0:y0 + tile, x0:x0 + tile]
+        ox, oy = c * tile - x0, r * tile - y0
+        truth.append((r, c, (pose["c1"][0] + ox, pose["c1"][1] + oy), (pose["c2"][0] + ox, pose["c2"][1] + oy)))
+    return layer, truth
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark whole-layer detection vs one capture per part")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--rows", type=int, default=2)
+    ap.add_argument("--cols", type=int, default=3)
+    ap.add_argument("--tile", type=int, default=960, help="ขนาดช่องในภาพชั้นจำลอง (px)")
+    ap.add_argument("--score2", type=float, default=0.4)
+    ap.add_argument("--min-score", type=float, default=0.5, help="score ขั้นต่ำของชิ้นที่นำมาเรียงเป็นชั้น")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    n = args.rows * args.cols
+    p1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    p2 = sm.MatchingParams(maxCount=1, scoreThreshold=args.score2, iouThreshold=0.6, angle=1.0)
+    single = TwoTemplateMatcher.from_files(mt=sm, params1=p1, params2=p2)
+    layer_img, truth = build_layer(files, single, args.rows, args.cols, args.tile, args.min_score)
+    print(f"layer image {layer_img.shape[1]}x{layer_img.shape[0]}  parts: {len(truth)}")
+
+    lp1 = sm.MatchingParams(maxCount=n, scoreThreshold=0.6, iouThreshold=0.3, angle=5.0)
+    lp2 = sm.MatchingParams(maxCount=n, scoreThreshold=args.score2, iouThreshold=0.3, angle=1.0)
+    layer = LayerMatcher.from_files(mt=sm, rows=args.rows, cols=args.cols, params1=lp1, params2=lp2)
+
+    layer_ms = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        cells = layer.detect(layer_img)
+        layer_ms.append((time.perf_counter() - t0) * 1000.0)
+    ok = 0
+    errs = []
+    for r, c, c1, c2 in truth:
+        pose = cells.get((r, c))
+        if pose is not None and math.dist(pose["c1"], c1) < 5 and math.dist(pose["c2"], c2) < 10:
+            ok += 1
+            errs.append(math.dist(pose["c1"], c1))
+    print(f"layer: {min(layer_ms):.1f} ms/frame  matched cells {ok}/{len(truth)}  "
+          f"(results t1={layer.last_counts[0]} t2={layer.last_counts[1]}, grid {layer.last_timing['grid_ms']:.2f} ms)"
+          + (f"  c1 err max {max(errs):.2f} px" if errs else ""))
+
+    # เทียบ: หนึ่งเฟรม+ค้นต่อหนึ่งชิ้น (ภาพต้นฉบับเต็มเฟรม)
+    single_ms = []
+    for f in files[:len(truth)]:
+        img = cv2.imread(f)
+        t0 = time.perf_counter()
+        single.match(img)
+        single_ms.append((time.perf_counter() - t0) * 1000.0)
+    per_part = sum(single_ms) / max(1, len(single_ms))
+    print(f"one capture per part: {per_part:.1f} ms x {n} = {per_part * n:.0f} ms/layer "
+          f"vs {min(layer_ms):.0f} ms (match time only; capture/exposure not included)")
+
+    # NMS: rotated (vectorized) vs loop แบบเดิม บน candidate ซ้อนกันจำนวนมาก
+    rng = np.random.default_rng(0)
+    for count in (50, 200, 800):
+        rects = [((float(x), float(y)), (130.0, 150.0), float(a)) for x, y, a in
+                 zip(rng.uniform(0, 1500, count), rng.uniform(0, 1000, count), rng.uniform(-30, 30, count))]
+        quads = np.stack([cv2.boxPoints(rc) for rc in rects])
+        scores = rng.uniform(0, 1, count)
+        t0 = time.perf_counter()
+        keep = rotated_nms(quads, scores, 0.3)
+        t1 = time.perf_counter()
+        kept_loop = _loop_nms(quads, scores, 0.3)
+        t2 = time.perf_counter()
+        print(f"NMS n={count:4d}: rotated {(t1 - t0) * 1000:6.2f} ms (kept {len(keep)})  "
+              f"loop axis-aligned {(t2 - t1) * 1000:6.2f} ms (kept {len(kept_loop)})")
+
+    single.release()
+    layer.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+ทดสอบการตรวจ O-ring (vision.oring) บนภาพใน image_comppressor_picture
+ตำแหน่งที่คาด = ศูนย์กลาง template1; เทียบเวลา ROI + buffer เดิม กับทำทั้งเฟรมแบบสร้าง buffer ใหม่ทุกครั้ง
+
+    python demo/bench_oring.py                       # ค่า [find_oring] จาก ConfigManager
+    python demo/bench_oring.py --blur 7 --canny1 20 --canny2 40
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.oring import OringFinder, OringParams, oring_roi  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def _full_frame(image, finder):
+    """แบบไม่จำกัด ROI: gray/blur/Canny/close ทั้งเฟรม และ allocate ผลใหม่ทุกขั้น"""
+    p = finder.params
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    blur = cv2.GaussianBlur(gray, finder.blur_size, 0)
+    edges = cv2.Canny(blur, p.canny_thresh1, p.canny_thresh2)
+    closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, finder.kernel)
+    contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return [c for c in contours if cv2.contourArea(c) >= p.large_area]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the O-ring finder")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--blur", type=int, default=None)
+    ap.add_argument("--canny1", type=int, default=None)
+    ap.add_argument("--canny2", type=int, default=None)
+    ap.add_argument("--morph", type=int, default=None)
+    ap.add_argument("--dif-zone", type=int, default=None)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    params = OringParams.from_config()
+    for attr, value in (("blur_kernel", args.blur), ("canny_thresh1", args.canny1), ("canny_thresh2", args.canny2),
+                        ("morph_kernel", args.morph), ("dif_zone", args.dif_zone)):
+        if value is not None:
+            setattr(params, attr, value)
+    print(params)
+    finder = OringFinder(params)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    p1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    p2 = sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+    matcher = TwoTemplateMatcher.from_files(mt=sm, params1=p1, params2=p2)
+
+    present = position_ok = checked = 0
+    roi_ms, full_ms, offsets = [], [], []
+    for f in files:
+        img = cv2.imread(f)
+        pose = matcher.match(img) if img is not None else None
+        if pose is None:
+            continue
+        checked += 1
+        roi = oring_roi(pose["c1"], params)
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            res = finder.find(img, roi, pose["c1"])
+            roi_ms.append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        _full_frame(img, finder)
+        full_ms.append((time.perf_counter() - t0) * 1000.0)
+        present += res["present"]
+        position_ok += res["ok"]
+        if res["present"]:
+            offsets.append(res["offset"])
+        print(f"{os.path.basename(f)}  {'present' if res['present'] else 'MISSING':8s}"
+              + (f"  bbox={res['bbox']}  offset={res['offset']:.1f} px" if res["present"] else "")
+              + f"  {finder.last_timing['total_ms']:.2f} ms")
+
+    if not checked:
+        raise SystemExit("no part found in any image")
+    print(f"images with a part: {checked}  O-ring present: {present}  position ok: {position_ok}")
+    if offsets:
+        print(f"offset from template1 centre: mean {np.mean(offsets):.1f} px  max {np.max(offsets):.1f} px")
+    print(f"ROI + scratch buffers: mean {np.mean(roi_ms):.2f} ms  p95 {np.percentile(roi_ms, 95):.2f} ms")
+    print(f"full frame, new buffers: mean {np.mean(full_ms):.2f} ms  (x{np.mean(full_ms) / np.mean(roi_ms):.0f})")
+    matcher.release()
+
+
+if __name__ == "__main__":
+    main()
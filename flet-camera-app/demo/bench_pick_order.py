@@ -0,0 +1,85 @@
+"""
+เทียบลำดับหยิบ (vision.pick_order) บนพาเลทสังเคราะห์ถึงกริด 200x200 (ขีดสูงสุดของหน้า Home)
+ลำดับเดิม = แถวแล้วคอลัมน์ตามตัวนับ; ชั้นบนหมดก่อนลงชั้นถัดไป; หุ่นเริ่มที่ --start (mm)
+ช่องถูกสุ่มหายตาม --missing (หยิบไปแล้ว/ตรวจไม่เจอ) และตำแหน่งสั่นตาม --jitter
+
+    python demo/bench_pick_order.py
+    python demo/bench_pick_order.py --grids 5x8,40x40 --layers 3 --missing 0.3
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision.pick_order import (FULL_2OPT_N, PickPlanner, nearest_neighbour_order, path_length,  # noqa: E402
+                               serpentine_order, two_opt)
+
+
+def make_pallet(rows, cols, layers, pitch, jitter, missing, rng):
+    r, c, layer = np.meshgrid(np.arange(rows), np.arange(cols), np.arange(layers), indexing="ij")
+    # เรียงตามลำดับเดิม: ชั้นบน (เลขมาก) ก่อน แล้วแถว แล้วคอลัมน์
+    order = np.lexsort((c.ravel(), r.ravel(), -layer.ravel()))
+    r, c, layer = r.ravel()[order], c.ravel()[order], layer.ravel()[order]
+    pts = np.stack([c * pitch[0], r * pitch[1]], axis=1) + rng.normal(0.0, jitter, (len(r), 2))
+    keep = rng.random(len(r)) >= missing
+    return pts[keep], np.stack([r, c], axis=1)[keep], layer[keep]
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark pallet pick-order planning")
+    ap.add_argument("--grids", default="5x8,20x20,50x50,100x100,200x200")
+    ap.add_argument("--layers", type=int, default=3)
+    ap.add_argument("--pitch", default="120,100", help="ระยะช่อง x,y (mm)")
+    ap.add_argument("--jitter", type=float, default=3.0, help="mm")
+    ap.add_argument("--missing", type=float, default=0.2)
+    ap.add_argument("--speed", type=float, default=500.0, help="mm/s")
+    ap.add_argument("--start", default="-400,-300", help="ตำแหน่งหุ่นก่อนเริ่ม (mm)")
+    ap.add_argument("--budget", type=float, default=100.0, help="ms ของ 2-opt ต่อพาเลท")
+    args = ap.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    pitch = tuple(float(v) for v in args.pitch.split(","))
+    start = np.array([float(v) for v in args.start.split(",")])
+    planner = PickPlanner(speed_mm_s=args.speed, budget_ms=args.budget)
+    print(f"{'grid':>9} {'picks':>6} | {'row-major m':>11} {'planned m':>9} {'saved':>6} {'saved s':>8} "
+          f"{'plan ms':>8} {'ms/layer':>8}  method")
+    for spec in args.grids.split(","):
+        rows, cols = (int(v) for v in spec.lower().split("x"))
+        pts, cells, layers = make_pallet(rows, cols, args.layers, pitch, args.jitter, args.missing, rng)
+        plan = planner.plan(pts, start=start, cells=cells, layers=layers)
+        assert sorted(plan.order.tolist()) == list(range(len(pts)))
+        # ข้อจำกัดชั้น: เลขชั้นตามลำดับหยิบต้องไม่เพิ่มขึ้น
+        assert np.all(np.diff(layers[plan.order]) <= 0)
+        print(f"{spec:>9} {len(pts):6d} | {plan.baseline_length / 1000:11.1f} {plan.length / 1000:9.1f} "
+              f"{plan.saved_ratio:6.1%} {plan.saved_s:8.1f} {plan.plan_ms:8.1f} "
+              f"{plan.plan_ms / args.layers:8.1f}  {plan.method}")
+
+    # แยกแต่ละวิธีบนชั้นเดียว (top layer) เพื่อดูว่าอะไรได้ผลตอนไหน
+    print("\nsingle layer, per heuristic (m / ms):")
+    for spec in args.grids.split(","):
+        rows, cols = (int(v) for v in spec.lower().split("x"))
+        pts, cells, _ = make_pallet(rows, cols, 1, pitch, args.jitter, args.missing, rng)
+        base = path_length(pts, np.arange(len(pts)), start)
+        serp, serp_ms = _timed(lambda: serpentine_order(cells, pts, start))
+        line = f"{spec:>9}: row-major {base / 1000:.1f}  serpentine {path_length(pts, serp, start) / 1000:.1f} " \
+               f"/ {serp_ms:.1f}"
+        if len(pts) <= 4 * FULL_2OPT_N:
+            nn, nn_ms = _timed(lambda: nearest_neighbour_order(pts, start))
+            opt, opt_ms = _timed(lambda: two_opt(pts, nn, start, args.budget))
+            line += f"  nn {path_length(pts, nn, start) / 1000:.1f} / {nn_ms:.1f}" \
+                    f"  nn+2opt {path_length(pts, opt, start) / 1000:.1f} / {nn_ms + opt_ms:.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+ทดสอบ quality stage (vision.frame_quality) ผ่าน PosePipeline: ภาพใน image_comppressor_picture บางเฟรมถูกทำให้
+เบลอแบบหุ่นขยับ (motion blur แนวนอน) หรือมืด (exposure สั้น) แล้วยิง Capture ทีละภาพ
+เทียบ match ทุกเฟรม กับตรวจคุณภาพก่อน (เฟรมเสียรอเฟรมถัดไปที่ "กล้อง" ส่งมา)
+
+    python demo/bench_quality.py
+    python demo/bench_quality.py --bad 0.5 --blur 25 --gain 0.15
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from components import framing  # noqa: E402
+from components.pose_pipeline import PosePipeline  # noqa: E402
+from vision import shape_match as sm  # noqa: E402
+from vision.frame_quality import FrameQuality, QualityParams  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+ROBOT_CFG = {"calpick": 1.0, "offsetpickx": 0.0, "offsetpicky": 0.0, "angle": 0.0}
+
+
+def motion_blur(img, length):
+    kernel = np.zeros((length, length), np.float32)
+    kernel[length // 2, :] = 1.0 / length
+    return cv2.filter2D(img, -1, kernel)
+
+
+class FakeCamera:
+    """เฟรมล่าสุดแบบ state["last_frame"]: retrigger() ปล่อยเฟรมถัดไปของลำดับ (ภาพดีของชิ้นเดิม)"""
+
+    def __init__(self):
+        self.frame = None
+        self.good = None
+        self.triggers = 0
+
+    def __call__(self):
+        return self.frame
+
+    def retrigger(self):
+        self.triggers += 1
+        good = self.good
+        # เฟรมใหม่มาถึงหลังเวลา exposure + ส่งภาพ (~30 ms)
+        threading.Timer(0.03, lambda: setattr(self, "frame", good.copy())).start()
+
+
+def run(files, bad, args, quality):
+    p1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    p2 = sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+    matcher = TwoTemplateMatcher.from_files(mt=sm, params1=p1, params2=p2)
+    cam = FakeCamera()
+    checker = FrameQuality(QualityParams()) if quality else None
+    pipe = PosePipeline(cam, matcher, robot_cfg=ROBOT_CFG, deadline_ms=2000,
+                        quality=checker.check if checker else None, retrigger=cam.retrigger)
+    wrong = 0
+    match_ms = []
+    for f, kind in zip(files, bad):
+        img = cv2.imread(f)
+        truth = matcher.match(img)
+        cam.good = img
+        if kind == "blur":
+            cam.frame = motion_blur(img, args.blur)
+        elif kind == "dark":
+            cam.frame = (img * args.gain).astype(np.uint8)
+        else:
+            cam.frame = img
+        t0 = time.perf_counter()
+        reply = pipe.handle("Capture:1")
+        match_ms.append((time.perf_counter() - t0) * 1000.0)
+        if reply["status"] == framing.STATUS_OK and truth is not None:
+            if math.hypot(reply["x"] - truth["c1"][0], reply["y"] - truth["c1"][1]) > 3.0:
+                wrong += 1
+    st = pipe.stats()
+    pipe.close()
+    return st, wrong, match_ms, cam.triggers, checker
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the frame quality stage")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--bad", type=float, default=0.3, help="สัดส่วนเฟรมเสีย (ครึ่งเบลอ ครึ่งมืด)")
+    ap.add_argument("--blur", type=int, default=21, help="ความยาว motion blur (px)")
+    ap.add_argument("--gain", type=float, default=0.2, help="ตัวคูณความสว่างของเฟรมมืด")
+    ap.add_argument("--limit", type=int, default=24)
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))[:args.limit]
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    rng = np.random.default_rng(1)
+    bad = [("blur" if rng.random() < 0.5 else "dark") if rng.random() < args.bad else "" for _ in files]
+    print(f"{len(files)} captures, {sum(map(bool, bad))} bad frames "
+          f"({bad.count('blur')} blurred, {bad.count('dark')} dark)")
+
+    for quality in (False, True):
+        st, wrong, ms, triggers, checker = run(files, bad, args, quality)
+        label = "quality check " if quality else "match directly"
+        print(f"\n{label}: ok={st['ok']} no_part={st['no_part']} retry={st['retry']}  wrong pose={wrong}  "
+              f"mean {np.mean(ms):.1f} ms  p95 {np.percentile(ms, 95):.1f} ms")
+        bad_ms = [m for m, kind in zip(ms, bad) if kind]
+        if bad_ms:
+            print(f"  captures that hit a bad frame: mean {np.mean(bad_ms):.1f} ms"
+                  + ("  (includes waiting for the next frame)" if quality else "  (full search, then fail)"))
+        if checker is not None:
+            q = checker.stats()
+            print(f"  checked {q['checked']}  rejected {q['rejected']} {q['reasons']}  retriggers {triggers}"
+                  f"  check {q['quality_ms']:.2f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+เทียบการค้นทั้งภาพกับการค้นสองขั้นใน ROI ([PROGRAMS] large_roi_* / small_roi_*)
+
+    python demo/bench_roi_search.py
+    python demo/bench_roi_search.py --angle1 180 --angle2 180
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+from vision.roi_search import TwoStageMatcher, load_roi_config  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark ROI-restricted two-stage matching")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--config", default=None, help="config.ini (default: src/pages/config.ini)")
+    ap.add_argument("--angle1", type=float, default=5.0)
+    ap.add_argument("--angle2", type=float, default=1.0)
+    ap.add_argument("--score1", type=float, default=0.6)
+    ap.add_argument("--score2", type=float, default=0.4)
+    ap.add_argument("--save", default=None, help="โฟลเดอร์เก็บภาพที่วาด ROI/ผล")
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    roi_cfg = load_roi_config(args.config)
+    params1 = sm.MatchingParams(maxCount=1, scoreThreshold=args.score1, iouThreshold=0.8, angle=args.angle1)
+    params2 = sm.MatchingParams(maxCount=1, scoreThreshold=args.score2, iouThreshold=0.6, angle=args.angle2)
+    full = TwoTemplateMatcher.from_files(mt=sm, params1=params1, params2=params2)
+    staged = TwoStageMatcher.from_files(mt=sm, params1=params1, params2=params2, roi_cfg=roi_cfg)
+    print(f"ROI config: {roi_cfg}")
+
+    t_full, t_roi, t1s, t2s, dists = [], [], [], [], []
+    found_full = found_roi = 0
+    for f in files:
+        img = cv2.imread(f)
+        t0 = time.perf_counter()
+        pose_full = full.match(img)
+        t_full.append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        pose_roi = staged.match(img)
+        t_roi.append((time.perf_counter() - t0) * 1000.0)
+        t1s.append(staged.last_timing["template1_ms"])
+        t2s.append(staged.last_timing["template2_ms"])
+        found_full += pose_full is not None
+        found_roi += pose_roi is not None
+        if pose_full and pose_roi:
+            dists.append(math.dist(pose_full["c1"], pose_roi["c1"]))
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            from vision.roi_search import draw_roi
+            for roi in staged.last_rois:
+                draw_roi(img, roi)
+            if pose_roi:
+                for c in (pose_roi["c1"], pose_roi["c2"]):
+                    cv2.circle(img, (int(c[0]), int(c[1])), 6, (0, 0, 255), -1)
+            cv2.imwrite(os.path.join(args.save, os.path.basename(f)), img)
+
+    h, w = cv2.imread(files[0]).shape[:2]
+    ratio = roi_cfg["large_roi_width"] * roi_cfg["large_roi_height"] / float(w * h)
+    print(f"images: {len(files)} ({w}x{h}), large ROI / image area = {ratio:.2f}")
+    print(f"full image : found {found_full}/{len(files)}  mean={np.mean(t_full):.1f} ms  "
+          f"p95={np.percentile(t_full, 95):.1f} ms")
+    print(f"ROI search : found {found_roi}/{len(files)}  mean={np.mean(t_roi):.1f} ms  "
+          f"p95={np.percentile(t_roi, 95):.1f} ms  (template1 {np.mean(t1s):.1f} ms, template2 {np.mean(t2s):.1f} ms)")
+    print(f"speed-up x{np.mean(t_full) / np.mean(t_roi):.2f}")
+    if dists:
+        print(f"template1 center |full - ROI|: mean={np.mean(dists):.2f} px  max={np.max(dists):.2f} px")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+เทียบ two-template matching แบบเรียงกันกับแบบพร้อมกัน (vision.scheduler, pyramid ร่วม)
+
+    python demo/bench_scheduler.py
+    python demo/bench_scheduler.py --angle2 180 --repeat 3
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark sequential vs concurrent two-template matching")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--angle1", type=float, default=5.0)
+    ap.add_argument("--angle2", type=float, default=1.0)
+    ap.add_argument("--score1", type=float, default=0.6)
+    ap.add_argument("--score2", type=float, default=0.4)
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    images = [cv2.imread(f) for f in files]
+    params1 = sm.MatchingParams(maxCount=1, scoreThreshold=args.score1, iouThreshold=0.8, angle=args.angle1)
+    params2 = sm.MatchingParams(maxCount=1, scoreThreshold=args.score2, iouThreshold=0.6, angle=args.angle2)
+    seq = TwoTemplateMatcher.from_files(mt=sm, params1=params1, params2=params2)
+    conc = TwoTemplateMatcher.from_files(mt=sm, params1=params1, params2=params2, concurrent=True)
+
+    seq_ms, conc_ms, per = [], [], {"pyramid_ms": [], "template1_ms": [], "template2_ms": []}
+    same = 0
+    for img in images:
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            a = seq.match(img)
+            seq_ms.append((time.perf_counter() - t0) * 1000.0)
+            t0 = time.perf_counter()
+            b = conc.match(img)
+            conc_ms.append((time.perf_counter() - t0) * 1000.0)
+            for k in per:
+                per[k].append(conc.scheduler.last_timing[k])
+        same += (a is None and b is None) or (a is not None and b is not None and a["c1"] == b["c1"]
+                                              and a["c2"] == b["c2"])
+    conc.release()
+
+    print(f"images: {len(images)} x{args.repeat}  cpu: {os.cpu_count()}")
+    print(f"sequential : mean={np.mean(seq_ms):.1f} ms  p95={np.percentile(seq_ms, 95):.1f} ms")
+    print(f"concurrent : mean={np.mean(conc_ms):.1f} ms  p95={np.percentile(conc_ms, 95):.1f} ms  "
+          f"(pyramid {np.mean(per['pyramid_ms']):.1f} ms, template1 {np.mean(per['template1_ms']):.1f} ms, "
+          f"template2 {np.mean(per['template2_ms']):.1f} ms)")
+    print(f"speed-up x{np.mean(seq_ms) / np.mean(conc_ms):.2f}  identical poses {same}/{len(images)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark built-in shape matching (vision.shape_match) บนภาพใน image_comppressor_picture
+
+ค่าเริ่มต้น = params ที่แอปโหลดจริง (vision.pose.TwoTemplateMatcher / demo/test1.py)
+
+    python demo/bench_shape_match.py
+    python demo/bench_shape_match.py --angle1 180 --angle2 180 --repeat 3
+    python demo/bench_shape_match.py --method shape --fft 1   # ShapeMatcher, ชั้นบนด้วย FFT template bank
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the built-in shape matcher")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--template1", default=os.path.join(PICTURE_DIR, "temp1.jpg"))
+    ap.add_argument("--template2", default=os.path.join(PICTURE_DIR, "temp3.png"))
+    ap.add_argument("--angle1", type=float, default=5.0)
+    ap.add_argument("--angle2", type=float, default=1.0)
+    ap.add_argument("--score1", type=float, default=0.6)
+    ap.add_argument("--score2", type=float, default=0.4)
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--method", default=sm.METHOD_NCC, choices=(sm.METHOD_NCC, sm.METHOD_SHAPE))
+    ap.add_argument("--features", type=int, default=128, help="numFeatures ต่อ model")
+    ap.add_argument("--fft", type=int, default=-1, choices=(-1, 0, 1),
+                    help="ค้นชั้นบนด้วย FFT bank: -1 อัตโนมัติ, 0 ปิด, 1 เปิด")
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    images = [(os.path.basename(f), cv2.imread(f)) for f in files]
+
+    specs = [
+        ("template1", args.template1, sm.MatchingParams(maxCount=1, scoreThreshold=args.score1,
+                                                        iouThreshold=0.8, angle=args.angle1,
+                                                        numFeatures=args.features, fftSearch=args.fft,
+                                                        method=args.method)),
+        ("template2", args.template2, sm.MatchingParams(maxCount=1, scoreThreshold=args.score2,
+                                                        iouThreshold=0.6, angle=args.angle2,
+                                                        numFeatures=args.features, fftSearch=args.fft,
+                                                        method=args.method)),
+    ]
+    for name, path, params in specs:
+        t0 = time.perf_counter()
+        matcher = sm.create_matcher_for_template(cv2.imread(path), None, params)
+        build_ms = (time.perf_counter() - t0) * 1000.0
+        times = []
+        found = 0
+        for fname, img in images:
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                count, results, _ = sm.run_match(matcher, img)
+                times.append((time.perf_counter() - t0) * 1000.0)
+            found += count > 0
+        t = np.asarray(times)
+        if args.method == sm.METHOD_SHAPE:
+            detail = (f"top={'fft' if matcher.use_fft else 'direct'} "
+                      f"bank={matcher.bank.nbytes() / 1e6:.1f} MB")
+        else:
+            detail = f"top angles={matcher.top_angles.size} bank={matcher.nbytes() / 1e6:.1f} MB"
+        print(f"{name}: {os.path.basename(path)} {args.method} score>={params.scoreThreshold:g} "
+              f"angle=±{params.angle} levels={matcher.num_levels} {detail} build={build_ms:.1f} ms")
+        print(f"  found {found}/{len(images)}  mean={t.mean():.1f} ms  p50={np.percentile(t, 50):.1f} ms  "
+              f"p95={np.percentile(t, 95):.1f} ms  ({1000.0 / t.mean():.1f} img/s)")
+
+
+if __name__ == "__main__":
+    main()
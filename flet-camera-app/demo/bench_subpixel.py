@@ -0,0 +1,93 @@
+"""
+วัดความแม่นยำ/ต้นทุนของ sub-pixel refinement (MatchingParams.subPixel ของ ShapeMatcher) ด้วยภาพที่เลื่อน/หมุนรู้ค่า
+
+ภาพ source ถูก warpAffine ด้วย (tx, ty, φ) สุ่มแบบทศนิยม แล้วเทียบ pose ที่หาได้กับ pose เดิมที่แปลงด้วย
+transform เดียวกัน (ความคลาดเคลื่อนของ pose เดิมตัดกันไปในผลต่าง)
+
+    python demo/bench_subpixel.py
+    python demo/bench_subpixel.py --template image_comppressor_picture/temp3.png --angle 180 --score 0.25
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import refine  # noqa: E402
+from vision import shape_match as sm  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark sub-pixel pose refinement")
+    ap.add_argument("--source", default=os.path.join(PICTURE_DIR, "Image_02.png"))
+    ap.add_argument("--template", default=os.path.join(PICTURE_DIR, "temp1.jpg"))
+    ap.add_argument("--angle", type=float, default=5.0)
+    ap.add_argument("--score", type=float, default=0.6)
+    ap.add_argument("--trials", type=int, default=30)
+    ap.add_argument("--shift", type=float, default=3.0, help="± px ของการเลื่อนสุ่ม")
+    ap.add_argument("--rotate", type=float, default=2.0, help="± องศาของการหมุนสุ่ม")
+    ap.add_argument("--calpick", type=float, default=0.162, help="mm/px สำหรับแปลงความคลาดเป็น mm")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    src = cv2.imread(args.source)
+    tpl = cv2.imread(args.template)
+    if src is None or tpl is None:
+        raise SystemExit("cannot read source/template")
+    h, w = src.shape[:2]
+    centre = ((w - 1) / 2.0, (h - 1) / 2.0)
+    rng = np.random.default_rng(args.seed)
+    warps = []
+    for _ in range(args.trials):
+        tx, ty = rng.uniform(-args.shift, args.shift, 2)
+        phi = rng.uniform(-args.rotate, args.rotate)
+        m = cv2.getRotationMatrix2D(centre, phi, 1.0)
+        m[:, 2] += (tx, ty)
+        warps.append((m, phi, cv2.warpAffine(src, m, (w, h), flags=cv2.INTER_CUBIC,
+                                             borderMode=cv2.BORDER_REPLICATE)))
+
+    print(f"{args.trials} warps of {os.path.basename(args.source)}: shift ±{args.shift} px, rotate ±{args.rotate}°")
+    print(f"{'mode':20s} {'found':>6s} {'pos err mean':>13s} {'p95':>7s} {'angle err':>10s} {'match ms':>9s} {'refine ms':>10s}")
+    for mode in refine.SUBPIXEL_MODES:
+        params = sm.MatchingParams(maxCount=1, scoreThreshold=args.score, iouThreshold=0.8, angle=args.angle,
+                                   subPixel=mode, method=sm.METHOD_SHAPE)
+        matcher = sm.create_matcher_for_template(tpl, None, params)
+        _, base, _ = sm.run_match(matcher, src)
+        if not base:
+            print(f"{mode:20s} template not found in source")
+            continue
+        b = base[0]
+        pos_err, ang_err, times = [], [], []
+        for m, phi, img in warps:
+            t0 = time.perf_counter()
+            _, res, _ = sm.run_match(matcher, img)
+            times.append((time.perf_counter() - t0) * 1000.0)
+            if not res:
+                continue
+            ex, ey = m @ np.array([b.centerX, b.centerY, 1.0])
+            pos_err.append(math.hypot(res[0].centerX - ex, res[0].centerY - ey))
+            ang_err.append(abs((res[0].angle - (b.angle + phi) + 180.0) % 360.0 - 180.0))
+        # ต้นทุนของขั้น least squares อย่างเดียว (ต่อผลหนึ่งอัน)
+        refine_ms = 0.0
+        if mode in (refine.SUBPIXEL_LEAST_SQUARES, refine.SUBPIXEL_LEAST_SQUARES_HIGH):
+            gray = sm.frame_pyramid(src, 1)[0]
+            t0 = time.perf_counter()
+            for _ in range(20):
+                matcher._least_squares(gray, b)
+            refine_ms = (time.perf_counter() - t0) * 1000.0 / 20
+        pe = np.asarray(pos_err)
+        print(f"{mode:20s} {len(pe):>3d}/{len(warps):<2d} {pe.mean():>10.3f} px {np.percentile(pe, 95):>7.3f} "
+              f"{np.mean(ang_err):>9.3f}° {np.mean(times):>9.1f} {refine_ms:>10.2f}")
+        if mode == refine.SUBPIXEL_LEAST_SQUARES:
+            print(f"{'':20s} -> {pe.mean() * args.calpick:.3f} mm mean at calpick={args.calpick} mm/px")
+
+
+if __name__ == "__main__":
+    main()
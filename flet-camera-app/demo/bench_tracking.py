@@ -0,0 +1,71 @@
+"""
+ทดสอบ tracking mode (vision.tracking) บนภาพเรียงตามลำดับใน image_comppressor_picture
+
+    python demo/bench_tracking.py
+    python demo/bench_tracking.py --window 80 --band 5 --score2 0.3
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.roi_search import TwoStageMatcher  # noqa: E402
+from vision.tracking import GridModel, PoseTracker  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark pose tracking vs global search")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--window", type=float, default=120.0)
+    ap.add_argument("--band", type=float, default=10.0, help="± องศารอบมุมเดิม")
+    ap.add_argument("--score1", type=float, default=0.6, help="score ขั้นต่ำของ template1 ที่ track ได้")
+    ap.add_argument("--score2", type=float, default=0.4, help="score ขั้นต่ำของ template2 ที่ track ได้")
+    ap.add_argument("--rows", type=int, default=5)
+    ap.add_argument("--cols", type=int, default=8)
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    params1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    params2 = sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+    base = TwoStageMatcher.from_files(mt=sm, params1=params1, params2=params2)
+    reference = TwoStageMatcher.from_files(mt=sm, params1=params1, params2=params2)
+    tracker = PoseTracker(base, grid=GridModel(args.rows, args.cols), window=args.window,
+                          angle_band=args.band, score1=args.score1, score2=args.score2)
+
+    ref_ms, trk_ms, errs = [], [], []
+    for f in files:
+        img = cv2.imread(f)
+        t0 = time.perf_counter()
+        ref = reference.match(img)
+        ref_ms.append((time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        pose = tracker.match(img)
+        trk_ms.append((time.perf_counter() - t0) * 1000.0)
+        if ref and pose:
+            errs.append(max(math.dist(ref["c1"], pose["c1"]), math.dist(ref["c2"], pose["c2"])))
+        print(f"{os.path.basename(f)}  {tracker.last_mode:6s}  {trk_ms[-1]:6.1f} ms"
+              + (f"  angle={pose['angle']:7.2f}" if pose else "  not found"))
+
+    st = tracker.stats()
+    print(f"\nglobal every frame: mean={np.mean(ref_ms):.1f} ms")
+    print(f"tracking          : mean={np.mean(trk_ms):.1f} ms  hit rate={st['hit_rate'] * 100:.0f}% "
+          f"({st['hits']} hit / {st['misses']} miss)  track={st['track_ms']:.1f} ms  global={st['global_ms']:.1f} ms")
+    print(f"time saved: {st['saved_ms']:.0f} ms over {len(files)} frames")
+    if errs:
+        print(f"max centre difference vs global: median={np.median(errs):.2f} px  max={np.max(errs):.2f} px")
+
+
+if __name__ == "__main__":
+    main()
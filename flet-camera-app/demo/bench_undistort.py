@@ -0,0 +1,109 @@
+"""
+ทดสอบ vision.calibration: เวลา build map vs โหลดจาก cache, remap ทั้งเฟรม vs เฉพาะ ROI vs แก้เฉพาะจุด
+และความสอดคล้องของ map กับ undistort_points (จุดที่ map ชี้ไป แก้กลับต้องได้ pixel เดิม)
+camera model ของ hdev มี kappa = 0 (ไม่มี distortion) -> ค่าเริ่มต้นใช้ kappa ทดสอบแบบ barrel แทน
+
+    python demo/bench_undistort.py
+    python demo/bench_undistort.py --kappa 0          # model ของ hdev ตรง ๆ (identity)
+    python demo/bench_undistort.py --kappa -3000 --roi 550
+"""
+import argparse
+import glob
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import shape_match as sm  # noqa: E402
+from vision.calibration import HDEV_CAMERA, Undistorter  # noqa: E402
+from vision.pose import TwoTemplateMatcher  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+
+
+def _ms(fn, repeat=5):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat, out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark lens undistortion paths")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--kappa", type=float, default=-1500.0, help="1/m^2 (hdev = 0)")
+    ap.add_argument("--roi", type=int, default=550, help="ด้าน ROI ที่ remap (px)")
+    args = ap.parse_args(argv)
+
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    frame = cv2.imread(files[0])
+    h, w = frame.shape[:2]
+    model = replace(HDEV_CAMERA, kappa=args.kappa)
+    m = model.for_size(w, h)
+    print(f"camera model {model.width}x{model.height} -> frame {w}x{h}: "
+          f"f={m.focus / m.sx:.1f} px  c=({m.cx:.1f}, {m.cy:.1f})  kappa={m.kappa:g}")
+
+    cache = tempfile.mkdtemp(prefix="undistort-")
+    try:
+        und = Undistorter(model, cache_dir=cache)
+        t0 = time.perf_counter()
+        und.maps(frame.shape)
+        build_ms = (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
+        map_x, map_y = Undistorter(model, cache_dir=cache).maps(frame.shape)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+        print(f"maps: build {build_ms:.0f} ms -> cached load {load_ms:.0f} ms  ({os.listdir(cache)[0]})")
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+
+    corner = und.undistort_points([(0.0, 0.0)], frame.shape)[0]
+    print(f"corner (0, 0) moves {math.hypot(*corner):.1f} px")
+    # map(p) = จุดที่บิดของ pixel p; undistort_points(map(p)) ต้องได้ p
+    ys, xs = np.mgrid[0:h:37, 0:w:37]
+    src = np.stack([map_x[ys, xs].ravel(), map_y[ys, xs].ravel()], axis=1)
+    inside = (src[:, 0] >= 0) & (src[:, 0] < w) & (src[:, 1] >= 0) & (src[:, 1] < h)
+    back = und.undistort_points(src[inside], frame.shape)
+    err = np.hypot(back[:, 0] - xs.ravel()[inside], back[:, 1] - ys.ravel()[inside])
+    print(f"map vs point model round trip: max {err.max():.2e} px over {inside.sum()} samples")
+
+    cx, cy, half = w // 2, h // 2, args.roi // 2
+    bounds = (cx - half, cy - half, cx + half, cy + half)
+    full_ms, _ = _ms(lambda: und.remap(frame))
+    roi_ms, _ = _ms(lambda: und.remap_roi(frame, bounds))
+    pts = np.array([[996.5, 673.0], [1028.0, 634.1]])
+    pts_ms, _ = _ms(lambda: und.undistort_points(pts, frame.shape), repeat=200)
+    print(f"remap full frame {full_ms:.2f} ms | ROI {args.roi}x{args.roi} {roi_ms:.2f} ms | "
+          f"2 points {pts_ms * 1000.0:.1f} us")
+
+    # pose ในพิกัดไม่บิด: match บนภาพจริงแล้วแก้เฉพาะจุด เทียบกับ match บนภาพที่ remap ทั้งเฟรม
+    p1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    p2 = sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+    matcher = TwoTemplateMatcher.from_files(mt=sm, params1=p1, params2=p2)
+    diffs = []
+    for f in files[:8]:
+        img = cv2.imread(f)
+        pose = und.undistort_pose(matcher.match(img), img.shape)
+        ref = matcher.match(und.remap(img))
+        if pose is not None and ref is not None:
+            diffs.append(math.dist(pose["c1"], ref["c1"]))
+            raw = math.dist(pose["c1"], pose.get("c1_raw", pose["c1"]))
+            print(f"{os.path.basename(f)}  c1 correction {raw:.2f} px  |points - remapped match| "
+                  f"{diffs[-1]:.2f} px")
+    if diffs:
+        print(f"undistorted c1 via points vs match on remapped frame: max {max(diffs):.2f} px")
+    matcher.release()
+
+
+if __name__ == "__main__":
+    main()
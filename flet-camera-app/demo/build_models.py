@@ -0,0 +1,106 @@
+"""
+Build ไฟล์ model (vision.model_file) จากภาพ template ล่วงหน้า แล้ววัดเวลา build เทียบกับโหลดแบบ memory-map
+
+    python demo/build_models.py                       # temp1 (±5°) และ temp3 (±1°) ของ matcher ในแอป (method=ncc)
+    python demo/build_models.py image_comppressor_picture/temp3.png --angle 180
+    python demo/build_models.py --method shape        # model ของ ShapeMatcher (opt-in)
+    python demo/build_models.py --check               # แค่ตรวจว่าไฟล์ที่มีอยู่ยังตรงกับ template
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from vision import model_file  # noqa: E402
+from vision import shape_match as sm  # noqa: E402
+from vision.matcher_registry import template_hash  # noqa: E402
+from vision.pose import DEFAULT_TEMPLATE1, DEFAULT_TEMPLATE2  # noqa: E402
+
+# มุมเดียวกับ params1/params2 ของ TwoTemplateMatcher/TwoStageMatcher (score/maxCount ไม่มีผลกับ model)
+# -> ไฟล์ชื่อเดียวกับที่ MatcherRegistry(model_dir=...) ของแอปหา เมื่อ --method ตรงกับ MatchingParams().method
+DEFAULT_ANGLES = {DEFAULT_TEMPLATE1: 5.0, DEFAULT_TEMPLATE2: 1.0}
+
+
+def _same(built, loaded) -> bool:
+    """bank ที่โหลดจากไฟล์ตรงกับที่เพิ่ง build ทุกมุม"""
+    if hasattr(built, "levels"):  # ShapeMatcher
+        return all(np.array_equal(a.rx, b.rx) and np.array_equal(a.cos, b.cos)
+                   for a, b in zip(built.bank.tables, loaded.bank.tables))
+    for a, b in zip(built.bank, loaded.bank):
+        if a.lazy:
+            continue
+        for ea, eb in zip(a.entries(), b.entries()):
+            for name in ("template", "mask", "zero_mean", "spans"):
+                x, y = getattr(ea, name), getattr(eb, name)
+                if (x is None) != (y is None) or (x is not None and not np.array_equal(x, y)):
+                    return False
+    return True
+
+
+def _rotated_count(matcher) -> int:
+    if hasattr(matcher, "levels"):
+        return sum(t.angles.size for t in matcher.bank.tables)
+    return sum(level.angles.size for level in matcher.bank)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build memory-mappable matcher model files")
+    ap.add_argument("templates", nargs="*", help="ภาพ template (ไม่ระบุ = temp1/temp3)")
+    ap.add_argument("-o", "--model-dir", default=model_file.MODEL_DIR)
+    ap.add_argument("--method", default=sm.MatchingParams().method, choices=(sm.METHOD_NCC, sm.METHOD_SHAPE),
+                    help="matcher ที่ build (ค่าเริ่มต้น = ของแอป)")
+    ap.add_argument("--angle", type=float, default=None, help="± องศา (ไม่ระบุ = ค่าเริ่มต้นของแต่ละ template)")
+    ap.add_argument("--angle-step", type=float, default=0.0)
+    ap.add_argument("--levels", type=int, default=0)
+    ap.add_argument("--features", type=int, default=128)
+    ap.add_argument("--contrast", type=float, default=30.0)
+    ap.add_argument("--check", action="store_true", help="ไม่ build: ตรวจ version/hash ของไฟล์ที่มีอยู่")
+    args = ap.parse_args(argv)
+
+    templates = args.templates or [DEFAULT_TEMPLATE1, DEFAULT_TEMPLATE2]
+    failed = 0
+    for path in templates:
+        img = cv2.imread(path)
+        if img is None:
+            print(f"{path}: cannot read image")
+            failed += 1
+            continue
+        angle = args.angle if args.angle is not None else DEFAULT_ANGLES.get(path, 0.0)
+        params = sm.MatchingParams(angle=angle, angleStep=args.angle_step, numLevels=args.levels,
+                                   numFeatures=args.features, minContrast=args.contrast, method=args.method)
+        source_hash = template_hash(img)
+        out = model_file.model_path(args.model_dir, source_hash, params)
+        name = os.path.basename(path)
+        if args.check:
+            try:
+                model_file.load_model(out, params, source_hash)
+                print(f"{name}: ok  {out}")
+            except (OSError, model_file.ModelFileError) as e:
+                print(f"{name}: STALE/MISSING  {e}")
+                failed += 1
+            continue
+
+        t0 = time.perf_counter()
+        built = sm.create_matcher_for_template(img, None, params)
+        build_ms = (time.perf_counter() - t0) * 1000.0
+        model_file.save_model(built, out, source_hash)
+
+        t0 = time.perf_counter()
+        loaded = model_file.load_model(out, params, source_hash)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+        same = _same(built, loaded)
+        angles = _rotated_count(loaded)
+        print(f"{name}: {args.method} ±{angle:g}°  levels={loaded.num_levels}  rotated variants={angles}  "
+              f"{os.path.getsize(out) / 1024:.0f} KB  build {build_ms:.1f} ms -> load {load_ms:.2f} ms"
+              f"  {'identical' if same else 'MISMATCH'}  {out}")
+        failed += not same
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Fit pixel -> robot (vision.robot_calib) จากคู่จุดใน CSV แล้วเขียนกลับ [ROBOT] pick_transform ของ pages/config.ini
+CSV: px,py,rx,ry (มี header หรือไม่ก็ได้) — จุดที่เห็นในภาพ กับพิกัดที่ jog หุ่นไปแตะ
+
+    python demo/calibrate_robot.py points.csv                        # fit + แสดง residual
+    python demo/calibrate_robot.py points.csv --model homography --write
+    python demo/calibrate_robot.py --synthetic                       # ทดสอบ RANSAC + เวลาแปลงทั้งชั้น
+"""
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from components.pose_pipeline import load_robot_config, pixel_to_pick  # noqa: E402
+from vision.robot_calib import (MODEL_AFFINE, MODEL_HOMOGRAPHY, RANSAC_THRESHOLD, PixelToRobot,  # noqa: E402
+                                write_transform)
+
+
+def read_pairs(path):
+    px, robot = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            try:
+                values = [float(v) for v in row[:4]]
+            except ValueError:
+                continue  # header
+            if len(values) == 4:
+                px.append(values[:2])
+                robot.append(values[2:])
+    return np.array(px), np.array(robot)
+
+
+def report(transform, px, robot):
+    err = np.hypot(*(transform.apply(px) - robot).T)
+    inl = transform.inliers if transform.inliers is not None else np.ones(len(px), bool)
+    print(f"{transform.model}: {inl.sum()}/{len(px)} inliers  rms {transform.rms:.3f} mm  "
+          f"max inlier {err[inl].max():.3f} mm")
+    for i in np.flatnonzero(~inl):
+        print(f"  outlier #{i}: px ({px[i, 0]:.1f}, {px[i, 1]:.1f}) -> robot ({robot[i, 0]:.2f}, {robot[i, 1]:.2f})"
+              f"  residual {err[i]:.1f} mm")
+    print("matrix:\n" + np.array2string(transform.matrix, precision=6, suppress_small=True))
+
+
+def synthetic(args, robot_cfg):
+    """ชั้นพาเลท 5x8 จุด: robot = (หมุน 0.7°, scale จาก calpick, offset) + noise 0.1 mm + outlier 3 จุด"""
+    rng = np.random.default_rng(0)
+    gx, gy = np.meshgrid(np.linspace(300, 1620, 8), np.linspace(150, 930, 5))
+    px = np.stack([gx.ravel(), gy.ravel()], axis=1)
+    th = math.radians(0.7)
+    s = robot_cfg["calpick"]
+    truth = PixelToRobot([[s * math.cos(th), -s * math.sin(th), robot_cfg["offsetpickx"]],
+                          [s * math.sin(th), s * math.cos(th), robot_cfg["offsetpicky"]], [0, 0, 1]])
+    robot = truth.apply(px) + rng.normal(0.0, 0.1, px.shape)
+    bad = rng.choice(len(px), 3, replace=False)
+    robot[bad] += rng.uniform(20.0, 60.0, (3, 2))
+
+    for model in (MODEL_AFFINE, MODEL_HOMOGRAPHY):
+        fit = PixelToRobot.fit(px, robot, model, args.threshold)
+        report(fit, px, robot)
+        err = np.hypot(*(fit.apply(px) - truth.apply(px)).T)
+        print(f"  vs ground truth: max {err.max():.3f} mm  outliers found {np.flatnonzero(~fit.inliers).tolist()} "
+              f"(planted {sorted(bad.tolist())})\n")
+    plain = PixelToRobot.fit(px, robot, MODEL_AFFINE, threshold=0)
+    print(f"least squares without RANSAC: vs ground truth max "
+          f"{np.hypot(*(plain.apply(px) - truth.apply(px)).T).max():.2f} mm\n")
+
+    fit = PixelToRobot.fit(px, robot, MODEL_AFFINE, args.threshold, angle_offset=robot_cfg["angle"])
+    poses = [{"c1": tuple(p), "angle": float(a)} for p, a in zip(px, rng.uniform(-5, 5, len(px)))]
+    legacy = dict(robot_cfg, pick_transform=None)
+
+    def per_pose():
+        return [pixel_to_pick(p, legacy) for p in poses]
+
+    def batch():
+        return fit.apply_poses(poses)
+
+    pts = px.copy()
+    for name, fn in (("pixel_to_pick per pose (scale+offset)", per_pose),
+                     ("PixelToRobot.apply_poses (layer)", batch),
+                     ("PixelToRobot.apply (points only)", lambda: fit.apply(pts))):
+        fn()
+        n = 2000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        print(f"{name:40s} {len(poses)} poses: {(time.perf_counter() - t0) * 1e6 / n:7.1f} us")
+    big = np.tile(px, (1000, 1))
+    t0 = time.perf_counter()
+    fit.apply(big)
+    print(f"{'PixelToRobot.apply':40s} {len(big)} points: {(time.perf_counter() - t0) * 1e6:7.1f} us")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fit pixel -> robot transform from point pairs")
+    ap.add_argument("pairs", nargs="?", help="CSV px,py,rx,ry")
+    ap.add_argument("--model", choices=(MODEL_AFFINE, MODEL_HOMOGRAPHY), default=MODEL_AFFINE)
+    ap.add_argument("--threshold", type=float, default=RANSAC_THRESHOLD, help="RANSAC residual (mm), 0 = ปิด")
+    ap.add_argument("--kind", default="pick", help="prefix ของ key ใน [ROBOT] (pick / place)")
+    ap.add_argument("--write", action="store_true", help="เขียนผลลง [ROBOT] ของ config.ini")
+    ap.add_argument("--config", default=None)
+    ap.add_argument("--synthetic", action="store_true")
+    args = ap.parse_args(argv)
+
+    robot_cfg = load_robot_config(args.config)
+    if args.synthetic:
+        synthetic(args, robot_cfg)
+        return
+    if not args.pairs:
+        ap.error("pairs CSV is required (or --synthetic)")
+    px, robot = read_pairs(args.pairs)
+    fit = PixelToRobot.fit(px, robot, args.model, args.threshold)
+    report(fit, px, robot)
+    old = PixelToRobot.from_scale(robot_cfg["calpick"], robot_cfg["offsetpickx"], robot_cfg["offsetpicky"])
+    old_err = np.hypot(*(old.apply(px) - robot).T)[fit.inliers]
+    print(f"current calpick/offset on the same inliers: rms {np.sqrt(np.mean(old_err ** 2)):.3f} mm")
+    if args.write:
+        print(f"written [ROBOT] {args.kind}_transform -> {write_transform(fit, args.kind, args.config)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Robot simulator / load test สำหรับ TCP server ของ vision station
+
+จำลองหุ่น N ตัวต่อเข้ามาพร้อมกัน แต่ละตัวส่งลำดับคำสั่ง (ค่าเริ่มต้น Capture:1 -> finnish)
+ด้วยอัตราที่กำหนด รอคำตอบทุกข้อความแล้ววัด round-trip latency
+
+ตัวอย่าง:
+    python demo/robot_sim.py --port 5001 --clients 4 --rate 20 --duration 10
+    python demo/robot_sim.py --spawn-server --clients 8 --rate 0 --count 500 --json out.json
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from components import framing, tcpserver  # noqa: E402
+
+
+def read_reply(sock, reader, reply_mode):
+    """อ่านคำตอบหนึ่งอัน; คืน bytes หรือ None เมื่อ server ปิด"""
+    if reply_mode == framing.REPLY_BINARY:
+        buf = b""
+        while len(buf) < framing.RESULT_SIZE:
+            chunk = sock.recv(framing.RESULT_SIZE - len(buf))
+            if not chunk:
+                return None
+            buf += chunk
+        framing.unpack_result(buf)
+        return buf
+    return reader.read_frame()
+
+
+def run_client(idx, args, stop_at, results):
+    lat = []
+    errors = 0
+    sent = 0
+    sequence = [s for s in args.sequence.split(",") if s]
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    try:
+        sock = socket.create_connection((args.host, args.port), timeout=args.timeout)
+    except OSError as e:
+        results.put({"client": idx, "latency_ms": [], "errors": 1, "sent": 0, "connect_error": str(e)})
+        return
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    reader = framing.FrameReader(sock, args.framing)
+    next_t = time.perf_counter()
+    i = 0
+    with sock:
+        while True:
+            if args.count and sent >= args.count:
+                break
+            if not args.count and time.perf_counter() >= stop_at:
+                break
+            msg = sequence[i % len(sequence)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                sock.sendall(framing.encode_frame(msg, args.framing))
+                sent += 1
+                reply = read_reply(sock, reader, args.reply)
+                if reply is None:
+                    errors += 1
+                    break
+                lat.append((time.perf_counter() - t0) * 1000.0)
+            except (OSError, framing.FramingError, ValueError):
+                errors += 1
+                break
+            if interval:
+                next_t += interval
+                delay = next_t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+    results.put({"client": idx, "latency_ms": lat, "errors": errors, "sent": sent})
+
+
+def _drain(q):
+    # server ที่เปิดเองไม่มี consumer จาก home -> ทิ้งข้อความไม่ให้คิวโต
+    while True:
+        q.get()
+
+
+def summarize(per_client, wall_s):
+    lat = np.concatenate([np.asarray(c["latency_ms"], dtype=float) for c in per_client]) if per_client else np.empty(0)
+    sent = sum(c["sent"] for c in per_client)
+    errors = sum(c["errors"] for c in per_client)
+    out = {
+        "clients": len(per_client),
+        "sent": sent,
+        "replies": int(lat.size),
+        "errors": errors,
+        "wall_s": wall_s,
+        "msgs_per_s": (lat.size / wall_s) if wall_s > 0 else 0.0,
+    }
+    if lat.size:
+        p50, p95, p99 = np.percentile(lat, (50, 95, 99))
+        out.update({"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+                    "max_ms": float(lat.max()), "mean_ms": float(lat.mean())})
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Robot simulator / load test for the vision TCP server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5001)
+    ap.add_argument("--clients", type=int, default=1, help="จำนวนหุ่นที่ต่อพร้อมกัน")
+    ap.add_argument("--rate", type=float, default=10.0, help="ข้อความ/วินาที ต่อ client (0 = เร็วที่สุด)")
+    ap.add_argument("--duration", type=float, default=5.0, help="วินาที (ใช้เมื่อไม่ได้ระบุ --count)")
+    ap.add_argument("--count", type=int, default=0, help="จำนวนข้อความต่อ client")
+    ap.add_argument("--sequence", default="Capture:1,finnish", help="คำสั่งคั่นด้วย comma วนซ้ำ")
+    tcp_cfg = tcpserver.load_tcp_config()  # ค่าเริ่มต้นตาม [TCP] ของแอป
+    ap.add_argument("--framing", default=tcp_cfg["framing_mode"], choices=framing.MODES)
+    ap.add_argument("--reply", default=tcp_cfg["reply_mode"], choices=framing.REPLY_MODES)
+    ap.add_argument("--timeout", type=float, default=5.0)
+    ap.add_argument("--spawn-server", action="store_true",
+                    help="เปิด start_tcp_server ในโปรเซสนี้ (ไม่มีงาน vision) เพื่อวัด overhead ของ server")
+    ap.add_argument("--json", help="บันทึกผลสรุปเป็นไฟล์ JSON")
+    args = ap.parse_args(argv)
+
+    server = None
+    if args.spawn_server:
+        sink = queue.Queue()
+        server = tcpserver.start_tcp_server(args.host, args.port, sink,
+                                            framing_mode=args.framing, reply_mode=args.reply)
+        threading.Thread(target=_drain, args=(sink,), daemon=True).start()
+        time.sleep(0.3)
+
+    results = queue.Queue()
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    threads = [threading.Thread(target=run_client, args=(i, args, stop_at, results), daemon=True)
+               for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    per_client = [results.get() for _ in threads]
+
+    if server is not None:
+        server.stop()
+
+    summary = summarize(per_client, wall)
+    print(f"[SIM] clients={summary['clients']} sent={summary['sent']} replies={summary['replies']} "
+          f"errors={summary['errors']} rate={summary['msgs_per_s']:.1f} msg/s")
+    if "p50_ms" in summary:
+        print(f"[SIM] RTT p50={summary['p50_ms']:.2f} ms  p95={summary['p95_ms']:.2f} ms  "
+              f"p99={summary['p99_ms']:.2f} ms  max={summary['max_ms']:.2f} ms")
+    for c in per_client:
+        if c.get("connect_error"):
+            print(f"[SIM] client {c['client']} connect error: {c['connect_error']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if summary["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Scraper ของ /metrics และ /stats.json (components.metrics) — ใช้ตรวจสถานีจริงหรือทดสอบในเครื่อง
+
+    python demo/scrape_metrics.py http://10.0.0.21:9108            # แสดงค่าหลักของสถานี
+    python demo/scrape_metrics.py http://10.0.0.21:9108 --raw      # text exposition ทั้งหมด
+    python demo/scrape_metrics.py --selftest                       # เปิด endpoint + TCP server + matcher ในเครื่อง
+
+--selftest: ส่ง Capture:1 ผ่าน TCP ตามจำนวน --count พร้อม scrape ทุก --interval วินาที
+แล้วเทียบตัวเลขที่ scrape ได้กับที่ส่งจริง และเทียบเวลา match ตอนมี/ไม่มีคน scrape
+"""
+import argparse
+import glob
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from components import framing, message_queue, metrics, pose_pipeline, tcpserver, timing  # noqa: E402
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+KEY_METRICS = (
+    "vision_frames_acquired_total", "vision_frames_dropped_total", "vision_frames_matched_total",
+    "vision_frames_failed_total", "vision_tcp_messages_total", "vision_encode_fps",
+    "vision_queue_message_depth", "vision_pallet_pick_counter",
+    "vision_process_cpu_seconds_total", "vision_process_resident_memory_bytes",
+)
+
+
+def fetch(url, timeout=2.0):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return r.headers.get("Content-Type", ""), r.read().decode("utf-8")
+
+
+def parse_prometheus(text):
+    """text exposition -> {name: {labels_tuple: value}} และ {name: type}; บรรทัดผิดรูปแบบ -> ValueError"""
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ", 3)
+            types[name] = kind
+            continue
+        if line.startswith("#"):
+            continue
+        head, value = line.rsplit(" ", 1)
+        labels = ()
+        if "{" in head:
+            name, rest = head.split("{", 1)
+            if not rest.endswith("}"):
+                raise ValueError(f"bad labels: {line!r}")
+            labels = tuple(tuple(kv.split("=", 1)) for kv in rest[:-1].split(","))
+            labels = tuple((k, v.strip('"')) for k, v in labels)
+        else:
+            name = head
+        samples.setdefault(name, {})[labels] = float(value)
+    return samples, types
+
+
+def show(url):
+    _, text = fetch(url.rstrip("/") + "/metrics")
+    samples, _ = parse_prometheus(text)
+    for name in KEY_METRICS:
+        if name in samples:
+            print(f"{name:42s} {samples[name][()]:g}")
+    quantiles = samples.get("vision_stage_seconds", {})
+    stages = sorted({dict(k)["stage"] for k in quantiles})
+    if stages:
+        print(f"\n{'stage':14s} {'count':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for stage in stages:
+        q = {dict(k)["quantile"]: v for k, v in quantiles.items() if dict(k)["stage"] == stage}
+        count = samples["vision_stage_seconds_count"][(("stage", stage),)]
+        print(f"{stage:14s} {count:8.0f} " + " ".join(f"{q.get(x, float('nan')) * 1000:8.2f}"
+                                                     for x in ("0.5", "0.95", "0.99")))
+
+
+def selftest(args):
+    files = sorted(glob.glob(os.path.join(args.images, "Image_*.png")))
+    if not files:
+        raise SystemExit(f"No Image_*.png in {args.images}")
+    frames = [cv2.imread(f) for f in files]
+    from vision import shape_match as sm
+    from vision.pose import TwoTemplateMatcher
+    p1 = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+    p2 = sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+    matcher = TwoTemplateMatcher.from_files(mt=sm, params1=p1, params2=p2)
+    matcher.match(frames[0])
+
+    acquired, encode_fps = metrics.counter("frames_acquired_total"), metrics.meter("encode_fps")
+    current = {"i": 0}
+
+    def frame_source():
+        # จำลองกล้อง: ทุก Capture ได้เฟรมถัดไป (นับ acquired / encode fps เหมือน camera_worker ของ Home)
+        current["i"] += 1
+        acquired.inc()
+        encode_fps.mark()
+        return frames[current["i"] % len(frames)]
+
+    q = message_queue.BoundedMessageQueue(maxsize=64)
+    pipeline = pose_pipeline.PosePipeline(frame_source, matcher, robot_cfg=pose_pipeline.load_robot_config(),
+                                          deadline_ms=2000)
+    metrics.register_collector("queue", lambda: {"message": q.stats()})
+    metrics.register_collector("pallet", lambda: {"pick_counter": current["i"], "pose": pipeline.stats()})
+    mserver = metrics.start_metrics_server("127.0.0.1", 0)
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    tcp_port = sock.getsockname()[1]
+    sock.close()
+    tserver = tcpserver.start_tcp_server("127.0.0.1", tcp_port, q, request_handler=pipeline.handle,
+                                         framing_mode=framing.MODE_LINE)
+    threading.Thread(target=lambda: [q.get() for _ in iter(int, 1)], daemon=True).start()  # consumer ของคิว
+    time.sleep(0.3)
+
+    def run_captures(n):
+        match_ms = []
+        with socket.create_connection(("127.0.0.1", tcp_port)) as c:
+            reader = framing.FrameReader(c, framing.MODE_LINE)
+            for _ in range(n):
+                c.sendall(framing.encode_frame("Capture:1", framing.MODE_LINE))
+                reader.read_frame()
+                match_ms.append(matcher.last_timing["wall_ms"])
+        return match_ms
+
+    scrape_ms, stop = [], threading.Event()
+
+    def scraper():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            fetch(mserver.url + "/metrics")
+            fetch(mserver.url + "/stats.json")
+            scrape_ms.append((time.perf_counter() - t0) * 1000.0)
+            stop.wait(args.interval)
+
+    try:
+        quiet = run_captures(args.count)
+        t = threading.Thread(target=scraper, daemon=True)
+        t.start()
+        busy = run_captures(args.count)
+        stop.set()
+        t.join()
+
+        ctype, text = fetch(mserver.url + "/metrics")
+        samples, types = parse_prometheus(text)
+        _, body = fetch(mserver.url + "/stats.json")
+        js = json.loads(body)
+        sent = 2 * args.count
+        value = {name: samples[name][()] for name in KEY_METRICS if name in samples}
+        checks = [
+            ("content type", ctype.startswith("text/plain; version=0.0.4")),
+            ("tcp messages == sent", value.get("vision_tcp_messages_total") == sent),
+            ("matched + failed == sent",
+             value.get("vision_frames_matched_total", 0) + value.get("vision_frames_failed_total", 0) == sent),
+            ("acquired == sent", value.get("vision_frames_acquired_total") == sent),
+            ("stage summary has match/tcp_request",
+             {"match", "tcp_request"} <= {dict(k)["stage"] for k in samples.get("vision_stage_seconds", {})}),
+            ("counter types", types.get("vision_tcp_messages_total") == "counter"),
+            ("stats.json matches /metrics", js["counters"]["tcp_messages_total"] == sent),
+            ("process cpu/rss present", "vision_process_cpu_seconds_total" in value
+             and "vision_process_resident_memory_bytes" in value),
+            ("404 for unknown path", _status(mserver.url + "/nope") == 404),
+        ]
+        for name, ok in checks:
+            print(f"[{'ok' if ok else 'FAIL'}] {name}")
+        print(f"\nscrapes {len(scrape_ms)} (/metrics + /stats.json) every {args.interval:g} s: "
+              f"median {np.median(scrape_ms):.1f} ms  max {max(scrape_ms):.1f} ms  ({len(text)} bytes)")
+        print(f"match wall ms without scraper: median {np.median(quiet):.1f}  p95 {np.percentile(quiet, 95):.1f}")
+        print(f"match wall ms while scraping : median {np.median(busy):.1f}  p95 {np.percentile(busy, 95):.1f}")
+        print()
+        show(mserver.url)
+        if not all(ok for _, ok in checks):
+            raise SystemExit(1)
+    finally:
+        tserver.stop()
+        mserver.stop()
+        pipeline.close()
+        matcher.release()
+        timing.reset()
+
+
+def _status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=2.0) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scrape /metrics and /stats.json of a vision station")
+    ap.add_argument("url", nargs="?", help="เช่น http://127.0.0.1:9108")
+    ap.add_argument("--raw", action="store_true", help="แสดง text exposition ทั้งหมด")
+    ap.add_argument("--json", action="store_true", help="แสดง /stats.json")
+    ap.add_argument("--selftest", action="store_true")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--count", type=int, default=40, help="Capture ต่อรอบ (selftest)")
+    ap.add_argument("--interval", type=float, default=1.0, help="ช่วง scrape (s) ระหว่าง selftest")
+    args = ap.parse_args(argv)
+    if args.selftest:
+        selftest(args)
+    elif not args.url:
+        ap.error("url is required (or --selftest)")
+    elif args.raw:
+        print(fetch(args.url.rstrip("/") + "/metrics")[1], end="")
+    elif args.json:
+        print(json.dumps(json.loads(fetch(args.url.rstrip("/") + "/stats.json")[1]), indent=2))
+    else:
+        show(args.url)
+
+
+if __name__ == "__main__":
+    main()
@@ -82,14 +82,16 @@ win = 'match_view'
 cv2.namedWindow(win, cv2.WINDOW_NORMAL)
 idx = start_idx
 
-def _first_center(centers):
+def _first_center(centers, as_int=True):
+    # as_int=False: เก็บทศนิยม (sub-pixel) ไว้คำนวณมุม; int ใช้แค่ตอนวาด
+    cast = int if as_int else float
     if not centers:
         return None
     if isinstance(centers, (tuple, list)) and len(centers) == 2 and all(isinstance(v, (int, float)) for v in centers):
-        return (int(centers[0]), int(centers[1]))
+        return (cast(centers[0]), cast(centers[1]))
     try:
         c = centers[0]
-        return (int(c[0]), int(c[1]))
+        return (cast(c[0]), cast(c[1]))
     except Exception:
         return None
 
@@ -174,7 +176,9 @@ while True:
         cv2.line(vis, c1, c3, (0, 255, 255), thickness=1, lineType=cv2.LINE_AA)
         cv2.line(vis, c3, c2, (0, 255, 255), thickness=1, lineType=cv2.LINE_AA)
 
-        ang_signed = angle_between(c1, c2, c3)
+        f1 = _first_center(centers1, as_int=False)
+        f2 = _first_center(centers2, as_int=False)
+        ang_signed = angle_between(f1, f2, (f1[0], f2[1]))
         if ang_signed is None:
             ang_text = "angle: n/a"
         else:
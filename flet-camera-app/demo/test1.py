@@ -1,9 +1,13 @@
 import matching as mt
 import cv2
 import os
+import sys
 import math
 import numpy as np
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from vision.matcher_registry import MatcherRegistry
+
 # Example paths (update to your images)
 template1 = '/home/iiot-b20/Documents/Robotvision/flet-camera-app/image_comppressor_picture/temp.jpg'
 template2 = '/home/iiot-b20/Documents/Robotvision/flet-camera-app/image_comppressor_picture/temp3.png'
@@ -49,16 +53,21 @@ if source_img is None:
 
 dll_path = mt.find_library_path()
 
-def _first_center(centers):
+# matcher ถูกสร้างครั้งเดียวต่อ (template, params) แล้วใช้ซ้ำทุกภาพ
+_registry = MatcherRegistry(mt, dll_path=dll_path)
+
+def _first_center(centers, as_int=True):
     # centers can be a tuple (x,y) or a list of tuples; return (int(x), int(y)) or None
+    # as_int=False keeps the sub-pixel floats (use those for the angle, ints only for drawing)
+    cast = int if as_int else float
     if not centers:
         return None
     if isinstance(centers, (tuple, list)) and len(centers) == 2 and all(isinstance(v, (int, float)) for v in centers):
-        return (int(centers[0]), int(centers[1]))
+        return (cast(centers[0]), cast(centers[1]))
     # assume list-like of points
     try:
         c = centers[0]
-        return (int(c[0]), int(c[1]))
+        return (cast(c[0]), cast(c[1]))
     except Exception:
         return None
 
@@ -81,18 +90,19 @@ def match_and_annotate(template1_img,
                        dll_path=None,
                        params1=None,
                        params2=None,
-                       draw_angle=True):
+                       draw_angle=True,
+                       registry=None):
 
-    if dll_path is None:
-        dll_path = mt.find_library_path()
+    if registry is None:
+        registry = _registry
 
     if params1 is None:
         params1 = mt.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
     if params2 is None:
         params2 = mt.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
 
-    matcher1 = mt.create_matcher_for_template(template1_img, dll_path, params1)
-    matcher2 = mt.create_matcher_for_template(template2_img, dll_path, params2)
+    matcher1 = registry.get(template1_img, params1)
+    matcher2 = registry.get(template2_img, params2)
 
     count1, results1, center1 = mt.run_match(matcher1, source_img)
     count2, results2, center2 = mt.run_match(matcher2, source_img)
@@ -113,7 +123,9 @@ def match_and_annotate(template1_img,
         cv2.circle(image, c2, 3, (255, 0, 0), -1, lineType=cv2.LINE_AA)
 
         if draw_angle and c3:
-            ang_signed = _angle_between(c1, c2, c3)
+            f1 = _first_center(center1, as_int=False)
+            f2 = _first_center(center2, as_int=False)
+            ang_signed = _angle_between(f1, f2, (f1[0], f2[1]))
             if ang_signed is None:
                 ang_text = "angle: n/a"
             else:
@@ -188,3 +200,5 @@ if __name__ == "__main__":
             idx = (idx + 1) % len(image_files)
 
     cv2.destroyAllWindows()
+    print(f"Matcher registry: {_registry.stats()}")
+    _registry.clear()
@@ -0,0 +1,217 @@
+"""
+Sweep scoreThreshold / iouThreshold / angle ของ matcher built-in กับภาพที่มี label แล้วเลือกค่าที่เร็วที่สุด
+ที่ยังได้ detection rate ตามเป้า — ทำขนานด้วย process pool (หนึ่งงานต่อภาพ)
+--method ค่าเริ่มต้น = ของแอป (MatchingParams().method = ncc, NccMatcher); --method shape = ShapeMatcher (opt-in)
+score ของสอง method คนละสเกล: ค่าที่ได้ใช้ได้กับ method ที่ sweep เท่านั้น
+
+ต่อภาพ: อ่าน + pyramid ครั้งเดียว, score map ชั้นบนสุด (top_scores) ครั้งเดียวต่อค่า angle
+(angle เปลี่ยน model จึงต้องมี matcher ต่อค่า) แล้วแต่ละคู่ score/iou รันแค่ candidate -> refine -> NMS
+เวลาของแต่ละชุด = pyramid + score map + ส่วนที่เหลือ (เฉลี่ยทุกภาพ)
+
+labels: CSV file,x1,y1,x2,y2 = ศูนย์กลาง template1/template2 (ว่าง = ภาพไม่มีชิ้นงาน)
+
+    python demo/tune_params.py --make-labels labels.csv      # สร้าง label จาก TwoTemplateMatcher แล้วตรวจด้วยตาอีกที
+    python demo/tune_params.py labels.csv --template 1 --angles 2,5,10 --scores 0.4,0.5,0.6,0.7
+    python demo/tune_params.py labels.csv --template 2 --angles 1,2,5 --scores 0.3,0.4,0.5 --target 0.98
+    python demo/tune_params.py labels.csv --template 2 --method shape --angles 5,30,180 --scores 0.25,0.4
+"""
+import argparse
+import csv
+import dataclasses
+import glob
+import itertools
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+PICTURE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "image_comppressor_picture"))
+LABEL_FIELDS = ("file", "x1", "y1", "x2", "y2")
+# มุมที่ sweep เมื่อไม่ระบุ --angles: (method, template) -> ± องศา (ncc: ±5° / ±1° คือค่าที่แอปใช้อยู่)
+DEFAULT_ANGLES = {("ncc", 1): [2.0, 5.0, 10.0], ("ncc", 2): [1.0, 2.0, 5.0],
+                  ("shape", 1): [2.0, 5.0, 10.0], ("shape", 2): [5.0, 30.0, 180.0]}
+
+_worker = {}  # ต่อ worker process: opts, template, matcher ต่อค่า angle
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def _init_worker(opts):
+    import cv2
+    cv2.setNumThreads(1)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    from vision import shape_match as sm
+    _worker["opts"] = opts
+    _worker["template"] = cv2.imread(opts["template_path"])
+    _worker["matchers"] = {angle: sm.create_matcher_for_template(
+                               _worker["template"], None,
+                               sm.MatchingParams(maxCount=opts["max_count"], angle=angle, method=opts["method"]))
+                           for angle in opts["angles"]}
+
+
+def _evaluate(item):
+    """คืน (file, rows) — rows: (angle, score, iou, hit, false_pos, ms) หนึ่งแถวต่อชุด"""
+    import cv2
+    from vision import shape_match as sm
+    path, expected = item
+    opts = _worker["opts"]
+    matchers = _worker["matchers"]
+    img = cv2.imread(path)
+    if img is None:
+        return path, None
+    t0 = time.perf_counter()
+    pyramid = sm.frame_pyramid(img, max(m.num_levels for m in matchers.values()))
+    pyramid_ms = (time.perf_counter() - t0) * 1000.0
+
+    rows = []
+    for angle, matcher in matchers.items():
+        base = matcher.params
+        top_img = pyramid[matcher.num_levels - 1]
+        matcher.top_scores(top_img)  # เฟรมแรก (shape) สร้าง FFT ของ kernel ตามขนาดภาพ: ไม่นับเวลา
+        t0 = time.perf_counter()
+        top = matcher.top_scores(top_img)
+        top_ms = (time.perf_counter() - t0) * 1000.0
+        for score, iou in itertools.product(opts["scores"], opts["ious"]):
+            matcher.params = dataclasses.replace(base, scoreThreshold=score, iouThreshold=iou)
+            t0 = time.perf_counter()
+            results = matcher.match(img, pyramid=pyramid, top_scores=top)
+            ms = pyramid_ms + top_ms + (time.perf_counter() - t0) * 1000.0
+            hit = False
+            false_pos = 0
+            for r in results:
+                if expected is not None and not hit and \
+                        np.hypot(r.centerX - expected[0], r.centerY - expected[1]) <= opts["tolerance"]:
+                    hit = True
+                else:
+                    false_pos += 1
+            rows.append((angle, score, iou, hit, false_pos, ms))
+        matcher.params = base
+    return path, rows
+
+
+def read_labels(path, template_no):
+    """[(ไฟล์ภาพ, (x, y) หรือ None)] — path ในไฟล์ label นับจากโฟลเดอร์ของไฟล์ label"""
+    base = os.path.dirname(os.path.abspath(path))
+    xk, yk = f"x{template_no}", f"y{template_no}"
+    items = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            x, y = (row.get(xk) or "").strip(), (row.get(yk) or "").strip()
+            items.append((os.path.join(base, row["file"]), (float(x), float(y)) if x and y else None))
+    return items
+
+
+def make_labels(out, images):
+    """label เริ่มต้นจาก TwoTemplateMatcher ด้วย params ที่แอปใช้ (NCC แบบ native: score 0.6/0.4, ±5°/±1°)"""
+    import cv2
+    from vision import shape_match as sm
+    from vision.pose import TwoTemplateMatcher
+
+    matcher = TwoTemplateMatcher.from_files(mt=sm)
+    base = os.path.dirname(os.path.abspath(out))
+    found = 0
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(LABEL_FIELDS)
+        for path in images:
+            img = cv2.imread(path)
+            pose = matcher.match(img) if img is not None else None
+            rel = os.path.relpath(path, base)
+            if pose is None:
+                w.writerow((rel, "", "", "", ""))
+                continue
+            found += 1
+            w.writerow((rel, *(round(v, 2) for v in pose["c1"]), *(round(v, 2) for v in pose["c2"])))
+    matcher.release()
+    print(f"wrote {out}: {len(images)} images, {found} with a part (review before tuning)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parallel threshold/angle sweep for the built-in matchers")
+    ap.add_argument("labels", nargs="?", help="CSV file,x1,y1,x2,y2")
+    ap.add_argument("--make-labels", metavar="CSV", help="สร้าง label จากภาพใน --images แล้วจบ")
+    ap.add_argument("--images", default=PICTURE_DIR)
+    ap.add_argument("--template", default="1", help="1, 2 หรือ path ของภาพ template (ใช้ x1/y1)")
+    ap.add_argument("--method", default=None, choices=("ncc", "shape"),
+                    help="matcher ที่ sweep (ไม่ระบุ = ของแอป: MatchingParams().method)")
+    ap.add_argument("--angles", type=_floats, default=None, help="เช่น 2,5,10")
+    ap.add_argument("--scores", type=_floats, default=_floats("0.3,0.4,0.5,0.6,0.7"))
+    ap.add_argument("--ious", type=_floats, default=_floats("0.5,0.8"))
+    ap.add_argument("--max-count", type=int, default=1)
+    ap.add_argument("--tolerance", type=float, default=10.0, help="ระยะจาก label ที่นับว่าเจอ (px)")
+    ap.add_argument("--target", type=float, default=0.95, help="detection rate ขั้นต่ำ")
+    ap.add_argument("--max-fp", type=float, default=0.1, help="false positive เฉลี่ยต่อภาพสูงสุด")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--top", type=int, default=10, help="จำนวนแถวที่พิมพ์")
+    args = ap.parse_args(argv)
+
+    from vision import shape_match as sm
+    from vision.pose import DEFAULT_TEMPLATE1, DEFAULT_TEMPLATE2
+    if args.make_labels:
+        make_labels(args.make_labels, sorted(glob.glob(os.path.join(args.images, "Image_*.png"))))
+        return
+    if not args.labels:
+        ap.error("labels file required (or --make-labels)")
+    template_no = 2 if args.template == "2" else 1
+    template_path = {"1": DEFAULT_TEMPLATE1, "2": DEFAULT_TEMPLATE2}.get(args.template, args.template)
+    app_method = sm.MatchingParams().method
+    method = args.method or app_method
+    angles = args.angles or DEFAULT_ANGLES[(method, template_no)]
+    items = read_labels(args.labels, template_no)
+    positives = sum(e is not None for _, e in items)
+    if not positives:
+        raise SystemExit(f"{args.labels}: no labelled part for template {template_no}")
+
+    opts = {"template_path": template_path, "method": method, "angles": angles, "scores": args.scores, "ious": args.ious,
+            "max_count": args.max_count, "tolerance": args.tolerance}
+    combos = len(angles) * len(args.scores) * len(args.ious)
+    print(f"method={method}: {len(items)} images ({positives} positives) x {combos} settings, {args.workers} workers")
+    if method != app_method:
+        print(f"warning: sweeping method={method!r} but the app matches with method={app_method!r}; "
+              f"these thresholds only apply if the app's MatchingParams are switched to {method!r}")
+    stats = {}
+    t0 = time.perf_counter()
+    with mp.Pool(args.workers, initializer=_init_worker, initargs=(opts,)) as pool:
+        for path, rows in pool.imap_unordered(_evaluate, items):
+            if rows is None:
+                print(f"{path}: cannot read image")
+                continue
+            for angle, score, iou, hit, false_pos, ms in rows:
+                s = stats.setdefault((angle, score, iou), {"hit": 0, "fp": 0, "n": 0, "ms": []})
+                s["hit"] += hit
+                s["fp"] += false_pos
+                s["n"] += 1
+                s["ms"].append(ms)
+    wall = time.perf_counter() - t0
+
+    table = []
+    for (angle, score, iou), s in stats.items():
+        rate = s["hit"] / positives
+        fp = s["fp"] / max(1, s["n"])
+        table.append((float(np.mean(s["ms"])), float(np.percentile(s["ms"], 95)), rate, fp, angle, score, iou))
+    table.sort(key=lambda r: (-(r[2] >= args.target and r[3] <= args.max_fp), r[0]))
+    print(f"swept in {wall:.1f} s\n")
+    print(f"{'angle':>6} {'score':>6} {'iou':>5} {'rate':>6} {'fp/img':>7} {'mean ms':>8} {'p95 ms':>8}")
+    for mean_ms, p95, rate, fp, angle, score, iou in table[:args.top]:
+        ok = "*" if rate >= args.target and fp <= args.max_fp else " "
+        print(f"{angle:6g} {score:6g} {iou:5g} {rate:6.1%} {fp:7.2f} {mean_ms:8.1f} {p95:8.1f} {ok}")
+    best = table[0] if table and table[0][2] >= args.target and table[0][3] <= args.max_fp else None
+    if best is None:
+        raise SystemExit(f"\nno setting reaches {args.target:.0%} detection with <= {args.max_fp:g} fp/image")
+    mean_ms, _, rate, fp, angle, score, iou = best
+    print(f"\nfastest meeting target: MatchingParams(scoreThreshold={score:g}, iouThreshold={iou:g}, "
+          f"angle={angle:g}, method={method!r})  {rate:.1%} detected, {fp:.2f} fp/img, {mean_ms:.1f} ms")
+    if method != app_method:
+        print(f"warning: the app uses method={app_method!r}; the scores above are not comparable")
+
+
+if __name__ == "__main__":
+    main()
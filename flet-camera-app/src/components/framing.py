@@ -0,0 +1,232 @@
+import socket
+import struct
+
+# ---------------------------------------------------------------------------
+# Message framing สำหรับลิงก์ TCP กับหุ่นยนต์
+#
+# TCP เป็น stream ไม่ใช่ message: recv() หนึ่งครั้งอาจได้หลายคำสั่งติดกัน
+# ("Capture:1finnish") หรือได้คำสั่งครึ่งเดียว จึงต้องมี framing ชัดเจน
+#
+#   "line"   => ข้อความจบด้วย '\n' (รองรับ '\r\n')
+#   "length" => header 4 ไบต์ (uint32 big-endian) บอกความยาว payload
+#   "raw"    => พฤติกรรมเดิม: recv() หนึ่งครั้ง = หนึ่งข้อความ (สำหรับโปรแกรมหุ่นเก่า)
+# ---------------------------------------------------------------------------
+
+MODE_LINE = "line"
+MODE_LENGTH = "length"
+MODE_RAW = "raw"
+MODES = (MODE_LINE, MODE_LENGTH, MODE_RAW)
+
+LENGTH_HEADER = struct.Struct("!I")
+DEFAULT_MAX_FRAME = 64 * 1024
+
+
+class FramingError(ValueError):
+    """Raised when the peer sends a frame that can never be decoded."""
+
+
+def encode_frame(payload, mode: str = MODE_LINE) -> bytes:
+    """Wrap one message for sending with the given framing mode."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    if mode == MODE_LINE:
+        return payload if payload.endswith(b"\n") else payload + b"\n"
+    if mode == MODE_LENGTH:
+        return LENGTH_HEADER.pack(len(payload)) + payload
+    if mode == MODE_RAW:
+        return payload
+    raise ValueError(f"unknown framing mode: {mode!r}")
+
+
+class FrameDecoder:
+    """
+    Incremental decoder: feed() รับไบต์ที่ได้จาก recv() แล้วคืน list ของ frame ที่ครบ
+    ส่วนที่ยังไม่ครบจะเก็บไว้ใน buffer รอรอบถัดไป
+    """
+
+    def __init__(self, mode: str = MODE_LINE, max_frame: int = DEFAULT_MAX_FRAME):
+        if mode not in MODES:
+            raise ValueError(f"unknown framing mode: {mode!r}")
+        self.mode = mode
+        self.max_frame = int(max_frame)
+        self._buf = bytearray()
+
+    def pending(self) -> int:
+        return len(self._buf)
+
+    def reset(self):
+        self._buf.clear()
+
+    def feed(self, data: bytes) -> list:
+        if not data:
+            return []
+        if self.mode == MODE_RAW:
+            return [bytes(data)]
+        self._buf += data
+        if self.mode == MODE_LINE:
+            return self._split_lines()
+        return self._split_length()
+
+    def _split_lines(self) -> list:
+        frames = []
+        start = 0
+        buf = self._buf
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            line = bytes(buf[start:end]).rstrip(b"\r")
+            start = end + 1
+            if line:
+                frames.append(line)
+        if start:
+            del buf[:start]
+        if len(buf) > self.max_frame:
+            self._buf = bytearray()
+            raise FramingError(f"line exceeds {self.max_frame} bytes without delimiter")
+        return frames
+
+    def _split_length(self) -> list:
+        frames = []
+        pos = 0
+        buf = self._buf
+        hsize = LENGTH_HEADER.size
+        while len(buf) - pos >= hsize:
+            (size,) = LENGTH_HEADER.unpack_from(buf, pos)
+            if size > self.max_frame:
+                self._buf = bytearray()
+                raise FramingError(f"frame length {size} exceeds {self.max_frame}")
+            if len(buf) - pos - hsize < size:
+                break
+            frames.append(bytes(buf[pos + hsize:pos + hsize + size]))
+            pos += hsize + size
+        if pos:
+            del buf[:pos]
+        return frames
+
+
+class FrameReader:
+    """
+    Buffered reader บน socket: อ่านทีละก้อนใหญ่แล้วแตกเป็น frame
+    read() คืน list ของ frame (อาจว่างถ้า timeout), คืน None เมื่อ peer ปิดการเชื่อมต่อ
+    read_frame() รอ frame เดียว: timeout ของ socket -> socket.timeout (ไม่วนรอต่อ)
+    """
+
+    def __init__(self, conn, mode: str = MODE_LINE, bufsize: int = 4096, max_frame: int = DEFAULT_MAX_FRAME):
+        self.conn = conn
+        self.bufsize = int(bufsize)
+        self.decoder = FrameDecoder(mode, max_frame=max_frame)
+        self._ready = []
+
+    @property
+    def mode(self) -> str:
+        return self.decoder.mode
+
+    def _recv_frames(self):
+        data = self.conn.recv(self.bufsize)
+        if not data:
+            return None
+        return self.decoder.feed(data)
+
+    def read(self):
+        try:
+            return self._recv_frames()
+        except socket.timeout:
+            return []
+
+    def read_frame(self):
+        """
+        Block จนได้ frame หนึ่งอัน; None เมื่อปิดการเชื่อมต่อ
+        ไม่มีข้อมูลเข้ามาภายใน timeout ของ socket -> socket.timeout (ส่วนที่อ่านค้างไว้ยังอยู่ใน buffer)
+        """
+        while not self._ready:
+            frames = self._recv_frames()
+            if frames is None:
+                return None
+            self._ready.extend(frames)
+        return self._ready.pop(0)
+
+    def send(self, payload):
+        self.conn.sendall(encode_frame(payload, self.mode))
+
+
+# ---------------------------------------------------------------------------
+# Result reply: text หรือ binary record ขนาดคงที่
+#
+# binary layout (little-endian, 24 ไบต์):
+#   magic  uint16  'RV' (0x5652)
+#   ver    uint8
+#   x, y, angle, score  float32 x4
+#   frame  uint32
+#   status uint8
+# ---------------------------------------------------------------------------
+
+REPLY_TEXT = "text"
+REPLY_BINARY = "binary"
+REPLY_MODES = (REPLY_TEXT, REPLY_BINARY)
+
+RESULT_MAGIC = 0x5652
+RESULT_VERSION = 1
+RESULT_STRUCT = struct.Struct("<HBffffIB")
+RESULT_SIZE = RESULT_STRUCT.size
+
+STATUS_OK = 0
+STATUS_NO_PART = 1
+STATUS_TIMEOUT = 2
+STATUS_ERROR = 3
+STATUS_ACK = 4
+STATUS_BUSY = 5
+STATUS_REJECT = 6  # เจอชิ้นงานแต่ไม่ผ่านการตรวจ (เช่น ไม่มี O-ring) -> x, y, angle ยังเป็น pose ของชิ้นนั้น
+STATUS_RETRY = 7   # เฟรมไม่ผ่านการตรวจคุณภาพ (เบลอ/มืด) แม้ลองเฟรมใหม่แล้ว -> หุ่นส่ง Capture ใหม่
+
+STATUS_NAMES = {
+    STATUS_OK: "OK",
+    STATUS_NO_PART: "NOPART",
+    STATUS_TIMEOUT: "TIMEOUT",
+    STATUS_ERROR: "ERROR",
+    STATUS_ACK: "ACK",
+    STATUS_BUSY: "BUSY",
+    STATUS_REJECT: "REJECT",
+    STATUS_RETRY: "RETRY",
+}
+
+
+def pack_result(x: float = 0.0, y: float = 0.0, angle: float = 0.0, score: float = 0.0,
+                frame: int = 0, status: int = STATUS_OK) -> bytes:
+    return RESULT_STRUCT.pack(RESULT_MAGIC, RESULT_VERSION, float(x), float(y), float(angle),
+                              float(score), int(frame) & 0xFFFFFFFF, int(status))
+
+
+def unpack_result(buf: bytes) -> dict:
+    magic, ver, x, y, angle, score, frame, status = RESULT_STRUCT.unpack_from(buf)
+    if magic != RESULT_MAGIC:
+        raise FramingError(f"bad result magic 0x{magic:04x}")
+    return {"version": ver, "x": x, "y": y, "angle": angle, "score": score,
+            "frame": frame, "status": status}
+
+
+def format_result_text(x: float = 0.0, y: float = 0.0, angle: float = 0.0, score: float = 0.0,
+                       frame: int = 0, status: int = STATUS_OK) -> str:
+    """Text reply เช่น 'OK,123.450,-20.100,90.00,0.873,17'"""
+    name = STATUS_NAMES.get(status, str(status))
+    return f"{name},{x:.3f},{y:.3f},{angle:.2f},{score:.3f},{int(frame)}"
+
+
+def parse_result_text(text: str) -> dict:
+    name, x, y, angle, score, frame = text.strip().split(",")
+    codes = {v: k for k, v in STATUS_NAMES.items()}
+    return {"x": float(x), "y": float(y), "angle": float(angle), "score": float(score),
+            "frame": int(frame), "status": codes.get(name, STATUS_ERROR)}
+
+
+def encode_result(reply_mode: str, framing: str, **fields) -> bytes:
+    """
+    เข้ารหัสผลลัพธ์ตาม reply mode
+    - binary: record ขนาดคงที่ ส่งตรงโดยไม่ต้องมี framing เพิ่ม
+    - text: ใช้ framing เดียวกับขาเข้า
+    """
+    if reply_mode == REPLY_BINARY:
+        return pack_result(**fields)
+    if reply_mode == REPLY_TEXT:
+        return encode_frame(format_result_text(**fields), framing)
+    raise ValueError(f"unknown reply mode: {reply_mode!r}")
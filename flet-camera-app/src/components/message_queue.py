@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+from collections import deque
+
+# ---------------------------------------------------------------------------
+# คิวข้อความระหว่าง tcpserver กับฝั่ง processing (home)
+# - ขนาดจำกัด + นโยบายเมื่อเต็ม: block / drop_oldest / reject
+# - priority ต่อคำสั่ง: Capture:1 มาก่อนเสมอ ข้อความสถานะจำนวนมากไม่ทำให้มันช้า
+# - drop_oldest ทิ้งได้เฉพาะข้อความทั่วไป (default_priority) — คำสั่งที่มีสถานะ (Capture:1, finnish)
+#   ไม่ถูกทิ้ง; คิวเต็มด้วยคำสั่งพวกนี้แล้ว คำสั่งใหม่ที่มีสถานะได้ queue.Full (tcpserver ตอบ BUSY)
+# ใช้แทน queue.Queue ได้ (put/get/put_nowait/get_nowait/qsize/empty)
+# ---------------------------------------------------------------------------
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_REJECT = "reject"
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_REJECT)
+
+# เลขน้อย = สำคัญกว่า
+DEFAULT_PRIORITIES = {
+    "Capture:1": 0,
+    "finnish": 1,
+}
+DEFAULT_PRIORITY = 2
+
+
+class BoundedMessageQueue:
+    def __init__(self, maxsize: int = 256, policy: str = POLICY_DROP_OLDEST, priorities=None,
+                 default_priority: int = DEFAULT_PRIORITY):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overload policy: {policy!r}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = int(maxsize)
+        self.policy = policy
+        self.priorities = dict(DEFAULT_PRIORITIES if priorities is None else priorities)
+        self.default_priority = int(default_priority)
+        levels = max([self.default_priority, *self.priorities.values()]) + 1
+        self._levels = [deque() for _ in range(levels)]
+        self._size = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+        self.put_count = 0
+        self.get_count = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.high_watermark = 0
+
+    def priority_of(self, item) -> int:
+        if isinstance(item, str):
+            return self.priorities.get(item.strip(), self.default_priority)
+        return self.default_priority
+
+    # -------- queue.Queue compatible API --------
+    def qsize(self) -> int:
+        with self._lock:
+            return self._size
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def full(self) -> bool:
+        return self.qsize() >= self.maxsize
+
+    def put(self, item, block: bool = True, timeout: float = None):
+        prio = self.priority_of(item)
+        with self._not_full:
+            if self._size >= self.maxsize:
+                if self.policy == POLICY_DROP_OLDEST:
+                    if not self._drop_oldest():
+                        if prio < self.default_priority:
+                            # ไม่มีอะไรทิ้งได้ -> ปฏิเสธ ให้หุ่นส่งคำสั่งใหม่ (BUSY)
+                            self.rejected += 1
+                            raise queue.Full
+                        # ข้อความทั่วไป: ทิ้งข้อความใหม่นี้แทน
+                        self.dropped += 1
+                        return
+                elif self.policy == POLICY_REJECT or not block:
+                    self.rejected += 1
+                    raise queue.Full
+                else:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while self._size >= self.maxsize:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self.rejected += 1
+                            raise queue.Full
+                        self._not_full.wait(remaining)
+            self._levels[prio].append(item)
+            self._size += 1
+            self.put_count += 1
+            if self._size > self.high_watermark:
+                self.high_watermark = self._size
+            self._not_empty.notify()
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get(self, block: bool = True, timeout: float = None):
+        with self._not_empty:
+            if not block:
+                if self._size == 0:
+                    raise queue.Empty
+            else:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while self._size == 0:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+            for level in self._levels:
+                if level:
+                    item = level.popleft()
+                    break
+            self._size -= 1
+            self.get_count += 1
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    # -------- internal / metrics --------
+    def _drop_oldest(self) -> bool:
+        # ทิ้งข้อความทั่วไปที่เก่าสุด (ระดับสำคัญน้อยสุดก่อน); ไม่แตะคำสั่งที่มีสถานะ
+        for prio in range(len(self._levels) - 1, self.default_priority - 1, -1):
+            level = self._levels[prio]
+            if level:
+                level.popleft()
+                self._size -= 1
+                self.dropped += 1
+                return True
+        return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "depth": self._size,
+                "maxsize": self.maxsize,
+                "policy": self.policy,
+                "depth_by_priority": [len(level) for level in self._levels],
+                "high_watermark": self.high_watermark,
+                "put": self.put_count,
+                "get": self.get_count,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,308 @@
+import configparser
+import json
+import os
+import pathlib
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from components import timing
+except ImportError:  # รันจากโฟลเดอร์ components
+    import timing
+
+# ---------------------------------------------------------------------------
+# ตัวเลขของสถานีสำหรับ scrape จากส่วนกลาง:
+#   GET /metrics     -> Prometheus text exposition (version 0.0.4)
+#   GET /stats.json  -> ค่าเดียวกันเป็น JSON (ดูด้วย browser / curl)
+# ที่มาของค่า:
+#   counter(name).inc()      ฝั่งต้นทาง (กล้อง / PosePipeline / tcpserver) — บวกตัวนับอย่างเดียว
+#   meter(name).mark()       อัตราต่อวินาทีในช่วง METER_WINDOW_S ล่าสุด (เช่น encode fps)
+#   register_collector(...)  callable คืน dict แบบ stats() ที่มีอยู่แล้ว อ่านตอน scrape เท่านั้น (ความลึกคิว ฯลฯ)
+#   timing.stage(...)        latency ทุกขั้นเป็น summary vision_stage_seconds{stage=..., quantile=...}
+#   process                  CPU (process_time) / RSS / จำนวน thread
+# HTTP server อยู่ใน daemon thread ของตัวเอง: งานทั้งหมดเกิดตอนมีคน scrape ไม่แตะ capture path
+# ---------------------------------------------------------------------------
+
+PREFIX = "vision_"
+METRICS_HOST = "0.0.0.0"   # scrape จากเครื่องอื่นได้ ([METRICS] host = 127.0.0.1 ถ้าดูแค่ในเครื่อง)
+METRICS_PORT = 9108        # 0 = ปิด
+METER_WINDOW_S = 5.0
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+_START_TIME = time.time()
+
+
+def _config_path() -> pathlib.Path:
+    return pathlib.Path(__file__).resolve().parent.parent / "pages" / "config.ini"
+
+
+def load_metrics_config(path=None) -> dict:
+    """[METRICS] host/port ของ pages/config.ini (ไม่มี = ค่าเริ่มต้น; port 0 = ไม่เปิด endpoint)"""
+    cfg = configparser.ConfigParser()
+    cfg.read(path or _config_path(), encoding="utf-8")
+    try:
+        port = cfg.getint("METRICS", "port", fallback=METRICS_PORT)
+    except ValueError:
+        port = METRICS_PORT
+    return {"host": cfg.get("METRICS", "host", fallback=METRICS_HOST), "port": port}
+
+
+class Counter:
+    """ตัวนับที่เพิ่มอย่างเดียว (ปลอดภัยข้าม thread)"""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1):
+        with self._lock:
+            self.value += n
+
+
+class Meter:
+    """จำนวนเหตุการณ์ต่อวินาทีในช่วง window_s ล่าสุด (mark = append เวลาเข้า deque)"""
+
+    __slots__ = ("window_s", "_times")
+
+    def __init__(self, window_s: float = METER_WINDOW_S, maxlen: int = 4096):
+        self.window_s = float(window_s)
+        self._times = deque(maxlen=maxlen)
+
+    def mark(self):
+        self._times.append(time.monotonic())
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        times = list(self._times)
+        recent = [t for t in times if now - t <= self.window_s]
+        if len(recent) < 2:
+            return 0.0
+        # deque เต็มก่อนครบ window -> ใช้ช่วงที่มีจริง
+        span = self.window_s if len(times) < self._times.maxlen else max(now - recent[0], 1e-6)
+        return len(recent) / span
+
+
+_lock = threading.Lock()
+_counters = {}
+_meters = {}
+_collectors = {}
+
+
+def counter(name: str) -> Counter:
+    """ตัวนับชื่อ name (ไม่ต้องมี prefix; ควรลงท้าย _total) — เก็บตัวที่ได้ไว้ใช้ซ้ำใน loop"""
+    c = _counters.get(name)
+    if c is None:
+        with _lock:
+            c = _counters.setdefault(name, Counter())
+    return c
+
+
+def meter(name: str) -> Meter:
+    m = _meters.get(name)
+    if m is None:
+        with _lock:
+            m = _meters.setdefault(name, Meter())
+    return m
+
+
+def register_collector(name: str, fn):
+    """
+    fn() -> dict ตัวเลข (ซ้อน dict ได้) อ่านตอน scrape; ชื่อ metric = vision_<name>_<key>
+    key ลงท้าย _total = counter, นอกนั้น gauge; ค่าไม่ใช่ตัวเลข/None ข้ามใน /metrics แต่อยู่ใน /stats.json
+    """
+    with _lock:
+        _collectors[name] = fn
+
+
+def unregister_collector(name: str):
+    with _lock:
+        _collectors.pop(name, None)
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def process_stats() -> dict:
+    return {
+        "cpu_seconds_total": time.process_time(),
+        "resident_memory_bytes": _rss_bytes(),
+        "threads": threading.active_count(),
+        "start_time_seconds": _START_TIME,
+        "uptime_seconds": time.time() - _START_TIME,
+    }
+
+
+def _collect_sources() -> dict:
+    with _lock:
+        collectors = list(_collectors.items())
+    out = {}
+    for name, fn in collectors:
+        try:
+            out[name] = fn()
+        except Exception as e:  # collector ของหน้าที่ปิดไปแล้ว ฯลฯ ไม่ควรทำให้ scrape ล้ม
+            out[name] = {"error": str(e)}
+    return out
+
+
+def stats() -> dict:
+    """ทุกค่าเป็น dict (เนื้อหาของ /stats.json)"""
+    with _lock:
+        counters = {name: c.value for name, c in sorted(_counters.items())}
+        meters = {name: m.rate() for name, m in sorted(_meters.items())}
+    return {
+        "time": time.time(),
+        "process": process_stats(),
+        "counters": counters,
+        "rates": meters,
+        "stages": timing.snapshot(),
+        "sources": _collect_sources(),
+    }
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    return None
+
+
+def _flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, v in value.items():
+            _flatten(f"{prefix}_{key}", v, out)
+    else:
+        number = _number(value)
+        if number is not None:
+            out.append((prefix, number))
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def _sanitize(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in name)
+
+
+def render_prometheus(snapshot: dict = None) -> str:
+    """Prometheus text exposition ของ stats() (หรือ snapshot ที่ส่งมา)"""
+    s = stats() if snapshot is None else snapshot
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ""
+            if labels:
+                label_text = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+            lines.append(f"{name}{suffix}{label_text} {_format_value(value)}")
+
+    for key, value in s["process"].items():
+        if value is None:
+            continue
+        kind = "counter" if key.endswith("_total") else "gauge"
+        family(f"{PREFIX}process_{key}", kind, f"process {key.replace('_', ' ')}", [("", None, value)])
+    for key, value in s["counters"].items():
+        family(PREFIX + _sanitize(key), "counter", key.replace("_", " "), [("", None, value)])
+    for key, value in s["rates"].items():
+        family(PREFIX + _sanitize(key), "gauge", f"{key.replace('_', ' ')} (per second, last {METER_WINDOW_S:g} s)",
+               [("", None, value)])
+    if s["stages"]:
+        samples = []
+        for stage, h in s["stages"].items():
+            for q in timing.PERCENTILES:
+                v = h.get(f"p{q}_ms")
+                samples.append(("", {"stage": stage, "quantile": f"{q / 100:g}"},
+                                float("nan") if v is None else v / 1000.0))
+            samples.append(("_sum", {"stage": stage}, (h["mean_ms"] or 0.0) * h["count"] / 1000.0))
+            samples.append(("_count", {"stage": stage}, h["count"]))
+        family(f"{PREFIX}stage_seconds", "summary", "latency per pipeline stage", samples)
+    for source, values in s["sources"].items():
+        flat = []
+        _flatten(PREFIX + _sanitize(source), values, flat)
+        for name, value in flat:
+            name = _sanitize(name)
+            family(name, "counter" if name.endswith("_total") else "gauge", f"{name[len(PREFIX):]} (from {source} stats)",
+                   [("", None, value)])
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "VisionMetrics/1"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        try:
+            if path == "/metrics":
+                body, ctype = render_prometheus().encode("utf-8"), CONTENT_TYPE_PROMETHEUS
+            elif path in ("/stats.json", "/stats"):
+                body, ctype = json.dumps(stats(), default=str).encode("utf-8"), "application/json"
+            else:
+                self.send_error(404, "use /metrics or /stats.json")
+                return
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # scrape ทุก 15 s ไม่ต้อง print
+        pass
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """
+    เปิด /metrics และ /stats.json ใน daemon thread (port 0 = ให้ OS เลือก, ดู .port)
+    คืน control object ที่มี .stop(), .is_running(), .port, .url เหมือน tcpserver.start_tcp_server
+    """
+    httpd = ThreadingHTTPServer((host, int(port)), _Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.5}, daemon=True,
+                              name="metrics-http")
+    thread.start()
+    print(f"[METRICS] http://{host}:{httpd.server_address[1]}/metrics")
+
+    class MetricsServerControl:
+        port = httpd.server_address[1]
+        url = f"http://{'127.0.0.1' if host in ('', '0.0.0.0') else host}:{httpd.server_address[1]}"
+
+        def stop(self, timeout: float = 2.0):
+            if not thread.is_alive():
+                return
+            httpd.shutdown()
+            httpd.server_close()
+            thread.join(timeout=timeout)
+
+        def is_running(self):
+            return thread.is_alive()
+
+        @property
+        def thread(self):
+            return thread
+
+    return MetricsServerControl()
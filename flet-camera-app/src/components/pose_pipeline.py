@@ -0,0 +1,304 @@
+import configparser
+import itertools
+import pathlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import numpy as np
+
+try:
+    from components import framing, metrics, timing
+except ImportError:  # รันจากโฟลเดอร์ components
+    import framing
+    import metrics
+    import timing
+
+# ---------------------------------------------------------------------------
+# Capture -> pose: รับ "Capture:1" จากหุ่น, match สอง template บนเฟรมล่าสุด
+# แปลงเป็นพิกัดหุ่นด้วยค่า [ROBOT] แล้วตอบกลับบน connection เดิมภายใน deadline
+# ---------------------------------------------------------------------------
+
+CAPTURE_COMMANDS = ("Capture:1",)
+CONFIRM_COMMANDS = ("finnish",)  # หุ่นหยิบเสร็จ -> matcher.confirm() (เช่น LayerMatcher เลื่อนไปช่องถัดไป)
+DEFAULT_DEADLINE_MS = 800
+_QUALITY_STAGE = timing.stage("quality")
+_MATCH_STAGE = timing.stage("match")
+_INSPECT_STAGE = timing.stage("inspect")
+_POSE_STAGE = timing.stage("pose")
+_MATCHED = metrics.counter("frames_matched_total")   # ได้ pose (OK หรือ REJECT จาก inspect)
+_FAILED = metrics.counter("frames_failed_total")     # NO_PART / RETRY / TIMEOUT / ERROR
+QUALITY_RETRIES = 2      # เฟรมไม่ผ่าน quality: รอเฟรมใหม่ได้อีกกี่ครั้งก่อนตอบ STATUS_RETRY
+FRAME_POLL_S = 0.005
+
+
+def _config_path() -> pathlib.Path:
+    return pathlib.Path(__file__).resolve().parent.parent / "pages" / "config.ini"
+
+
+def load_robot_config(path=None) -> dict:
+    """อ่าน offset/scale ของหุ่นจาก section [ROBOT] (key ไม่สนตัวพิมพ์เล็กใหญ่)"""
+    cfg = configparser.ConfigParser()
+    cfg.read(path or _config_path(), encoding="utf-8")
+
+    def getf(key, default):
+        try:
+            return cfg.getfloat("ROBOT", key, fallback=default)
+        except ValueError:
+            return default
+
+    return {
+        "robot_ip": cfg.get("ROBOT", "robot_ip", fallback=""),
+        "robot_port": int(getf("robot_port", 0)),
+        "robot_push": bool(getf("robot_push", 0)),
+        "offsetpickx": getf("offsetpickx", 0.0),
+        "offsetpicky": getf("offsetpicky", 0.0),
+        "calpick": getf("calpick", 1.0),
+        "angle": getf("angle", 0.0),
+        "deadline_ms": getf("deadline_ms", DEFAULT_DEADLINE_MS),
+        "pick_transform": _pick_transform(cfg, getf("angle", 0.0)),
+    }
+
+
+def _pick_transform(cfg, angle_offset):
+    """[ROBOT] pick_transform ที่ fit จากคู่จุด (demo/calibrate_robot.py); ไม่มี = None -> ใช้ calpick + offset"""
+    try:
+        from vision.robot_calib import PixelToRobot
+    except ImportError:  # ไม่มี src บน sys.path
+        return None
+    return PixelToRobot.from_config(cfg, "pick", angle_offset)
+
+
+def pixel_to_pick(pose: dict, robot_cfg: dict):
+    """
+    Scale + offset แบบเดียวกับที่ตั้งใน [ROBOT]: mm = px * calpick + offset
+    ถ้ามี [ROBOT] pick_transform (affine/homography ที่ fit แล้ว) ใช้ตัวนั้นแทน
+    """
+    transform = robot_cfg.get("pick_transform")
+    if transform is not None:
+        return transform(pose)
+    px, py = pose["c1"]
+    x = px * robot_cfg["calpick"] + robot_cfg["offsetpickx"]
+    y = py * robot_cfg["calpick"] + robot_cfg["offsetpicky"]
+    angle = pose["angle"] + robot_cfg["angle"]
+    return x, y, angle
+
+
+class LatencyRecorder:
+    """เก็บ latency ล่าสุด N ค่า (ms) แล้วคำนวณ percentile เมื่อถูกเรียกดู"""
+
+    def __init__(self, size: int = 2048):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, ms: float):
+        with self._lock:
+            self._samples.append(ms)
+            self.count += 1
+
+    def percentiles(self, qs=(50, 95, 99)) -> dict:
+        with self._lock:
+            data = np.fromiter(self._samples, dtype=float)
+        if data.size == 0:
+            return {f"p{q}": None for q in qs}
+        values = np.percentile(data, qs)
+        return {f"p{q}": float(v) for q, v in zip(qs, values)}
+
+
+class PosePipeline:
+    """
+    frame_source: callable คืนเฟรมล่าสุด (BGR ndarray) หรือ None
+    matcher:      object ที่มี match(frame) -> pose dict (ดู vision.pose.TwoTemplateMatcher)
+                  หรือ callable ที่สร้าง matcher (เรียกครั้งแรกที่มี Capture)
+    on_result:    callable(reply) เรียกหลังได้ผลทุกครั้ง (เช่น push ไปหุ่นผ่าน RobotClient)
+    inspect:      callable(frame, pose) -> dict ที่มี "ok" (เช่น vision.oring.OringFinder.inspect)
+                  ok เป็น False -> ตอบ STATUS_REJECT พร้อม pose เดิม
+    quality:      callable(frame) -> dict ที่มี "ok" (เช่น vision.frame_quality.FrameQuality.check) ตรวจก่อน match
+                  ไม่ผ่าน -> เรียก retrigger() (ถ้ามี, เช่น software trigger ของกล้อง) แล้วรอเฟรมใหม่จาก frame_source
+                  ได้ QUALITY_RETRIES ครั้งภายใน deadline; ยังไม่ผ่าน -> ตอบ STATUS_RETRY โดยไม่ match
+    undistort:    callable(pose, frame_shape) -> pose ในพิกัดภาพไม่บิด (เช่น vision.calibration.Undistorter.undistort_pose)
+                  ทำหลัง inspect (ซึ่งทำงานบนเฟรมจริง) ก่อนแปลงเป็นพิกัดหุ่น
+    handle(message) คืน dict ของ field สำหรับ framing.encode_result หรือ None ถ้าไม่ใช่คำสั่ง capture
+    "finnish" -> matcher.confirm() (ถ้ามี) ผ่าน worker เดียวกับ match ก่อนตอบ ack: ลำดับ Capture/confirm
+    ตรงกับที่หุ่นส่งบน connection (ไม่ไปรอ consumer ของ message queue ที่ช้ากว่า Capture ถัดไปได้)
+    deadline แบบ cooperative: worker ตรวจเวลาที่เหลือระหว่างขั้น (ก่อน quality/match/inspect)
+    งานที่เลย deadline แล้ว (handle ตอบ TIMEOUT ไปแล้ว) จะหยุดที่ขั้นถัดไป ไม่กินเวลาของ Capture ถัดไป
+    """
+
+    def __init__(self, frame_source, matcher, robot_cfg=None, deadline_ms=None, on_result=None, inspect=None,
+                 quality=None, retrigger=None, undistort=None):
+        self.frame_source = frame_source
+        self._matcher = matcher if hasattr(matcher, "match") else None
+        self._matcher_factory = None if self._matcher is not None else matcher
+        self._matcher_lock = threading.Lock()
+        self.robot_cfg = robot_cfg or load_robot_config()
+        if deadline_ms is None:
+            deadline_ms = self.robot_cfg.get("deadline_ms", DEFAULT_DEADLINE_MS)
+        self.deadline_s = float(deadline_ms) / 1000.0
+        self.on_result = on_result
+        self.inspect = inspect
+        self.last_inspection = None
+        self.quality = quality
+        self.retrigger = retrigger
+        self.last_quality = None
+        self.undistort = undistort
+        self.quality_rejects = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PoseWorker")
+        self._frame_counter = itertools.count(1)
+        self.abandoned = 0
+        self.latency = LatencyRecorder()
+        self.counts = {"ok": 0, "no_part": 0, "reject": 0, "retry": 0, "timeout": 0, "error": 0}
+        self._counts_lock = threading.Lock()  # handle() ถูกเรียกจากหลาย connection thread
+
+    def _get_matcher(self):
+        with self._matcher_lock:
+            if self._matcher is None and self._matcher_factory is not None:
+                factory, self._matcher_factory = self._matcher_factory, None
+                self._matcher = factory()
+            return self._matcher
+
+    def _good_frame(self, frame, give_up_at):
+        """เฟรมที่ผ่าน quality (ลองเฟรมใหม่ได้ QUALITY_RETRIES ครั้ง) หรือ None ถ้าไม่มีเฟรมไหนผ่าน"""
+        for attempt in range(QUALITY_RETRIES + 1):
+            with _QUALITY_STAGE.time():
+                self.last_quality = self.quality(frame)
+            if self.last_quality.get("ok", False):
+                return frame
+            self.quality_rejects += 1
+            if attempt == QUALITY_RETRIES:
+                break
+            if self.retrigger is not None:
+                try:
+                    self.retrigger()
+                except Exception as e:
+                    print(f"[POSE] retrigger error: {e}")
+            # frame_source คืนเฟรมล่าสุดเสมอ: รอจนได้ object ใหม่
+            previous = frame
+            while frame is previous or frame is None:
+                if time.perf_counter() >= give_up_at:
+                    return None
+                time.sleep(FRAME_POLL_S)
+                frame = self.frame_source()
+        return None
+
+    def _abandon(self, frame_no: int, give_up_at: float):
+        """reply TIMEOUT ถ้าเลย deadline แล้ว (handle เลิกรอไปแล้ว) ไม่งั้น None -> ทำขั้นถัดไปต่อ"""
+        if time.perf_counter() < give_up_at:
+            return None
+        self.abandoned += 1
+        return {"frame": frame_no, "status": framing.STATUS_TIMEOUT}
+
+    def _compute(self, frame_no: int, t0: float = None) -> dict:
+        if t0 is None:
+            t0 = time.perf_counter()
+        deadline = t0 + self.deadline_s
+        # รอคิวหลังงานก่อนหน้าจนหมดเวลา -> ไม่ต้องเริ่ม
+        late = self._abandon(frame_no, deadline)
+        if late is not None:
+            return late
+        frame = self.frame_source()
+        if frame is None:
+            return {"frame": frame_no, "status": framing.STATUS_NO_PART}
+        if self.quality is not None:
+            # เผื่อเวลาไว้ match หลังได้เฟรมดี: รอเฟรมใหม่ได้ไม่เกินครึ่ง deadline
+            frame = self._good_frame(frame, t0 + self.deadline_s / 2.0)
+            if frame is None:
+                return {"frame": frame_no, "status": framing.STATUS_RETRY}
+            late = self._abandon(frame_no, deadline)
+            if late is not None:
+                return late
+        matcher = self._get_matcher()
+        if matcher is None:
+            return {"frame": frame_no, "status": framing.STATUS_ERROR}
+        with _MATCH_STAGE.time():
+            pose = matcher.match(frame)
+        if pose is None:
+            return {"frame": frame_no, "status": framing.STATUS_NO_PART}
+        late = self._abandon(frame_no, deadline)
+        if late is not None:
+            return late
+        status = framing.STATUS_OK
+        if self.inspect is not None:
+            with _INSPECT_STAGE.time():
+                self.last_inspection = self.inspect(frame, pose)
+            if not self.last_inspection.get("ok", False):
+                status = framing.STATUS_REJECT
+        if self.undistort is not None:
+            pose = self.undistort(pose, frame.shape)
+        x, y, angle = pixel_to_pick(pose, self.robot_cfg)
+        return {"x": x, "y": y, "angle": angle, "score": pose.get("score", 0.0),
+                "frame": frame_no, "status": status}
+
+    def _confirm(self):
+        matcher = self._matcher  # ยังไม่เคยสร้าง matcher = ยังไม่มีช่องที่ตอบไป
+        if matcher is not None and hasattr(matcher, "confirm"):
+            matcher.confirm()
+
+    def handle(self, message: str):
+        command = message.strip()
+        if command in CONFIRM_COMMANDS:
+            try:
+                self._executor.submit(self._confirm).result(timeout=self.deadline_s)
+            except FutureTimeout:
+                print("[POSE] confirm ไม่เสร็จภายใน deadline (match ก่อนหน้ายังทำอยู่)")
+            except Exception as e:
+                print(f"[POSE] confirm error: {e}")
+            return None
+        if command not in CAPTURE_COMMANDS:
+            return None
+        t0 = time.perf_counter()
+        frame_no = next(self._frame_counter)  # หลาย connection เรียก handle พร้อมกันได้
+        future = self._executor.submit(self._compute, frame_no, t0)
+        try:
+            reply = future.result(timeout=self.deadline_s)
+        except FutureTimeout:
+            # ยังไม่เริ่ม -> ยกเลิกเลย; กำลังทำอยู่ -> worker หยุดเองที่ขั้นถัดไป (ดู _abandon)
+            future.cancel()
+            reply = {"frame": frame_no, "status": framing.STATUS_TIMEOUT}
+        except Exception as e:
+            print(f"[POSE] capture {frame_no} error: {e}")
+            reply = {"frame": frame_no, "status": framing.STATUS_ERROR}
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        self.latency.add(elapsed_ms)
+        _POSE_STAGE.record_ms(elapsed_ms)
+        key = {
+            framing.STATUS_OK: "ok",
+            framing.STATUS_NO_PART: "no_part",
+            framing.STATUS_REJECT: "reject",
+            framing.STATUS_RETRY: "retry",
+            framing.STATUS_TIMEOUT: "timeout",
+        }.get(reply["status"], "error")
+        with self._counts_lock:
+            self.counts[key] += 1
+        (_MATCHED if key in ("ok", "reject") else _FAILED).inc()
+        if self.on_result is not None:
+            try:
+                self.on_result(reply)
+            except Exception as e:
+                print(f"[POSE] on_result error: {e}")
+        return reply
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            out = dict(self.counts)
+        out["requests"] = self.latency.count
+        out["deadline_ms"] = self.deadline_s * 1000.0
+        out["abandoned"] = self.abandoned
+        out.update(self.latency.percentiles())
+        if self.quality is not None:
+            out["quality_rejects"] = self.quality_rejects
+            checker = getattr(self.quality, "__self__", None)  # bound method ของ FrameQuality
+            if checker is not None and hasattr(checker, "stats"):
+                out["quality"] = checker.stats()
+        matcher = self._matcher
+        if matcher is not None and hasattr(matcher, "stats"):
+            out["matcher"] = matcher.stats()
+        return out
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        matcher = self._matcher
+        if matcher is not None and hasattr(matcher, "release"):
+            matcher.release()
@@ -0,0 +1,354 @@
+import socket
+import threading
+import time
+from collections import deque
+
+try:
+    from components import framing
+except ImportError:  # รันไฟล์นี้ตรง ๆ จากโฟลเดอร์ components
+    import framing
+
+# ---------------------------------------------------------------------------
+# Outbound connection ไปยัง robot controller (vision PC เป็นฝั่ง client)
+# - connection เดียวต่อ (host, port) ใช้ซ้ำผ่าน get_client() (pool)
+# - send queue มีขนาดจำกัด: เต็มแล้วทิ้งของเก่าสุด
+# - ข้อความ kind เดียวกันที่ coalesce ได้ (เช่น pose) จะเหลือแค่อันล่าสุดในคิว
+# - หลุดแล้วต่อใหม่แบบ exponential backoff
+# - wait_ack: รอคำตอบทุกข้อความภายใน ack_timeout (ไม่ตอบ = ถือว่าหลุด ต่อใหม่) และวัด RTT จาก ack
+#   rtt_ms มีค่าเฉพาะเมื่อ wait_ack; connect_ms คือเวลา TCP handshake ตอนต่อครั้งล่าสุด
+# ---------------------------------------------------------------------------
+
+COALESCE_KINDS = ("pose", "counter", "pallet")
+
+
+class RobotClient:
+    def __init__(self, host: str, port: int,
+                 framing_mode: str = framing.MODE_LINE,
+                 max_queue: int = 256,
+                 connect_timeout: float = 2.0,
+                 backoff_initial: float = 0.5,
+                 backoff_max: float = 10.0,
+                 wait_ack: bool = False,
+                 ack_timeout: float = 1.0):
+        self.host = host
+        self.port = int(port)
+        self.framing_mode = framing_mode
+        self.max_queue = int(max_queue)
+        self.connect_timeout = connect_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.wait_ack = wait_ack
+        self.ack_timeout = ack_timeout
+
+        self._queue = deque()
+        self._latest = {}  # kind -> entry ที่ยังรอส่ง (สำหรับ coalesce)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._sock = None
+        self._reader = None
+        self._thread = None
+
+        self.connected = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.reconnects = 0
+        self.send_errors = 0
+        self.ack_timeouts = 0
+        self.last_connect_ms = None
+        self.last_rtt_ms = None
+        self._rtt_sum = 0.0
+        self._rtt_n = 0
+
+    # ---------------- public ----------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"RobotClient-{self.host}:{self.port}")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._close_socket()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def send(self, payload, kind: str = None) -> bool:
+        """
+        ใส่ข้อความเข้าคิวส่ง (ไม่บล็อก)
+        kind ที่อยู่ใน COALESCE_KINDS: ถ้ามีอันเดิมค้างในคิว จะเขียนทับด้วยค่าใหม่แทนการต่อท้าย
+        คืน False ถ้าต้องทิ้งข้อความเก่าเพราะคิวเต็ม
+        """
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        ok = True
+        with self._cond:
+            if kind in COALESCE_KINDS and kind in self._latest:
+                self._latest[kind][1] = payload
+                self.coalesced += 1
+                return True
+            if len(self._queue) >= self.max_queue:
+                old = self._queue.popleft()
+                if self._latest.get(old[0]) is old:
+                    del self._latest[old[0]]
+                self.dropped += 1
+                ok = False
+            entry = [kind, payload]
+            self._queue.append(entry)
+            if kind in COALESCE_KINDS:
+                self._latest[kind] = entry
+            self._cond.notify()
+        return ok
+
+    def send_result(self, result: dict):
+        """ส่งผล pose (dict แบบเดียวกับที่ PosePipeline คืน) ในรูปแบบ text"""
+        return self.send(framing.format_result_text(**result), kind="pose")
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> dict:
+        return {
+            "host": self.host,
+            "port": self.port,
+            "connected": self.connected,
+            "queue_depth": self.queue_depth(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "reconnects": self.reconnects,
+            "send_errors": self.send_errors,
+            "ack_timeouts": self.ack_timeouts,
+            "connect_ms": self.last_connect_ms,
+            "rtt_ms": self.last_rtt_ms,
+            "rtt_avg_ms": (self._rtt_sum / self._rtt_n) if self._rtt_n else None,
+        }
+
+    # ---------------- internal ----------------
+    def _record_rtt(self, ms: float):
+        self.last_rtt_ms = ms
+        self._rtt_sum += ms
+        self._rtt_n += 1
+
+    def _close_socket(self):
+        sock, self._sock = self._sock, None
+        self._reader = None
+        self.connected = False
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _connect(self) -> bool:
+        t0 = time.perf_counter()
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        except OSError:
+            return False
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.ack_timeout)
+        self._sock = sock
+        self._reader = framing.FrameReader(sock, self.framing_mode)
+        self.connected = True
+        self.last_connect_ms = (time.perf_counter() - t0) * 1000.0
+        return True
+
+    def _next_entry(self):
+        with self._cond:
+            while not self._queue and not self._stop.is_set():
+                self._cond.wait(timeout=0.5)
+            if self._stop.is_set():
+                return None
+            entry = self._queue.popleft()
+            if self._latest.get(entry[0]) is entry:
+                del self._latest[entry[0]]
+            return entry
+
+    def _requeue_front(self, entry):
+        with self._cond:
+            kind = entry[0]
+            if kind in COALESCE_KINDS and kind in self._latest:
+                return  # มีค่าใหม่กว่ารออยู่แล้ว
+            self._queue.appendleft(entry)
+            if kind in COALESCE_KINDS:
+                self._latest[kind] = entry
+
+    def _send_entry(self, entry):
+        t0 = time.perf_counter()
+        self._sock.sendall(framing.encode_frame(entry[1], self.framing_mode))
+        if self.wait_ack:
+            try:
+                frame = self._reader.read_frame()  # socket timeout = ack_timeout
+            except socket.timeout:
+                self.ack_timeouts += 1
+                raise
+            if frame is None:
+                raise ConnectionResetError("robot closed connection")
+            self._record_rtt((time.perf_counter() - t0) * 1000.0)
+        self.sent += 1
+
+    def _run(self):
+        delay = self.backoff_initial
+        first = True
+        while not self._stop.is_set():
+            if self._sock is None:
+                if not first:
+                    self.reconnects += 1
+                if not self._connect():
+                    if first:
+                        print(f"[ROBOT] เชื่อมต่อ {self.host}:{self.port} ไม่ได้ จะลองใหม่แบบ backoff")
+                    first = False
+                    self._stop.wait(delay)
+                    delay = min(delay * 2.0, self.backoff_max)
+                    continue
+                print(f"[ROBOT] เชื่อมต่อ {self.host}:{self.port} แล้ว")
+                first = False
+                delay = self.backoff_initial
+            entry = self._next_entry()
+            if entry is None:
+                break
+            try:
+                self._send_entry(entry)
+            except (OSError, framing.FramingError):
+                self.send_errors += 1
+                self._requeue_front(entry)
+                self._close_socket()
+                print(f"[ROBOT] การเชื่อมต่อ {self.host}:{self.port} หลุด")
+        self._close_socket()
+
+
+# ---------------------------------------------------------------------------
+# Pool: connection ถาวรหนึ่งอันต่อ endpoint
+# ---------------------------------------------------------------------------
+
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+def get_client(host: str, port: int, **kwargs) -> RobotClient:
+    """คืน RobotClient ที่เริ่มทำงานแล้วสำหรับ (host, port); สร้างใหม่ถ้ายังไม่มี"""
+    key = (host, int(port))
+    with _pool_lock:
+        client = _pool.get(key)
+        if client is None:
+            client = RobotClient(host, port, **kwargs)
+            _pool[key] = client
+        client.start()
+        return client
+
+
+def close_all():
+    with _pool_lock:
+        clients = list(_pool.values())
+        _pool.clear()
+    for c in clients:
+        c.stop()
+
+
+# ---------------------------------------------------------------------------
+# Stand-in robot server สำหรับทดสอบโดยไม่มี controller จริง
+# ---------------------------------------------------------------------------
+
+class StandInRobot:
+    """
+    TCP server เล็ก ๆ ที่ทำตัวเป็น robot controller: เก็บทุก frame ที่ได้รับใน .received
+    ack=True จะตอบ "ACK" กลับทุกข้อความ (ใช้วัด RTT ด้วย wait_ack)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 framing_mode: str = framing.MODE_LINE, ack: bool = True):
+        self.framing_mode = framing_mode
+        self.ack = ack
+        self.received = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._srv.bind((host, port))
+        self._srv.listen()
+        self._srv.settimeout(0.5)
+        self.host, self.port = self._srv.getsockname()[:2]
+        self._conns = []
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True, name="StandInRobot")
+        self._thread.start()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._srv.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.connections += 1
+            self._conns.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        conn.settimeout(0.5)
+        reader = framing.FrameReader(conn, self.framing_mode)
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    frames = reader.read()
+                except (OSError, framing.FramingError):
+                    break
+                if frames is None:
+                    break
+                for f in frames:
+                    with self._lock:
+                        self.received.append(f.decode("utf-8", errors="replace"))
+                    if self.ack:
+                        try:
+                            reader.send("ACK")
+                        except OSError:
+                            return
+
+    def drop_connections(self):
+        """ตัดทุก connection (จำลองหุ่นรีบูต/สายหลุด)"""
+        for c in self._conns:
+            try:
+                c.shutdown(socket.SHUT_RDWR)
+                c.close()
+            except OSError:
+                pass
+        self._conns = []
+
+    def messages(self) -> list:
+        with self._lock:
+            return list(self.received)
+
+    def stop(self):
+        self._stop.set()
+        self.drop_connections()
+        try:
+            self._srv.close()
+        except OSError:
+            pass
+        self._thread.join(timeout=1.0)
+
+
+# --- ตัวอย่างการใช้งาน ---
+if __name__ == "__main__":
+    robot = StandInRobot()
+    print(f"[MAIN] stand-in robot ที่ {robot.host}:{robot.port}")
+    client = get_client(robot.host, robot.port, wait_ack=True)
+    try:
+        for i in range(20):
+            client.send_result({"x": i, "y": -i, "angle": 1.5, "score": 0.9, "frame": i})
+            client.send(f"COUNT,{i}", kind="counter")
+            time.sleep(0.05)
+        time.sleep(0.5)
+        print(f"[MAIN] robot ได้รับ {len(robot.messages())} ข้อความ")
+        print(f"[MAIN] stats: {client.stats()}")
+    finally:
+        close_all()
+        robot.stop()
@@ -1,34 +1,123 @@
+import configparser
+import pathlib
 import socket
 import threading
 import queue
 import time
 
-def start_tcp_server(host: str, port: int, message_queue: queue.Queue):
+try:
+    from components import framing, metrics, timing
+except ImportError:  # รันไฟล์นี้ตรง ๆ จากโฟลเดอร์ components
+    import framing
+    import metrics
+    import timing
+
+# เวลาต่อข้อความ: ตั้งแต่ได้ frame ครบจนส่งคำตอบเสร็จ (รวมรอคิวและ request_handler)
+_REQUEST_STAGE = timing.stage("tcp_request")
+_MESSAGES = metrics.counter("tcp_messages_total")
+_BUSY = metrics.counter("tcp_busy_total")
+
+
+def _config_path() -> pathlib.Path:
+    return pathlib.Path(__file__).resolve().parent.parent / "pages" / "config.ini"
+
+
+def load_tcp_config(path=None) -> dict:
+    """
+    [TCP] framing/reply ของ pages/config.ini (ไม่มี = raw/text แบบโปรแกรมหุ่นเดิม)
+    เปลี่ยนเป็น line/length เมื่อโปรแกรมหุ่นส่ง delimiter/header แล้วเท่านั้น
+    """
+    cfg = configparser.ConfigParser()
+    cfg.read(path or _config_path(), encoding="utf-8")
+    framing_mode = cfg.get("TCP", "framing", fallback=framing.MODE_RAW).strip().lower()
+    reply_mode = cfg.get("TCP", "reply", fallback=framing.REPLY_TEXT).strip().lower()
+    if framing_mode not in framing.MODES:
+        print(f"[SERVER] [TCP] framing={framing_mode!r} ไม่รู้จัก -> ใช้ {framing.MODE_RAW}")
+        framing_mode = framing.MODE_RAW
+    if reply_mode not in framing.REPLY_MODES:
+        print(f"[SERVER] [TCP] reply={reply_mode!r} ไม่รู้จัก -> ใช้ {framing.REPLY_TEXT}")
+        reply_mode = framing.REPLY_TEXT
+    return {"framing_mode": framing_mode, "reply_mode": reply_mode}
+
+
+def start_tcp_server(host: str, port: int, message_queue: queue.Queue,
+                     framing_mode: str = framing.MODE_RAW,
+                     reply_mode: str = framing.REPLY_TEXT,
+                     request_handler=None,
+                     put_timeout: float = 2.0):
     """
     สร้างและเริ่ม TCP server (รองรับ stop แบบ graceful)
+    framing_mode: "raw" (default: recv ละข้อความ แบบเดิม), "line" หรือ "length" (ดู load_tcp_config)
+    reply_mode:   "text" หรือ "binary" (record ขนาดคงที่ ดู framing.RESULT_STRUCT)
+    request_handler: callable(message) -> dict ของผลลัพธ์ (ดู framing.encode_result) หรือ None
+                     ถ้าคืน dict จะตอบผลนั้นบน connection เดิมแทน ack
+    put_timeout: เวลารอสูงสุดเมื่อ message_queue เต็ม (เช่น BoundedMessageQueue policy=block)
+                 ถ้าคิวเต็ม/ปฏิเสธ จะตอบ status BUSY กลับไปแทน
     คืนค่า control object ที่มี:
         .thread        => server thread
         .stop()        => เรียกเพื่อหยุด server
         .is_running()  => ตรวจสอบสถานะ
     """
+    if framing_mode not in framing.MODES:
+        raise ValueError(f"unknown framing mode: {framing_mode!r}")
+    if reply_mode not in framing.REPLY_MODES:
+        raise ValueError(f"unknown reply mode: {reply_mode!r}")
+
     stop_event = threading.Event()
     client_threads = []
+    seq_lock = threading.Lock()
+    seq = [0]
+
+    def next_seq() -> int:
+        with seq_lock:
+            seq[0] += 1
+            return seq[0]
+
+    def ack(message: str) -> bytes:
+        if reply_mode == framing.REPLY_BINARY:
+            return framing.pack_result(frame=next_seq(), status=framing.STATUS_ACK)
+        return framing.encode_frame(f"Server received: {message}", framing_mode)
+
+    def busy() -> bytes:
+        return framing.encode_result(reply_mode, framing_mode, frame=next_seq(), status=framing.STATUS_BUSY)
+
+    def reply_for(message: str) -> bytes:
+        if request_handler is None:
+            return ack(message)
+        try:
+            result = request_handler(message)
+        except Exception as e:
+            print(f"[SERVER] request_handler error: {e}")
+            result = {"status": framing.STATUS_ERROR}
+        if result is None:
+            return ack(message)
+        return framing.encode_result(reply_mode, framing_mode, **result)
 
     def handle_client(conn, addr):
         print(f"[SERVER] Client เชื่อมต่อเข้ามาจาก: {addr}")
         with conn:
             conn.settimeout(2.0)
+            reader = framing.FrameReader(conn, framing_mode)
             while not stop_event.is_set():
                 try:
-                    data = conn.recv(1024)
-                    if not data:
+                    frames = reader.read()
+                    if frames is None:
                         break
-                    message = data.decode('utf-8', errors='replace')
-                    message_queue.put(message)
-                    response = f"Server received: {message}"
-                    conn.sendall(response.encode('utf-8'))
-                except socket.timeout:
-                    continue
+                    for data in frames:
+                        _MESSAGES.inc()
+                        with _REQUEST_STAGE.time():
+                            message = data.decode('utf-8', errors='replace')
+                            try:
+                                # คิวแบบ bounded อาจบล็อก (policy=block) หรือปฏิเสธเมื่อเต็ม
+                                message_queue.put(message, timeout=put_timeout)
+                            except queue.Full:
+                                _BUSY.inc()
+                                conn.sendall(busy())
+                                continue
+                            conn.sendall(reply_for(message))
+                except framing.FramingError as e:
+                    print(f"[SERVER] Client {addr} ส่ง frame ผิดรูปแบบ: {e}")
+                    break
                 except (ConnectionResetError, OSError):
                     break
         print(f"[SERVER] Client {addr} ตัดการเชื่อมต่อแล้ว")
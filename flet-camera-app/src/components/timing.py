@@ -0,0 +1,181 @@
+import threading
+import time
+from functools import wraps
+
+# ---------------------------------------------------------------------------
+# จับเวลาแต่ละขั้น (capture / decode / match / encode / ui_update / tcp) แบบเบา ๆ
+#   with timing.stage("match").time(): ...      หรือ   @timing.timed("encode")
+# เก็บใน histogram ขนาดคงที่แบบ HDR: ค่า ns แบ่งเป็นช่วงกำลังสอง ช่วงละ 16 ช่อง (คลาดไม่เกิน ~6%)
+#   0 ns .. ~18 นาที ใช้ 624 ช่อง ไม่ต้องเก็บทุก sample; p50/p95/p99 คำนวณตอนเรียกดู (snapshot)
+# record = bit_length + shift แล้วบวกตัวนับใน shard ของ thread ตัวเอง (ไม่มี lock) -> span ละ ~0.8 us (demo/bench_timing.py)
+# ---------------------------------------------------------------------------
+
+SUB_BUCKETS = 16          # ช่องต่อช่วงกำลังสอง
+_SUB_BITS = 4
+MAX_SHIFT = 37            # ค่า >= 2^41 ns (~37 นาที) นับรวมในช่องสุดท้าย
+N_BUCKETS = (MAX_SHIFT + 2) * SUB_BUCKETS
+PERCENTILES = (50, 95, 99)
+
+_perf_ns = time.perf_counter_ns
+_get_ident = threading.get_ident
+
+
+def bucket_index(ns: int) -> int:
+    if ns < 2 * SUB_BUCKETS:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - (_SUB_BITS + 1)
+    if shift > MAX_SHIFT:
+        return N_BUCKETS - 1
+    return shift * SUB_BUCKETS + (ns >> shift)
+
+
+def bucket_bounds(idx: int):
+    """ช่วง [lo, hi) ns ของช่อง idx"""
+    if idx < 2 * SUB_BUCKETS:
+        return idx, idx + 1
+    shift = idx // SUB_BUCKETS - 1
+    lo = (idx % SUB_BUCKETS + SUB_BUCKETS) << shift
+    return lo, lo + (1 << shift)
+
+
+class _Span:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = _perf_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.hist.record_ns(_perf_ns() - self.t0)
+        return False
+
+
+class Histogram:
+    """
+    latency ของหนึ่งขั้น: counts ขนาดคงที่ N_BUCKETS แยกตาม thread ที่ record (shard)
+    แต่ละ shard มี thread เดียวเขียน -> ไม่ต้อง lock ตอน record และไม่มีการนับหาย; snapshot รวมทุก shard
+    shard = list ยาว N_BUCKETS + 1 (ช่องสุดท้าย = ผลรวม ns สำหรับค่าเฉลี่ย)
+    time() -> context manager; record_ns / record_ms สำหรับเวลาที่วัดไว้แล้ว (เช่น last_timing ของ matcher)
+    """
+
+    __slots__ = ("name", "_shards", "_lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def _new_shard(self):
+        with self._lock:
+            return self._shards.setdefault(_get_ident(), [0] * (N_BUCKETS + 1))
+
+    def record_ns(self, ns: int):
+        shard = self._shards.get(_get_ident()) or self._new_shard()
+        if ns < 2 * SUB_BUCKETS:
+            shard[ns if ns > 0 else 0] += 1
+        else:
+            shift = ns.bit_length() - (_SUB_BITS + 1)
+            shard[shift * SUB_BUCKETS + (ns >> shift) if shift <= MAX_SHIFT else N_BUCKETS - 1] += 1
+        shard[N_BUCKETS] += ns
+
+    def record_ms(self, ms: float):
+        self.record_ns(int(ms * 1e6))
+
+    def time(self) -> _Span:
+        return _Span(self)
+
+    def merged(self) -> list:
+        """counts รวมทุก shard (ช่องสุดท้าย = ผลรวม ns)"""
+        with self._lock:
+            shards = list(self._shards.values())
+        total = [0] * (N_BUCKETS + 1)
+        for shard in shards:
+            for i, c in enumerate(list(shard)):
+                if c:
+                    total[i] += c
+        return total
+
+    @property
+    def count(self) -> int:
+        return sum(self.merged()[:N_BUCKETS])
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards.values():
+                shard[:] = [0] * (N_BUCKETS + 1)
+
+    def snapshot(self, qs=PERCENTILES) -> dict:
+        """count, mean_ms, max_ms, p50_ms ... (None ถ้ายังไม่มี sample); percentile = กลางช่อง, max = ขอบบนช่อง"""
+        counts = self.merged()
+        total = counts.pop()
+        count = sum(counts)
+        top = max((i for i, c in enumerate(counts) if c), default=0)
+        peak = bucket_bounds(top)[1]
+        out = {"count": count, "mean_ms": total / count / 1e6 if count else None,
+               "max_ms": peak / 1e6 if count else None}
+        targets = [(q, max(1, -(-count * q // 100))) for q in qs]  # rank แบบ nearest-rank
+        seen, t = 0, 0
+        for idx, c in enumerate(counts):
+            if not c:
+                continue
+            seen += c
+            while t < len(targets) and seen >= targets[t][1]:
+                lo, hi = bucket_bounds(idx)
+                out[f"p{targets[t][0]}_ms"] = min((lo + hi) / 2.0, peak) / 1e6
+                t += 1
+            if t == len(targets):
+                break
+        for q, _ in targets[t:]:
+            out[f"p{q}_ms"] = None
+        return out
+
+
+_stages = {}
+_stages_lock = threading.Lock()
+
+
+def stage(name: str) -> Histogram:
+    """histogram ของขั้น name (สร้างครั้งแรกที่เรียก); เก็บตัวที่ได้ไว้ใช้ซ้ำใน hot path"""
+    hist = _stages.get(name)
+    if hist is None:
+        with _stages_lock:
+            hist = _stages.setdefault(name, Histogram(name))
+    return hist
+
+
+def span(name: str) -> _Span:
+    """with timing.span("encode"): ... (ค้น dict ทุกครั้ง; ใน loop ให้ใช้ stage(name).time())"""
+    return _Span(stage(name))
+
+
+def timed(name: str):
+    """decorator: จับเวลาทุกครั้งที่เรียกฟังก์ชันลง stage(name)"""
+    def deco(fn):
+        hist = stage(name)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = _perf_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.record_ns(_perf_ns() - t0)
+        return wrapper
+    return deco
+
+
+def snapshot(qs=PERCENTILES) -> dict:
+    """{stage: {count, mean_ms, max_ms, p50_ms, p95_ms, p99_ms}} ของทุกขั้น เรียงตามชื่อ"""
+    with _stages_lock:
+        items = sorted(_stages.items())
+    return {name: hist.snapshot(qs) for name, hist in items}
+
+
+def reset():
+    with _stages_lock:
+        hists = list(_stages.values())
+    for hist in hists:
+        hist.reset()
@@ -5,6 +5,11 @@ import cv2
 import threading
 import time
 import components.tcpserver as tcpserver
+import components.pose_pipeline as pose_pipeline
+import components.robot_client as robot_client
+import components.message_queue as message_queue
+import components.timing as timing
+import components.metrics as metrics
 import os
 import inspect
 
@@ -47,6 +52,14 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
         "cols": 8,   # เริ่มต้น 6 คอลัมน์
         "cell_size": 65,  # ขนาดพิกเซลของการ์ด (กว้าง/สูง)
         "layer_size": 3,  # จำนวนชั้น (floor)
+        "track_pitch": (0.0, 0.0),  # ระยะระหว่างช่องในภาพ (px) x, y; 0 = ชิ้นงานมาที่จุดเดิมทุกครั้ง
+        "layer_mode": False,  # True = กล้องเห็นทั้งชั้น: ค้นทุกชิ้นในเฟรมเดียวแล้วตอบจาก cache ทีละช่อง
+        "oring_check": False,  # True = ตรวจ O-ring รอบ template1 หลังหา pose ([find_oring] ของ ConfigManager)
+        "quality_check": False,  # True = ตรวจความคม/exposure ก่อน match ([QUALITY]); เฟรมไม่ผ่าน -> รอเฟรมใหม่/ตอบ RETRY
+        "coarse_scale": 0,  # 4 หรือ 8 = หา template1 บนภาพย่อก่อนแล้ว match ภาพเต็มรอบ candidate แทน ROI ของ [PROGRAMS]
+        "change_gate": True,  # True = เฟรมไม่เปลี่ยนจากครั้งก่อน (หุ่นไม่อยู่/พาเลทนิ่ง) ตอบผลเดิมไม่ match ใหม่
+        "undistort": False,  # True = pose ในพิกัดไม่บิดตาม camera model ([CALIBRATION] / hdev; kappa 0 = ไม่เปลี่ยน)
+        "plan_picks": True,  # layer_mode: วางลำดับหยิบใหม่ทุกชั้นให้หุ่นเดินสั้นสุด (vision.pick_order) แทนแถวแล้วคอลัมน์
         # --- tcp / processing ---
         "server_running": False,
         "processing": False,
@@ -56,6 +69,10 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
         "tcp_port": 5001,               # <-- added
         "tcp_server": None,
         "message_queue": None,
+        "queue_size": 256,
+        "queue_policy": message_queue.POLICY_DROP_OLDEST,
+        "pose_pipeline": None,
+        "robot_client": None,
         "counter": 0,
         
     }
@@ -109,15 +126,43 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
     def log(msg: str):
         shared["ui_log"](msg)
 
-    # ----------- TCP / SERVER LOGIC -------------
-    def _message_reader(q: queue.Queue):
-        while state["server_running"]:
+    # --------- /metrics + /stats.json สำหรับ scrape จากส่วนกลาง ([METRICS] ของ config.ini) ----------
+    # ค่าที่ขึ้นกับ state ของหน้านี้อ่านตอน scrape เท่านั้น; build ใหม่ = แทน collector เดิม
+    def _queue_metrics():
+        out = {"ui_log_depth": shared["_ui_log_queue"].qsize()}
+        mq = state.get("message_queue")
+        if mq is not None:
+            out["message"] = mq.stats() if hasattr(mq, "stats") else {"depth": mq.qsize()}
+        if state.get("robot_client") is not None:
+            out["robot"] = state["robot_client"].stats()
+        return out
+
+    def _pallet_metrics():
+        out = {"pick_counter": state["counter"], "rows": state["rows"], "cols": state["cols"],
+               "layers": state["layer_size"], "tcp_server_running": state["server_running"]}
+        pipeline = state.get("pose_pipeline")
+        if pipeline is not None:
+            out["pose"] = pipeline.stats()
+        return out
+
+    metrics.register_collector("queue", _queue_metrics)
+    metrics.register_collector("pallet", _pallet_metrics)
+    if "metrics_server" not in shared:
+        shared["metrics_server"] = None
+        metrics_cfg = metrics.load_metrics_config()
+        if metrics_cfg["port"]:
             try:
-                msg = q.get(timeout=0.4)
-            except queue.Empty:
-                continue
-            # เดิม: ui_set_result(f"MSG: {msg}")
-            log(f"MSG: {msg}")
+                shared["metrics_server"] = metrics.start_metrics_server(metrics_cfg["host"], metrics_cfg["port"])
+            except OSError as e:
+                print(f"[METRICS] cannot listen on {metrics_cfg['host']}:{metrics_cfg['port']}: {e}")
+
+    # ----------- TCP / SERVER LOGIC -------------
+    # ข้อความจากคิวมี consumer เดียวคือ _consume_message (ดู processing_start)
+    def _new_message_queue():
+        return message_queue.BoundedMessageQueue(
+            maxsize=state["queue_size"],
+            policy=state["queue_policy"],
+        )
 
     def start_tcp_server():
         if state["server_running"]:
@@ -142,11 +187,19 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
             server_obj = None
 
             params = set(sig.parameters.keys())
-            if {"host", "port", "message_queue"} <= params:
-                q = queue.Queue()
+            if {"host", "port", "message_queue", "request_handler"} <= params:
+                q = _new_message_queue()
+                state["message_queue"] = q
+                pipeline = _build_pose_pipeline()
+                state["pose_pipeline"] = pipeline
+                server_obj = tcpserver.start_tcp_server(
+                    host=state["tcp_host"], port=state["tcp_port"], message_queue=q,
+                    request_handler=pipeline.handle, **tcpserver.load_tcp_config(),
+                )
+            elif {"host", "port", "message_queue"} <= params:
+                q = _new_message_queue()
                 state["message_queue"] = q
                 server_obj = tcpserver.start_tcp_server(host=state["tcp_host"], port=state["tcp_port"], message_queue=q)
-                threading.Thread(target=_message_reader, args=(q,), daemon=True, name="TCPMessageReader").start()
             elif {"host", "port"} <= params:
                 server_obj = fn(host=state["tcp_host"], port=state["tcp_port"])
             elif len(sig.parameters) == 2:
@@ -161,6 +214,73 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
             ui_set_result(f"Server error: {ex}")
             state["server_running"] = False
 
+    def _build_pose_pipeline():
+        # matcher สร้างตอน Capture แรก (โหลด template/โมดูล matching ช้า และอาจไม่มีในเครื่อง)
+        def make_matcher():
+            # template1 ค้นใน large ROI, template2 ใน small ROI รอบ template1 ([PROGRAMS])
+            # (ไม่เจอใน small ROI -> ค้นซ้ำรอบ template1 ทุกทิศ: ชุดภาพตัวอย่างเจอ 49/49 เท่า TwoTemplateMatcher)
+            # แล้วห่อด้วย tracker: ค้นรอบ pose เดิม/ช่องถัดไปก่อน ค่อย global เมื่อ score ต่ำ
+            from vision.matcher_registry import get_registry
+            from vision.model_file import MODEL_DIR
+            from vision.frame_gate import FrameGate
+            from vision.roi_search import TwoStageMatcher
+            from vision.tracking import GridModel, PoseTracker
+            try:
+                if state["layer_mode"]:
+                    # LayerMatcher ตอบทีละช่องจาก cache อยู่แล้ว (ช่องเปลี่ยนเมื่อหยิบเสร็จ) -> ไม่ผ่าน FrameGate
+                    from vision.pallet import LayerMatcher
+                    from vision.pick_order import PickPlanner
+                    planner = PickPlanner(mm_per_unit=robot_cfg["calpick"]) if state["plan_picks"] else None
+                    # ช่องถัดไปเมื่อหุ่นยืนยันว่าหยิบแล้วเท่านั้น ("finnish" -> PosePipeline.handle -> confirm
+                    # บน connection thread ตามลำดับกับ Capture; increment_counter แค่นับ/แสดงผล)
+                    return LayerMatcher.from_files(rows=state["rows"], cols=state["cols"], planner=planner)
+                # model ที่ build ไว้ (demo/build_models.py) โหลดจาก models/ แบบ memory-map ไม่ต้อง build ใหม่
+                registry = get_registry(model_dir=MODEL_DIR)
+                if state["coarse_scale"]:
+                    from vision.coarse_fine import CoarseToFineMatcher
+                    base = CoarseToFineMatcher.from_files(registry=registry, scale=state["coarse_scale"])
+                else:
+                    base = TwoStageMatcher.from_files(registry=registry)
+                grid = GridModel(state["rows"], state["cols"], *state["track_pitch"])
+                matcher = PoseTracker(base, grid=grid, index_fn=lambda: state["counter"])
+                return FrameGate(matcher) if state["change_gate"] else matcher
+            except Exception as ex:
+                log(f"Matcher unavailable: {ex}")
+                return None
+
+        robot_cfg = pose_pipeline.load_robot_config()
+        on_result = None
+        if robot_cfg["robot_push"] and robot_cfg["robot_ip"] and robot_cfg["robot_port"]:
+            # push ผล/ตัวนับไปหุ่นผ่าน connection ขาออกที่ค้างไว้
+            client = robot_client.get_client(robot_cfg["robot_ip"], robot_cfg["robot_port"])
+            state["robot_client"] = client
+            on_result = client.send_result
+
+        inspect = None
+        if state["oring_check"]:
+            from vision.oring import OringFinder
+            inspect = OringFinder().inspect
+
+        quality = None
+        if state["quality_check"]:
+            from vision.frame_quality import FrameQuality
+            quality = FrameQuality().check
+
+        undistort = None
+        if state["undistort"]:
+            from vision.calibration import Undistorter
+            undistort = Undistorter().undistort_pose
+
+        return pose_pipeline.PosePipeline(
+            frame_source=lambda: state["last_frame"],
+            matcher=make_matcher,
+            robot_cfg=robot_cfg,
+            on_result=on_result,
+            inspect=inspect,
+            quality=quality,
+            undistort=undistort,
+        )
+
     def stop_tcp_server():
         if not state["server_running"]:
             return
@@ -182,7 +302,22 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
             pass
             state["server_running"] = False
             state["tcp_server"] = None
+            if state["message_queue"] is not None and hasattr(state["message_queue"], "stats"):
+                print(f"[tcp] message queue: {state['message_queue'].stats()}")
             state["message_queue"] = None
+            if state["pose_pipeline"] is not None:
+                stats = state["pose_pipeline"].stats()
+                print(f"[tcp] pose requests={stats['requests']} p50={stats['p50']} p95={stats['p95']} p99={stats['p99']} ms")
+                if "matcher" in stats:
+                    print(f"[tcp] matcher: {stats['matcher']}")
+                if "quality" in stats:
+                    print(f"[tcp] quality: {stats['quality']}")
+                state["pose_pipeline"].close()
+                state["pose_pipeline"] = None
+            if state["robot_client"] is not None:
+                print(f"[tcp] robot link: {state['robot_client'].stats()}")
+                robot_client.close_all()
+                state["robot_client"] = None
             ui_set_result("SERVER STOPPED.")
             log("SERVER STOPPED.")
 
@@ -269,6 +404,13 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
         result_output.update()
 
     def camera_worker(cam_index=0):
+        capture_stage = timing.stage("capture")
+        encode_stage = timing.stage("encode")
+        ui_stage = timing.stage("ui_update")
+        acquired = metrics.counter("frames_acquired_total")
+        dropped = metrics.counter("frames_dropped_total")
+        capture_fps = metrics.meter("capture_fps")
+        encode_fps = metrics.meter("encode_fps")
         try:
             cap = cv2.VideoCapture(cam_index)
             state["capture"] = cap
@@ -276,21 +418,30 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
                 ui_set_result(f"Camera {cam_index} not opened.")
                 return
             while state["running"]:
-                ret, frame = cap.read()
+                with capture_stage.time():
+                    ret, frame = cap.read()
                 if not ret or frame is None:
+                    dropped.inc()
                     time.sleep(0.05)
                     continue
-                ok, im_arr = cv2.imencode('.png', frame)
+                acquired.inc()
+                capture_fps.mark()
+                state["last_frame"] = frame
+                with encode_stage.time():
+                    ok, im_arr = cv2.imencode('.png', frame)
+                    im_b64 = base64.b64encode(im_arr.tobytes()).decode('utf-8') if ok else None
                 if not ok:
+                    dropped.inc()
                     time.sleep(0.05)
                     continue
-                im_b64 = base64.b64encode(im_arr.tobytes()).decode('utf-8')
+                encode_fps.mark()
 
                 def update_img(b64=im_b64):
                     if hasattr(camera_frame.content, 'src_base64'):
                         camera_frame.content.src_base64 = b64
                     try:
-                        page.update()
+                        with ui_stage.time():
+                            page.update()
                     except Exception:
                         pass
 
@@ -544,6 +695,13 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
 
     def increment_counter():
         state["counter"] += 1
+        client = state.get("robot_client")
+        if client is not None:
+            client.send(f"COUNT,{state['counter']}", kind="counter")
+            client.send(
+                f"PALLET,{state['rows']},{state['cols']},{state['layer_size']},{state['counter']}",
+                kind="pallet",
+            )
         def _():
             counter_text.value = f"COUNTER : {state['counter']}"
             counter_text.update()
@@ -5,6 +5,7 @@ import threading
 import time
 import os
 import datetime
+import components.timing as timing
 
 
 def build(page: ft.Page, shared: dict) -> ft.Control:
@@ -62,13 +63,15 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
 
     def set_image_from_frame(frame):
         try:
-            ok, im_arr = cv2.imencode(".png", frame)
-            if not ok:
-                return
-            im_b64 = base64.b64encode(im_arr.tobytes()).decode("utf-8")
+            with timing.span("encode"):
+                ok, im_arr = cv2.imencode(".png", frame)
+                if not ok:
+                    return
+                im_b64 = base64.b64encode(im_arr.tobytes()).decode("utf-8")
             if hasattr(image_card.content, "src_base64"):
                 image_card.content.src_base64 = im_b64
-            page.update()
+            with timing.span("ui_update"):
+                page.update()
         except Exception:
             pass
 
@@ -94,7 +97,8 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
                 return
 
             while state["running"]:
-                ret, frame = state["capture"].read()
+                with timing.span("capture"):
+                    ret, frame = state["capture"].read()
                 if not ret or frame is None:
                     time.sleep(0.05)
                     continue
@@ -1,11 +1,58 @@
 import flet as ft
+import components.timing as timing
+
+# ลำดับแสดงผลตามทางเดินของเฟรม; ขั้นอื่นที่มีการจับเวลาต่อท้าย
+STAGE_ORDER = ("capture", "decode", "quality", "match", "inspect", "pose", "encode", "ui_update", "tcp_request")
+
+
+def _fmt(ms):
+    return "-" if ms is None else f"{ms:.2f}"
 
 
 def build(page: ft.Page, shared: dict) -> ft.Control:
+    columns = ["Stage", "Count", "p50 ms", "p95 ms", "p99 ms", "Mean ms", "Max ms"]
+    table = ft.DataTable(
+        columns=[ft.DataColumn(ft.Text(c), numeric=i > 0) for i, c in enumerate(columns)],
+        rows=[],
+    )
+    note = ft.Text("", size=12, italic=True)
+
+    def refresh(e=None):
+        snap = timing.snapshot()
+        names = [n for n in STAGE_ORDER if n in snap] + [n for n in snap if n not in STAGE_ORDER]
+        table.rows = [
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(name)),
+                ft.DataCell(ft.Text(str(s["count"]))),
+                ft.DataCell(ft.Text(_fmt(s["p50_ms"]))),
+                ft.DataCell(ft.Text(_fmt(s["p95_ms"]))),
+                ft.DataCell(ft.Text(_fmt(s["p99_ms"]))),
+                ft.DataCell(ft.Text(_fmt(s["mean_ms"]))),
+                ft.DataCell(ft.Text(_fmt(s["max_ms"]))),
+            ])
+            for name, s in ((n, snap[n]) for n in names)
+        ]
+        note.value = "No timings yet: start the camera or the TCP server on Home." if not names else ""
+        if e is not None:
+            page.update()
+
+    def reset(e):
+        timing.reset()
+        refresh(e)
+
+    refresh()
     return ft.Column(
         [
             ft.Text("Result", size=18, weight="bold"),
-            ft.Text("Display results / logs here."),
+            ft.Row(
+                [
+                    ft.ElevatedButton("Refresh", icon=ft.Icons.REFRESH, on_click=refresh),
+                    ft.OutlinedButton("Reset", icon=ft.Icons.RESTART_ALT, on_click=reset),
+                ],
+                spacing=8,
+            ),
+            table,
+            note,
         ],
         spacing=10,
         horizontal_alignment=ft.CrossAxisAlignment.START,
@@ -52,6 +52,8 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
         ],
         "ROBOT": [
             ("ROBOT_IP", [("ROBOT", "IP"), ("ROBOT", "ROBOT_IP")], False),
+            ("ROBOT_PORT", [("ROBOT", "ROBOT_PORT")], True),
+            ("ROBOT_PUSH", [("ROBOT", "ROBOT_PUSH")], True),
             ("offsetPickX", [("ROBOT", "offsetPickX")], True),
             ("offsetPickY", [("ROBOT", "offsetPickY")], True),
             ("offsetPlaceX", [("ROBOT", "offsetPlaceX")], True),
@@ -59,6 +61,7 @@ def build(page: ft.Page, shared: dict) -> ft.Control:
             ("calpick", [("ROBOT", "calpick")], True),
             ("calplace", [("ROBOT", "calplace")], True),
             ("angle", [("ROBOT", "angle")], True),
+            ("deadline_ms", [("ROBOT", "deadline_ms")], True),
         ],
         "HARDWARE": [
             ("CAMERA_NAME", [("HARDWARE", "CAMERA_NAME")], False),
@@ -0,0 +1 @@
+# vision package
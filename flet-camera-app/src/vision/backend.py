@@ -0,0 +1,40 @@
+import os
+
+# ---------------------------------------------------------------------------
+# เลือก backend ของ template matching
+#   native  => โมดูล matching + DLL จาก opencv_matching (ถ้า build แล้ว)
+#   builtin => vision.shape_match (OpenCV/NumPy ล้วน ใช้ได้ทุกเครื่อง)
+# ---------------------------------------------------------------------------
+
+BACKEND_AUTO = "auto"
+BACKEND_NATIVE = "native"
+BACKEND_BUILTIN = "builtin"
+
+_ENV_KEY = "ROBOTVISION_MATCHER"
+
+
+def _native():
+    import matching
+    path = matching.find_library_path()
+    if not path or not os.path.exists(str(path)):
+        raise ImportError(f"matching native library not found: {path!r}")
+    return matching
+
+
+def load_matching(prefer: str = None):
+    """
+    คืนโมดูลที่มี API แบบ matching (create_matcher_for_template, run_match, ...)
+    prefer: "auto" (default, native ถ้ามี), "native" หรือ "builtin"
+    ตั้งค่าเริ่มต้นได้ด้วย env ROBOTVISION_MATCHER
+    """
+    prefer = prefer or os.environ.get(_ENV_KEY, BACKEND_AUTO)
+    if prefer == BACKEND_BUILTIN:
+        from vision import shape_match
+        return shape_match
+    try:
+        return _native()
+    except Exception:
+        if prefer == BACKEND_NATIVE:
+            raise
+    from vision import shape_match
+    return shape_match
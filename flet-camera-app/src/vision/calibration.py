@@ -0,0 +1,216 @@
+import configparser
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, fields, replace
+
+import cv2
+import numpy as np
+
+from vision.pose import PROJECT_ROOT, angle_between
+from vision.roi_search import CONFIG_PATH
+
+# ---------------------------------------------------------------------------
+# Lens distortion ตาม camera model ของ hdev:
+#   gen_cam_par_area_scan_division (12 mm, kappa 0, 4.65 um x2, 4.65 um x2, 2592/2, 1944/2, 2592, 1944)
+# division model (HALCON): พิกัดบน sensor (เมตร) ที่บิด d -> ไม่บิด u = d / (1 + kappa |d|^2)
+#   ย้อนกลับได้ตรง ๆ: d = 2u / (1 + sqrt(1 - 4 kappa |u|^2))  -> สร้าง map ได้ exact ไม่ต้อง iterate
+# ถ้า calibrate ด้วย OpenCV (K + dist แบบ Brown) ใส่ dist ไว้ใน CameraModel -> ใช้ cv2.initUndistortRectifyMap
+# map คำนวณครั้งเดียวต่อ (model, ขนาดภาพ) แล้วเก็บเป็น .npz ใน CALIB_DIR; kappa = 0 และไม่มี dist = identity
+# พิกัดที่ได้ = ภาพไม่บิดที่ K เดิม (ขนาดเท่าเดิม) -> ใช้แทนพิกัดภาพเดิมได้ทันที
+# ---------------------------------------------------------------------------
+
+CALIB_DIR = os.path.join(PROJECT_ROOT, "calibration")
+MAP_VERSION = 1
+
+
+@dataclass(frozen=True)
+class CameraModel:
+    focus: float = 0.012           # m
+    kappa: float = 0.0             # 1/m^2 (division model)
+    sx: float = 4.65e-6 * 2        # ขนาด pixel (m)
+    sy: float = 4.65e-6 * 2
+    cx: float = 2592 / 2           # จุด principal (pixel)
+    cy: float = 1944 / 2
+    width: int = 2592
+    height: int = 1944
+    dist: tuple = ()               # ค่า distortion แบบ OpenCV (k1, k2, p1, p2[, k3...]); ว่าง = division model
+
+    @property
+    def identity(self) -> bool:
+        return self.kappa == 0.0 and not any(self.dist)
+
+    def camera_matrix(self) -> np.ndarray:
+        return np.array([[self.focus / self.sx, 0.0, self.cx],
+                         [0.0, self.focus / self.sy, self.cy],
+                         [0.0, 0.0, 1.0]], dtype=np.float64)
+
+    def for_size(self, width: int, height: int) -> "CameraModel":
+        """
+        model สำหรับภาพขนาด width x height
+        อัตราส่วนเท่าเดิม = binning/ย่อ (ขยายขนาด pixel); ไม่เท่า = ROI กลาง sensor ของกล้อง (เลื่อนจุด principal)
+        """
+        width, height = int(width), int(height)
+        if (width, height) == (self.width, self.height):
+            return self
+        fx, fy = self.width / float(width), self.height / float(height)
+        if abs(fx - fy) < 1e-6:
+            return replace(self, sx=self.sx * fx, sy=self.sy * fy, cx=(self.cx + 0.5) / fx - 0.5,
+                           cy=(self.cy + 0.5) / fy - 0.5, width=width, height=height)
+        return replace(self, cx=self.cx - (self.width - width) / 2.0, cy=self.cy - (self.height - height) / 2.0,
+                       width=width, height=height)
+
+    def key(self) -> str:
+        blob = json.dumps(dict(asdict(self), version=MAP_VERSION), sort_keys=True).encode("utf-8")
+        return hashlib.sha1(blob).hexdigest()[:16]
+
+    @classmethod
+    def from_config(cls, path=None):
+        """section [CALIBRATION] ของ pages/config.ini (ไม่มี = ค่าจาก hdev)"""
+        cfg = configparser.ConfigParser()
+        cfg.read(path or CONFIG_PATH, encoding="utf-8")
+        values = {}
+        for f in fields(cls):
+            if f.name == "dist" or not cfg.has_option("CALIBRATION", f.name):
+                continue
+            try:
+                values[f.name] = (int if f.type is int else float)(cfg.getfloat("CALIBRATION", f.name))
+            except ValueError:
+                continue
+        if cfg.has_option("CALIBRATION", "dist"):
+            try:
+                values["dist"] = tuple(float(v) for v in cfg.get("CALIBRATION", "dist").split(",") if v.strip())
+            except ValueError:
+                pass
+        return cls(**values)
+
+
+HDEV_CAMERA = CameraModel()
+
+
+def undistort_maps(model: CameraModel):
+    """(map_x, map_y) float32 สำหรับ cv2.remap: pixel (x, y) ของภาพไม่บิด <- pixel map[y, x] ของภาพจากกล้อง"""
+    size = (model.width, model.height)
+    k = model.camera_matrix()
+    if any(model.dist):
+        return cv2.initUndistortRectifyMap(k, np.asarray(model.dist, np.float64), None, k, size, cv2.CV_32FC1)
+    xs = (np.arange(model.width, dtype=np.float64) - model.cx) * model.sx
+    ys = (np.arange(model.height, dtype=np.float64) - model.cy) * model.sy
+    ux, uy = np.meshgrid(xs, ys)
+    r2 = ux * ux + uy * uy
+    # 1 - 4 kappa r^2 < 0 เกิดได้เฉพาะ kappa > 0 (pincushion) ไกลเกินขอบ sensor -> ให้ออกนอกภาพ
+    root = np.sqrt(np.maximum(1.0 - 4.0 * model.kappa * r2, 0.0))
+    scale = 2.0 / (1.0 + root)
+    scale[1.0 - 4.0 * model.kappa * r2 < 0.0] = np.inf
+    map_x = (ux * scale / model.sx + model.cx).astype(np.float32)
+    map_y = (uy * scale / model.sy + model.cy).astype(np.float32)
+    return map_x, map_y
+
+
+def undistort_points(points, model: CameraModel) -> np.ndarray:
+    """pixel ที่บิด (N, 2) -> pixel ไม่บิด (N, 2) ที่ K เดิม (ใช้กับจุดที่ match ได้: ไม่ต้อง remap ภาพ)"""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if model.identity:
+        return pts.copy()
+    k = model.camera_matrix()
+    if any(model.dist):
+        out = cv2.undistortPoints(pts.reshape(-1, 1, 2), k, np.asarray(model.dist, np.float64), P=k)
+        return out.reshape(-1, 2)
+    dx = (pts[:, 0] - model.cx) * model.sx
+    dy = (pts[:, 1] - model.cy) * model.sy
+    s = 1.0 / (1.0 + model.kappa * (dx * dx + dy * dy))
+    return np.stack([dx * s / model.sx + model.cx, dy * s / model.sy + model.cy], axis=1)
+
+
+class Undistorter:
+    """
+    แก้ distortion ตาม CameraModel สำหรับเฟรมทุกขนาดที่เจอ (model ปรับตามขนาดด้วย CameraModel.for_size)
+    maps(shape): map ของขนาดนั้น (โหลดจาก cache_dir หรือคำนวณแล้วบันทึก) — เก็บไว้ใน memory ต่อขนาด
+    remap_roi(frame, bounds): ภาพไม่บิดเฉพาะกรอบ (x0, y0, x1, y1) ในพิกัดไม่บิด
+    undistort_points / undistort_pose: แก้เฉพาะจุด (ถูกที่สุด)
+    """
+
+    def __init__(self, model: CameraModel = None, cache_dir=CALIB_DIR, save=True):
+        self.model = model or CameraModel.from_config()
+        self.cache_dir = cache_dir
+        self.save = save
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    @property
+    def identity(self) -> bool:
+        return self.model.identity
+
+    def model_for(self, shape) -> CameraModel:
+        return self.model.for_size(shape[1], shape[0])
+
+    def cache_path(self, model: CameraModel) -> str:
+        return os.path.join(self.cache_dir, f"undistort-{model.width}x{model.height}-{model.key()}.npz")
+
+    def maps(self, shape):
+        size = (int(shape[1]), int(shape[0]))
+        with self._lock:
+            cached = self._maps.get(size)
+            if cached is not None:
+                return cached
+            model = self.model_for(shape)
+            path = self.cache_path(model) if self.cache_dir else None
+            maps = None
+            if path and os.path.exists(path):
+                try:
+                    with np.load(path) as data:
+                        maps = (data["map_x"], data["map_y"])
+                    if maps[0].shape != (size[1], size[0]):
+                        maps = None
+                except (OSError, KeyError, ValueError) as e:
+                    print(f"[calib] cannot load {path}: {e}")
+                    maps = None
+            if maps is None:
+                maps = undistort_maps(model)
+                if path and self.save:
+                    try:
+                        os.makedirs(self.cache_dir, exist_ok=True)
+                        tmp = f"{path}.{os.getpid()}.tmp.npz"
+                        np.savez(tmp, map_x=maps[0], map_y=maps[1])
+                        os.replace(tmp, path)
+                    except OSError as e:
+                        print(f"[calib] cannot save {path}: {e}")
+            self._maps[size] = maps
+            return maps
+
+    def remap(self, frame, interpolation=cv2.INTER_LINEAR):
+        """ภาพไม่บิดทั้งเฟรม (แพง: ใช้ remap_roi หรือ undistort_points ถ้าได้)"""
+        if self.identity:
+            return frame
+        map_x, map_y = self.maps(frame.shape)
+        return cv2.remap(frame, map_x, map_y, interpolation)
+
+    def remap_roi(self, frame, bounds, interpolation=cv2.INTER_LINEAR):
+        """
+        ภาพไม่บิดของกรอบ bounds = (x0, y0, x1, y1) ในพิกัดไม่บิด (ตัดตามขนาดภาพ)
+        คืน (patch, (x0, y0)); remap เฉพาะ pixel ในกรอบ — แหล่งข้อมูลยังเป็นเฟรมเต็ม (map ชี้ออกนอกกรอบได้)
+        """
+        h, w = frame.shape[:2]
+        x0, y0 = max(0, int(bounds[0])), max(0, int(bounds[1]))
+        x1, y1 = min(w, int(bounds[2])), min(h, int(bounds[3]))
+        if x1 <= x0 or y1 <= y0:
+            return frame[0:0, 0:0], (x0, y0)
+        if self.identity:
+            return frame[y0:y1, x0:x1], (x0, y0)
+        map_x, map_y = self.maps(frame.shape)
+        patch = cv2.remap(frame, map_x[y0:y1, x0:x1], map_y[y0:y1, x0:x1], interpolation)
+        return patch, (x0, y0)
+
+    def undistort_points(self, points, shape) -> np.ndarray:
+        return undistort_points(points, self.model_for(shape))
+
+    def undistort_pose(self, pose, shape):
+        """pose dict ของ two_template_pose -> c1/c2 ไม่บิด และมุมคำนวณใหม่จากจุดที่แก้แล้ว (เก็บค่าเดิมใน c1_raw/c2_raw)"""
+        if pose is None or self.identity:
+            return pose
+        c1, c2 = self.undistort_points([pose["c1"], pose["c2"]], shape)
+        c1, c2 = (float(c1[0]), float(c1[1])), (float(c2[0]), float(c2[1]))
+        ang = angle_between(c1, c2, (c1[0], c2[1]))
+        return dict(pose, c1=c1, c2=c2, angle=pose["angle"] if ang is None else ang,
+                    c1_raw=pose["c1"], c2_raw=pose["c2"])
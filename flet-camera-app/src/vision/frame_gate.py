@@ -0,0 +1,111 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Change gate: ถ้าเฟรมใหม่แทบไม่ต่างจากเฟรมที่ match ไปล่าสุด (หุ่นไม่อยู่/พาเลทนิ่ง) ให้ตอบผลเดิม
+#   เลือก pixel ทุก ๆ step แล้วย่อ INTER_AREA เหลือ GATE_WIDTH px (เฉลี่ย noise ของกล้องไปในตัว)
+#   -> gray -> absdiff กับ thumbnail เดิม
+#   "เปลี่ยน" = สัดส่วน pixel ที่ต่างเกิน pixel_threshold มากกว่า changed_ratio
+# ผลเดิมใช้ได้ไม่เกิน max_age_s วินาที (0 = ไม่จำกัด) กันค้างผลเก่าถ้าเปลี่ยนทีละนิดจนไม่ถึงเกณฑ์
+# ---------------------------------------------------------------------------
+
+GATE_WIDTH = 64
+GATE_OVERSAMPLE = 4      # ก่อนย่อ INTER_AREA ยังเหลือ >= 4 ตัวอย่างต่อ pixel ของ thumbnail ในแต่ละแกน
+PIXEL_THRESHOLD = 8      # ระดับเทา (0-255) ที่นับว่า pixel ใน thumbnail เปลี่ยน
+CHANGED_RATIO = 0.002    # สัดส่วน pixel ที่เปลี่ยนแล้วถือว่าเฟรมเปลี่ยน (64x36 -> ~5 pixel)
+MAX_AGE_S = 10.0
+
+
+def thumbnail(frame, width: int = GATE_WIDTH) -> np.ndarray:
+    """ภาพ gray ย่อกว้าง width px (ย่อก่อนแปลงสี: ไม่ต้อง cvtColor ทั้งเฟรม)"""
+    h, w = frame.shape[:2]
+    size = (int(width), max(1, int(round(h * width / float(w)))))
+    step = max(1, w // (int(width) * GATE_OVERSAMPLE))
+    small = cv2.resize(frame[::step, ::step], size, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def changed_fraction(a: np.ndarray, b: np.ndarray, pixel_threshold: int = PIXEL_THRESHOLD) -> float:
+    """สัดส่วน pixel ของ thumbnail สองภาพที่ต่างกันเกิน pixel_threshold (ขนาดไม่ตรง = เปลี่ยนทั้งภาพ)"""
+    if a.shape != b.shape:
+        return 1.0
+    return float(np.count_nonzero(cv2.absdiff(a, b) > pixel_threshold)) / a.size
+
+
+class FrameGate:
+    """
+    ห่อ matcher ที่มี match(frame) และได้ผลเดิมเมื่อเฟรมเดิม (TwoTemplateMatcher / TwoStageMatcher / PoseTracker)
+    — ไม่ใช้กับ LayerMatcher ที่ตอบตามช่องที่ถึงคิวหยิบ (ไม่ขึ้นกับเฟรม)
+    match(frame): เฟรมไม่เปลี่ยน -> คืนผลล่าสุด (pose dict copy + "cached": True หรือ None) โดยไม่ match ใหม่
+    """
+
+    def __init__(self, base, width=GATE_WIDTH, pixel_threshold=PIXEL_THRESHOLD, changed_ratio=CHANGED_RATIO,
+                 max_age_s=MAX_AGE_S):
+        self.base = base
+        self.mt = getattr(base, "mt", None)
+        self.width = int(width)
+        self.pixel_threshold = int(pixel_threshold)
+        self.changed_ratio = float(changed_ratio)
+        self.max_age_s = float(max_age_s)
+        self._thumb = None
+        self._pose = None
+        self._stamp = 0.0
+        self._lock = threading.Lock()
+        self.last_change = None
+        self.hits = 0
+        self.misses = 0
+        self.gate_ms = 0.0
+        self.match_ms = 0.0
+
+    def match(self, frame):
+        t0 = time.perf_counter()
+        thumb = thumbnail(frame, self.width)
+        fresh = self._thumb is not None and (self.max_age_s <= 0 or t0 - self._stamp <= self.max_age_s)
+        self.last_change = changed_fraction(thumb, self._thumb, self.pixel_threshold) if fresh else 1.0
+        t1 = time.perf_counter()
+        if self.last_change <= self.changed_ratio:
+            with self._lock:
+                self.hits += 1
+                self.gate_ms += (t1 - t0) * 1000.0
+            return None if self._pose is None else dict(self._pose, cached=True)
+
+        pose = self.base.match(frame)
+        t2 = time.perf_counter()
+        with self._lock:
+            self.misses += 1
+            self.gate_ms += (t1 - t0) * 1000.0
+            self.match_ms += (t2 - t1) * 1000.0
+        self._thumb, self._pose, self._stamp = thumb, pose, t2
+        return pose
+
+    def reset(self):
+        """ลืมเฟรม/ผลล่าสุด (เช่นเปลี่ยนชั้นหรือเปลี่ยน program): เฟรมถัดไป match ใหม่เสมอ"""
+        self._thumb = None
+        self._pose = None
+        if hasattr(self.base, "reset"):
+            self.base.reset()
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.hits + self.misses
+            mean_match = self.match_ms / self.misses if self.misses else 0.0
+            out = {
+                "gate_hits": self.hits,
+                "gate_misses": self.misses,
+                "gate_hit_rate": self.hits / calls if calls else 0.0,
+                "gate_ms": self.gate_ms / calls if calls else 0.0,
+                # เวลาที่ไม่ต้อง match (ประมาณด้วยเวลา match เฉลี่ย) หักเวลาตรวจของทุกเฟรม
+                "gate_saved_ms": mean_match * self.hits - self.gate_ms,
+            }
+        if hasattr(self.base, "stats"):
+            out.update(self.base.stats())
+        return out
+
+    def release(self):
+        if hasattr(self.base, "release"):
+            self.base.release()
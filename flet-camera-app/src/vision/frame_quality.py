@@ -0,0 +1,105 @@
+import configparser
+import threading
+import time
+from dataclasses import dataclass, fields
+
+import cv2
+import numpy as np
+
+from vision.roi_search import CONFIG_PATH
+
+# ---------------------------------------------------------------------------
+# ตรวจคุณภาพเฟรมก่อน match (exposure_time สั้น + หุ่นกำลังขยับ -> ภาพเบลอ/มืด)
+#   ใช้ภาพ decimate (ทุก ๆ step pixel, gray) ไม่ใช่ทั้งเฟรม:
+#   - ความคม  = variance ของ Laplacian (ภาพเบลอ -> ขอบอ่อน -> variance ต่ำ)
+#   - exposure = สัดส่วน pixel ที่ติดดำ (<= DARK_LEVEL) / ติดขาว (>= BRIGHT_LEVEL) จาก histogram และค่าเฉลี่ย
+# ฉากจริงเป็นแบบ backlight: พื้นหลังขาวติดขาว ~70% ของภาพเป็นปกติ จึงตั้ง max_bright ไว้สูง
+# ค่าจาก section [QUALITY] ของ pages/config.ini (ไม่มี = ค่าเริ่มต้นข้างล่าง)
+# ---------------------------------------------------------------------------
+
+DARK_LEVEL = 5
+BRIGHT_LEVEL = 250
+
+
+@dataclass
+class QualityParams:
+    step: int = 4                # decimation (1920x1080 -> 480x270)
+    min_sharpness: float = 2500.0  # variance ของ Laplacian ขั้นต่ำ (ภาพคมจริง ~5700, เบลอ 15 px ~1700)
+    max_dark: float = 0.5        # สัดส่วน pixel ติดดำสูงสุด
+    max_bright: float = 0.95     # สัดส่วน pixel ติดขาวสูงสุด
+    min_mean: float = 60.0       # ความสว่างเฉลี่ยขั้นต่ำ (under-exposure)
+
+    @classmethod
+    def from_config(cls, path=None):
+        cfg = configparser.ConfigParser()
+        cfg.read(path or CONFIG_PATH, encoding="utf-8")
+        values = {}
+        for f in fields(cls):
+            try:
+                if cfg.has_option("QUALITY", f.name):
+                    values[f.name] = f.type(cfg.getfloat("QUALITY", f.name))
+            except ValueError:
+                continue
+        return cls(**values)
+
+
+class FrameQuality:
+    """
+    check(frame) -> dict: ok, reason ("" / "blur" / "dark" / "bright"), sharpness, dark, bright, mean, ms
+    ใช้เป็น PosePipeline(quality=FrameQuality().check) ได้เลย; นับจำนวนที่ตรวจ/ไม่ผ่านแยกตามเหตุผลไว้ใน stats()
+    """
+
+    def __init__(self, params: QualityParams = None):
+        self.params = params or QualityParams.from_config()
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.rejected = {"blur": 0, "dark": 0, "bright": 0}
+        self.total_ms = 0.0
+        self.last = None
+
+    def measure(self, frame) -> dict:
+        step = max(1, int(self.params.step))
+        small = frame[::step, ::step]
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else np.ascontiguousarray(small)
+        _, sd = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S, ksize=3))
+        hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        n = float(gray.size)
+        return {
+            "sharpness": float(sd[0, 0]) ** 2,
+            "dark": float(hist[:DARK_LEVEL + 1].sum()) / n,
+            "bright": float(hist[BRIGHT_LEVEL:].sum()) / n,
+            "mean": float(np.dot(hist, np.arange(256))) / n,
+        }
+
+    def check(self, frame) -> dict:
+        p = self.params
+        t0 = time.perf_counter()
+        out = self.measure(frame)
+        if out["dark"] > p.max_dark or out["mean"] < p.min_mean:
+            reason = "dark"
+        elif out["bright"] > p.max_bright:
+            reason = "bright"
+        elif out["sharpness"] < p.min_sharpness:
+            reason = "blur"
+        else:
+            reason = ""
+        ms = (time.perf_counter() - t0) * 1000.0
+        out.update(ok=not reason, reason=reason, ms=ms)
+        with self._lock:
+            self.checked += 1
+            self.total_ms += ms
+            if reason:
+                self.rejected[reason] += 1
+        self.last = out
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            rejected = sum(self.rejected.values())
+            return {
+                "checked": self.checked,
+                "rejected": rejected,
+                "reject_rate": rejected / self.checked if self.checked else 0.0,
+                "reasons": dict(self.rejected),
+                "quality_ms": self.total_ms / self.checked if self.checked else 0.0,
+            }
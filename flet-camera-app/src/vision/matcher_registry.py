@@ -0,0 +1,216 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Matcher registry: สร้าง matcher ครั้งเดียวต่อ (template, params) แล้วใช้ซ้ำทุกเฟรม
+# - key = hash ของเนื้อภาพ template + ค่าใน MatchingParams
+# - LRU ตามเพดานหน่วยความจำ; ถูกไล่ออกเมื่อไหร่จะเรียก release_matcher คืน native handle
+# - lease: acquire() ปักหมุด entry (refcount) จนกว่าจะ release(); entry ที่ยังมีคนถืออยู่ไม่ถูกไล่ออก
+#   get() แค่ยืมชั่วคราว (ใช้ทันทีแล้วทิ้ง) — object ที่ถือ matcher ไว้นาน ๆ ต้องใช้ acquire()
+# - thread-safe: หลายเธรดขอ key เดียวกันพร้อมกันจะ build แค่ครั้งเดียว
+# - model_dir: backend ที่มี load_model (built-in) โหลด model ที่ build ไว้แล้วจากไฟล์ (vision.model_file)
+# ---------------------------------------------------------------------------
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def template_hash(img) -> str:
+    arr = np.ascontiguousarray(img)
+    h = hashlib.sha1()
+    h.update(f"{arr.shape}|{arr.dtype.str}|".encode("ascii"))
+    h.update(arr.data)
+    return h.hexdigest()
+
+
+def params_key(params) -> tuple:
+    """ทำ MatchingParams (ctypes struct / dataclass / object) ให้เป็น tuple ที่ hash ได้"""
+    if params is None:
+        return ()
+    fields = getattr(params, "_fields_", None)
+    if fields:
+        return tuple((name, getattr(params, name)) for name, *_ in fields)
+    if hasattr(params, "__dataclass_fields__"):
+        return tuple((name, getattr(params, name)) for name in params.__dataclass_fields__)
+    if hasattr(params, "__dict__"):
+        return tuple(sorted(vars(params).items()))
+    return (repr(params),)
+
+
+def estimate_matcher_bytes(template_img, params) -> int:
+    """
+    ประมาณขนาด matcher: template ต่อ 1 มุมหมุน คูณจำนวนมุม (ค่าหยาบ ใช้แค่จัดลำดับ eviction)
+    """
+    nbytes = int(np.asarray(template_img).nbytes)
+    step = float(getattr(params, "angle", 0.0) or 0.0)
+    n_angles = int(360.0 / step) if step > 0 else 1
+    return max(nbytes, nbytes * n_angles // 4)
+
+
+class MatcherRegistry:
+    def __init__(self, mt=None, dll_path=None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = 32, size_fn=None, model_dir=None):
+        if mt is None:
+            from vision.backend import load_matching
+            mt = load_matching()
+        self.mt = mt
+        if dll_path is None and hasattr(mt, "find_library_path"):
+            dll_path = mt.find_library_path()
+        self.dll_path = dll_path
+        self.max_bytes = int(max_bytes)
+        self.max_entries = int(max_entries)
+        self.size_fn = size_fn or getattr(mt, "estimate_matcher_bytes", None) or estimate_matcher_bytes
+        self.model_dir = model_dir if hasattr(self.mt, "load_model") else None
+
+        self._entries = OrderedDict()  # key -> [matcher, nbytes, refs]
+        self._keys = {}  # id(matcher) -> key (สำหรับ release)
+        self._building = {}  # key -> Lock
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loaded = 0  # จำนวน matcher ที่ได้จากไฟล์ model (ไม่ต้อง build)
+
+    def key_for(self, template_img, params) -> tuple:
+        return (template_hash(template_img), params_key(params))
+
+    def get(self, template_img, params):
+        """คืน matcher ของ template นี้ (build ถ้ายังไม่มี) — ไม่ปักหมุด อาจถูกไล่ออกเมื่อมี entry ใหม่"""
+        return self._get(template_img, params, pin=False)
+
+    def acquire(self, template_img, params):
+        """เหมือน get() แต่ปักหมุด entry ไว้จนกว่าจะเรียก release(matcher)"""
+        return self._get(template_img, params, pin=True)
+
+    def release(self, matcher):
+        """คืน lease จาก acquire(); entry ที่ไม่มีคนถือแล้วถูกไล่ออกได้ตามปกติ"""
+        with self._lock:
+            key = self._keys.get(id(matcher))
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None or entry[0] is not matcher or entry[2] <= 0:
+                return
+            entry[2] -= 1
+            evicted = self._evict_locked() if entry[2] == 0 else []
+        for m in evicted:
+            self._release(m)
+
+    def _get(self, template_img, params, pin: bool):
+        key = self.key_for(template_img, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                entry[2] += pin
+                return entry[0]
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    # เธรดอื่น build เสร็จไปแล้วระหว่างรอ
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    entry[2] += pin
+                    return entry[0]
+                self.misses += 1
+            matcher = self._build(template_img, params)
+            nbytes = int(self.size_fn(template_img, params))
+            with self._lock:
+                self._entries[key] = [matcher, nbytes, int(pin)]
+                self._keys[id(matcher)] = key
+                self.bytes += nbytes
+                self._building.pop(key, None)
+                evicted = self._evict_locked(keep=key)
+        for m in evicted:
+            self._release(m)
+        return matcher
+
+    def _build(self, template_img, params):
+        if self.model_dir is not None:
+            from vision.model_file import load_or_build
+            matcher, loaded = load_or_build(template_img, params, self.model_dir)
+            if loaded:
+                with self._lock:
+                    self.loaded += 1
+            return matcher
+        return self.mt.create_matcher_for_template(template_img, self.dll_path, params)
+
+    def _evict_locked(self, keep=None) -> list:
+        # ไล่จากเก่าสุด ข้ามตัวที่เพิ่ง build และตัวที่ถูก acquire อยู่ (อาจเกินเพดานชั่วคราว)
+        evicted = []
+        for key in list(self._entries):
+            if self.bytes <= self.max_bytes and len(self._entries) <= self.max_entries:
+                break
+            matcher, nbytes, refs = self._entries[key]
+            if key == keep or refs > 0:
+                continue
+            del self._entries[key]
+            self._keys.pop(id(matcher), None)
+            self.bytes -= nbytes
+            self.evictions += 1
+            evicted.append(matcher)
+        return evicted
+
+    def _release(self, matcher):
+        if hasattr(self.mt, "release_matcher"):
+            try:
+                self.mt.release_matcher(matcher)
+            except Exception as e:
+                print(f"[registry] release_matcher error: {e}")
+
+    def clear(self):
+        """ปล่อยทุก entry ที่ไม่มีคนถือ (ตัวที่ถูก acquire อยู่ค้างไว้จนกว่าจะ release)"""
+        with self._lock:
+            matchers = []
+            for key, (matcher, nbytes, refs) in list(self._entries.items()):
+                if refs > 0:
+                    continue
+                del self._entries[key]
+                self._keys.pop(id(matcher), None)
+                self.bytes -= nbytes
+                matchers.append(matcher)
+        for m in matchers:
+            self._release(m)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "pinned": sum(1 for e in self._entries.values() if e[2] > 0),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "loaded": self.loaded,
+            }
+
+
+_default = None
+_default_kwargs = {}
+_default_lock = threading.Lock()
+
+
+def get_registry(mt=None, **kwargs) -> MatcherRegistry:
+    """
+    Registry กลางของโปรเซส (สร้างครั้งแรกที่เรียก)
+    เรียกซ้ำแบบไม่ส่ง argument ได้ตัวเดิม; ส่ง mt/kwargs ที่ต่างจากตอนสร้าง -> ValueError
+    """
+    global _default, _default_kwargs
+    with _default_lock:
+        if _default is None:
+            _default = MatcherRegistry(mt=mt, **kwargs)
+            _default_kwargs = dict(kwargs)
+        elif (mt is not None and mt is not _default.mt) or (kwargs and kwargs != _default_kwargs):
+            raise ValueError(f"get_registry: registry already created with {_default_kwargs!r}, got {kwargs!r}"
+                             + (" and a different mt" if mt is not None and mt is not _default.mt else ""))
+        return _default
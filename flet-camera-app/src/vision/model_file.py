@@ -0,0 +1,204 @@
+import dataclasses
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from vision.matcher_registry import template_hash
+from vision.pose import PROJECT_ROOT
+from vision.template_bank import _AngleTable
+
+# ---------------------------------------------------------------------------
+# ไฟล์ model ที่ build ไว้แล้ว (แบบ read_shape_model ของ HALCON) ของ matcher built-in ทั้งสองแบบ
+#   method="ncc" (ค่าเริ่มต้นของแอป, NccMatcher) และ method="shape" (ShapeMatcher) — ดู params.method ใน header
+#
+# layout: MAGIC | version (u32) | ความยาว header (u32) | header JSON | array ต่อกัน (align 64 byte)
+#   header: hash ของภาพ template ต้นฉบับ, MatchingParams, ขนาด template, dtype/shape/offset ของทุก array
+#   array (shape): จุดขอบ (dx, dy, theta) ทุกชั้น + ตารางมุมหมุน (rx, ry, cos, sin, z2) ทุกชั้น
+#   array (ncc):   pyramid ของ template + template หมุนทุกมุมใน grid ทุกชั้น
+#                  (ชั้นบนสุด: template/mask; ชั้นล่าง: zero_mean/spans) — ชั้นที่ bank หมุนเมื่อใช้ (lazy) ไม่เก็บ
+# โหลดด้วย mmap แล้วชี้ array ตรงเข้าไปในไฟล์ (np.frombuffer ไม่ copy) -> ไม่ต้องหา feature/หมุน model ใหม่
+# FFT ของ kernel ชั้นบนสุด (shape) ขึ้นกับขนาดเฟรม ยังสร้างตอนเฟรมแรกเหมือนเดิม
+# ---------------------------------------------------------------------------
+
+MAGIC = b"SHMODEL\0"
+MODEL_VERSION = 1
+MODEL_EXT = ".smf"
+MODEL_DIR = os.path.join(PROJECT_ROOT, "models")
+ALIGN = 64
+# field ของ MatchingParams ที่เปลี่ยน model; field อื่น (maxCount, scoreThreshold, ...) ใช้ตอนค้นเท่านั้น
+BUILD_FIELDS = ("method", "angle", "angleStep", "numLevels", "numFeatures", "minContrast")
+
+_PREFIX = struct.Struct("<8sII")
+_TABLE_FIELDS = ("angles", "rx", "ry", "cos", "sin", "z2")
+_ROTATED_FIELDS = ("template", "mask", "zero_mean", "spans")
+
+
+class ModelFileError(ValueError):
+    """ไฟล์ model อ่านไม่ได้ / คนละ version / ไม่ตรงกับ template หรือ params ที่ขอ"""
+
+
+def build_key(params) -> dict:
+    return {name: getattr(params, name) for name in BUILD_FIELDS}
+
+
+def model_path(model_dir, source_hash: str, params) -> str:
+    """ชื่อไฟล์ผูกกับ template + build params: recipe ต่างกันได้ไฟล์ต่างกัน"""
+    tag = hashlib.sha1(json.dumps(build_key(params), sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(model_dir, f"{source_hash[:16]}-{tag}{MODEL_EXT}")
+
+
+def _shape_arrays(matcher):
+    arrays = {}
+    for lv, (m, t) in enumerate(zip(matcher.levels, matcher.bank.tables)):
+        arrays[f"L{lv}.dx"] = m.dx
+        arrays[f"L{lv}.dy"] = m.dy
+        arrays[f"L{lv}.theta"] = m.theta
+        for name in _TABLE_FIELDS:
+            arrays[f"T{lv}.{name}"] = getattr(t, name)
+    return arrays, {"level_sizes": [list(m.size) for m in matcher.levels]}
+
+
+def _ncc_arrays(matcher):
+    arrays = {}
+    rotated = []
+    for lv, level in enumerate(matcher.bank):
+        arrays[f"N{lv}.template"] = level.template
+        if level.lazy:
+            rotated.append(0)
+            continue
+        entries = level.entries()
+        rotated.append(len(entries))
+        for i, e in enumerate(entries):
+            for name in _ROTATED_FIELDS:
+                arr = getattr(e, name)
+                if arr is not None:  # มุม 0 ชั้นบนสุดไม่มี mask
+                    arrays[f"R{lv}.{i}.{name}"] = arr
+    return arrays, {"rotated": rotated}
+
+
+def save_model(matcher, path: str, source_hash: str) -> str:
+    """เขียน model ของ ShapeMatcher/NccMatcher ลงไฟล์ (เขียนไฟล์ชั่วคราวแล้ว rename -> ไม่มีไฟล์ครึ่ง ๆ)"""
+    from vision.ncc_match import NccMatcher
+
+    arrays, extra = (_ncc_arrays if isinstance(matcher, NccMatcher) else _shape_arrays)(matcher)
+    table = {}
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        arrays[name] = arr
+        table[name] = [arr.dtype.str, list(arr.shape), offset]
+        offset += (arr.nbytes + ALIGN - 1) // ALIGN * ALIGN
+    header = {
+        "version": MODEL_VERSION,
+        "source_hash": source_hash,
+        "params": dataclasses.asdict(matcher.params),
+        "template_size": list(matcher.template_size),
+        "arrays": table,
+    }
+    header.update(extra)
+    blob = json.dumps(header, sort_keys=True).encode("utf-8")
+    start = _PREFIX.size + len(blob)
+    start = (start + ALIGN - 1) // ALIGN * ALIGN
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, MODEL_VERSION, len(blob)))
+        f.write(blob)
+        for name, arr in arrays.items():
+            f.seek(start + table[name][2])
+            f.write(arr.tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+    return path
+
+
+def read_header(path: str):
+    """คืน (header dict, offset เริ่มของ array) โดยอ่านแค่ส่วนหัวของไฟล์"""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ModelFileError(f"{path}: truncated model file")
+        magic, version, length = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ModelFileError(f"{path}: not a shape model file")
+        if version != MODEL_VERSION:
+            raise ModelFileError(f"{path}: model version {version}, expected {MODEL_VERSION} (rebuild)")
+        header = json.loads(f.read(length).decode("utf-8"))
+    start = (_PREFIX.size + length + ALIGN - 1) // ALIGN * ALIGN
+    return header, start
+
+
+def load_model(path: str, params=None, source_hash: str = None):
+    """
+    เปิดไฟล์ model แบบ memory-map แล้วคืน ShapeMatcher หรือ NccMatcher ตาม method ที่ build ไว้
+    source_hash: hash ของภาพ template ปัจจุบัน (template_hash) — ไม่ตรง = model เก่า -> ModelFileError
+    params: MatchingParams ที่ต้องการ; build field ต้องตรงกับไฟล์, field สำหรับค้น (maxCount, ...) ใช้ของ params นี้
+    """
+    from vision import shape_match as sm
+
+    header, start = read_header(path)
+    if source_hash is not None and header["source_hash"] != source_hash:
+        raise ModelFileError(f"{path}: built from a different template (rebuild)")
+    known = {f.name for f in dataclasses.fields(sm.MatchingParams)}
+    stored = sm.MatchingParams(**{k: v for k, v in header["params"].items() if k in known})
+    if params is None:
+        params = stored
+    elif build_key(params) != build_key(stored):
+        raise ModelFileError(f"{path}: built with {build_key(stored)}, requested {build_key(params)}")
+
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buf) < start:
+        raise ModelFileError(f"{path}: truncated model file")
+
+    def view(name):
+        dtype, shape, offset = header["arrays"][name]
+        count = int(np.prod(shape)) if shape else 1
+        end = start + offset + np.dtype(dtype).itemsize * count
+        if end > len(buf):
+            raise ModelFileError(f"{path}: truncated model file")
+        return np.frombuffer(buf, dtype=dtype, count=count, offset=start + offset).reshape(shape)
+
+    if stored.method == sm.METHOD_NCC:
+        from vision.ncc_match import NccMatcher, _Rotated
+
+        templates, entries = [], []
+        for lv, count in enumerate(header["rotated"]):
+            templates.append(view(f"N{lv}.template"))
+            entries.append([_Rotated(**{name: view(f"R{lv}.{i}.{name}") for name in _ROTATED_FIELDS
+                                        if f"R{lv}.{i}.{name}" in header["arrays"]})
+                            for i in range(count)] if count else None)
+        return NccMatcher.from_arrays(params, header["template_size"], templates, entries)
+
+    models, tables = [], []
+    for lv, size in enumerate(header["level_sizes"]):
+        models.append(sm._LevelModel(view(f"L{lv}.dx"), view(f"L{lv}.dy"), view(f"L{lv}.theta"), tuple(size)))
+        tables.append(_AngleTable.from_arrays(*(view(f"T{lv}.{n}") for n in _TABLE_FIELDS)))
+    return sm.ShapeMatcher.from_arrays(params, header["template_size"], models, tables)
+
+
+def load_or_build(template_img, params, model_dir=MODEL_DIR, save=True):
+    """
+    matcher จากไฟล์ใน model_dir ถ้ามีและตรงกับ template/params; ไม่งั้น build จากภาพแล้วบันทึกไว้ใช้ครั้งหน้า
+    คืน (matcher, loaded: bool)
+    """
+    from vision import shape_match as sm
+
+    source_hash = template_hash(template_img)
+    path = model_path(model_dir, source_hash, params)
+    if os.path.exists(path):
+        try:
+            return load_model(path, params, source_hash), True
+        except ModelFileError as e:
+            print(f"[model] {e}")
+    matcher = sm.create_matcher_for_template(template_img, None, params)
+    if save:
+        try:
+            save_model(matcher, path, source_hash)
+        except OSError as e:
+            print(f"[model] cannot save {path}: {e}")
+    return matcher, False
@@ -0,0 +1,444 @@
+import math
+
+import cv2
+import numpy as np
+
+from vision import refine
+from vision.shape_match import (CANDIDATE_RATIO, MAX_LEVELS, MIN_TOP_SIZE, ShapeMatcher, _nms_rotated,
+                                angle_range, build_pyramid, frame_pyramid, to_gray)
+
+# ---------------------------------------------------------------------------
+# Grayscale NCC matching (TM_CCOEFF_NORMED) แบบเดียวกับโมดูล matching (native)
+#   - score = normalized cross-correlation ของภาพ gray กับ template ที่มุมที่เจอ (-1..1)
+#     ความหมายเดียวกับ scoreThreshold ของ native: params ชุดเดียวกันใช้ได้ทั้งสอง backend
+#   - angle = ค้นมุมช่วง ±angle องศา (>= 180 = รอบวง) ที่ชั้นบนสุด แล้ว refine มุมทีละชั้นลงมา
+# bank: template หมุนครบทุกมุมใน grid ของทุกชั้น สร้างครั้งเดียวตอน build (แบบ TemplateBank ของ ShapeMatcher)
+#   ชั้นบนสุด: (template, mask) -> matchTemplate ทั้งภาพ ต่อมุมหนึ่งครั้ง (มุม 0 ไม่ต้องใช้ mask)
+#   ชั้นล่าง:  template แบบ zero-mean (นอก mask = 0) + ช่วงคอลัมน์ของ mask ต่อแถว
+#              NCC ในหน้าต่าง ±REFINE_RADIUS = TM_CCORR หนึ่งครั้ง + ผลรวมจาก integral image ตามช่วงของ mask
+#              ไม่ต้อง warp ภาพหรือ template ทุกเฟรม
+# ชั้น 0 ใช้ template มุมใน grid ที่ใกล้มุมจากชั้น 1 ที่สุด (step ชั้น 0 ของ template 679 px ~0.17 องศา) ค้นแค่ตำแหน่ง
+# subPixel: interpolation = parabola ต่อแกน; least_squares(_high) = fit quadratic (x, y, มุม) ผ่าน NCC ชั้น 0
+#   รอบผลสุดท้าย ไม่ใช้ edge alignment ของ ShapeMatcher: ขอบรอบชิ้นงานจริงใน template2 ทำให้สั่นกว่า NCC
+# ---------------------------------------------------------------------------
+
+REFINE_RADIUS = 2       # px รอบ candidate ที่ค้นในชั้นถัดลงมา
+TOP_MAXIMA = 64         # local maxima ต่อมุมที่ชั้นบนสุด
+MAX_ROTATED = 512       # template หมุนที่เก็บไว้ต่อชั้น เมื่อ bank ใหญ่เกินกว่าจะสร้างล่วงหน้า
+# subPixel -> (± px รอบผล, ± มุมใน grid ชั้น 0) ที่ใช้ fit quadratic ตอน refine แบบ least squares
+LSQ_SETTINGS = {refine.SUBPIXEL_LEAST_SQUARES: (1, 1), refine.SUBPIXEL_LEAST_SQUARES_HIGH: (1, 2)}
+MAX_BANK_BYTES = 256 * 1024 * 1024  # bank ชั้นล่างที่ใหญ่กว่านี้ (เช่น ±180° ที่ชั้น 0) หมุนเมื่อใช้ครั้งแรกแทน
+
+
+def angle_step(size) -> float:
+    """step มุม (องศา) ที่มุมของ template (w, h) เลื่อนไม่เกิน ~2 px"""
+    return math.degrees(math.atan(2.0 / max(2.0, float(max(size)))))
+
+
+def _clean(res):
+    # mask + พื้นที่เรียบ -> หารศูนย์ได้ inf/nan
+    return np.nan_to_num(res, nan=-1.0, posinf=-1.0, neginf=-1.0)
+
+
+def _wrap(a):
+    return (a + 180.0) % 360.0 - 180.0
+
+
+def _rotated_size(w, h, angle):
+    a = math.radians(angle)
+    c, s = abs(math.cos(a)), abs(math.sin(a))
+    return int(math.ceil(w * c + h * s)), int(math.ceil(w * s + h * c))
+
+
+def rotate_template(tpl, angle):
+    """(template, mask) หมุน angle องศา (บวก = ทวนเข็มบนจอ) ในกรอบที่พอดี; มุม 0 ไม่มี mask (None)"""
+    if round(float(angle), 4) == 0.0:
+        return tpl, None
+    h, w = tpl.shape
+    rw, rh = _rotated_size(w, h, angle)
+    m = cv2.getRotationMatrix2D(((w - 1) / 2.0, (h - 1) / 2.0), angle, 1.0)
+    m[0, 2] += (rw - w) / 2.0
+    m[1, 2] += (rh - h) / 2.0
+    # ขอบ template ไม่ผสมกับสีดำนอกกรอบ (ขอบมืดทำให้ตำแหน่งเลื่อน)
+    rot = cv2.warpAffine(tpl, m, (rw, rh), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    mask = cv2.warpAffine(np.full_like(tpl, 255), m, (rw, rh), flags=cv2.INTER_NEAREST)
+    return rot, mask
+
+
+def mask_spans(mask, shape):
+    """(H, 2) int32 ช่วงคอลัมน์ [x0, x1) ของ mask ในแต่ละแถว (สี่เหลี่ยมหมุนเป็นรูปนูน -> ช่วงเดียวต่อแถว)"""
+    h, w = shape
+    if mask is None:
+        return np.tile(np.array([0, w], np.int32), (h, 1))
+    on = mask > 0
+    x0 = np.argmax(on, axis=1)
+    x1 = w - np.argmax(on[:, ::-1], axis=1)
+    x1 = np.where(on.any(axis=1), x1, x0)
+    return np.stack([x0, x1], axis=1).astype(np.int32)
+
+
+def zero_mean(tpl, spans):
+    """template float32 ที่ลบค่าเฉลี่ยในช่วง mask แล้ว (นอก mask = 0): correlation = ตัวเศษของ NCC"""
+    inside = np.arange(tpl.shape[1])[None, :]
+    inside = (inside >= spans[:, :1]) & (inside < spans[:, 1:])
+    t = tpl.astype(np.float32)
+    mean = float(t[inside].mean()) if inside.any() else 0.0
+    return np.where(inside, t - mean, 0.0).astype(np.float32)
+
+
+class _Rotated:
+    """template หนึ่งมุม: ชั้นบนสุดใช้ (template, mask); ชั้นล่างใช้ (zero_mean, spans)"""
+
+    __slots__ = ("template", "mask", "zero_mean", "spans", "count", "norm", "size")
+
+    def __init__(self, template=None, mask=None, zero_mean=None, spans=None):
+        self.template = template
+        self.mask = mask
+        self.zero_mean = zero_mean
+        self.spans = spans
+        src = template if template is not None else zero_mean
+        self.size = (src.shape[1], src.shape[0])
+        if zero_mean is not None:
+            self.count = int((spans[:, 1] - spans[:, 0]).sum())
+            self.norm = float(np.sqrt(np.dot(zero_mean.ravel(), zero_mean.ravel())))
+
+    @classmethod
+    def build(cls, tpl, angle, top):
+        rot, mask = rotate_template(tpl, angle)
+        if top:
+            return cls(template=rot, mask=mask)
+        spans = mask_spans(mask, rot.shape)
+        return cls(zero_mean=zero_mean(rot, spans), spans=spans)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.template, self.mask, self.zero_mean, self.spans) if a is not None)
+
+    def window_ncc(self, win):
+        """
+        NCC (แบบ TM_CCOEFF_NORMED + mask) ของ template มุมนี้กับทุกตำแหน่งใน win (uint8)
+        ตัวเศษ = TM_CCORR กับ zero_mean; ผลรวม/ผลรวมกำลังสองของภาพใต้ mask จาก integral image ตามช่วงต่อแถว
+        """
+        w, h = self.size
+        num = cv2.matchTemplate(win.astype(np.float32), self.zero_mean, cv2.TM_CCORR)
+        ny, nx = num.shape
+        s, sq = cv2.integral2(win, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        rows = (np.arange(ny)[:, None, None] + np.arange(h)[None, None, :])
+        xa = np.arange(nx)[None, :, None] + self.spans[None, None, :, 0]
+        xb = np.arange(nx)[None, :, None] + self.spans[None, None, :, 1]
+
+        def masked_sum(table):
+            return (table[rows + 1, xb] - table[rows, xb] - table[rows + 1, xa] + table[rows, xa]).sum(axis=2)
+
+        s1 = masked_sum(s)
+        var = masked_sum(sq) - s1 * s1 / max(1, self.count)
+        den = np.sqrt(np.maximum(var, 1e-12)) * self.norm
+        return np.where((var > 1e-6) & (self.norm > 0), num / den, -1.0).astype(np.float32)
+
+
+class RotatedLevel:
+    """template ของชั้นหนึ่งหมุนครบทุกมุมใน grid; lazy = หมุนเมื่อใช้ครั้งแรกแล้วเก็บไว้ (ไม่เกิน MAX_ROTATED)"""
+
+    def __init__(self, template, angles, full_circle=False, top=False, lazy=False, entries=None):
+        self.template = template
+        self.angles = np.asarray(angles, dtype=np.float64)
+        self.full_circle = full_circle
+        self.top = top
+        self.lazy = lazy and entries is None
+        if entries is not None:
+            self._entries = dict(enumerate(entries))
+        elif self.lazy:
+            self._entries = {}
+        else:
+            self._entries = {i: _Rotated.build(template, a, top) for i, a in enumerate(self.angles)}
+        self.step = float(self.angles[1] - self.angles[0]) if self.angles.size > 1 else 0.0
+
+    def __getitem__(self, i):
+        hit = self._entries.get(i)
+        if hit is None:
+            hit = _Rotated.build(self.template, self.angles[i], self.top)
+            if len(self._entries) >= MAX_ROTATED:
+                self._entries.clear()
+            self._entries[i] = hit
+        return hit
+
+    def entries(self) -> list:
+        """ทุกมุมตามลำดับ grid (สร้างส่วนที่ยังไม่มี) — ใช้ตอนบันทึกไฟล์ model"""
+        return [self[i] for i in range(self.angles.size)]
+
+    def nbytes(self) -> int:
+        return sum(e.nbytes() for e in list(self._entries.values()))
+
+    def indices_near(self, angle: float, half_width: float) -> np.ndarray:
+        """index ของมุมใน grid ที่อยู่ภายใน angle ± half_width (ไม่มี = มุมที่ใกล้ที่สุด)"""
+        d = self.angles - angle
+        if self.full_circle:
+            d = _wrap(d)
+        idx = np.nonzero(np.abs(d) <= half_width + 1e-9)[0]
+        if idx.size == 0:
+            idx = np.array([int(np.argmin(np.abs(d)))])
+        return idx
+
+
+def estimate_bank_bytes(templates, grids) -> int:
+    """ขนาดโดยประมาณของ bank ชั้นล่าง (zero_mean float32 ทุกมุม) ใช้ตัดสินว่าจะสร้างล่วงหน้าหรือไม่"""
+    total = 0
+    for tpl, grid in zip(templates[:-1], grids[:-1]):
+        h, w = tpl.shape
+        total += sum(4 * int(np.prod(_rotated_size(w, h, a))) for a in grid)
+    return total
+
+
+class NccMatcher:
+    supports_roi = True  # match(image, roi=...) จำกัดตำแหน่งจุดศูนย์กลางได้เอง
+
+    def __init__(self, template_img, params):
+        self.params = params
+        gray = to_gray(template_img)
+        self.template_size = (gray.shape[1], gray.shape[0])
+        levels = params.numLevels
+        if levels <= 0:
+            levels = 1
+            while levels < MAX_LEVELS and min(gray.shape) / (2 ** levels) >= MIN_TOP_SIZE:
+                levels += 1
+        # blur แบบเดียวกับ frame_pyramid ของภาพค้น
+        self._init_bank(build_pyramid(cv2.GaussianBlur(gray, (3, 3), 0), levels))
+
+    @classmethod
+    def from_arrays(cls, params, template_size, templates, entries):
+        """
+        สร้าง matcher จาก bank ที่คำนวณไว้แล้ว (vision.model_file) โดยไม่หมุน template ใหม่
+        templates: pyramid ของ template (ชั้น 0..); entries: list ต่อชั้นของ _Rotated ทุกมุมใน grid
+        หรือ None (ชั้นที่ bank ใหญ่เกินจะเก็บ -> หมุนเมื่อใช้ครั้งแรกเหมือนตอน build)
+        """
+        self = cls.__new__(cls)
+        self.params = params
+        self.template_size = tuple(template_size)
+        self._init_bank(templates, entries)
+        return self
+
+    def _init_bank(self, templates, entries=None):
+        params = self.params
+        self.templates = list(templates)
+        self.num_levels = len(self.templates)
+        self.steps = [params.angleStep if params.angleStep > 0 else angle_step(t.shape[::-1])
+                      for t in self.templates]
+        self.full_circle = params.angle >= 180.0
+        grids = [angle_range(params.angle, st) for st in self.steps]
+        top = self.num_levels - 1
+        lazy = estimate_bank_bytes(self.templates, grids) > MAX_BANK_BYTES
+        if entries is None:
+            entries = [None] * self.num_levels
+        self.bank = [RotatedLevel(t, g, self.full_circle, top=lv == top, lazy=lazy and lv < top, entries=e)
+                     for lv, (t, g, e) in enumerate(zip(self.templates, grids, entries))]
+        self.top_angles = self.bank[top].angles
+
+    def nbytes(self) -> int:
+        return sum(level.nbytes() for level in self.bank)
+
+    def _angle_indices(self, angles):
+        """index มุมที่ค้นชั้นบนสุด: ทั้ง grid หรือเฉพาะแถบ (center, half_width) จาก tracking"""
+        top = self.bank[-1]
+        if angles is None:
+            return np.arange(top.angles.size)
+        return top.indices_near(float(angles[0]), max(float(angles[1]), self.steps[-1]))
+
+    def top_scores(self, img, idx=None):
+        """
+        score map ชั้นบนสุดของภาพ img: list ของ (index มุม, map ของ matchTemplate) ต่อมุม
+        ไม่ขึ้นกับ scoreThreshold/iouThreshold/maxCount -> cache ไว้ลองหลาย threshold ได้ (demo/tune_params.py)
+        """
+        if idx is None:
+            idx = range(self.top_angles.size)
+        level = self.bank[-1]
+        maps = []
+        for i in idx:
+            e = level[i]
+            th, tw = e.template.shape
+            if th > img.shape[0] or tw > img.shape[1]:
+                continue
+            maps.append((int(i), _clean(cv2.matchTemplate(img, e.template, cv2.TM_CCOEFF_NORMED, mask=e.mask))))
+        return maps
+
+    def _top_candidates(self, maps, thr, window):
+        """candidate (x, y, angle, score) ที่ชั้นบนสุด; window = ขอบเขตจุดศูนย์กลาง (x0, y0, x1, y1) หรือ None"""
+        found = []
+        level = self.bank[-1]
+        for i, res in maps:
+            tw, th = level[i].size
+            peak = (res >= cv2.dilate(res, np.ones((3, 3), np.uint8))) & (res >= thr)
+            ys, xs = np.nonzero(peak)
+            if xs.size > TOP_MAXIMA:
+                keep = np.argpartition(-res[ys, xs], TOP_MAXIMA)[:TOP_MAXIMA]
+                ys, xs = ys[keep], xs[keep]
+            cx = xs + (tw - 1) / 2.0
+            cy = ys + (th - 1) / 2.0
+            a = float(level.angles[i])
+            for x, y, sc in zip(cx, cy, res[ys, xs]):
+                if window is None or (window[0] <= x < window[2] and window[1] <= y < window[3]):
+                    found.append((float(x), float(y), a, float(sc)))
+        found.sort(key=lambda c: -c[3])
+        h, w = self.templates[-1].shape
+        min_d2 = (min(w, h) / 2.0) ** 2
+        limit = max(8, self.params.maxCount * 8)
+        cands = []
+        for c in found:
+            if all((c[0] - k[0]) ** 2 + (c[1] - k[1]) ** 2 >= min_d2 for k in cands):
+                cands.append(c)
+                if len(cands) >= limit:
+                    break
+        return cands
+
+    @staticmethod
+    def _window(gray, x0, y0, w, h):
+        """ภาพ gray[y0:y0+h, x0:x0+w] (ส่วนที่เลยขอบภาพใช้ค่าขอบ)"""
+        ih, iw = gray.shape
+        cx0, cy0 = max(0, x0), max(0, y0)
+        cx1, cy1 = min(iw, x0 + w), min(ih, y0 + h)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return None
+        win = gray[cy0:cy1, cx0:cx1]
+        if (cx0, cy0, cx1, cy1) != (x0, y0, x0 + w, y0 + h):
+            win = cv2.copyMakeBorder(win, cy0 - y0, y0 + h - cy1, cx0 - x0, x0 + w - cx1, cv2.BORDER_REPLICATE)
+        return win
+
+    def _refine(self, gray, level, x, y, a, idx):
+        """
+        ค้นรอบ (x, y) ของชั้น level ด้วย template ที่หมุนไว้แล้วใน bank (index มุม idx)
+        คืน (x, y, angle, score) ที่ดีที่สุด (sub-pixel ที่ชั้น 0 ตาม params.subPixel) หรือ None
+        ชั้น 0 มีมุมเดียว (ใกล้ a ที่สุดใน grid): คืนมุม a ที่ละเอียดกว่า grid จากชั้นบน
+        """
+        bank = self.bank[level]
+        r = REFINE_RADIUS
+        best = None
+        per_angle = []
+        for i in idx:
+            e = bank[i]
+            tw, th = e.size
+            x0 = int(round(x - (tw - 1) / 2.0)) - r
+            y0 = int(round(y - (th - 1) / 2.0)) - r
+            win = self._window(gray, x0, y0, tw + 2 * r, th + 2 * r)
+            if win is None:
+                per_angle.append(-1.0)
+                continue
+            res = e.window_ncc(win)
+            _, sc, _, loc = cv2.minMaxLoc(res)
+            per_angle.append(sc)
+            if best is None or sc > best[0]:
+                best = (sc, i, res, loc, x0 + (tw - 1) / 2.0, y0 + (th - 1) / 2.0)
+        if best is None:
+            return None
+        sc, i, res, (px, py), bx, by = best
+        bx += px
+        by += py
+        if level == 0 and self.params.subPixel != refine.SUBPIXEL_NONE:
+            if 0 < px < res.shape[1] - 1:
+                bx += refine.parabola_offset(res[py, px - 1], res[py, px], res[py, px + 1])
+            if 0 < py < res.shape[0] - 1:
+                by += refine.parabola_offset(res[py - 1, px], res[py, px], res[py + 1, px])
+        if level == 0:
+            ba = a
+        else:
+            ba = float(bank.angles[i])
+            k = int(np.argmax(per_angle))
+            ang = bank.angles[idx]
+            # มุมข้างเคียงต้องห่างกันหนึ่ง step จริง (idx อาจวนรอบ ±180 หรือถูกตัดที่ขอบช่วง)
+            gaps = np.abs(_wrap(np.diff(ang)))
+            if 0 < k < len(idx) - 1 and np.allclose(gaps, bank.step, atol=1e-6):
+                ba += refine.parabola_offset(per_angle[k - 1], per_angle[k], per_angle[k + 1]) * bank.step
+        return (float(bx), float(by), float(_wrap(ba)) if self.full_circle else float(ba), float(sc))
+
+    def search(self, pyramid, roi=None, angles=None, top_scores=None) -> list:
+        """
+        pyramid: ภาพ gray (blur แล้ว) ชั้น 0.. อย่างน้อย num_levels ชั้น; คืน list ของ (x, y, angle, score)
+        roi / angles: ความหมายเดียวกับ ShapeMatcher.search
+        top_scores: ผลของ top_scores(pyramid[num_levels - 1]) ของเฟรมนี้ที่คำนวณไว้แล้ว (ใช้เมื่อไม่มี roi/angles)
+        """
+        p = self.params
+        top = self.num_levels - 1
+        s = 2 ** top
+        img = pyramid[top]
+        ox = oy = 0
+        window = None
+        if roi is not None:
+            h, w = img.shape
+            margin = int(math.ceil(math.hypot(*self.templates[top].shape) / 2.0)) + 2
+            x0 = max(0, int(math.floor(roi[0] / s)) - margin)
+            y0 = max(0, int(math.floor(roi[1] / s)) - margin)
+            x1 = min(w, int(math.ceil(roi[2] / s)) + margin + 1)
+            y1 = min(h, int(math.ceil(roi[3] / s)) + margin + 1)
+            img = img[y0:y1, x0:x1]
+            ox, oy = x0, y0
+            # เผื่อ 1 pixel ชั้นบน: ตำแหน่งชั้นบนคลาดได้ก่อน refine
+            window = (roi[0] / s - ox - 1, roi[1] / s - oy - 1, roi[2] / s - ox + 1, roi[3] / s - oy + 1)
+            if img.size == 0:
+                return []
+        if top_scores is None or roi is not None or angles is not None:
+            top_scores = self.top_scores(img, self._angle_indices(angles))
+        thr_top = p.scoreThreshold * (CANDIDATE_RATIO if top > 0 else 1.0)
+        cands = [(x + ox, y + oy, a, sc) for x, y, a, sc in self._top_candidates(top_scores, thr_top, window)]
+        for level in range(top - 1, -1, -1):
+            thr = p.scoreThreshold * (CANDIDATE_RATIO if level > 0 else 1.0)
+            # ชั้นล่าง: มุมใน grid ของชั้นนี้ที่ครอบ ±step ของชั้นบน; ชั้น 0: มุมเดียวที่ใกล้ที่สุด
+            half = self.steps[level + 1] if level > 0 else 0.0
+            refined = []
+            for x, y, a, _ in cands:
+                # ตำแหน่งชั้นบน -> ชั้นนี้ (pyrDown: pixel i ของชั้นบน = pixel 2i ของชั้นล่าง)
+                res = self._refine(pyramid[level], level, 2.0 * x, 2.0 * y, a,
+                                   self.bank[level].indices_near(a, half))
+                if res is not None and res[3] >= thr:
+                    refined.append(res)
+            cands = refined
+            if not cands:
+                break
+        if roi is not None:
+            cands = [c for c in cands if roi[0] <= c[0] < roi[2] and roi[1] <= c[1] < roi[3]]
+        return cands
+
+    make_result = ShapeMatcher.make_result  # ใช้แค่ template_size
+
+    def match(self, image, pyramid=None, roi=None, angles=None, top_scores=None):
+        if pyramid is None:
+            pyramid = frame_pyramid(image, self.num_levels)
+        cands = self.search(pyramid, roi, angles, top_scores)
+        results = [self.make_result(*c) for c in sorted(cands, key=lambda c: -c[3])]
+        results = _nms_rotated(results, self.params.iouThreshold, max(1, self.params.maxCount))
+        if self.params.subPixel in LSQ_SETTINGS:
+            results = [self._least_squares(pyramid[0], r) for r in results]
+        return results
+
+    def _least_squares(self, gray, result):
+        """
+        sub-pixel/sub-degree ของผลสุดท้าย: NCC ชั้น 0 ที่ ±LSQ_SETTINGS ตำแหน่ง (px) x มุมข้างเคียงใน grid
+        แล้ว fit quadratic ของ (x, y, มุม) พร้อมกันด้วย least squares (refine.fit_quadratic_peak)
+        ยอดอยู่นอกช่วงที่วัด/ไม่ใช่ยอด -> ใช้ผลเดิม; score = NCC เดิม
+        """
+        radius, spread = LSQ_SETTINGS[self.params.subPixel]
+        bank = self.bank[0]
+        n = bank.angles.size
+        i0 = int(bank.indices_near(result.angle, 0.0)[0])
+        idx = [i0 + k for k in range(-spread, spread + 1)]
+        idx = [i % n for i in idx] if self.full_circle else [i for i in idx if 0 <= i < n]
+        # มุมข้างเคียงไม่ครบ (ขอบช่วง ±angle หรือมุมเดียว) -> fit แค่ตำแหน่ง มุมคงเดิม
+        fit_angle = len(idx) == 2 * spread + 1 and bank.step > 0
+        x, y = result.centerX, result.centerY
+        offsets, scores = [], []
+        for i in (idx if fit_angle else [i0]):
+            e = bank[i]
+            tw, th = e.size
+            x0 = int(round(x - (tw - 1) / 2.0)) - radius
+            y0 = int(round(y - (th - 1) / 2.0)) - radius
+            win = self._window(gray, x0, y0, tw + 2 * radius, th + 2 * radius)
+            if win is None:
+                return result
+            res = e.window_ncc(win)
+            py, px = np.mgrid[0:res.shape[0], 0:res.shape[1]]
+            cols = [(x0 + (tw - 1) / 2.0 - x + px).ravel(), (y0 + (th - 1) / 2.0 - y + py).ravel()]
+            if fit_angle:
+                cols.append(np.full(res.size, _wrap(bank.angles[i] - bank.angles[i0]) / bank.step))
+            offsets.append(np.stack(cols, axis=1))
+            scores.append(res.ravel())
+        peak = refine.fit_quadratic_peak(np.concatenate(offsets), np.concatenate(scores))
+        if peak is None or abs(peak[0]) > radius or abs(peak[1]) > radius or (fit_angle and abs(peak[2]) > spread):
+            return result
+        a = float(bank.angles[i0] + peak[2] * bank.step) if fit_angle else result.angle
+        return self.make_result(x + peak[0], y + peak[1], float(_wrap(a)) if self.full_circle else a, result.score)
@@ -0,0 +1,115 @@
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# NMS สำหรับกรอบหมุน (quad 4 มุม) แบบ vectorized ด้วย NumPy
+#   - IoU ของทุกคู่พร้อมกัน: ตัด polygon ด้วย Sutherland-Hodgman ทีละขอบของ quad อีกอัน
+#     (loop แค่ 4 ขอบ ไม่ใช่ต่อคู่) แล้วหาพื้นที่ด้วย shoelace
+#   - คู่ที่กรอบแกนตรงไม่ทับกันเลยไม่ต้องคำนวณ
+# ---------------------------------------------------------------------------
+
+
+def _signed_area(poly):
+    """poly: (..., M, 2) -> พื้นที่แบบมีเครื่องหมาย (shoelace); จุดซ้ำไม่มีผล"""
+    x = poly[..., 0]
+    y = poly[..., 1]
+    return 0.5 * np.sum(x * np.roll(y, -1, axis=-1) - np.roll(x, -1, axis=-1) * y, axis=-1)
+
+
+def _orient(quads):
+    """กลับลำดับจุดของ quad ที่วนตามเข็ม ให้ทุกอันวนทางเดียวกัน (พื้นที่เป็นบวก)"""
+    flip = _signed_area(quads) < 0
+    out = quads.copy()
+    out[flip] = out[flip][:, ::-1]
+    return out
+
+
+def _compact(points, valid):
+    """
+    ย้ายจุดที่ valid ไปไว้หน้าแถว (คงลำดับ) แล้วเติมช่องที่เหลือด้วยจุด valid ตัวสุดท้าย
+    (จุดซ้ำ = ขอบยาวศูนย์ ไม่กระทบการตัดหรือพื้นที่); แถวที่ว่าง = 0
+    """
+    order = np.argsort(~valid, axis=1, kind="stable")
+    n = valid.sum(axis=1)
+    width = max(1, int(n.max()))
+    order = order[:, :width]
+    pts = np.take_along_axis(points, order[:, :, None], axis=1)
+    last = np.clip(n - 1, 0, None)
+    fill = pts[np.arange(len(pts)), np.minimum(last, width - 1)]
+    pad = np.arange(width)[None, :] >= n[:, None]
+    pts = np.where(pad[:, :, None], fill[:, None, :], pts)
+    pts[n == 0] = 0.0
+    return pts
+
+
+def clip_intersection_area(subject, clip):
+    """
+    พื้นที่ทับซ้อนของ convex polygon คู่ ๆ: subject (B, M, 2), clip (B, 4, 2) (วนทวนทางเดียวกัน)
+    """
+    poly = subject.astype(np.float64)
+    for k in range(clip.shape[1]):
+        a = clip[:, k][:, None, :]
+        b = clip[:, (k + 1) % clip.shape[1]][:, None, :]
+        edge = b - a
+        cur = poly
+        nxt = np.roll(poly, -1, axis=1)
+        side_cur = edge[..., 0] * (cur[..., 1] - a[..., 1]) - edge[..., 1] * (cur[..., 0] - a[..., 0])
+        side_nxt = edge[..., 0] * (nxt[..., 1] - a[..., 1]) - edge[..., 1] * (nxt[..., 0] - a[..., 0])
+        in_cur = side_cur >= 0
+        in_nxt = side_nxt >= 0
+        denom = side_cur - side_nxt
+        t = np.where(np.abs(denom) > 1e-12, side_cur / np.where(np.abs(denom) > 1e-12, denom, 1.0), 0.0)
+        inter = cur + t[..., None] * (nxt - cur)
+        # ต่อขอบ cur->nxt ได้สูงสุดสองจุดตามลำดับ: [จุดตัด (ถ้าข้ามเส้น), nxt (ถ้าอยู่ด้านใน)]
+        pts = np.stack([inter, nxt], axis=2).reshape(len(poly), -1, 2)
+        valid = np.stack([in_cur != in_nxt, in_nxt], axis=2).reshape(len(poly), -1)
+        poly = _compact(pts, valid)
+    return np.abs(_signed_area(poly))
+
+
+def rotated_iou_matrix(quads):
+    """quads: (N, 4, 2) มุมของกรอบหมุน -> (N, N) IoU"""
+    quads = _orient(np.asarray(quads, dtype=np.float64).reshape(-1, 4, 2))
+    n = len(quads)
+    iou = np.zeros((n, n), np.float64)
+    if n < 2:
+        if n == 1:
+            iou[0, 0] = 1.0
+        return iou
+    area = np.abs(_signed_area(quads))
+    lo = quads.min(axis=1)
+    hi = quads.max(axis=1)
+    ii, jj = np.triu_indices(n, k=1)
+    # กรองคู่ที่กรอบแกนตรงไม่ทับกันออกก่อน
+    overlap = np.all((np.minimum(hi[ii], hi[jj]) > np.maximum(lo[ii], lo[jj])), axis=1)
+    ii, jj = ii[overlap], jj[overlap]
+    if ii.size:
+        inter = clip_intersection_area(quads[ii], quads[jj])
+        union = area[ii] + area[jj] - inter
+        vals = np.where(union > 0, inter / np.where(union > 0, union, 1.0), 0.0)
+        iou[ii, jj] = vals
+        iou[jj, ii] = vals
+    np.fill_diagonal(iou, 1.0)
+    return iou
+
+
+def rotated_nms(quads, scores, iou_threshold, max_keep=None):
+    """
+    Greedy NMS: คืน index ที่เก็บไว้ เรียงตาม score มากไปน้อย
+    IoU คำนวณครั้งเดียวเป็นเมทริกซ์; ขั้น greedy เป็นแค่ boolean mask ต่อแถว
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.size == 0:
+        return np.zeros(0, np.intp)
+    order = np.argsort(-scores, kind="stable")
+    iou = rotated_iou_matrix(np.asarray(quads)[order])
+    alive = np.ones(order.size, bool)
+    keep = []
+    for i in range(order.size):
+        if not alive[i]:
+            continue
+        keep.append(i)
+        if max_keep is not None and len(keep) >= max_keep:
+            break
+        alive &= iou[i] <= iou_threshold
+        alive[i] = False
+    return order[np.asarray(keep, dtype=np.intp)]
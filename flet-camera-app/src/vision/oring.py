@@ -0,0 +1,170 @@
+import math
+import sys
+import threading
+import time
+from dataclasses import dataclass, fields
+
+import cv2
+import numpy as np
+
+from vision.pose import PROJECT_ROOT
+
+# ---------------------------------------------------------------------------
+# ตรวจ O-ring ตามค่า [find_oring] ของ config_manager.ConfigManager
+#   blur (blur_kernel) -> Canny (canny_thresh1/2) -> morph close (morph_kernel)
+#   -> contour ภายนอก กรองด้วยพื้นที่ (large_area) และกรอบ (w_oring x h_oring, rect_height_ratio)
+#   -> มี/ไม่มี + ตำแหน่ง (ห่างจากจุดที่คาดไม่เกิน dif_zone px; 0 = ไม่ตรวจตำแหน่ง)
+# ทำเฉพาะใน ROI รอบตำแหน่งที่คาด (ศูนย์กลาง template1) และใช้ buffer ชุดเดิมทุกเฟรม
+# ---------------------------------------------------------------------------
+
+ORING_ROI_SCALE = 2.0  # ด้าน ROI = ORING_ROI_SCALE x max(w_oring, h_oring)
+
+
+@dataclass
+class OringParams:
+    large_area: int = 5000         # พื้นที่ contour ขั้นต่ำ (px^2)
+    dif_zone: int = 0              # ระยะจากจุดที่คาดที่ยอมรับได้ (px); 0 = ไม่ตรวจตำแหน่ง
+    h_oring: int = 65              # ความสูงกรอบขั้นต่ำ (px)
+    w_oring: int = 110             # ความกว้างกรอบขั้นต่ำ (px)
+    blur_kernel: int = 15
+    canny_thresh1: int = 50
+    canny_thresh2: int = 90
+    morph_kernel: int = 15
+    rect_height_ratio: float = 0.5  # ด้านสั้น/ด้านยาวของกรอบขั้นต่ำ (ตัดเส้นยาว ๆ ที่ไม่ใช่วง)
+
+    @classmethod
+    def from_config(cls, cm=None):
+        """ค่าจาก ConfigManager (ไม่ระบุ = CONFIG_MANAGER ของโปรแกรม; import ไม่ได้ = ค่าเริ่มต้น)"""
+        if cm is None:
+            if PROJECT_ROOT not in sys.path:
+                sys.path.insert(0, PROJECT_ROOT)
+            try:
+                from config_manager import CONFIG_MANAGER as cm
+            except Exception as e:
+                print(f"[oring] config_manager unavailable ({e}); using defaults")
+                return cls()
+        values = {}
+        for f in fields(cls):
+            try:
+                values[f.name] = f.type(getattr(cm, f.name))
+            except (AttributeError, TypeError, ValueError):
+                continue
+        return cls(**values)
+
+
+def _odd(k: int) -> int:
+    k = max(1, int(k))
+    return k if k % 2 else k + 1
+
+
+def oring_roi(center, params: OringParams):
+    """ROI สี่เหลี่ยมจัตุรัส (x0, y0, x1, y1) รอบจุดที่คาดว่า O-ring อยู่"""
+    half = ORING_ROI_SCALE * max(params.w_oring, params.h_oring) / 2.0
+    cx, cy = center
+    return (int(math.floor(cx - half)), int(math.floor(cy - half)),
+            int(math.ceil(cx + half)), int(math.ceil(cy + half)))
+
+
+class OringFinder:
+    """
+    find(image, roi, expected) -> dict: present, position_ok, ok, center, bbox, area, offset, candidates
+    buffer ของแต่ละขั้น (gray/blur/edge/closed) สร้างครั้งเดียวต่อขนาด ROI แล้วใช้ซ้ำ (ไม่ thread-safe:
+    หนึ่ง finder ต่อหนึ่งเธรด หรือเรียกผ่าน inspect ที่ล็อกให้)
+    """
+
+    def __init__(self, params: OringParams = None):
+        self.params = params or OringParams.from_config()
+        p = self.params
+        self.blur_size = (_odd(p.blur_kernel), _odd(p.blur_kernel))
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (_odd(p.morph_kernel), _odd(p.morph_kernel)))
+        self._shape = None
+        self._gray = self._blur = self._edges = self._closed = None
+        self._lock = threading.Lock()
+        self.last_timing = {}
+
+    def _buffers(self, shape):
+        if self._shape != shape:
+            self._gray = np.empty(shape, np.uint8)
+            self._blur = np.empty(shape, np.uint8)
+            self._edges = np.empty(shape, np.uint8)
+            self._closed = np.empty(shape, np.uint8)
+            self._shape = shape
+
+    def find(self, image, roi=None, expected=None) -> dict:
+        """
+        image: BGR หรือ gray เต็มเฟรม; roi: (x0, y0, x1, y1) หรือ vision.roi_search.Roi (None = ทั้งภาพ)
+        expected: (x, y) ที่ควรเป็นศูนย์กลาง O-ring (None = กลาง ROI)
+        """
+        p = self.params
+        t0 = time.perf_counter()
+        h, w = image.shape[:2]
+        if roi is None:
+            x0, y0, x1, y1 = 0, 0, w, h
+        elif hasattr(roi, "bounds"):
+            x0, y0, x1, y1 = roi.bounds(image.shape)
+        else:
+            x0, y0 = max(0, int(roi[0])), max(0, int(roi[1]))
+            x1, y1 = min(w, int(roi[2])), min(h, int(roi[3]))
+        out = {"present": False, "position_ok": False, "ok": False, "center": None, "bbox": None,
+               "area": 0.0, "offset": None, "candidates": 0, "roi": (x0, y0, x1, y1)}
+        if x1 - x0 < 3 or y1 - y0 < 3:
+            self.last_timing = {"total_ms": (time.perf_counter() - t0) * 1000.0}
+            return out
+        if expected is None:
+            expected = ((x0 + x1) / 2.0, (y0 + y1) / 2.0)
+
+        view = image[y0:y1, x0:x1]  # view ไม่ copy
+        self._buffers(view.shape[:2])
+        if view.ndim == 3:
+            cv2.cvtColor(view, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            gray = self._gray
+        else:
+            gray = view
+        cv2.GaussianBlur(gray, self.blur_size, 0, dst=self._blur)
+        cv2.Canny(self._blur, p.canny_thresh1, p.canny_thresh2, edges=self._edges)
+        cv2.morphologyEx(self._edges, cv2.MORPH_CLOSE, self.kernel, dst=self._closed)
+        t1 = time.perf_counter()
+        contours, _ = cv2.findContours(self._closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        best = None
+        for c in contours:
+            area = cv2.contourArea(c)
+            if area < p.large_area:
+                continue
+            bx, by, bw, bh = cv2.boundingRect(c)
+            if bw < p.w_oring or bh < p.h_oring:
+                continue
+            if min(bw, bh) < p.rect_height_ratio * max(bw, bh):
+                continue
+            cx, cy = x0 + bx + bw / 2.0, y0 + by + bh / 2.0
+            d = math.hypot(cx - expected[0], cy - expected[1])
+            out["candidates"] += 1
+            # หลายวงผ่านเกณฑ์: เลือกวงที่ใกล้จุดที่คาดที่สุด
+            if best is None or d < best[0]:
+                best = (d, (cx, cy), (x0 + bx, y0 + by, bw, bh), area)
+        if best is not None:
+            d, center, bbox, area = best
+            out.update(present=True, center=center, bbox=bbox, area=float(area), offset=d,
+                       position_ok=p.dif_zone <= 0 or d <= p.dif_zone)
+            out["ok"] = out["position_ok"]
+        t2 = time.perf_counter()
+        self.last_timing = {"filter_ms": (t1 - t0) * 1000.0, "contour_ms": (t2 - t1) * 1000.0,
+                            "total_ms": (t2 - t0) * 1000.0}
+        return out
+
+    def inspect(self, frame, pose) -> dict:
+        """ขั้นตรวจหลังหา pose (PosePipeline inspect=): ROI รอบศูนย์กลาง template1 ของ pose"""
+        with self._lock:
+            return self.find(frame, oring_roi(pose["c1"], self.params), pose["c1"])
+
+
+def draw_oring(image, result, color_ok=(0, 255, 0), color_ng=(0, 0, 255)):
+    x0, y0, x1, y1 = result["roi"]
+    color = color_ok if result["ok"] else color_ng
+    cv2.rectangle(image, (x0, y0), (x1 - 1, y1 - 1), color, 1, cv2.LINE_AA)
+    if result["bbox"] is not None:
+        bx, by, bw, bh = result["bbox"]
+        cv2.rectangle(image, (bx, by), (bx + bw, by + bh), color, 2, cv2.LINE_AA)
+    label = "ORING OK" if result["ok"] else ("ORING POS" if result["present"] else "NO ORING")
+    cv2.putText(image, label, (x0, max(12, y0 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+    return image
@@ -0,0 +1,274 @@
+import configparser
+import threading
+import time
+
+import numpy as np
+
+from vision.pose import DEFAULT_TEMPLATE1, DEFAULT_TEMPLATE2, two_template_pose
+from vision.roi_search import CONFIG_PATH
+
+# ---------------------------------------------------------------------------
+# ตรวจทั้งชั้นของพาเลทในภาพเดียว:
+#   1) template1/template2 ค้นแบบหลายชิ้น (maxCount = row x column จาก [COMPRESSOR])
+#      ผลซ้อนกันถูกตัดด้วย rotated NMS (vision.nms) ใน matcher
+#   2) จับคู่ template1 กับ template2 ของชิ้นเดียวกันด้วยระยะจุดศูนย์กลาง (เมทริกซ์ระยะ)
+#   3) ใส่ pose ลงช่องกริด (row, col) แล้ว cache ไว้ -> Capture ถัดไปในชั้นเดียวกันไม่ต้องถ่าย/ค้นใหม่
+# ---------------------------------------------------------------------------
+
+LAYER_IOU = 0.3  # ชิ้นงานข้างกันไม่ทับกัน: ตัดผลที่กรอบหมุนทับกันเกินนี้
+
+
+def load_layer_config(path=None) -> dict:
+    """จำนวนแถว/คอลัมน์ต่อชั้นจาก [COMPRESSOR] row/column (ค่าไม่ถูกต้อง = 1)"""
+    cfg = configparser.ConfigParser()
+    cfg.read(path or CONFIG_PATH, encoding="utf-8")
+
+    def geti(key):
+        try:
+            return max(1, cfg.getint("COMPRESSOR", key, fallback=1))
+        except ValueError:
+            return 1
+
+    return {"rows": geti("row"), "cols": geti("column")}
+
+
+def pair_parts(centers1, centers2, max_distance):
+    """
+    จับคู่ผล template1 กับ template2 ที่อยู่ชิ้นเดียวกัน (greedy ตามระยะน้อยสุด ไม่ใช้ซ้ำ)
+    คืน list ของ (i, j) index ใน centers1/centers2
+    """
+    if len(centers1) == 0 or len(centers2) == 0:
+        return []
+    a = np.asarray(centers1, dtype=np.float64).reshape(-1, 2)
+    b = np.asarray(centers2, dtype=np.float64).reshape(-1, 2)
+    d = np.hypot(a[:, None, 0] - b[None, :, 0], a[:, None, 1] - b[None, :, 1])
+    flat = np.argsort(d, axis=None, kind="stable")
+    flat = flat[d.ravel()[flat] <= max_distance]
+    used1 = np.zeros(len(a), bool)
+    used2 = np.zeros(len(b), bool)
+    pairs = []
+    for k in flat:
+        i, j = divmod(int(k), len(b))
+        if used1[i] or used2[j]:
+            continue
+        used1[i] = used2[j] = True
+        pairs.append((i, j))
+        if len(pairs) == min(len(a), len(b)):
+            break
+    return pairs
+
+
+def _cluster_index(values, count, tol):
+    """
+    ค่าพิกัดตามแกนเดียว -> index แถว/คอลัมน์ 0..count-1
+    กลุ่มใหม่เริ่มเมื่อช่องว่างระหว่างค่าที่เรียงแล้วเกิน tol; ถ้ากลุ่มไม่ครบ (หยิบไปบางแถวแล้ว)
+    ใช้ระยะระหว่างกลุ่ม (median) เป็น pitch; index นับจากกลุ่มแรกที่เห็น (แถวแรกต้องยังไม่ถูกหยิบหมด)
+    """
+    order = np.argsort(values, kind="stable")
+    v = values[order]
+    group = np.concatenate([[0], np.cumsum(np.diff(v) > tol)])
+    n_groups = int(group[-1]) + 1
+    means = np.bincount(group, weights=v) / np.bincount(group)
+    if n_groups >= count or n_groups < 2:
+        gidx = np.arange(n_groups)
+    else:
+        pitch = float(np.median(np.diff(means)))
+        gidx = np.rint((means - means[0]) / max(pitch, 1e-6)).astype(int)
+    out = np.empty(len(values), int)
+    out[order] = np.clip(gidx[group], 0, count - 1)
+    return out
+
+
+def grid_axis(pts):
+    """
+    ทิศแถวของชั้น (unit vector ที่ใกล้แกน x ของภาพ) จากเวกเตอร์ไปเพื่อนบ้านที่ใกล้สุดของแต่ละจุด
+    เฉลี่ยมุมแบบ 4θ (ทิศตามแถว/คอลัมน์ห่างกัน 90 องศา ถือเป็นทิศเดียวกัน) -> ทนต่อช่องที่หยิบไปแล้ว
+    """
+    if len(pts) < 2:
+        return np.array([1.0, 0.0])
+    d = pts[None, :, :] - pts[:, None, :]
+    dist = np.hypot(d[..., 0], d[..., 1])
+    np.fill_diagonal(dist, np.inf)
+    nn = d[np.arange(len(pts)), np.argmin(dist, axis=1)]
+    theta = np.arctan2(nn[:, 1], nn[:, 0])
+    a = np.angle(np.exp(4j * theta).sum()) / 4.0  # (-45, 45] องศา
+    return np.array([np.cos(a), np.sin(a)])
+
+
+def assign_to_grid(poses, rows, cols, tol):
+    """
+    ใส่ pose ลงช่อง (row, col) ตามตำแหน่ง c2 (template2 ครอบทั้งชิ้น = กลางช่อง) ในภาพ
+    พาเลทเอียงได้ (grid_axis); ช่องที่มีสองชิ้น (ผลผิด) เก็บตัวที่ score สูงกว่า; คืน dict (row, col) -> pose
+    """
+    if not poses:
+        return {}
+    pts = np.array([p["c2"] for p in poses], dtype=np.float64)
+    axis_x = grid_axis(pts)
+    axis_y = np.array([-axis_x[1], axis_x[0]])
+    col = _cluster_index(pts @ axis_x, cols, tol)
+    row = _cluster_index(pts @ axis_y, rows, tol)
+    cells = {}
+    for p, r, c in zip(poses, row, col):
+        key = (int(r), int(c))
+        if key not in cells or p["score"] > cells[key]["score"]:
+            cells[key] = dict(p, cell=key)
+    return cells
+
+
+class LayerMatcher:
+    """
+    match(frame) แบบเดียวกับ TwoTemplateMatcher แต่ตรวจทั้งชั้นในเฟรมแรก แล้วคืน pose ที่ cache ไว้
+    ทีละช่องตามลำดับหยิบ (แถวแล้วคอลัมน์) จนหมดชั้น จึงถ่าย/ค้นใหม่
+    ช่องที่ตอบไปแล้วยังเป็นช่องปัจจุบันจนกว่าจะ confirm() (หุ่นหยิบเสร็จ: finnish / counter เพิ่ม)
+    -> Capture ซ้ำ (หุ่นไม่ได้คำตอบ/ส่งใหม่) ได้ช่องเดิม ไม่ข้ามช่อง
+    planner: vision.pick_order.PickPlanner -> ลำดับหยิบที่หุ่นเดินสั้นสุดจากช่องที่หยิบล่าสุด (วางใหม่ทุกชั้น)
+    pose มี key เพิ่ม: cell (row, col), cached (True = ไม่ได้ค้นจากเฟรมนี้)
+    """
+
+    def __init__(self, mt, template1_img, template2_img, rows=None, cols=None, params1=None, params2=None,
+                 dll_path=None, pair_distance=None, planner=None):
+        if rows is None or cols is None:
+            layer = load_layer_config()
+            rows = layer["rows"] if rows is None else rows
+            cols = layer["cols"] if cols is None else cols
+        self.mt = mt
+        self.rows = max(1, int(rows))
+        self.cols = max(1, int(cols))
+        n = self.rows * self.cols
+        if params1 is None:
+            params1 = mt.MatchingParams(maxCount=n, scoreThreshold=0.6, iouThreshold=LAYER_IOU, angle=5.0)
+        if params2 is None:
+            params2 = mt.MatchingParams(maxCount=n, scoreThreshold=0.4, iouThreshold=LAYER_IOU, angle=1.0)
+        if dll_path is None and hasattr(mt, "find_library_path"):
+            dll_path = mt.find_library_path()
+        self.matcher1 = mt.create_matcher_for_template(template1_img, dll_path, params1)
+        self.matcher2 = mt.create_matcher_for_template(template2_img, dll_path, params2)
+        h2, w2 = template2_img.shape[:2]
+        # template1 อยู่บนชิ้นงานที่ template2 ครอบ: คู่ที่ห่างเกินครึ่งด้านสั้นของ template2 ไม่ใช่ชิ้นเดียวกัน
+        self.pair_distance = float(pair_distance) if pair_distance else 0.5 * min(h2, w2)
+        self.cluster_tol = 0.5 * min(h2, w2)  # ชิ้นในแถว/คอลัมน์เดียวกันเหลื่อมกันไม่เกินนี้ (< ระยะช่อง)
+
+        self._lock = threading.Lock()
+        self._queue = []    # [(row, col), pose] ที่ยังไม่ได้หยิบ เรียงตามลำดับหยิบ
+        self._current = None  # pose ของช่องที่ตอบไปแล้ว รอ confirm()
+        self.planner = planner
+        self._last_pick = None  # c1 ของช่องที่ตอบไปล่าสุด = จุดเริ่มของชั้นถัดไป
+        self.plan_ms = 0.0
+        self.plan_saved_s = 0.0
+        self.last_cells = {}
+        self.last_counts = (0, 0)
+        self.last_timing = {}
+        self.layers = 0
+        self.captures = 0
+        self.cached_hits = 0
+        self.repeats = 0
+        self.picked = 0
+        self.detect_ms = 0.0
+
+    @classmethod
+    def from_files(cls, template1=DEFAULT_TEMPLATE1, template2=DEFAULT_TEMPLATE2, mt=None, **kwargs):
+        import cv2
+        if mt is None:
+            from vision.backend import load_matching
+            mt = load_matching()
+        t1 = cv2.imread(template1)
+        t2 = cv2.imread(template2)
+        if t1 is None or t2 is None:
+            raise FileNotFoundError(f"cannot read templates: {template1}, {template2}")
+        return cls(mt, t1, t2, **kwargs)
+
+    def detect(self, frame):
+        """ค้นทุกชิ้นในเฟรม คืน dict (row, col) -> pose"""
+        t0 = time.perf_counter()
+        _, results1, centers1 = self.mt.run_match(self.matcher1, frame)
+        t1 = time.perf_counter()
+        _, results2, centers2 = self.mt.run_match(self.matcher2, frame)
+        t2 = time.perf_counter()
+        poses = []
+        for i, j in pair_parts(centers1, centers2, self.pair_distance):
+            pose = two_template_pose([centers1[i]], [centers2[j]], [results1[i]], [results2[j]])
+            if pose is not None:
+                poses.append(pose)
+        cells = assign_to_grid(poses, self.rows, self.cols, self.cluster_tol)
+        t3 = time.perf_counter()
+        self.last_counts = (len(results1), len(results2))
+        self.last_timing = {"template1_ms": (t1 - t0) * 1000.0, "template2_ms": (t2 - t1) * 1000.0,
+                            "grid_ms": (t3 - t2) * 1000.0, "wall_ms": (t3 - t0) * 1000.0}
+        self.last_cells = cells
+        return cells
+
+    def match(self, frame):
+        with self._lock:
+            if self._current is not None:
+                # ยังไม่ confirm -> ตอบช่องเดิม
+                self.cached_hits += 1
+                self.repeats += 1
+                return dict(self._current, cached=True)
+            if self._queue:
+                self.cached_hits += 1
+                _, self._current = self._queue.pop(0)
+                return dict(self._current, cached=True)
+        cells = self.detect(frame)
+        with self._lock:
+            self.captures += 1
+            self.detect_ms += self.last_timing["wall_ms"]
+            if not cells:
+                return None
+            self.layers += 1
+            if self.planner is not None:
+                self._queue = self.planner.order_cells(cells, start=self._last_pick)
+                plan = self.planner.last_plan
+                if plan is not None and len(cells) >= 3:
+                    self.plan_ms += plan.plan_ms
+                    self.plan_saved_s += plan.saved_s
+            else:
+                self._queue = sorted(cells.items())
+            _, self._current = self._queue.pop(0)
+            return dict(self._current, cached=False)
+
+    def confirm(self):
+        """หุ่นหยิบช่องปัจจุบันแล้ว -> Capture ถัดไปได้ช่องถัดไป (ไม่มีช่องค้าง = ไม่ทำอะไร)"""
+        with self._lock:
+            if self._current is None:
+                return
+            self._last_pick = self._current["c1"]
+            self._current = None
+            self.picked += 1
+
+    def remaining(self) -> int:
+        """จำนวนช่องที่ยังไม่ confirm (รวมช่องปัจจุบัน)"""
+        with self._lock:
+            return len(self._queue) + (self._current is not None)
+
+    def reset(self):
+        """ล้าง cache (เช่น เปลี่ยนชั้น/พาเลทขยับ) -> Capture ถัดไปค้นใหม่ทั้งชั้น"""
+        with self._lock:
+            self._queue = []
+            self._current = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            mean_detect = self.detect_ms / self.captures if self.captures else 0.0
+            served = self.captures + self.cached_hits
+            return {
+                "layers": self.layers,
+                "captures": self.captures,
+                "cached_hits": self.cached_hits,
+                "cache_rate": self.cached_hits / served if served else 0.0,
+                "repeats": self.repeats,
+                "picked": self.picked,
+                "detect_ms": mean_detect,
+                "remaining": len(self._queue) + (self._current is not None),
+                "current": self._current["cell"] if self._current is not None else None,
+                "plan_ms": self.plan_ms / self.layers if self.layers else 0.0,
+                "plan_saved_s": self.plan_saved_s,
+            }
+
+    def release(self):
+        for m in (self.matcher1, self.matcher2):
+            if m is not None and hasattr(self.mt, "release_matcher"):
+                try:
+                    self.mt.release_matcher(m)
+                except Exception:
+                    pass
+        self.matcher1 = self.matcher2 = None
@@ -0,0 +1,292 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# ลำดับหยิบบนพาเลท: เดิมหยิบตามตัวนับ (แถวแล้วคอลัมน์ กลับไปคอลัมน์แรกทุกแถว)
+# ที่นี่วางลำดับใหม่ทุกชั้นให้ระยะเดินของหุ่นสั้นที่สุด (path เปิด เริ่มจากตำแหน่งหุ่นตอนนี้)
+#   - serpentine: งูเลื้อยตามแถว/คอลัมน์ เริ่มมุมที่ใกล้หุ่น (8 แบบ เลือกสั้นสุด) — กริดเต็มแทบ optimal
+#   - nearest neighbour (bucket grid, ไม่ต้อง O(n^2)) + 2-opt ภายในเวลา budget_ms — ชั้นที่หยิบไปบางช่อง/เบี้ยว
+#   เอาแบบที่สั้นกว่า; ข้อจำกัดชั้น: หยิบชั้นบนหมดก่อนจึงลงชั้นถัดไป (จุดเริ่มชั้นใหม่ = จุดสุดท้ายของชั้นก่อน)
+# หน่วยของจุดเป็นอะไรก็ได้ (pixel / mm); mm_per_unit ใช้แปลงเป็นเวลาเดินที่ speed_mm_s
+# ---------------------------------------------------------------------------
+
+SPEED_MM_S = 500.0       # ความเร็วเดินเฉลี่ยของหุ่นระหว่างจุดหยิบ (ประมาณเวลาที่ประหยัด)
+PLAN_BUDGET_MS = 100.0   # เวลาสูงสุดของ 2-opt ต่อชั้น
+FULL_2OPT_N = 800        # จุดไม่เกินนี้: 2-opt เต็ม (numpy ทีละแถว); มากกว่า: 2-opt เฉพาะเพื่อนบ้านใกล้
+NEIGHBOURS = 8
+
+
+def path_length(points, order, start=None) -> float:
+    """ระยะรวมของ path points[order] (บวกขาแรกจาก start ถ้ามี)"""
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)[np.asarray(order, dtype=int)]
+    if start is not None:
+        p = np.vstack([np.asarray(start, dtype=np.float64).reshape(1, 2), p])
+    if len(p) < 2:
+        return 0.0
+    return float(np.hypot(*np.diff(p, axis=0).T).sum())
+
+
+def serpentine_order(cells, points, start=None):
+    """
+    ลำดับงูเลื้อยจาก (row, col) ของแต่ละจุด: ลอง แถว/คอลัมน์ก่อน x เริ่มมุมไหน (8 แบบ) เลือกที่สั้นสุด
+    ใช้ index ช่องจริง -> ช่องที่หยิบไปแล้วไม่ทำให้ทิศสลับผิด
+    """
+    rc = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    best, best_len = None, np.inf
+    for major in (0, 1):
+        lead, minor = rc[:, major], rc[:, 1 - major]
+        for lead_sign in (1, -1):
+            for minor_sign in (1, -1):
+                rank = lead_sign * lead
+                flip = np.where((rank - rank.min()) % 2 == 0, 1, -1)
+                order = np.lexsort((minor_sign * flip * minor, rank))
+                length = path_length(points, order, start)
+                if length < best_len:
+                    best, best_len = order, length
+    return best
+
+
+class _Buckets:
+    """ตารางช่องสี่เหลี่ยมขนาด cell สำหรับหาจุดใกล้สุดที่ยังเหลือ (แทน KD-tree)"""
+
+    def __init__(self, points, cell):
+        self.points = points
+        self.cell = float(cell)
+        self.origin = points.min(axis=0)
+        keys = np.floor((points - self.origin) / self.cell).astype(np.int64)
+        self.shape = tuple(int(v) + 1 for v in keys.max(axis=0))
+        self.table = {}
+        for i, (kx, ky) in enumerate(keys.tolist()):
+            self.table.setdefault((kx, ky), set()).add(i)
+
+    def key(self, p):
+        k = np.floor((np.asarray(p) - self.origin) / self.cell).astype(np.int64)
+        return int(k[0]), int(k[1])
+
+    def remove(self, i):
+        k = self.key(self.points[i])
+        bucket = self.table[k]
+        bucket.discard(i)
+        if not bucket:
+            del self.table[k]
+
+    def nearest(self, p, k=1, exclude=None):
+        """index ของจุดที่ใกล้ p ที่สุด k จุด (ขยายวงทีละชั้นจนแน่ใจว่าไม่มีที่ใกล้กว่า)"""
+        cx, cy = self.key(p)
+        px, py = float(p[0]), float(p[1])
+        found = []
+        max_ring = max(self.shape[0], self.shape[1], abs(cx), abs(cy)) + max(self.shape)
+        for ring in range(max_ring + 1):
+            for kx in range(cx - ring, cx + ring + 1):
+                for ky in (range(cy - ring, cy + ring + 1) if kx in (cx - ring, cx + ring) else (cy - ring, cy + ring)):
+                    for i in self.table.get((kx, ky), ()):
+                        if i != exclude:
+                            q = self.points[i]
+                            found.append(((q[0] - px) ** 2 + (q[1] - py) ** 2, i))
+            # จุดในวงถัดไปห่างอย่างน้อย ring * cell
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= (ring * self.cell) ** 2:
+                    break
+            if not self.table:
+                break
+        found.sort()
+        return [i for _, i in found[:k]]
+
+
+def _cell_size(points):
+    span = np.ptp(points, axis=0)
+    area = max(float(span[0] * span[1]), float(max(span.max(), 1.0)) ** 2 / max(len(points), 1))
+    return max(np.sqrt(area / len(points)), 1e-6)
+
+
+def nearest_neighbour_order(points, start=None) -> np.ndarray:
+    """greedy: ไปจุดที่ใกล้สุดที่ยังไม่หยิบเสมอ; O(n) ต่อก้าวโดยเฉลี่ยด้วย bucket grid"""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(pts)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+    buckets = _Buckets(pts, _cell_size(pts))
+    cur = pts[0] if start is None else np.asarray(start, dtype=np.float64)
+    order = []
+    for _ in range(n):
+        i = buckets.nearest(cur)[0]
+        buckets.remove(i)
+        order.append(i)
+        cur = pts[i]
+    return np.array(order, dtype=int)
+
+
+def _two_opt_full(pts, order, start, deadline):
+    """
+    2-opt ของ path เปิด: Q = [start] + pts[order]; กลับช่วง Q[a..b] แทนขา (a-1, a) และ (b, b+1)
+    ทุก a คำนวณ delta ของทุก b ด้วย numpy แล้วทำ move ที่ดีที่สุด วนจนไม่ดีขึ้นหรือหมดเวลา
+    """
+    q = np.vstack([start.reshape(1, 2), pts[order]])
+    n = len(q) - 1
+    order = order.copy()
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for a in range(1, n):
+            qa_prev, qa = q[a - 1], q[a]
+            b = np.arange(a + 1, n + 1)
+            old = np.hypot(*(qa - qa_prev)) + np.append(np.hypot(*(q[b[:-1] + 1] - q[b[:-1]]).T), 0.0)
+            new = np.hypot(*(q[b] - qa_prev).T) + np.append(np.hypot(*(q[b[:-1] + 1] - qa).T), 0.0)
+            k = int(np.argmin(new - old))
+            if new[k] - old[k] < -1e-9:
+                bb = int(b[k])
+                q[a:bb + 1] = q[a:bb + 1][::-1]
+                order[a - 1:bb] = order[a - 1:bb][::-1]
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return order
+
+
+def _two_opt_neighbours(pts, order, start, deadline, k=NEIGHBOURS):
+    """2-opt เฉพาะ move ที่ขาใหม่เชื่อมกับเพื่อนบ้านใกล้สุด k จุด (ชั้นใหญ่ เช่น 200x200)"""
+    n = len(order)
+    buckets = _Buckets(pts, _cell_size(pts))
+    nbrs = [buckets.nearest(pts[i], k + 1, exclude=i)[:k] for i in range(n)]
+    tour = [-1] + [int(i) for i in order]  # -1 = ตำแหน่งเริ่มของหุ่น
+    pos = np.empty(n, dtype=int)
+    pos[order] = np.arange(1, n + 1)
+    xy = {i: pts[i] for i in range(n)}
+    xy[-1] = start
+
+    def d(u, v):
+        a, b = xy[u], xy[v]
+        return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for a in range(1, n + 1):
+            prev, cur = tour[a - 1], tour[a]
+            base = d(prev, cur)
+            for c in nbrs[cur]:
+                # ขาใหม่ (cur, c): กลับช่วงระหว่างทั้งสองฝั่ง
+                b = int(pos[c])
+                if b > a:      # กลับ tour[a..b-1]: (prev,cur),(tour[b-1],c) -> (prev,tour[b-1]),(cur,c)
+                    lo, hi = a, b - 1
+                    delta = d(prev, tour[hi]) + d(cur, c) - base - d(tour[hi], c)
+                elif b < a - 1:  # กลับ tour[b+1..a-1]: (c,tour[b+1]),(prev,cur) -> (c,prev),(tour[b+1],cur)
+                    lo, hi = b + 1, a - 1
+                    delta = d(c, prev) + d(tour[lo], cur) - d(c, tour[lo]) - base
+                else:
+                    continue
+                if delta < -1e-9:
+                    tour[lo:hi + 1] = tour[lo:hi + 1][::-1]
+                    pos[tour[lo:hi + 1]] = np.arange(lo, hi + 1)
+                    improved = True
+                    break
+            if time.perf_counter() >= deadline:
+                break
+    return np.array(tour[1:], dtype=int)
+
+
+def two_opt(points, order, start=None, budget_ms=PLAN_BUDGET_MS) -> np.ndarray:
+    """ปรับ order ด้วย 2-opt (path เปิดจาก start) ภายใน budget_ms"""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    order = np.asarray(order, dtype=int)
+    if len(order) < 3:
+        return order
+    start = pts[order[0]] if start is None else np.asarray(start, dtype=np.float64).ravel()
+    deadline = time.perf_counter() + budget_ms / 1000.0
+    if len(order) <= FULL_2OPT_N:
+        return _two_opt_full(pts, order, start, deadline)
+    return _two_opt_neighbours(pts, order, start, deadline)
+
+
+@dataclass
+class PickPlan:
+    order: np.ndarray          # index ของจุดตามลำดับหยิบ
+    length: float              # ระยะรวม (หน่วยเดียวกับจุด)
+    baseline_length: float     # ระยะของลำดับเดิม (ลำดับที่ส่งเข้ามา)
+    method: str
+    plan_ms: float
+    travel_s: float
+    baseline_travel_s: float
+
+    @property
+    def saved_s(self) -> float:
+        return self.baseline_travel_s - self.travel_s
+
+    @property
+    def saved_ratio(self) -> float:
+        return 1.0 - self.length / self.baseline_length if self.baseline_length > 0 else 0.0
+
+
+class PickPlanner:
+    """
+    plan(points, start, cells, layers): ลำดับหยิบที่ระยะเดินสั้นสุด (เทียบกับลำดับที่ส่งเข้ามา = ลำดับเดิม)
+      cells  (n, 2) (row, col) ของแต่ละจุด -> ลอง serpentine ด้วย; layers (n,) เลขชั้น -> หยิบชั้นมากก่อน (บนสุด)
+    order_cells(cells_dict, start): สำหรับ LayerMatcher — dict (row, col) -> pose เป็น list ตามลำดับหยิบ (ใช้ c1)
+    """
+
+    def __init__(self, speed_mm_s=SPEED_MM_S, mm_per_unit=1.0, budget_ms=PLAN_BUDGET_MS, use_two_opt=True):
+        self.speed_mm_s = float(speed_mm_s)
+        self.mm_per_unit = float(mm_per_unit)
+        self.budget_ms = float(budget_ms)
+        self.use_two_opt = use_two_opt
+        self.last_plan = None
+
+    def travel_s(self, length) -> float:
+        return length * self.mm_per_unit / self.speed_mm_s
+
+    def _plan_layer(self, pts, cells, start, budget_ms):
+        candidates = []
+        if cells is not None:
+            candidates.append(("serpentine", serpentine_order(cells, pts, start)))
+            if len(pts) > FULL_2OPT_N:
+                # ชั้นใหญ่ที่รู้ช่อง: serpentine ห่างจาก nn+2opt ไม่ถึง 1% แต่เร็วกว่าหลายร้อยเท่า
+                return path_length(pts, candidates[0][1], start), candidates[0][0], candidates[0][1]
+        order = nearest_neighbour_order(pts, start)
+        if self.use_two_opt:
+            order = two_opt(pts, order, start, budget_ms)
+            candidates.append(("nn+2opt", order))
+        else:
+            candidates.append(("nn", order))
+        return min(((path_length(pts, o, start), m, o) for m, o in candidates), key=lambda t: t[0])
+
+    def plan(self, points, start=None, cells=None, layers=None) -> PickPlan:
+        t0 = time.perf_counter()
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        n = len(pts)
+        cells = None if cells is None else np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        layers = np.zeros(n, dtype=int) if layers is None else np.asarray(layers, dtype=int).ravel()
+        if start is None and n:
+            start = pts[0]
+        origin = start
+        order, methods = [], []
+        levels = np.unique(layers)[::-1]
+        for level in levels:
+            idx = np.flatnonzero(layers == level)
+            _, method, sub = self._plan_layer(pts[idx], None if cells is None else cells[idx], start,
+                                              self.budget_ms / len(levels))
+            order.extend(idx[sub].tolist())
+            if method not in methods:
+                methods.append(method)
+            start = pts[order[-1]]
+        order = np.array(order, dtype=int)
+        length = path_length(pts, order, origin) if n else 0.0
+        # ลำดับเดิม: ตามที่ส่งเข้ามาภายในชั้น, ชั้นบนก่อน (ข้อจำกัดเดียวกัน)
+        base_order = np.concatenate([np.flatnonzero(layers == level) for level in levels]) if n else order
+        baseline = path_length(pts, base_order, origin) if n else 0.0
+        plan = PickPlan(order=order, length=length, baseline_length=baseline, method="/".join(methods),
+                        plan_ms=(time.perf_counter() - t0) * 1000.0, travel_s=self.travel_s(length),
+                        baseline_travel_s=self.travel_s(baseline))
+        self.last_plan = plan
+        return plan
+
+    def order_cells(self, cells: dict, start=None, key="c1") -> list:
+        """dict (row, col) -> pose เป็น list [(cell, pose)] ตามลำดับหยิบ; start = จุดหยิบล่าสุด (None = ช่องแรก)"""
+        items = sorted(cells.items())
+        if len(items) < 3:
+            return items
+        pts = np.array([pose[key] for _, pose in items], dtype=np.float64)
+        plan = self.plan(pts, start=start, cells=[cell for cell, _ in items])
+        return [items[i] for i in plan.order]
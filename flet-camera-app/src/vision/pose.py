@@ -0,0 +1,156 @@
+import math
+import os
+import time
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Two-template pose: template1 ให้ตำแหน่งชิ้นงาน, template2 ให้ทิศทาง
+# (logic เดียวกับ demo/test1.match_and_annotate แต่ไม่วาดภาพ)
+# ---------------------------------------------------------------------------
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PICTURE_DIR = os.path.join(PROJECT_ROOT, "image_comppressor_picture")
+DEFAULT_TEMPLATE1 = os.path.join(PICTURE_DIR, "temp1.jpg")
+DEFAULT_TEMPLATE2 = os.path.join(PICTURE_DIR, "temp3.png")
+
+
+def first_center(centers):
+    # centers can be a tuple (x,y) or a list of tuples; return (x, y) as float or None
+    if centers is None or len(centers) == 0:
+        return None
+    if isinstance(centers, (tuple, list)) and len(centers) == 2 and all(isinstance(v, (int, float)) for v in centers):
+        return (float(centers[0]), float(centers[1]))
+    try:
+        c = centers[0]
+        return (float(c[0]), float(c[1]))
+    except Exception:
+        return None
+
+
+def angle_between(p1, p2, p3):
+    # returns signed angle degrees from vector p1->p2 to p1->p3 (-180..180)
+    v = np.array([p2[0] - p1[0], p2[1] - p1[1]], dtype=float)
+    u = np.array([p3[0] - p1[0], p3[1] - p1[1]], dtype=float)
+    if np.linalg.norm(v) == 0 or np.linalg.norm(u) == 0:
+        return None
+    dot = float(np.dot(v, u))
+    det = float(v[0] * u[1] - v[1] * u[0])  # 2D cross (z)
+    return math.degrees(math.atan2(det, dot))
+
+
+def result_score(result):
+    """Score of one match result (native struct attribute or dict key)."""
+    if result is None:
+        return None
+    if isinstance(result, dict):
+        return result.get("score")
+    return getattr(result, "score", None)
+
+
+def result_angle(results) -> float:
+    """มุม (องศา) ของผลแรก หรือ 0 ถ้าไม่มีผล"""
+    if not results:
+        return 0.0
+    return float(getattr(results[0], "angle", 0.0) or 0.0)
+
+
+def two_template_pose(center1, center2, results1=(), results2=()):
+    """
+    รวมผลสอง template เป็น pose ในพิกัดภาพ
+    คืน dict: c1, c2, angle (deg, signed แบบเดียวกับ demo), score (ต่ำสุดของทั้งสอง) หรือ None ถ้าไม่เจอ
+    """
+    c1 = first_center(center1)
+    c2 = first_center(center2)
+    if c1 is None or c2 is None:
+        return None
+    c3 = (c1[0], c2[1])
+    ang = angle_between(c1, c2, c3)
+    scores = [s for s in (result_score(r) for r in list(results1)[:1] + list(results2)[:1]) if s is not None]
+    return {
+        "c1": c1,
+        "c2": c2,
+        "angle": 0.0 if ang is None else ang,
+        "score": min(scores) if scores else 0.0,
+    }
+
+
+class TwoTemplateMatcher:
+    """
+    ถือ matcher สองตัว (สร้างครั้งเดียว) แล้วให้ match(frame) คืน pose dict
+    mt คือโมดูล matching (หรือ backend ที่มี create_matcher_for_template/run_match เหมือนกัน)
+    """
+
+    def __init__(self, mt, template1_img, template2_img, params1=None, params2=None, dll_path=None,
+                 registry=None, concurrent=False):
+        self.mt = mt
+        self.last_angles = (0.0, 0.0)  # มุมของผล template1/template2 ล่าสุด
+        self.last_counts = (0, 0)      # จำนวนผลของ template1/template2 ล่าสุด
+        self.last_timing = {}          # ms ต่อขั้นของเฟรมล่าสุด
+        # concurrent: รันสอง matcher พร้อมกัน และแชร์ pyramid ของเฟรม (vision.scheduler)
+        self.scheduler = None
+        if concurrent:
+            from vision.scheduler import MatchScheduler
+            self.scheduler = MatchScheduler(mt)
+        if params1 is None:
+            params1 = mt.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.8, angle=5.0)
+        if params2 is None:
+            params2 = mt.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0)
+        # ถ้ามี registry: matcher เป็นของ registry (ใช้ร่วมกัน) ถือ lease ไว้จน release() -> ไม่ถูกไล่ออกระหว่างใช้
+        self.registry = registry
+        if registry is not None:
+            self.matcher1 = registry.acquire(template1_img, params1)
+            self.matcher2 = registry.acquire(template2_img, params2)
+            return
+        if dll_path is None and hasattr(mt, "find_library_path"):
+            dll_path = mt.find_library_path()
+        self.matcher1 = mt.create_matcher_for_template(template1_img, dll_path, params1)
+        self.matcher2 = mt.create_matcher_for_template(template2_img, dll_path, params2)
+
+    @classmethod
+    def from_files(cls, template1=DEFAULT_TEMPLATE1, template2=DEFAULT_TEMPLATE2, mt=None, **kwargs):
+        import cv2
+        if mt is None:
+            from vision.backend import load_matching
+            mt = load_matching()
+        t1 = cv2.imread(template1)
+        t2 = cv2.imread(template2)
+        if t1 is None or t2 is None:
+            raise FileNotFoundError(f"cannot read templates: {template1}, {template2}")
+        return cls(mt, t1, t2, **kwargs)
+
+    def match(self, frame):
+        if self.scheduler is not None:
+            out = self.scheduler.run(frame, {"template1": self.matcher1, "template2": self.matcher2})
+            _, results1, center1 = out["template1"]
+            _, results2, center2 = out["template2"]
+            self.last_timing = dict(self.scheduler.last_timing)
+        else:
+            t0 = time.perf_counter()
+            _, results1, center1 = self.mt.run_match(self.matcher1, frame)
+            t1 = time.perf_counter()
+            _, results2, center2 = self.mt.run_match(self.matcher2, frame)
+            t2 = time.perf_counter()
+            self.last_timing = {"template1_ms": (t1 - t0) * 1000.0, "template2_ms": (t2 - t1) * 1000.0,
+                                "wall_ms": (t2 - t0) * 1000.0}
+        self.last_angles = (result_angle(results1), result_angle(results2))
+        self.last_counts = (len(results1), len(results2))
+        return two_template_pose(center1, center2, results1, results2)
+
+    def release(self):
+        if self.scheduler is not None:
+            self.scheduler.close()
+            self.scheduler = None
+        if self.registry is not None:
+            for m in (self.matcher1, self.matcher2):
+                if m is not None:
+                    self.registry.release(m)
+            self.matcher1 = self.matcher2 = None
+            return
+        for m in (self.matcher1, self.matcher2):
+            if m is not None and hasattr(self.mt, "release_matcher"):
+                try:
+                    self.mt.release_matcher(m)
+                except Exception:
+                    pass
+        self.matcher1 = self.matcher2 = None
@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Sub-pixel / sub-degree refinement หลัง match แบบ integer
+#
+# 1) quadratic peak interpolation: fit parabola ผ่าน score 3 จุดรอบ peak ในแต่ละแกน (x, y, มุม)
+#    หรือ fit quadratic หลายแกนพร้อมกันด้วย least squares ผ่าน score รอบ peak (fit_quadratic_peak)
+# 2) least-squares edge alignment (แบบ least_squares / least_squares_high ของ HALCON):
+#    ทุกจุดขอบของ model หา "ขอบจริง" ในภาพตามแนว normal (sub-pixel) แล้วแก้ (tx, ty, dθ)
+#    ที่ทำให้ระยะตามแนว normal รวมน้อยสุด (Gauss-Newton, vectorized ทั้งหมด)
+# เก็บตัวอย่างภาพเฉพาะจุดที่ต้องใช้ (bilinear) ไม่ต้องคำนวณ gradient ทั้งภาพ
+# ---------------------------------------------------------------------------
+
+SUBPIXEL_NONE = "none"
+SUBPIXEL_INTERPOLATION = "interpolation"
+SUBPIXEL_LEAST_SQUARES = "least_squares"
+SUBPIXEL_LEAST_SQUARES_HIGH = "least_squares_high"
+SUBPIXEL_MODES = (SUBPIXEL_NONE, SUBPIXEL_INTERPOLATION, SUBPIXEL_LEAST_SQUARES, SUBPIXEL_LEAST_SQUARES_HIGH)
+
+# mode -> (จำนวนรอบ Gauss-Newton, ระยะค้นขอบตาม normal (px))
+_LSQ_SETTINGS = {
+    SUBPIXEL_LEAST_SQUARES: (2, 1.5),
+    SUBPIXEL_LEAST_SQUARES_HIGH: (5, 1.5),
+}
+PROFILE_STEP = 0.5     # px ระหว่างจุดตัวอย่างตาม normal
+MIN_ALIGNMENT = 0.8    # |cos| ขั้นต่ำระหว่าง gradient ภาพที่ขอบกับ normal ของ model
+CONVERGED_PX = 0.01    # หยุดเมื่อขยับน้อยกว่านี้
+
+
+def parabola_offset(s_minus, s_zero, s_plus):
+    """ตำแหน่งยอด parabola ผ่าน (-1, s_minus), (0, s_zero), (1, s_plus); อยู่ในช่วง [-0.5, 0.5]"""
+    den = s_minus - 2.0 * s_zero + s_plus
+    if den >= 0.0:
+        return 0.0  # ไม่ใช่ยอด (แบนหรือเว้าขึ้น)
+    return float(np.clip(0.5 * (s_minus - s_plus) / den, -0.5, 0.5))
+
+
+def interpolate_peak(scores, ai, pi, r, angle_step, angle_contiguous=True):
+    """
+    scores: (A, P) score ของ refine ชั้น 0 (P = (2r+1)^2 ตำแหน่ง, เรียงแถว y แล้ว x)
+    คืน (ox, oy, oa) offset ทศนิยมของ x, y (px) และมุม (องศา) จาก peak (ai, pi)
+    """
+    side = 2 * r + 1
+    py, px = divmod(pi, side)
+    row = scores[ai]
+    ox = oy = oa = 0.0
+    if 0 < px < side - 1:
+        ox = parabola_offset(row[pi - 1], row[pi], row[pi + 1])
+    if 0 < py < side - 1:
+        oy = parabola_offset(row[pi - side], row[pi], row[pi + side])
+    if angle_contiguous and 0 < ai < scores.shape[0] - 1 and angle_step > 0:
+        oa = parabola_offset(scores[ai - 1, pi], scores[ai, pi], scores[ai + 1, pi]) * angle_step
+    return ox, oy, oa
+
+
+def fit_quadratic_peak(offsets, scores):
+    """
+    fit s = c + g·v + vᵀHv/2 (least squares) ผ่าน score ที่ offset v (N, D) รอบ peak แล้วคืนยอด -H⁻¹g (D,)
+    None ถ้า surface ไม่ใช่ยอด (H ไม่เป็น negative definite) หรือจุดไม่พอ
+    """
+    v = np.asarray(offsets, dtype=np.float64)
+    s = np.asarray(scores, dtype=np.float64)
+    n, d = v.shape
+    pairs = [(i, j) for i in range(d) for j in range(i, d)]
+    if n < 1 + d + len(pairs):
+        return None
+    design = np.column_stack([np.ones(n), v] + [v[:, i] * v[:, j] for i, j in pairs])
+    coef, *_ = np.linalg.lstsq(design, s, rcond=None)
+    hess = np.zeros((d, d))
+    for k, (i, j) in enumerate(pairs):
+        c = coef[1 + d + k]
+        if i == j:
+            hess[i, i] = 2.0 * c
+        else:
+            hess[i, j] = hess[j, i] = c
+    if np.linalg.eigvalsh(hess).max() >= 0.0:
+        return None
+    return -np.linalg.solve(hess, coef[1:1 + d])
+
+
+def bilinear(img, xs, ys):
+    """ค่าภาพที่พิกัดทศนิยม (vectorized); จุดนอกภาพ = ค่าขอบ"""
+    h, w = img.shape
+    xs = np.clip(xs, 0.0, w - 1.001)
+    ys = np.clip(ys, 0.0, h - 1.001)
+    x0 = xs.astype(np.intp)
+    y0 = ys.astype(np.intp)
+    fx = (xs - x0).astype(np.float32)
+    fy = (ys - y0).astype(np.float32)
+    a = img[y0, x0].astype(np.float32)
+    b = img[y0, x0 + 1].astype(np.float32)
+    c = img[y0 + 1, x0].astype(np.float32)
+    d = img[y0 + 1, x0 + 1].astype(np.float32)
+    top = a + (b - a) * fx
+    bot = c + (d - c) * fx
+    return top + (bot - top) * fy
+
+
+def _edge_offsets(img, px, py, nx, ny, reach, min_contrast):
+    """
+    ระยะ (px) ตามแนว normal จากจุด model ถึงขอบในภาพ + น้ำหนัก (0 = ไม่พบขอบที่เชื่อได้)
+    ใช้ |อนุพันธ์ตามแนว normal| เป็น profile (ไม่สน polarity) แล้ว fit parabola รอบ peak
+    """
+    ts = np.arange(-reach, reach + 1e-6, PROFILE_STEP, dtype=np.float32)
+    sx = px[:, None] + nx[:, None] * ts[None, :]
+    sy = py[:, None] + ny[:, None] * ts[None, :]
+    # central difference จากภาพที่เบลอแล้ว (pyramid ชั้น 0)
+    gx = (bilinear(img, sx + 1.0, sy) - bilinear(img, sx - 1.0, sy)) * 0.5
+    gy = (bilinear(img, sx, sy + 1.0) - bilinear(img, sx, sy - 1.0)) * 0.5
+    gn = np.abs(gx * nx[:, None] + gy * ny[:, None])
+    k = np.argmax(gn, axis=1)
+    rows = np.arange(gn.shape[0])
+    peak = gn[rows, k]
+    mag = np.sqrt(gx[rows, k] ** 2 + gy[rows, k] ** 2)
+    inner = (k > 0) & (k < ts.size - 1)
+    kk = np.clip(k, 1, ts.size - 2)
+    sm, s0, sp = gn[rows, kk - 1], gn[rows, kk], gn[rows, kk + 1]
+    den = sm - 2.0 * s0 + sp
+    off = np.where(den < 0, 0.5 * (sm - sp) / np.where(den < 0, den, -1.0), 0.0)
+    t = ts[k] + np.clip(off, -0.5, 0.5) * PROFILE_STEP
+    # ขอบต้องแรงพอ (min_contrast เป็นขนาด Sobel ~ 8x central difference) และทิศตรงกับ model
+    ok = inner & (peak * 8.0 > min_contrast) & (peak >= MIN_ALIGNMENT * np.maximum(mag, 1e-6))
+    return t, ok.astype(np.float64)
+
+
+def least_squares_pose(img, dx, dy, theta, x, y, angle, min_contrast, mode=SUBPIXEL_LEAST_SQUARES):
+    """
+    ปรับ pose (x, y, angle องศา) ให้ขอบของ model (dx, dy, theta ที่ชั้น 0) ทับขอบในภาพ img (float32)
+    คืน (x, y, angle, rms) — rms = ค่าคลาดเฉลี่ยตามแนว normal (px) หรือ None ถ้าจุดขอบไม่พอ
+    """
+    iterations, reach = _LSQ_SETTINGS.get(mode, _LSQ_SETTINGS[SUBPIXEL_LEAST_SQUARES])
+    dx = dx.astype(np.float64)
+    dy = dy.astype(np.float64)
+    theta = theta.astype(np.float64)
+    rms = None
+    for _ in range(iterations):
+        a = math.radians(angle)
+        c, s = math.cos(a), math.sin(a)
+        rx = c * dx + s * dy
+        ry = -s * dx + c * dy
+        th = theta - a
+        nx, ny = np.cos(th), np.sin(th)
+        t, w = _edge_offsets(img, (x + rx).astype(np.float32), (y + ry).astype(np.float32),
+                             nx.astype(np.float32), ny.astype(np.float32), reach, min_contrast)
+        if w.sum() < 6:
+            return x, y, angle, None
+        # n·(δt + δθ * ∂p/∂θ) = t ; ∂p/∂θ (θ = มุมทวนเข็ม) = (ry, -rx)
+        jac = np.stack([nx, ny, nx * ry - ny * rx], axis=1)
+        sw = np.sqrt(w)
+        sol, *_ = np.linalg.lstsq(jac * sw[:, None], t * sw, rcond=None)
+        tx, ty, dth = sol
+        x += tx
+        y += ty
+        angle += math.degrees(dth)
+        resid = (t - jac @ sol)[w > 0]
+        rms = float(np.sqrt(np.mean(resid * resid)))
+        if abs(tx) < CONVERGED_PX and abs(ty) < CONVERGED_PX and abs(dth) * (np.abs(dx).max() + 1) < CONVERGED_PX:
+            break
+    return x, y, angle, rms
@@ -0,0 +1,217 @@
+import configparser
+import math
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from vision.roi_search import CONFIG_PATH
+
+# ---------------------------------------------------------------------------
+# Pixel -> robot: แทน scale + offset ที่ตั้งด้วยมือ ([ROBOT] calpick/offsetpickx/offsetpicky)
+# ด้วย transform ที่ fit จากคู่จุด pixel <-> robot N คู่
+#   affine (6 ค่า, >= 3 คู่) หรือ homography (8 ค่า, >= 4 คู่; กล้องไม่ตั้งฉากกับพาเลท)
+#   RANSAC (cv2.estimateAffine2D / cv2.findHomography) ตัดคู่ที่ผิด แล้ว least squares ใหม่บน inlier
+# เก็บเป็นเมทริกซ์ 3x3 ใน [ROBOT] <kind>_transform (kind = pick / place) แล้วแปลงทั้ง batch ด้วย matmul ครั้งเดียว
+# มุม: map ทิศของชิ้นงานผ่าน Jacobian ของ transform ที่จุดนั้น -> ใช้กับแกนหุ่นหมุน/กลับด้านได้
+#   (transform แบบ scale อย่างเดียวได้มุมเท่าเดิม = แบบเก่า angle = มุมภาพ + [ROBOT] angle)
+# ---------------------------------------------------------------------------
+
+MODEL_AFFINE = "affine"
+MODEL_HOMOGRAPHY = "homography"
+MIN_POINTS = {MODEL_AFFINE: 3, MODEL_HOMOGRAPHY: 4}
+RANSAC_THRESHOLD = 1.0  # mm
+
+
+class CalibrationError(ValueError):
+    """คู่จุดไม่พอ / เรียงตัวเป็นเส้นตรง / RANSAC หา model ไม่ได้"""
+
+
+def _as_points(points) -> np.ndarray:
+    pts = np.asarray(points, dtype=np.float64)
+    return pts.reshape(-1, 2)
+
+
+def _lstsq_affine(px, robot) -> np.ndarray:
+    a = np.hstack([px, np.ones((len(px), 1))])
+    sol, _, rank, _ = np.linalg.lstsq(a, robot, rcond=None)
+    if rank < 3:
+        raise CalibrationError("pixel points are collinear")
+    m = np.eye(3)
+    m[:2, :] = sol.T
+    return m
+
+
+def _lstsq_homography(px, robot) -> np.ndarray:
+    # DLT บนจุดที่ normalize แล้ว (Hartley) -> SVD
+    def norm(p):
+        c = p.mean(axis=0)
+        d = np.sqrt(((p - c) ** 2).sum(axis=1)).mean() or 1.0
+        s = math.sqrt(2.0) / d
+        return np.array([[s, 0, -s * c[0]], [0, s, -s * c[1]], [0, 0, 1.0]])
+
+    tp, tr = norm(px), norm(robot)
+    p = px @ tp[:2, :2].T + tp[:2, 2]
+    r = robot @ tr[:2, :2].T + tr[:2, 2]
+    n = len(p)
+    a = np.zeros((2 * n, 9))
+    a[0::2, 0:2], a[0::2, 2] = p, 1.0
+    a[0::2, 6:8] = -r[:, :1] * p
+    a[0::2, 8] = -r[:, 0]
+    a[1::2, 3:5], a[1::2, 5] = p, 1.0
+    a[1::2, 6:8] = -r[:, 1:] * p
+    a[1::2, 8] = -r[:, 1]
+    _, sv, vt = np.linalg.svd(a)
+    if sv[-2] < 1e-12:
+        raise CalibrationError("degenerate point configuration")
+    h = np.linalg.inv(tr) @ vt[-1].reshape(3, 3) @ tp
+    return h / h[2, 2]
+
+
+class PixelToRobot:
+    """
+    matrix: 3x3 (affine = แถวล่าง 0 0 1); angle_offset: องศาที่บวกเพิ่ม (เช่นมุมของ gripper, [ROBOT] angle)
+    apply(points) / apply_poses(poses): แปลงทั้ง batch ด้วย matmul ครั้งเดียว
+    """
+
+    def __init__(self, matrix, model=MODEL_AFFINE, angle_offset=0.0, rms=None, inliers=None):
+        self.matrix = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+        self.model = model
+        self.angle_offset = float(angle_offset)
+        self.rms = rms
+        self.inliers = inliers
+        self._linear = self.matrix[:2, :2].T.copy()
+        self._shift = self.matrix[:2, 2].copy()
+        self._persp = self.matrix[2].copy()
+        self.is_affine = bool(np.allclose(self._persp, (0.0, 0.0, 1.0)))
+
+    @classmethod
+    def from_scale(cls, scale, offset_x, offset_y, angle_offset=0.0):
+        """transform แบบเดิม: mm = px * scale + offset"""
+        return cls([[scale, 0.0, offset_x], [0.0, scale, offset_y], [0.0, 0.0, 1.0]], MODEL_AFFINE, angle_offset)
+
+    @classmethod
+    def fit(cls, pixel_points, robot_points, model=MODEL_AFFINE, threshold=RANSAC_THRESHOLD, angle_offset=0.0):
+        """
+        fit จากคู่จุด (N, 2): RANSAC ตัด outlier (residual > threshold mm) แล้ว least squares บน inlier
+        threshold <= 0 = least squares ทุกคู่ (ไม่ RANSAC)
+        """
+        px, robot = _as_points(pixel_points), _as_points(robot_points)
+        if model not in MIN_POINTS:
+            raise CalibrationError(f"unknown model {model!r}")
+        if len(px) != len(robot):
+            raise CalibrationError(f"{len(px)} pixel points vs {len(robot)} robot points")
+        if len(px) < MIN_POINTS[model]:
+            raise CalibrationError(f"{model} needs at least {MIN_POINTS[model]} point pairs, got {len(px)}")
+        mask = np.ones(len(px), dtype=bool)
+        if threshold > 0 and len(px) > MIN_POINTS[model]:
+            src, dst = px.astype(np.float32), robot.astype(np.float32)
+            if model == MODEL_AFFINE:
+                m, inl = cv2.estimateAffine2D(src, dst, method=cv2.RANSAC, ransacReprojThreshold=threshold,
+                                              maxIters=2000, confidence=0.999)
+            else:
+                m, inl = cv2.findHomography(src, dst, cv2.RANSAC, threshold, maxIters=2000, confidence=0.999)
+            if m is None or inl is None:
+                raise CalibrationError("RANSAC found no consistent model")
+            mask = inl.ravel().astype(bool)
+            if mask.sum() < MIN_POINTS[model]:
+                raise CalibrationError(f"only {mask.sum()} inliers within {threshold} mm")
+        solve = _lstsq_affine if model == MODEL_AFFINE else _lstsq_homography
+        out = cls(solve(px[mask], robot[mask]), model, angle_offset, inliers=mask)
+        out.rms = float(np.sqrt(np.mean(np.sum((out.apply(px[mask]) - robot[mask]) ** 2, axis=1))))
+        return out
+
+    def apply(self, points) -> np.ndarray:
+        """(N, 2) pixel -> (N, 2) robot"""
+        pts = _as_points(points)
+        out = pts @ self._linear + self._shift
+        if self.is_affine:
+            return out
+        w = pts @ self._persp[:2] + self._persp[2]
+        return out / w[:, None]
+
+    def jacobians(self, points) -> np.ndarray:
+        """(N, 2, 2) d(robot)/d(pixel) ที่แต่ละจุด (affine = ค่าเดียวกันทุกจุด)"""
+        pts = _as_points(points)
+        if self.is_affine:
+            return np.broadcast_to(self.matrix[:2, :2], (len(pts), 2, 2))
+        m = self.matrix
+        w = pts @ m[2, :2] + m[2, 2]
+        xy = self.apply(pts)
+        jac = (m[None, :2, :2] - xy[:, :, None] * m[None, 2:3, :2]) / w[:, None, None]
+        return jac
+
+    def apply_angles(self, points, angles) -> np.ndarray:
+        """
+        มุมภาพ (องศา, บวก = ทวนเข็มบนจอ) ที่จุด points -> มุมในพิกัดหุ่นแบบเดียวกับ pixel_to_pick เดิม
+        ทิศ (cos a, -sin a) ในภาพ -> J @ ทิศ -> atan2(-vy, vx); J = scale * I ได้มุมเดิม
+        """
+        a = np.radians(np.asarray(angles, dtype=np.float64).ravel())
+        d = np.stack([np.cos(a), -np.sin(a)], axis=1)
+        if self.is_affine:
+            v = d @ self._linear
+        else:
+            v = np.einsum("nij,nj->ni", self.jacobians(points), d)
+        return np.degrees(np.arctan2(-v[:, 1], v[:, 0])) + self.angle_offset
+
+    def apply_poses(self, poses, key="c1") -> np.ndarray:
+        """list ของ pose dict (None ข้าม) -> array (N, 3) ของ x, y, angle; แถวของ pose ที่เป็น None = nan"""
+        out = np.full((len(poses), 3), np.nan)
+        idx = [i for i, p in enumerate(poses) if p is not None]
+        if idx:
+            rows = np.array([(*poses[i][key], poses[i]["angle"]) for i in idx], dtype=np.float64)
+            out[idx, :2] = self.apply(rows[:, :2])
+            out[idx, 2] = self.apply_angles(rows[:, :2], rows[:, 2])
+        return out
+
+    def __call__(self, pose, key="c1"):
+        """pose เดียว -> (x, y, angle) แบบเดียวกับ pixel_to_pick"""
+        pt = np.asarray(pose[key], dtype=np.float64).reshape(1, 2)
+        x, y = self.apply(pt)[0]
+        return float(x), float(y), float(self.apply_angles(pt, [pose["angle"]])[0])
+
+    # ----- config -----
+
+    def to_config(self, kind="pick") -> dict:
+        values = {f"{kind}_transform": ", ".join(f"{v:.10g}" for v in self.matrix.ravel()),
+                  f"{kind}_model": self.model}
+        if self.rms is not None:
+            values[f"{kind}_rms"] = f"{self.rms:.4f}"
+        return values
+
+    @classmethod
+    def from_config(cls, cfg, kind="pick", angle_offset=0.0):
+        """จาก ConfigParser ([ROBOT] <kind>_transform); ไม่มีหรืออ่านไม่ได้ = None (ใช้ scale + offset แบบเดิม)"""
+        if not cfg.has_option("ROBOT", f"{kind}_transform"):
+            return None
+        try:
+            values = [float(v) for v in cfg.get("ROBOT", f"{kind}_transform").split(",")]
+            if len(values) != 9:
+                return None
+            return cls(np.array(values).reshape(3, 3), cfg.get("ROBOT", f"{kind}_model", fallback=MODEL_AFFINE),
+                       angle_offset)
+        except ValueError:
+            return None
+
+
+def write_transform(transform: PixelToRobot, kind="pick", path=None):
+    """เขียน [ROBOT] <kind>_transform/_model/_rms กลับลง config.ini (เขียนไฟล์ชั่วคราวแล้ว replace เหมือนหน้า Setting)"""
+    path = str(path or CONFIG_PATH)
+    cfg = configparser.ConfigParser()
+    cfg.read(path, encoding="utf-8")
+    if not cfg.has_section("ROBOT"):
+        cfg.add_section("ROBOT")
+    for key, value in transform.to_config(kind).items():
+        cfg.set("ROBOT", key, value)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path) + ".",
+                               suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            cfg.write(f)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path
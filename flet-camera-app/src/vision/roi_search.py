@@ -0,0 +1,256 @@
+import configparser
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+from vision.pose import PROJECT_ROOT, TwoTemplateMatcher, first_center, result_angle, two_template_pose
+
+# ---------------------------------------------------------------------------
+# ค้นสองขั้นใน ROI ตาม [PROGRAMS]:
+#   1) template1 ค้นเฉพาะใน large ROI (large_roi_width x large_roi_height กลางภาพ)
+#   2) template2 ค้นเฉพาะใน small ROI (small_roi_width x small_roi_height) ที่วางตาม pose ของ template1
+#      small_roi_begin = ระยะ (px) จากจุดศูนย์กลาง template1 ถึงจุดศูนย์กลาง small ROI ตามแกน y ของ template1
+#   3) ถ้า template2 ไม่อยู่ใน small ROI (ทิศของชิ้นงานต่างจากที่ ROI วางไว้ เช่น c2 อยู่ขวาบนของ c1)
+#      ค้นซ้ำในวงกลมรอบ template1 ที่ครอบ small ROI ทุกมุมหมุน (wide_roi)
+# ROI จำกัด "จุดศูนย์กลาง" ของผล (เหมือน domain ของภาพใน find_shape_model) ไม่ใช่กรอบของทั้ง template
+# ภาพถูก crop = ROI + ขอบเท่าครึ่งเส้นทแยง template แล้วแปลงผลกลับเป็นพิกัดภาพเต็ม
+# ---------------------------------------------------------------------------
+
+CONFIG_PATH = os.path.join(PROJECT_ROOT, "src", "pages", "config.ini")
+ROI_KEYS = ("large_roi_width", "large_roi_height", "small_roi_width", "small_roi_height", "small_roi_begin")
+CROP_MARGIN = 8  # px เผื่อรอบ crop ให้ refine/gradient ที่ขอบ
+
+_XY_FIELDS = (
+    ("leftTopX", "leftTopY"), ("leftBottomX", "leftBottomY"),
+    ("rightTopX", "rightTopY"), ("rightBottomX", "rightBottomY"),
+    ("centerX", "centerY"),
+)
+
+
+def load_program_config(path=None, keys=ROI_KEYS) -> dict:
+    """อ่านค่าตัวเลขจาก [PROGRAMS] (ถ้าไม่มีใช้ค่าใน [CAMERA]); ไม่มีทั้งสองที่ = 0"""
+    cfg = configparser.ConfigParser()
+    cfg.read(path or CONFIG_PATH, encoding="utf-8")
+    out = {}
+    for key in keys:
+        value = 0.0
+        for section in ("PROGRAMS", "CAMERA"):
+            try:
+                if cfg.has_option(section, key):
+                    value = cfg.getfloat(section, key)
+                    break
+            except ValueError:
+                continue
+        out[key] = value
+    return out
+
+
+def load_roi_config(path=None) -> dict:
+    """ขนาด ROI จาก [PROGRAMS]; ค่า 0 = ไม่จำกัด"""
+    return load_program_config(path, ROI_KEYS)
+
+
+class Roi:
+    """สี่เหลี่ยม (หมุนได้) รอบจุด (cx, cy); angle องศา บวก = ทวนเข็มบนจอ เหมือนมุมของผล match"""
+
+    def __init__(self, cx, cy, width, height, angle=0.0):
+        self.cx = float(cx)
+        self.cy = float(cy)
+        self.width = float(width)
+        self.height = float(height)
+        self.angle = float(angle)
+
+    def corners(self) -> np.ndarray:
+        a = math.radians(self.angle)
+        c, s = math.cos(a), math.sin(a)
+        w2, h2 = self.width / 2.0, self.height / 2.0
+        pts = [(-w2, -h2), (w2, -h2), (w2, h2), (-w2, h2)]
+        return np.array([(self.cx + c * dx + s * dy, self.cy - s * dx + c * dy) for dx, dy in pts],
+                        dtype=np.float32)
+
+    def bounds(self, shape=None):
+        """กรอบแกนตรง (x0, y0, x1, y1) ที่ครอบ ROI (ตัดตามขนาดภาพถ้าให้ shape)"""
+        pts = self.corners()
+        x0, y0 = pts.min(axis=0)
+        x1, y1 = pts.max(axis=0)
+        x0, y0 = int(math.floor(x0)), int(math.floor(y0))
+        x1, y1 = int(math.ceil(x1)) + 1, int(math.ceil(y1)) + 1
+        if shape is not None:
+            h, w = shape[:2]
+            x0, y0 = max(0, x0), max(0, y0)
+            x1, y1 = min(w, x1), min(h, y1)
+        return x0, y0, x1, y1
+
+    def contains(self, x, y) -> bool:
+        a = math.radians(self.angle)
+        c, s = math.cos(a), math.sin(a)
+        dx, dy = x - self.cx, y - self.cy
+        # หมุนกลับเข้าแกนของ ROI (inverse ของ corners)
+        u = c * dx - s * dy
+        v = s * dx + c * dy
+        return abs(u) <= self.width / 2.0 and abs(v) <= self.height / 2.0
+
+    @property
+    def area(self) -> float:
+        return self.width * self.height
+
+    def __repr__(self):
+        return f"Roi(cx={self.cx:.1f}, cy={self.cy:.1f}, w={self.width:.0f}, h={self.height:.0f}, angle={self.angle:.1f})"
+
+
+def large_roi(image_shape, roi_cfg, center=None):
+    """large ROI กลางภาพ (หรือรอบ center); None ถ้าไม่ได้ตั้งขนาด"""
+    w, h = roi_cfg.get("large_roi_width", 0), roi_cfg.get("large_roi_height", 0)
+    if w <= 0 or h <= 0:
+        return None
+    ih, iw = image_shape[:2]
+    cx, cy = center if center is not None else ((iw - 1) / 2.0, (ih - 1) / 2.0)
+    return Roi(cx, cy, w, h)
+
+
+def small_roi(center, angle, roi_cfg):
+    """small ROI ตาม pose ของ template1 (center, angle); None ถ้าไม่ได้ตั้งขนาด"""
+    w, h = roi_cfg.get("small_roi_width", 0), roi_cfg.get("small_roi_height", 0)
+    if w <= 0 or h <= 0 or center is None:
+        return None
+    a = math.radians(angle)
+    begin = roi_cfg.get("small_roi_begin", 0.0)
+    # จุด (0, begin) ในแกนของ template1 -> พิกัดภาพ
+    return Roi(center[0] + math.sin(a) * begin, center[1] + math.cos(a) * begin, w, h, angle)
+
+
+def small_roi_reach(roi_cfg) -> float:
+    """ระยะไกลสุดจากจุดศูนย์กลาง template1 ถึงมุมของ small ROI (0 = ไม่ได้ตั้งขนาด)"""
+    w, h = roi_cfg.get("small_roi_width", 0), roi_cfg.get("small_roi_height", 0)
+    if w <= 0 or h <= 0:
+        return 0.0
+    return math.hypot(w / 2.0, abs(roi_cfg.get("small_roi_begin", 0.0)) + h / 2.0)
+
+
+def wide_roi(center, roi_cfg):
+    """กรอบรอบ template1 ที่ครอบ small ROI หมุนได้ทุกมุม (รัศมี small_roi_reach); None ถ้าไม่ได้ตั้งขนาด"""
+    reach = small_roi_reach(roi_cfg)
+    if reach <= 0 or center is None:
+        return None
+    return Roi(center[0], center[1], 2.0 * reach, 2.0 * reach)
+
+
+def shift_result(result, dx, dy):
+    """เลื่อนพิกัดทุกจุดของผล match (struct ของ matching หรือ MatchResult) ไป (dx, dy) แบบ in place"""
+    for fx, fy in _XY_FIELDS:
+        if hasattr(result, fx):
+            setattr(result, fx, getattr(result, fx) + dx)
+            setattr(result, fy, getattr(result, fy) + dy)
+    return result
+
+
+def match_in_roi(mt, matcher, image, roi, template_size, pyramid=None, angles=None):
+    """
+    run_match เฉพาะใน roi แล้วคืน (count, results, centers) เป็นพิกัดภาพเต็ม
+    roi=None = ค้นทั้งภาพ; template_size = (w, h) ใช้คำนวณขอบที่ต้อง crop เผื่อ
+    pyramid: pyramid ของทั้งเฟรม (built-in matcher) -> ค้นใน roi บน pyramid นี้เลยไม่ต้อง crop
+    angles: (center, half_width) แถบมุมที่ค้น (เฉพาะ built-in matcher; native ค้นช่วงมุมเดิม)
+    """
+    native = not getattr(matcher, "supports_roi", False)
+    shared = pyramid is not None and not native
+    if roi is None:
+        if native:
+            return mt.run_match(matcher, image)
+        return mt.run_match(matcher, image, pyramid=pyramid, angles=angles)
+    h, w = image.shape[:2]
+    bx0, by0, bx1, by1 = roi.bounds((h, w))
+    if bx1 <= bx0 or by1 <= by0:
+        return 0, [], []
+    if shared:
+        _, results, _ = mt.run_match(matcher, image, roi=(bx0, by0, bx1, by1), pyramid=pyramid, angles=angles)
+        kept = [r for r in results if roi.contains(r.centerX, r.centerY)]
+        return len(kept), kept, [(r.centerX, r.centerY) for r in kept]
+    # จัด origin ของ crop ให้ลงตัวกับ pyramid (ตำแหน่ง pixel ชั้นบนไม่เลื่อนครึ่ง pixel)
+    # และเผื่ออีก 2 pixel ของชั้นบนสุด เพราะ pyrDown ที่ขอบ crop ไม่เหมือนภาพจริง
+    align = 2 ** max(0, int(getattr(matcher, "num_levels", 1)) - 1)
+    margin = int(math.ceil(math.hypot(*template_size) / 2.0)) + CROP_MARGIN + 2 * align
+    x0 = max(0, (bx0 - margin) // align * align)
+    y0 = max(0, (by0 - margin) // align * align)
+    x1 = min(w, bx1 + margin)
+    y1 = min(h, by1 + margin)
+    crop = image[y0:y1, x0:x1]
+    if not native:
+        _, results, _ = mt.run_match(matcher, crop, roi=(bx0 - x0, by0 - y0, bx1 - x0, by1 - y0), angles=angles)
+    else:
+        _, results, _ = mt.run_match(matcher, crop)
+    kept = []
+    for r in results:
+        shift_result(r, x0, y0)
+        if roi.contains(r.centerX, r.centerY):
+            kept.append(r)
+    centers = [(r.centerX, r.centerY) for r in kept]
+    return len(kept), kept, centers
+
+
+def draw_roi(image, roi, color=(255, 128, 0)):
+    if roi is not None:
+        pts = np.rint(roi.corners()).astype(np.int32)
+        cv2.polylines(image, [pts], True, color, 2, cv2.LINE_AA)
+    return image
+
+
+class TwoStageMatcher(TwoTemplateMatcher):
+    """
+    TwoTemplateMatcher ที่ค้น template1 ใน large ROI แล้วค้น template2 ใน small ROI รอบ template1
+    roi_cfg: dict จาก load_roi_config(); large_center: จุดศูนย์กลาง large ROI (None = กลางภาพ)
+    template2 ไม่อยู่ใน small ROI -> ค้นซ้ำใน wide_roi แล้วรับเฉพาะผลที่ห่าง template1 ไม่เกิน small_roi_reach
+    """
+
+    def __init__(self, mt, template1_img, template2_img, params1=None, params2=None, dll_path=None,
+                 registry=None, roi_cfg=None, large_center=None):
+        # สองขั้นต้องรอกัน (ROI ของ template2 มาจากผล template1) จึงไม่รันพร้อมกัน แต่แชร์ pyramid
+        super().__init__(mt, template1_img, template2_img, params1, params2, dll_path, registry)
+        self.pyramid_fn = getattr(mt, "frame_pyramid", None)
+        self.roi_cfg = load_roi_config() if roi_cfg is None else roi_cfg
+        self.large_center = large_center
+        self.template1_size = (template1_img.shape[1], template1_img.shape[0])
+        self.template2_size = (template2_img.shape[1], template2_img.shape[0])
+        self.last_rois = (None, None)
+        self.wide_searches = 0  # จำนวนเฟรมที่ template2 ต้องค้นซ้ำใน wide_roi
+        self.wide_hits = 0
+
+    def _shared_pyramid(self, frame):
+        levels = [getattr(m, "num_levels", 0) for m in (self.matcher1, self.matcher2)
+                  if getattr(m, "supports_roi", False)]
+        if self.pyramid_fn is None or len(levels) < 2:
+            return None
+        return self.pyramid_fn(frame, max(levels))
+
+    def match(self, frame):
+        t0 = time.perf_counter()
+        pyramid = self._shared_pyramid(frame)
+        tp = time.perf_counter()
+        roi1 = large_roi(frame.shape, self.roi_cfg, self.large_center)
+        _, results1, center1 = match_in_roi(self.mt, self.matcher1, frame, roi1, self.template1_size, pyramid)
+        t1 = time.perf_counter()
+        c1 = first_center(center1)
+        roi2 = small_roi(c1, result_angle(results1), self.roi_cfg)
+        if c1 is None:
+            results2, center2 = [], []
+        else:
+            _, results2, center2 = match_in_roi(self.mt, self.matcher2, frame, roi2, self.template2_size,
+                                                pyramid)
+            wide = wide_roi(c1, self.roi_cfg) if not results2 and roi2 is not None else None
+            if wide is not None:
+                self.wide_searches += 1
+                _, results2, _ = match_in_roi(self.mt, self.matcher2, frame, wide, self.template2_size, pyramid)
+                reach = small_roi_reach(self.roi_cfg)
+                results2 = [r for r in results2 if math.hypot(r.centerX - c1[0], r.centerY - c1[1]) <= reach]
+                center2 = [(r.centerX, r.centerY) for r in results2]
+                self.wide_hits += bool(results2)
+                roi2 = wide
+        t2 = time.perf_counter()
+        self.last_rois = (roi1, roi2)
+        self.last_angles = (result_angle(results1), result_angle(results2))
+        self.last_counts = (len(results1), len(results2))
+        self.last_timing = {"pyramid_ms": (tp - t0) * 1000.0, "template1_ms": (t1 - tp) * 1000.0,
+                            "template2_ms": (t2 - t1) * 1000.0, "wall_ms": (t2 - t0) * 1000.0}
+        return two_template_pose(center1, center2, results1, results2)
@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------------------------------------------------------------------------
+# Match scheduler: รันหลาย matcher บนเฟรมเดียวกันพร้อมกันใน thread pool
+# - pyramid (gray + blur + pyrDown) สร้างครั้งเดียวต่อเฟรมแล้วแชร์ให้ทุก matcher ที่รับ pyramid ได้
+#   (built-in ShapeMatcher); native matcher ได้ภาพเดิมไปแปลงเอง
+# - OpenCV / NumPy / native DLL ปล่อย GIL ระหว่างคำนวณ -> เวลารวมใกล้ matcher ที่ช้าที่สุดตัวเดียว
+# ---------------------------------------------------------------------------
+
+
+def _uses_pyramid(matcher) -> bool:
+    return getattr(matcher, "supports_roi", False) and hasattr(matcher, "num_levels")
+
+
+class MatchScheduler:
+    def __init__(self, mt, max_workers: int = 2):
+        self.mt = mt
+        self.pyramid_fn = getattr(mt, "frame_pyramid", None)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="match")
+        self.last_timing = {}
+
+    def pyramid_for(self, image, matchers):
+        """pyramid ที่ลึกพอสำหรับทุก matcher ในชุด (None ถ้าไม่มีตัวไหนใช้)"""
+        levels = [m.num_levels for m in matchers if _uses_pyramid(m)]
+        if not levels or self.pyramid_fn is None:
+            return None
+        return self.pyramid_fn(image, max(levels))
+
+    def _run_one(self, matcher, image, roi, pyramid):
+        t0 = time.perf_counter()
+        if pyramid is not None and _uses_pyramid(matcher):
+            out = self.mt.run_match(matcher, image, roi=roi, pyramid=pyramid)
+        elif roi is not None and getattr(matcher, "supports_roi", False):
+            out = self.mt.run_match(matcher, image, roi=roi)
+        else:
+            out = self.mt.run_match(matcher, image)
+        return out, (time.perf_counter() - t0) * 1000.0
+
+    def run(self, image, jobs):
+        """
+        jobs: dict name -> matcher หรือ (matcher, roi)
+        คืน dict name -> (count, results, centers); เวลาแต่ละตัว/รวมอยู่ใน self.last_timing (ms)
+        """
+        t0 = time.perf_counter()
+        specs = {name: (job if isinstance(job, tuple) else (job, None)) for name, job in jobs.items()}
+        futures = {}
+        # native matcher เริ่มได้เลยระหว่างที่สร้าง pyramid ให้ตัวที่เหลือ
+        for name, (matcher, roi) in specs.items():
+            if not _uses_pyramid(matcher):
+                futures[name] = self._pool.submit(self._run_one, matcher, image, roi, None)
+        t_pyr = time.perf_counter()
+        pyramid = self.pyramid_for(image, [m for m, _ in specs.values()])
+        pyramid_ms = (time.perf_counter() - t_pyr) * 1000.0
+        for name, (matcher, roi) in specs.items():
+            if name not in futures:
+                futures[name] = self._pool.submit(self._run_one, matcher, image, roi, pyramid)
+
+        outputs = {}
+        timing = {"pyramid_ms": pyramid_ms}
+        for name, fut in futures.items():
+            outputs[name], timing[f"{name}_ms"] = fut.result()
+        timing["wall_ms"] = (time.perf_counter() - t0) * 1000.0
+        self.last_timing = timing
+        return outputs
+
+    def close(self):
+        self._pool.shutdown(wait=False)
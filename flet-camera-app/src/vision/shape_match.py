@@ -0,0 +1,554 @@
+import math
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from vision import refine
+from vision.nms import rotated_nms
+from vision.template_bank import TemplateBank, orientation_field
+
+# ---------------------------------------------------------------------------
+# Shape-based matching ด้วย OpenCV/NumPy ล้วน (ไม่ต้องใช้ native DLL)
+#
+# API เหมือนโมดูล matching: MatchingParams, find_library_path,
+# create_matcher_for_template, run_match, draw_results, result_to_points, release_matcher
+#
+# หลักการแบบเดียวกับ find_shape_model ของ HALCON:
+#   - model = จุดขอบ (edge feature) + ทิศ gradient ของ template ในแต่ละชั้น pyramid
+#   - score = ค่าเฉลี่ย |cos| ของมุมระหว่าง gradient model กับ gradient ภาพ
+#     (ignore_local_polarity) -> ทนต่อแสงเปลี่ยน
+#   - หาแบบหยาบที่ชั้นบนสุดครบทุกตำแหน่ง/มุม แล้ว refine ลงมาทีละชั้นเฉพาะรอบ ๆ candidate
+# การหมุนทำกับพิกัดจุดและทิศ gradient ตรง ๆ (ไม่ warp ภาพ template)
+#
+# method ของ MatchingParams เลือกวิธีให้ create_matcher_for_template:
+#   "ncc"   (ค่าเริ่มต้น) vision.ncc_match — score = NCC ของภาพ gray แบบ native matching
+#           params ชุดเดียวกับ demo/test1.py (score 0.4, angle ±1) ให้ผลแบบเดียวกับ native
+#           path ที่แอปใช้: bank มุมที่หมุนไว้ล่วงหน้า, sub-pixel แบบ least squares,
+#           model file (vision.model_file) และการจูน params (demo/tune_params.py) ทำกับ NCC ทั้งหมด
+#   "shape" ShapeMatcher ด้านล่าง (score = |cos| ของ gradient) — ทนแสงเปลี่ยน/บังบางส่วนได้ดีกว่า
+#           แต่ score ต่ำกว่า NCC มาก (template2 ทั้งตัว compressor ได้แค่ ~0.3) ต้องตั้ง threshold เอง
+#           ใช้เมื่อเลือก method="shape" เองเท่านั้น (model file / tune_params --method shape รองรับเหมือนกัน)
+# ---------------------------------------------------------------------------
+
+N_BINS = 16  # quantize ทิศ gradient (mod 180 องศา) เป็น 16 ช่อง
+_BIN_WIDTH = math.pi / N_BINS
+_BIN_ANGLES = np.arange(N_BINS, dtype=np.float32) * _BIN_WIDTH
+_BIN_COS = np.cos(_BIN_ANGLES).astype(np.float32)
+_BIN_SIN = np.sin(_BIN_ANGLES).astype(np.float32)
+
+MIN_TOP_SIZE = 16      # ขนาด template ขั้นต่ำ (px) ที่ชั้นบนสุดของ pyramid
+MAX_LEVELS = 6
+TOP_SPREAD = 3         # dilate response ที่ชั้นบนสุด ให้ทนต่อ step มุม/ตำแหน่งที่หยาบ
+REFINE_RADIUS = 2      # px รอบ candidate ที่ค้นในชั้นถัดลงมา
+CANDIDATE_RATIO = 0.8  # threshold ชั้นบน = scoreThreshold * ratio (กันพลาด)
+FFT_MIN_FEATURES = 32  # ชั้นบนมีจุดขอบตั้งแต่นี้ขึ้นไป FFT correlation เร็วกว่าบวก slice ทีละจุด
+MAX_TOP_MAXIMA = 2048  # local maxima ชั้นบนสุดที่นำมาตัดระยะ (เมทริกซ์ N x N)
+METHOD_NCC = "ncc"
+METHOD_SHAPE = "shape"
+
+
+@dataclass
+class MatchingParams:
+    maxCount: int = 1
+    scoreThreshold: float = 0.5
+    iouThreshold: float = 0.5
+    angle: float = 0.0        # ค้นมุมช่วง ±angle องศา (>= 180 = รอบวง)
+    minArea: int = 256
+    angleStep: float = 0.0    # 0 = อัตโนมัติตามขนาด template ในแต่ละชั้น
+    numLevels: int = 0        # 0 = อัตโนมัติ
+    numFeatures: int = 128    # จำนวนจุดขอบสูงสุดต่อชั้น
+    minContrast: float = 30.0 # ขนาด gradient ขั้นต่ำที่นับเป็นขอบ
+    fftSearch: int = -1       # ชั้นบนสุดค้นด้วย FFT bank: -1 = อัตโนมัติ, 0 = ปิด, 1 = เปิด
+    subPixel: str = "least_squares"  # none / interpolation / least_squares / least_squares_high
+    method: str = METHOD_NCC  # ncc (score แบบ native) / shape (ShapeMatcher)
+
+
+@dataclass
+class MatchResult:
+    leftTopX: float
+    leftTopY: float
+    leftBottomX: float
+    leftBottomY: float
+    rightTopX: float
+    rightTopY: float
+    rightBottomX: float
+    rightBottomY: float
+    centerX: float
+    centerY: float
+    angle: float
+    score: float
+
+
+def find_library_path():
+    """Built-in engine ไม่มี native library; คืน None เพื่อให้เรียกแบบเดียวกับ matching ได้"""
+    return None
+
+
+def to_gray(img) -> np.ndarray:
+    if img.ndim == 3:
+        if img.shape[2] == 4:
+            return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return img
+
+
+def build_pyramid(gray, levels: int) -> list:
+    pyr = [gray]
+    for _ in range(1, levels):
+        pyr.append(cv2.pyrDown(pyr[-1]))
+    return pyr
+
+
+def frame_pyramid(image, levels: int) -> list:
+    """pyramid ของภาพค้น (gray + blur 3x3) ใช้ร่วมกันได้ทุก matcher ที่ num_levels <= levels"""
+    return build_pyramid(cv2.GaussianBlur(to_gray(image), (3, 3), 0), levels)
+
+
+def unit_gradients(gray, min_contrast: float):
+    """คืน (ux, uy) = ทิศ gradient หน่วย (0 ตรงที่ขอบอ่อนกว่า min_contrast)"""
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    mag = cv2.magnitude(gx, gy)
+    inv = np.where(mag > min_contrast, 1.0 / np.maximum(mag, 1e-6), 0.0).astype(np.float32)
+    return gx * inv, gy * inv
+
+
+def response_maps(gray, min_contrast: float, spread: int = 1) -> np.ndarray:
+    """
+    (N_BINS, H, W) float32: response[m] = |cos(ทิศภาพ - ทิศ bin m)| (dilate ด้วย spread)
+    ใช้ค่าเดียวกันได้ทุกมุมหมุนของ model -> คำนวณครั้งเดียวต่อภาพ/ชั้น
+    """
+    ux, uy = unit_gradients(gray, min_contrast)
+    resp = np.abs(_BIN_COS[:, None, None] * ux[None] + _BIN_SIN[:, None, None] * uy[None])
+    if spread > 1:
+        kernel = np.ones((spread, spread), np.uint8)
+        for m in range(N_BINS):
+            cv2.dilate(resp[m], kernel, dst=resp[m])
+    return resp
+
+
+def _select_features(gray, min_contrast: float, max_features: int):
+    """เลือกจุดขอบที่แรงและกระจายทั่ว template: เก็บจุดแรงสุดต่อ cell ของกริด"""
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    mag = cv2.magnitude(gx, gy)
+    # ไม่ใช้ขอบกรอบ template (Sobel ขอบภาพไม่ใช่ขอบวัตถุ)
+    mag[:1, :] = 0
+    mag[-1:, :] = 0
+    mag[:, :1] = 0
+    mag[:, -1:] = 0
+    thr = max(min_contrast, float(np.percentile(mag, 80)) * 0.5)
+    ys, xs = np.nonzero(mag > thr)
+    if xs.size == 0:
+        return None
+    m = mag[ys, xs]
+    h, w = gray.shape
+    cell = max(1, int(math.sqrt(h * w / max(1, max_features))))
+    while True:
+        cid = (ys // cell) * (w // cell + 1) + (xs // cell)
+        order = np.lexsort((-m, cid))
+        first = np.ones(order.size, bool)
+        first[1:] = cid[order[1:]] != cid[order[:-1]]
+        keep = order[first]
+        if keep.size <= max_features:
+            break
+        cell += 1
+    keep = keep[np.argsort(-m[keep])][:max_features]
+    fx = xs[keep].astype(np.float32)
+    fy = ys[keep].astype(np.float32)
+    theta = np.arctan2(gy[ys[keep], xs[keep]], gx[ys[keep], xs[keep]]).astype(np.float32)
+    cx = (w - 1) / 2.0
+    cy = (h - 1) / 2.0
+    return fx - cx, fy - cy, theta
+
+
+def auto_angle_step(radius: float) -> float:
+    """step มุม (องศา) ที่จุดไกลสุดของ model เลื่อนไม่เกิน ~2 px"""
+    return max(0.5, min(15.0, math.degrees(math.atan(2.0 / max(radius, 1.0)))))
+
+
+def angle_range(tolerance: float, step: float) -> np.ndarray:
+    if tolerance >= 180.0:
+        n = int(math.ceil(360.0 / step))
+        return (np.arange(n, dtype=np.float64) * (360.0 / n)) - 180.0
+    if tolerance <= 0:
+        return np.zeros(1)
+    n = int(math.ceil(tolerance / step))
+    return np.linspace(-tolerance, tolerance, 2 * n + 1)
+
+
+class _LevelModel:
+    """Model ของหนึ่งชั้น pyramid: offset จุดขอบจากจุดศูนย์กลาง + ทิศ gradient"""
+
+    def __init__(self, dx, dy, theta, size):
+        self.dx = dx
+        self.dy = dy
+        self.theta = theta
+        self.size = size  # (w, h) ของ template ชั้นนี้
+        self.radius = float(np.sqrt(dx * dx + dy * dy).max()) if dx.size else 1.0
+        self._rot = {}
+
+    def rotated(self, angles):
+        """
+        (A, N) ของ offset x, y (int) และ bin ของทิศ สำหรับมุม angles (องศา, บวก = ทวนเข็มบนจอ)
+        """
+        angles = np.atleast_1d(np.asarray(angles, dtype=np.float64))
+        key = tuple(np.round(angles, 6))
+        hit = self._rot.get(key)
+        if hit is not None:
+            return hit
+        a = np.deg2rad(angles)[:, None]
+        c, s = np.cos(a), np.sin(a)
+        rx = np.rint(c * self.dx + s * self.dy).astype(np.int32)
+        ry = np.rint(-s * self.dx + c * self.dy).astype(np.int32)
+        th = self.theta[None, :] - a
+        bins = (np.rint(th / _BIN_WIDTH).astype(np.int64) % N_BINS).astype(np.intp)
+        out = (rx, ry, bins)
+        if len(self._rot) < 4096:
+            self._rot[key] = out
+        return out
+
+
+class ShapeMatcher:
+    supports_roi = True  # match(image, roi=...) จำกัดตำแหน่งจุดศูนย์กลางได้เอง
+
+    def __init__(self, template_img, params: MatchingParams):
+        self.params = params
+        gray = to_gray(template_img)
+        self.template_size = (gray.shape[1], gray.shape[0])
+        levels = params.numLevels
+        if levels <= 0:
+            levels = 1
+            while levels < MAX_LEVELS and min(gray.shape) / (2 ** levels) >= MIN_TOP_SIZE:
+                levels += 1
+        self.num_levels = levels
+        pyr = build_pyramid(cv2.GaussianBlur(gray, (3, 3), 0), levels)
+        models = []
+        for lv, g in enumerate(pyr):
+            n = max(16, params.numFeatures >> lv)
+            feats = _select_features(g, params.minContrast, n)
+            if feats is None:
+                # ชั้นนี้ไม่มีขอบพอ -> ตัด pyramid ที่ชั้นก่อนหน้า
+                break
+            models.append(_LevelModel(*feats, size=(g.shape[1], g.shape[0])))
+        if not models:
+            raise ValueError("template has no usable edges (check minContrast)")
+        self._init_model(models)
+
+    @classmethod
+    def from_arrays(cls, params: MatchingParams, template_size, models, tables):
+        """
+        สร้าง matcher จาก model ที่คำนวณไว้แล้ว (vision.model_file) โดยไม่แตะภาพ template
+        models: list ของ _LevelModel ต่อชั้น; tables: list ของ _AngleTable ต่อชั้น (มุมหมุนครบแล้ว)
+        """
+        self = cls.__new__(cls)
+        self.params = params
+        self.template_size = tuple(template_size)
+        self._init_model(list(models), tables)
+        return self
+
+    def _init_model(self, models, tables=None):
+        params = self.params
+        self.levels = models
+        self.num_levels = len(self.levels)
+        self.steps = [params.angleStep if params.angleStep > 0 else auto_angle_step(m.radius)
+                      for m in self.levels]
+        top = self.num_levels - 1
+        # bank: model หมุนครบทุกมุมใน grid ของทุกชั้น สร้างครั้งเดียว (refine แค่เลือก index มุม)
+        if tables is None:
+            self.bank = TemplateBank(self.levels, [angle_range(params.angle, st) for st in self.steps],
+                                     full_circle=params.angle >= 180.0)
+        else:
+            self.bank = TemplateBank(self.levels, None, full_circle=params.angle >= 180.0, tables=tables)
+        self.top_angles = self.bank.top.angles
+        if params.fftSearch < 0:
+            self.use_fft = self.levels[top].dx.size >= FFT_MIN_FEATURES
+        else:
+            self.use_fft = bool(params.fftSearch)
+        if not self.use_fft:
+            self.levels[top].rotated(self.top_angles)  # precompute มุมชั้นบนตอนสร้าง model
+
+    # ---------------- search ----------------
+    def _top_scores(self, resp, idx):
+        """score map ชั้นบนสุด (best score, index มุม) แบบบวก response ทีละจุดขอบ เฉพาะมุม index idx"""
+        model = self.levels[self.num_levels - 1]
+        _, h, w = resp.shape
+        pad = int(math.ceil(model.radius)) + 1
+        padded = np.zeros((N_BINS, h + 2 * pad, w + 2 * pad), np.float32)
+        padded[:, pad:pad + h, pad:pad + w] = resp
+        rx, ry, bins = model.rotated(self.top_angles)
+        n = rx.shape[1]
+        best = np.full((h, w), -1.0, np.float32)
+        best_idx = np.zeros((h, w), np.int32)
+        acc = np.empty((h, w), np.float32)
+        for ai in idx:
+            acc.fill(0.0)
+            for i in range(n):
+                y0 = pad + ry[ai, i]
+                x0 = pad + rx[ai, i]
+                acc += padded[bins[ai, i], y0:y0 + h, x0:x0 + w]
+            better = acc > best
+            best[better] = acc[better]
+            best_idx[better] = ai
+        best /= n
+        return best, best_idx
+
+    def _top_candidates(self, best, best_idx, thr):
+        model = self.levels[self.num_levels - 1]
+        # local maxima เหนือ threshold
+        dil = cv2.dilate(best, np.ones((5, 5), np.uint8))
+        ys, xs = np.nonzero((best >= dil) & (best >= thr))
+        if xs.size == 0:
+            return []
+        scores = best[ys, xs]
+        order = np.argsort(-scores, kind="stable")[:MAX_TOP_MAXIMA]
+        xs, ys, scores = xs[order], ys[order], scores[order]
+        limit = max(8, self.params.maxCount * 8)
+        min_d2 = (min(model.size) / 2.0) ** 2
+        # ตัด maxima ที่อยู่ใกล้ maxima ที่ score สูงกว่า (เมทริกซ์ระยะครั้งเดียว แทน loop ทุกคู่)
+        close = ((xs[:, None] - xs[None, :]) ** 2 + (ys[:, None] - ys[None, :]) ** 2) < min_d2
+        alive = np.ones(xs.size, bool)
+        cands = []
+        for k in range(xs.size):
+            if not alive[k]:
+                continue
+            x, y = int(xs[k]), int(ys[k])
+            cands.append((x, y, float(self.top_angles[best_idx[y, x]]), float(scores[k])))
+            if len(cands) >= limit:
+                break
+            alive &= ~close[k]
+        return cands
+
+    def _refine(self, gray, level, cand, idx):
+        """ค้นละเอียดรอบ candidate (x, y ที่ชั้นนี้) ที่มุม index idx ใน bank; คืน (x, y, angle, score)"""
+        model = self.levels[level]
+        x, y = cand
+        r = REFINE_RADIUS
+        pad = int(math.ceil(model.radius)) + r + 2
+        h, w = gray.shape
+        x0, y0 = x - pad, y - pad
+        x1, y1 = x + pad + 1, y + pad + 1
+        crop = gray[max(0, y0):min(h, y1), max(0, x0):min(w, x1)]
+        if crop.size == 0:
+            return None
+        ux, uy = unit_gradients(crop, self.params.minContrast)
+        if (x0 < 0) or (y0 < 0) or (x1 > w) or (y1 > h):
+            oy, ox = max(0, -y0), max(0, -x0)
+            full_x = np.zeros((y1 - y0, x1 - x0), np.float32)
+            full_y = np.zeros_like(full_x)
+            full_x[oy:oy + crop.shape[0], ox:ox + crop.shape[1]] = ux
+            full_y[oy:oy + crop.shape[0], ox:ox + crop.shape[1]] = uy
+            ux, uy = full_x, full_y
+        table = self.bank.tables[level]
+        rx = table.rx[idx]
+        ry = table.ry[idx]
+        mc = table.cos[idx][:, :, None]
+        ms = table.sin[idx][:, :, None]
+        py, px = np.mgrid[-r:r + 1, -r:r + 1]
+        py = py.ravel()
+        px = px.ravel()
+        # gather เฉพาะจุดที่ใช้ (A, N, P) แทนการคำนวณ response ทั้ง crop
+        yy = pad + ry[:, :, None] + py[None, None, :]
+        xx = pad + rx[:, :, None] + px[None, None, :]
+        scores = np.abs(ux[yy, xx] * mc + uy[yy, xx] * ms).mean(axis=1)
+        ai, pi = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        bx, by, ba = x + int(px[pi]), y + int(py[pi]), float(table.angles[idx[ai]])
+        if level == 0 and self.params.subPixel != refine.SUBPIXEL_NONE:
+            # มุมข้างเคียงต้องห่างกันหนึ่ง step จริง (idx อาจวนรอบ ±180 หรือถูกตัดที่ขอบช่วง)
+            ang = table.angles[idx]
+            gaps = np.abs((np.diff(ang) + 180.0) % 360.0 - 180.0)
+            contiguous = ang.size < 3 or bool(np.allclose(gaps, table.step, atol=1e-6))
+            ox, oy, oa = refine.interpolate_peak(scores, ai, pi, r, table.step, contiguous)
+            bx, by, ba = bx + ox, by + oy, ba + oa
+        return (bx, by, ba, float(scores[ai, pi]))
+
+    def _top_window(self, shape, roi):
+        """
+        ส่วนของภาพชั้นบนที่ต้องใช้เมื่อจำกัดจุดศูนย์กลางไว้ใน roi (x0, y0, x1, y1 ที่ชั้น 0)
+        คืน (crop slices, origin, ขอบเขตจุดศูนย์กลางใน crop)
+        """
+        top = self.num_levels - 1
+        s = 2 ** top
+        h, w = shape
+        x0 = max(0, int(math.floor(roi[0] / s)))
+        y0 = max(0, int(math.floor(roi[1] / s)))
+        x1 = min(w, int(math.ceil(roi[2] / s)) + 1)
+        y1 = min(h, int(math.ceil(roi[3] / s)) + 1)
+        m = int(math.ceil(self.levels[top].radius)) + TOP_SPREAD + 1
+        cx0, cy0 = max(0, x0 - m), max(0, y0 - m)
+        cx1, cy1 = min(w, x1 + m), min(h, y1 + m)
+        window = (slice(cy0, cy1), slice(cx0, cx1))
+        return window, (cx0, cy0), (x0 - cx0, y0 - cy0, x1 - cx0, y1 - cy0)
+
+    def top_scores(self, img, idx=None):
+        """
+        score map ชั้นบนสุด (best, index มุม) ของภาพ img (ชั้นบนสุดของ pyramid หรือส่วนที่ crop แล้ว)
+        ไม่ขึ้นกับ scoreThreshold/iouThreshold/maxCount -> cache ไว้ลองหลาย threshold ได้ (demo/tune_params.py)
+        """
+        if idx is None:
+            idx = np.arange(self.top_angles.size)
+        top = self.num_levels - 1
+        if self.use_fft:
+            return self.bank.correlate(orientation_field(img, self.params.minContrast), idx)
+        resp = response_maps(img, self.params.minContrast, TOP_SPREAD if top > 0 else 1)
+        return self._top_scores(resp, idx)
+
+    def search(self, pyramid, roi=None, angles=None, top_scores=None) -> list:
+        """
+        pyramid: list ของภาพ gray ชั้น 0.. (อย่างน้อย num_levels ชั้น); คืน list ของ (x, y, angle, score)
+        roi: (x0, y0, x1, y1) ที่ชั้น 0 — ยอมรับเฉพาะผลที่จุดศูนย์กลางอยู่ในกรอบนี้
+             (แบบ domain ของ find_shape_model) ชั้นบนจะคำนวณ score เฉพาะช่วงนี้
+        angles: (center, half_width) องศา — ค้นเฉพาะแถบมุมนี้ (ต้องอยู่ในช่วง params.angle อยู่แล้ว)
+        top_scores: ผลของ top_scores(pyramid[-1]) ของเฟรมนี้ที่คำนวณไว้แล้ว (ใช้เมื่อไม่มี roi/angles)
+        """
+        p = self.params
+        top = self.num_levels - 1
+        thr_top = p.scoreThreshold * (CANDIDATE_RATIO if top > 0 else 1.0)
+        if self.use_fft:
+            # score ของ FFT = mean cos(2Δθ); |cos| = t  <=>  cos(2Δθ) = 2t^2 - 1
+            thr_top = 2.0 * thr_top * thr_top - 1.0
+        img = pyramid[top]
+        ox = oy = 0
+        if roi is not None:
+            window, (ox, oy), (bx0, by0, bx1, by1) = self._top_window(img.shape, roi)
+            img = img[window]
+            if img.size == 0 or bx1 <= bx0 or by1 <= by0:
+                return []
+        if top_scores is not None and roi is None and angles is None:
+            best, best_idx = top_scores
+        else:
+            idx = None
+            if angles is not None:
+                idx = self.bank.top.indices_near(angles[0], max(angles[1], self.steps[top]))
+            best, best_idx = self.top_scores(img, idx)
+        if roi is not None:
+            inside = np.full(best.shape, -np.inf, np.float32)
+            inside[by0:by1, bx0:bx1] = best[by0:by1, bx0:bx1]
+            best = inside
+        cands = [(x + ox, y + oy, a, sc) for x, y, a, sc in self._top_candidates(best, best_idx, thr_top)]
+        for level in range(top - 1, -1, -1):
+            step_up = self.steps[level + 1]
+            thr = p.scoreThreshold * (CANDIDATE_RATIO if level > 0 else 1.0)
+            table = self.bank.tables[level]
+            refined = []
+            for x, y, a, _ in cands:
+                idx = table.indices_near(a, step_up)
+                res = self._refine(pyramid[level], level, (2 * x, 2 * y), idx)
+                if res is not None and res[3] >= thr:
+                    refined.append(res)
+            cands = refined
+            if not cands:
+                break
+        if roi is not None:
+            cands = [c for c in cands if roi[0] <= c[0] < roi[2] and roi[1] <= c[1] < roi[3]]
+        return cands
+
+    def make_result(self, x, y, angle, score) -> MatchResult:
+        w, h = self.template_size
+        a = math.radians(angle)
+        c, s = math.cos(a), math.sin(a)
+
+        def pt(dx, dy):
+            return (x + c * dx + s * dy, y - s * dx + c * dy)
+
+        lt = pt(-w / 2.0, -h / 2.0)
+        rt = pt(w / 2.0, -h / 2.0)
+        rb = pt(w / 2.0, h / 2.0)
+        lb = pt(-w / 2.0, h / 2.0)
+        return MatchResult(lt[0], lt[1], lb[0], lb[1], rt[0], rt[1], rb[0], rb[1],
+                           float(x), float(y), float(angle), float(score))
+
+    def match(self, image, pyramid=None, roi=None, angles=None, top_scores=None):
+        if pyramid is None:
+            pyramid = frame_pyramid(image, self.num_levels)
+        cands = self.search(pyramid, roi, angles, top_scores)
+        results = [self.make_result(*c) for c in sorted(cands, key=lambda c: -c[3])]
+        results = _nms_rotated(results, self.params.iouThreshold, max(1, self.params.maxCount))
+        if self.params.subPixel in (refine.SUBPIXEL_LEAST_SQUARES, refine.SUBPIXEL_LEAST_SQUARES_HIGH):
+            results = [self._least_squares(pyramid[0], r) for r in results]
+        return results
+
+    def _least_squares(self, gray, result):
+        """จัดขอบ model ชั้น 0 ให้ทับขอบภาพ (sub-pixel/sub-degree); ถ้าไม่ลู่เข้าใช้ผลเดิม"""
+        m = self.levels[0]
+        x, y, a, rms = refine.least_squares_pose(gray, m.dx, m.dy, m.theta, result.centerX, result.centerY,
+                                                 result.angle, self.params.minContrast, self.params.subPixel)
+        if rms is None or math.hypot(x - result.centerX, y - result.centerY) > REFINE_RADIUS:
+            return result
+        return self.make_result(x, y, a, result.score)
+
+
+def _nms_rotated(results, iou_threshold, max_keep=None):
+    """Greedy NMS ด้วย IoU ของกรอบหมุนจริงของผลแต่ละอัน (vision.nms, vectorized)"""
+    if len(results) < 2:
+        return results
+    quads = np.stack([result_to_points(r) for r in results])
+    scores = np.array([r.score for r in results], dtype=np.float64)
+    keep = rotated_nms(quads, scores, iou_threshold, max_keep)
+    return [results[i] for i in keep]
+
+
+# ---------------------------------------------------------------------------
+# matching-compatible module API
+# ---------------------------------------------------------------------------
+
+def create_matcher_for_template(template_img, dll_path=None, params=None):
+    if params is None:
+        params = MatchingParams()
+    if params.method == METHOD_SHAPE:
+        return ShapeMatcher(template_img, params)
+    if params.method != METHOD_NCC:
+        raise ValueError(f"unknown matching method: {params.method!r}")
+    from vision.ncc_match import NccMatcher
+    return NccMatcher(template_img, params)
+
+
+def run_match(matcher, image, roi=None, pyramid=None, angles=None):
+    """
+    คืน (count, results, centers) แบบเดียวกับ matching.run_match
+    roi, angles: ดู ShapeMatcher.search; pyramid: จาก frame_pyramid() ของเฟรมเดียวกัน (ไม่ต้องสร้างซ้ำ)
+    """
+    results = matcher.match(image, pyramid=pyramid, roi=roi, angles=angles)
+    centers = [(r.centerX, r.centerY) for r in results]
+    return len(results), results, centers
+
+
+def result_to_points(result) -> np.ndarray:
+    return np.array([
+        [result.leftTopX, result.leftTopY],
+        [result.rightTopX, result.rightTopY],
+        [result.rightBottomX, result.rightBottomY],
+        [result.leftBottomX, result.leftBottomY],
+    ], dtype=np.float32)
+
+
+def draw_results(image, results, color=(0, 255, 0)):
+    for r in results:
+        pts = np.rint(result_to_points(r)).astype(np.int32)
+        cv2.polylines(image, [pts], True, color, 2, cv2.LINE_AA)
+        c = (int(round(r.centerX)), int(round(r.centerY)))
+        cv2.circle(image, c, 3, color, -1, cv2.LINE_AA)
+        cv2.putText(image, f"{r.score:.2f} {r.angle:.1f}", (c[0] + 6, c[1] - 6),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+    return image
+
+
+def save_model(matcher, path, template_img):
+    """บันทึก model ที่ build แล้วลงไฟล์ (vision.model_file) ไว้โหลดแบบ memory-map ครั้งหน้า"""
+    from vision import model_file
+    from vision.matcher_registry import template_hash
+    return model_file.save_model(matcher, path, template_hash(template_img))
+
+
+def load_model(path, params=None, template_img=None):
+    """โหลด model จากไฟล์; ให้ template_img มาด้วยเพื่อตรวจว่าไฟล์ build จาก template นี้"""
+    from vision import model_file
+    from vision.matcher_registry import template_hash
+    source_hash = None if template_img is None else template_hash(template_img)
+    return model_file.load_model(path, params, source_hash)
+
+
+def release_matcher(matcher):
+    """ไม่มี native handle ให้คืน; มีไว้ให้ API ตรงกับ matching"""
+    return None
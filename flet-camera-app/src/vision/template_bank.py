@@ -0,0 +1,180 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Template bank: เตรียม model ที่ "หมุนแล้ว" ครบทุก step มุมและทุกชั้น pyramid ครั้งเดียว
+#
+# - tables[level]: offset (int) + ทิศ gradient (cos, sin) ของทุกจุดขอบ ทุกมุมใน grid ของชั้นนั้น
+#   -> refine ไม่ต้องหมุน model ใหม่ทุกเฟรม แค่เลือก index มุม
+# - ชั้นบนสุด: เก็บ FFT ของ kernel ทุกมุม แล้ว correlate กับเฟรมแบบ batch ใน frequency domain
+#
+# ทิศ gradient แทนด้วย z = exp(2i*theta) (มุมคูณสอง -> ไม่สน polarity)
+#   Re(z_img * conj(z_model)) = cos(2*Δθ)  ซึ่ง linear ใน z_img
+# score ของทุกตำแหน่งที่มุมหนึ่ง = correlation ของ field z_img กับ kernel เบาบางของ model
+# ทำครั้งเดียวต่อมุมด้วย FFT: ต้นทุนขึ้นกับจำนวนมุม ไม่ขึ้นกับจำนวนจุด/การ warp ภาพ
+# ---------------------------------------------------------------------------
+
+FIELD_SIGMA = 1.0  # Gaussian "spread" ของ field ที่ชั้นบนสุด (แทน dilate)
+MAX_SPECTRA = 4    # จำนวนขนาดภาพที่เก็บ FFT bank ไว้พร้อมกัน
+
+
+class _AngleTable:
+    def __init__(self, model, angles):
+        self.angles = np.asarray(angles, dtype=np.float64)
+        a = np.deg2rad(self.angles)[:, None]
+        c, s = np.cos(a), np.sin(a)
+        self.rx = np.rint(c * model.dx + s * model.dy).astype(np.int32)
+        self.ry = np.rint(-s * model.dx + c * model.dy).astype(np.int32)
+        th = model.theta[None, :] - a
+        self.cos = np.cos(th).astype(np.float32)
+        self.sin = np.sin(th).astype(np.float32)
+        # z ของ model (มุมคูณสอง) สำหรับ kernel ชั้นบนสุด
+        self.z2 = np.exp(2j * th).astype(np.complex64)
+        self._finish()
+
+    @classmethod
+    def from_arrays(cls, angles, rx, ry, cos, sin, z2):
+        """ตารางที่คำนวณไว้แล้ว (เช่น memory-map จากไฟล์ model) ไม่คำนวณซ้ำ/ไม่ copy"""
+        self = cls.__new__(cls)
+        self.angles, self.rx, self.ry = angles, rx, ry
+        self.cos, self.sin, self.z2 = cos, sin, z2
+        self._finish()
+        return self
+
+    def _finish(self):
+        self.step = float(self.angles[1] - self.angles[0]) if self.angles.size > 1 else 0.0
+        self.full_circle = False
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.rx, self.ry, self.cos, self.sin, self.z2))
+
+    def indices_near(self, angle: float, half_width: float) -> np.ndarray:
+        """index ของมุมใน grid ที่อยู่ภายใน angle ± half_width (วนรอบ ±180 ถ้าเป็นรอบวง)"""
+        d = self.angles - angle
+        if self.full_circle:
+            d = (d + 180.0) % 360.0 - 180.0
+        idx = np.nonzero(np.abs(d) <= half_width + 1e-9)[0]
+        if idx.size == 0:
+            idx = np.array([int(np.argmin(np.abs(d)))])
+        return idx
+
+
+def orientation_field(gray, min_contrast: float, sigma: float = FIELD_SIGMA):
+    """
+    (zr, zi) float32 = ส่วนจริง/จินตภาพของ exp(2i*theta) ของขอบในภาพ (0 ตรงที่ไม่มีขอบ)
+    sigma > 0: เบลอแบบ normalized (หารด้วยความหนาแน่นขอบ) ให้ทนต่อ step มุม/ตำแหน่งที่หยาบ
+    """
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    mag2 = gx * gx + gy * gy
+    edge = mag2 > (min_contrast * min_contrast)
+    inv = np.where(edge, 1.0 / np.maximum(mag2, 1e-6), 0.0).astype(np.float32)
+    zr = (gx * gx - gy * gy) * inv
+    zi = (2.0 * gx * gy) * inv
+    if sigma > 0:
+        w = edge.astype(np.float32)
+        ksize = int(2 * round(3 * sigma) + 1)
+        zr = cv2.GaussianBlur(zr, (ksize, ksize), sigma)
+        zi = cv2.GaussianBlur(zi, (ksize, ksize), sigma)
+        w = cv2.GaussianBlur(w, (ksize, ksize), sigma)
+        norm = np.where(w > 0.05, 1.0 / np.maximum(w, 1e-6), 0.0).astype(np.float32)
+        zr *= norm
+        zi *= norm
+    return zr, zi
+
+
+class TemplateBank:
+    """
+    levels:      list ของ level model (dx, dy, theta, radius) จากชั้น 0 ขึ้นไป
+    angle_grids: list ของ array มุม (องศา) ต่อชั้น
+    tables:      _AngleTable ที่สร้างไว้แล้ว (โหลดจากไฟล์ model) แทน angle_grids
+    """
+
+    def __init__(self, levels, angle_grids, full_circle: bool = False, tables=None):
+        if tables is None:
+            tables = [_AngleTable(model, grid) for model, grid in zip(levels, angle_grids)]
+        self.tables = list(tables)
+        for t in self.tables:
+            t.full_circle = full_circle
+        top = levels[-1]
+        self.top_pad = int(np.ceil(top.radius)) + 1
+        self.top_count = int(top.dx.size)
+        self._spectra = OrderedDict()  # (H, W) -> (fft_shape, kernel spectra (A, Fh, Fw))
+        self._lock = threading.Lock()
+
+    @property
+    def top(self) -> _AngleTable:
+        return self.tables[-1]
+
+    def nbytes(self) -> int:
+        total = sum(t.nbytes() for t in self.tables)
+        with self._lock:
+            total += sum(k.nbytes for _, k in self._spectra.values())
+        return total
+
+    def _build_spectra(self, shape):
+        h, w = shape
+        pad = self.top_pad
+        fh = cv2.getOptimalDFTSize(h + 2 * pad)
+        fw = cv2.getOptimalDFTSize(w + 2 * pad)
+        t = self.top
+        kr = np.zeros((fh, fw), np.float32)
+        ki = np.zeros((fh, fw), np.float32)
+        spectra = np.empty((t.angles.size, 2, fh, fw), np.float32)
+        for ai in range(t.angles.size):
+            # kernel[-ry, -rx] = z_model (วน index แบบ circular): correlation ผ่าน convolution theorem
+            ys = (-t.ry[ai]) % fh
+            xs = (-t.rx[ai]) % fw
+            kr.fill(0.0)
+            ki.fill(0.0)
+            np.add.at(kr, (ys, xs), t.z2[ai].real)
+            np.add.at(ki, (ys, xs), t.z2[ai].imag)
+            # เก็บแบบ CCS (real DFT ของ OpenCV) -> ครึ่งหนึ่งของ complex FFT
+            spectra[ai, 0] = cv2.dft(kr)
+            spectra[ai, 1] = cv2.dft(ki)
+        return (fh, fw), spectra
+
+    def spectra(self, shape):
+        key = tuple(shape)
+        with self._lock:
+            hit = self._spectra.get(key)
+            if hit is not None:
+                self._spectra.move_to_end(key)
+                return hit
+        built = self._build_spectra(key)
+        with self._lock:
+            self._spectra[key] = built
+            while len(self._spectra) > MAX_SPECTRA:
+                self._spectra.popitem(last=False)
+        return built
+
+    def correlate(self, field, idx=None):
+        """
+        field: (zr, zi) orientation field ของภาพชั้นบนสุด (H, W); idx: index มุมที่ค้น (None = ทุกมุม)
+        คืน (best_score, best_angle_index) ขนาด (H, W); score = mean cos(2Δθ) ใน [-1, 1]
+
+        Re(z_img * conj(z_model)) = zr*mr + zi*mi -> สอง real correlation ต่อมุม
+        รวมกันใน frequency domain แล้ว inverse DFT ครั้งเดียวต่อมุม
+        """
+        zr, zi = field
+        h, w = zr.shape
+        (fh, fw), spectra = self.spectra((h, w))
+        buf = np.zeros((fh, fw), np.float32)
+        buf[:h, :w] = zr
+        fr = cv2.dft(buf)
+        buf[:h, :w] = zi
+        fi = cv2.dft(buf)
+        best = np.full((h, w), -np.inf, np.float32)
+        best_idx = np.zeros((h, w), np.int32)
+        for ai in (range(spectra.shape[0]) if idx is None else idx):
+            spec = cv2.mulSpectrums(fr, spectra[ai, 0], 0)
+            spec += cv2.mulSpectrums(fi, spectra[ai, 1], 0)
+            score = cv2.idft(spec, flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE)[:h, :w]
+            better = score > best
+            best[better] = score[better]
+            best_idx[better] = ai
+        best /= float(self.top_count)
+        return best, best_idx
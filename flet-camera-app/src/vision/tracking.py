@@ -0,0 +1,182 @@
+import threading
+import time
+
+from vision.pose import first_center, result_angle, two_template_pose
+from vision.roi_search import Roi, load_program_config, match_in_roi
+
+# ---------------------------------------------------------------------------
+# Temporal tracking: ชิ้นถัดไปบนพาเลทอยู่ใกล้ pose เดิม (+ ระยะช่องของกริด)
+#   1) ค้นในหน้าต่างเล็ก + แถบมุมแคบรอบ pose ที่ทำนาย
+#   2) ถ้า score ต่ำกว่า score1/score2 ([PROGRAMS]) -> ค้นแบบ global ด้วย matcher หลัก
+# ---------------------------------------------------------------------------
+
+TRACK_WINDOW = 120.0  # px ด้านของหน้าต่างค้นรอบจุดที่ทำนาย
+TRACK_ANGLE = 10.0    # ± องศารอบมุมเดิม
+
+
+class GridModel:
+    """
+    ตำแหน่งช่องบนพาเลท: index 0.. เรียงทีละแถว (cols ช่องต่อแถว), rows*cols ช่องต่อชั้น
+    pitch_x/pitch_y = ระยะระหว่างช่องในภาพ (px); 0 = ชิ้นงานมาอยู่จุดเดิมทุกครั้ง (กล้องตามหุ่น/จุดหยิบคงที่)
+    """
+
+    def __init__(self, rows: int, cols: int, pitch_x: float = 0.0, pitch_y: float = 0.0):
+        self.rows = max(1, int(rows))
+        self.cols = max(1, int(cols))
+        self.pitch_x = float(pitch_x)
+        self.pitch_y = float(pitch_y)
+
+    def cell(self, index: int):
+        i = int(index) % (self.rows * self.cols)
+        return divmod(i, self.cols)  # (row, col)
+
+    def shift(self, from_index: int, to_index: int):
+        """ระยะ (dx, dy) px ที่ pose เลื่อนไปเมื่อเปลี่ยนจากช่อง from_index ไป to_index"""
+        r0, c0 = self.cell(from_index)
+        r1, c1 = self.cell(to_index)
+        return (c1 - c0) * self.pitch_x, (r1 - r0) * self.pitch_y
+
+
+class PoseTracker:
+    """
+    ห่อ matcher สอง template (TwoTemplateMatcher / TwoStageMatcher) ให้ match(frame) ลองค้นรอบ pose เดิมก่อน
+    grid: GridModel; index_fn: ฟังก์ชันคืน index ช่องปัจจุบัน (เช่นตัวนับใน home.state)
+    """
+
+    def __init__(self, base, grid=None, index_fn=None, window=TRACK_WINDOW, angle_band=TRACK_ANGLE,
+                 score1=None, score2=None):
+        self.base = base
+        self.mt = base.mt
+        self.grid = grid
+        self.index_fn = index_fn
+        self.window = float(window)
+        self.angle_band = float(angle_band)
+        if score1 is None or score2 is None:
+            cfg = load_program_config(keys=("score1", "score2"))
+            score1 = cfg["score1"] if score1 is None else score1
+            score2 = cfg["score2"] if score2 is None else score2
+        self.score1 = float(score1)
+        self.score2 = float(score2)
+        self.template1_size = _template_size(base, "1")
+        self.template2_size = _template_size(base, "2")
+
+        self._prev = None  # (index, c1, angle1, c2, angle2)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tracked_ms = 0.0   # เวลารวมของเฟรมที่ track สำเร็จ
+        self.global_ms = 0.0    # เวลารวมของการค้น global
+        self.global_count = 0
+        self.wasted_ms = 0.0    # เวลาที่เสียไปกับการ track ที่ไม่สำเร็จ (ก่อน fallback)
+        self.last_mode = None
+
+    def _current_index(self):
+        if self.index_fn is None:
+            return None
+        try:
+            return int(self.index_fn())
+        except Exception:
+            return None
+
+    def _predict(self, index):
+        prev_index, c1, a1, c2, a2 = self._prev
+        dx = dy = 0.0
+        if self.grid is not None and index is not None and prev_index is not None:
+            dx, dy = self.grid.shift(prev_index, index)
+        return (c1[0] + dx, c1[1] + dy), a1, (c2[0] + dx, c2[1] + dy), a2
+
+    def _track(self, frame, prediction):
+        p1, a1, p2, a2 = prediction
+        pyramid_fn = getattr(self.mt, "frame_pyramid", None)
+        matchers = (self.base.matcher1, self.base.matcher2)
+        pyramid = None
+        if pyramid_fn is not None and all(getattr(m, "supports_roi", False) for m in matchers):
+            pyramid = pyramid_fn(frame, max(m.num_levels for m in matchers))
+        roi1 = Roi(p1[0], p1[1], self.window, self.window)
+        _, results1, center1 = match_in_roi(self.mt, self.base.matcher1, frame, roi1, self.template1_size,
+                                            pyramid, (a1, self.angle_band))
+        if not results1 or (_score(results1) or 0.0) < self.score1:
+            return None
+        c1 = first_center(center1)
+        # template2 เลื่อนตาม template1 ที่เจอจริง (แก้ error ของการทำนาย)
+        p2 = (p2[0] + c1[0] - p1[0], p2[1] + c1[1] - p1[1])
+        roi2 = Roi(p2[0], p2[1], self.window, self.window)
+        _, results2, center2 = match_in_roi(self.mt, self.base.matcher2, frame, roi2, self.template2_size,
+                                            pyramid, (a2, self.angle_band))
+        if not results2 or (_score(results2) or 0.0) < self.score2:
+            return None
+        return results1, center1, results2, center2
+
+    def match(self, frame):
+        index = self._current_index()
+        t0 = time.perf_counter()
+        tracked = None
+        if self._prev is not None:
+            tracked = self._track(frame, self._predict(index))
+        if tracked is not None:
+            results1, center1, results2, center2 = tracked
+            pose = two_template_pose(center1, center2, results1, results2)
+            ms = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                self.hits += 1
+                self.tracked_ms += ms
+            self.last_mode = "track"
+            self._remember(index, pose, results1, results2)
+            return pose
+
+        t1 = time.perf_counter()
+        pose = self.base.match(frame)
+        ms = (time.perf_counter() - t1) * 1000.0
+        with self._lock:
+            if self._prev is not None:
+                self.misses += 1
+                self.wasted_ms += (t1 - t0) * 1000.0
+            self.global_ms += ms
+            self.global_count += 1
+        self.last_mode = "global"
+        if pose is None:
+            self._prev = None
+        else:
+            self._remember(index, pose, None, None)
+        return pose
+
+    def _remember(self, index, pose, results1, results2):
+        if pose is None:
+            self._prev = None
+            return
+        # ผล global: มุมของแต่ละ template อยู่ใน base.last_angles
+        a1 = result_angle(results1) if results1 else self.base.last_angles[0]
+        a2 = result_angle(results2) if results2 else self.base.last_angles[1]
+        self._prev = (index, pose["c1"], a1, pose["c2"], a2)
+
+    def reset(self):
+        self._prev = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            attempts = self.hits + self.misses
+            mean_track = self.tracked_ms / self.hits if self.hits else 0.0
+            mean_global = self.global_ms / self.global_count if self.global_count else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / attempts if attempts else 0.0,
+                "track_ms": mean_track,
+                "global_ms": mean_global,
+                # เวลาที่ประหยัดได้เทียบกับค้น global ทุกเฟรม (หักเวลาที่ track พลาดแล้ว)
+                "saved_ms": (mean_global - mean_track) * self.hits - self.wasted_ms if self.global_count else 0.0,
+            }
+
+    def release(self):
+        self.base.release()
+
+
+def _score(results):
+    return getattr(results[0], "score", None)
+
+
+def _template_size(base, which):
+    size = getattr(base, f"template{which}_size", None)
+    if size is None:
+        size = getattr(getattr(base, f"matcher{which}", None), "template_size", None)
+    return size if size is not None else (0, 0)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# โมดูลของแอปอยู่ใต้ src/ (components, vision) แบบเดียวกับ demo/*.py
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
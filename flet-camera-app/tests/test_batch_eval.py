@@ -0,0 +1,85 @@
+import csv
+import importlib
+import io
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+DEMO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "demo"))
+
+
+@pytest.fixture(scope="module")
+def batch_eval():
+    # import ตามชื่อ (ไม่ใช่จาก path) ให้ worker ของ process pool หา _evaluate เจอ
+    mp = pytest.MonkeyPatch()
+    mp.syspath_prepend(DEMO_DIR)
+    try:
+        yield importlib.import_module("batch_eval")
+    finally:
+        mp.undo()
+
+
+def _patch(seed):
+    rng = np.random.default_rng(seed)
+    img = cv2.resize(rng.integers(0, 255, (12, 12), dtype=np.uint8), (48, 48), interpolation=cv2.INTER_NEAREST)
+    return cv2.cvtColor(cv2.GaussianBlur(img, (3, 3), 0), cv2.COLOR_GRAY2BGR)
+
+
+def test_collect_images_filters_extensions(batch_eval, tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("b.PNG", "a.jpg", "notes.txt", "sub/c.bmp"):
+        (tmp_path / name).write_bytes(b"x")
+    names = [os.path.relpath(f, tmp_path) for f in batch_eval.collect_images(str(tmp_path))]
+    assert names == ["a.jpg", "b.PNG"]
+    deep = [os.path.relpath(f, tmp_path) for f in batch_eval.collect_images(str(tmp_path), recursive=True)]
+    assert deep == ["a.jpg", "b.PNG", os.path.join("sub", "c.bmp")]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "json"])
+def test_writer_formats_round_trip(batch_eval, fmt):
+    rows = [dict.fromkeys(batch_eval.FIELDS, ""), dict.fromkeys(batch_eval.FIELDS, "")]
+    rows[0].update(file="a.png", found=1, angle=12.5)
+    rows[1].update(file="b.png", found=0, error="ValueError: cannot read image")
+    buf = io.StringIO()
+    writer = batch_eval._Writer(buf, fmt)
+    for row in rows:
+        writer.write(row)
+    writer.close()
+    text = buf.getvalue()
+    if fmt == "csv":
+        back = list(csv.DictReader(io.StringIO(text)))
+        assert [r["file"] for r in back] == ["a.png", "b.png"] and back[0]["angle"] == "12.5"
+    elif fmt == "jsonl":
+        assert [json.loads(line) for line in text.splitlines()] == rows
+    else:
+        assert json.loads(text) == rows
+    assert writer.rows == 2
+
+
+def test_main_writes_one_row_per_image(batch_eval, tmp_path):
+    t1, t2 = _patch(1), _patch(2)
+    cv2.imwrite(str(tmp_path / "t1.png"), t1)
+    cv2.imwrite(str(tmp_path / "t2.png"), t2)
+    images = tmp_path / "images"
+    images.mkdir()
+    scene = np.full((240, 320, 3), 90, np.uint8)
+    scene[60:108, 70:118] = t1
+    scene[130:178, 200:248] = t2
+    cv2.imwrite(str(images / "part.png"), scene)
+    cv2.imwrite(str(images / "empty.png"), np.full((240, 320, 3), 90, np.uint8))
+    (images / "broken.png").write_bytes(b"not a png")
+    out = tmp_path / "out.json"
+    batch_eval.main([str(images), "-o", str(out), "--workers", "2", "--backend", "builtin",
+                     "--template1", str(tmp_path / "t1.png"), "--template2", str(tmp_path / "t2.png"),
+                     "--score1", "0.6", "--score2", "0.6"])
+    rows = {os.path.basename(r["file"]): r for r in json.loads(out.read_text(encoding="utf-8"))}
+    assert set(rows) == {"part.png", "empty.png", "broken.png"}
+    part = rows["part.png"]
+    assert part["found"] == 1 and (part["count1"], part["count2"]) == (1, 1)
+    assert (part["c1_x"], part["c1_y"]) == pytest.approx((93.5, 83.5), abs=1.0)
+    assert (part["c2_x"], part["c2_y"]) == pytest.approx((223.5, 153.5), abs=1.0)
+    assert rows["empty.png"]["found"] == 0 and rows["empty.png"]["error"] == ""
+    assert rows["broken.png"]["found"] == 0 and "cannot read image" in rows["broken.png"]["error"]
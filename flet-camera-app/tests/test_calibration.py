@@ -0,0 +1,133 @@
+import os
+from dataclasses import replace
+
+import cv2
+import numpy as np
+import pytest
+
+from vision import calibration as cal
+from vision.pose import angle_between
+
+# barrel แบบ division model: มุมภาพเลื่อน ~30 px ที่ 648x486
+MODEL = replace(cal.HDEV_CAMERA, kappa=-600.0).for_size(648, 486)
+
+
+def _grid(model, step=37):
+    xs, ys = np.meshgrid(np.arange(3, model.width - 3, step), np.arange(3, model.height - 3, step))
+    return np.stack([xs.ravel(), ys.ravel()], axis=1)
+
+
+def test_division_model_maps_and_points_round_trip():
+    map_x, map_y = cal.undistort_maps(MODEL)
+    assert map_x.shape == (MODEL.height, MODEL.width) and map_x.dtype == np.float32
+    u = _grid(MODEL)
+    # map: pixel ไม่บิด u <- pixel บิด d; undistort_points(d) ต้องได้ u คืน
+    d = np.stack([map_x[u[:, 1], u[:, 0]], map_y[u[:, 1], u[:, 0]]], axis=1)
+    assert np.abs(d - u).max() > 10.0  # distortion มีผลจริง
+    assert cal.undistort_points(d, MODEL) == pytest.approx(u.astype(float), abs=2e-3)
+    # จุดศูนย์กลาง principal ไม่ขยับ
+    assert cal.undistort_points([(MODEL.cx, MODEL.cy)], MODEL)[0] == pytest.approx((MODEL.cx, MODEL.cy))
+
+
+def test_remap_moves_a_spot_to_its_undistorted_position():
+    dx, dy = 560, 410
+    u = cal.undistort_points([(dx, dy)], MODEL)[0]
+    frame = np.zeros((MODEL.height, MODEL.width), np.float32)
+    frame[dy, dx] = 1.0
+    frame = cv2.GaussianBlur(frame, (0, 0), 2.0)
+    out = cal.Undistorter(MODEL, cache_dir=None).remap(frame)
+    ys, xs = np.nonzero(out > out.max() * 0.3)
+    w = out[ys, xs]
+    centroid = (float((xs * w).sum() / w.sum()), float((ys * w).sum() / w.sum()))
+    assert abs(u[0] - dx) > 10.0
+    assert centroid == pytest.approx(tuple(u), abs=0.5)
+
+
+def test_identity_model_is_a_no_op():
+    model = cal.HDEV_CAMERA.for_size(64, 48)
+    assert model.identity
+    und = cal.Undistorter(model, cache_dir=None)
+    frame = np.zeros((48, 64, 3), np.uint8)
+    assert und.remap(frame) is frame
+    pts = np.array([[1.5, 2.5], [60.0, 40.0]])
+    assert np.array_equal(und.undistort_points(pts, frame.shape), pts)
+    pose = {"c1": (1.0, 2.0), "c2": (3.0, 4.0), "angle": 10.0}
+    assert und.undistort_pose(pose, frame.shape) is pose
+
+
+def test_binned_and_cropped_sizes_agree_with_full_resolution():
+    full = replace(cal.HDEV_CAMERA, kappa=-600.0)
+    p = np.array([[2300.0, 1700.0], [400.0, 300.0]])
+    u = cal.undistort_points(p, full)
+    binned = full.for_size(full.width // 4, full.height // 4)
+    assert cal.undistort_points((p + 0.5) / 4 - 0.5, binned) == pytest.approx((u + 0.5) / 4 - 0.5, abs=1e-6)
+    # ROI กลาง sensor: พิกัดเลื่อนเท่ากันทั้งภาพ
+    crop = full.for_size(1920, 1080)
+    ox, oy = (full.width - 1920) / 2.0, (full.height - 1080) / 2.0
+    assert cal.undistort_points(p - (ox, oy), crop) == pytest.approx(u - (ox, oy), abs=1e-6)
+
+
+def test_opencv_distortion_round_trip():
+    k = cal.HDEV_CAMERA.for_size(648, 486)
+    model = replace(k, dist=(-0.25, 0.08, 0.0005, -0.0003))
+    map_x, map_y = cal.undistort_maps(model)
+    u = _grid(model, step=53)
+    d = np.stack([map_x[u[:, 1], u[:, 0]], map_y[u[:, 1], u[:, 0]]], axis=1)
+    assert cal.undistort_points(d, model) == pytest.approx(u.astype(float), abs=0.05)
+
+
+def test_maps_are_cached_on_disk(tmp_path, monkeypatch):
+    first = cal.Undistorter(MODEL, cache_dir=str(tmp_path))
+    maps = first.maps((MODEL.height, MODEL.width, 3))
+    path = first.cache_path(MODEL)
+    assert os.path.dirname(path) == str(tmp_path) and os.path.exists(path)
+    assert first.maps((MODEL.height, MODEL.width)) is maps  # ต่อขนาดเก็บใน memory
+
+    def no_compute(model):
+        raise AssertionError("maps recomputed")
+
+    monkeypatch.setattr(cal, "undistort_maps", no_compute)
+    loaded = cal.Undistorter(MODEL, cache_dir=str(tmp_path)).maps((MODEL.height, MODEL.width))
+    assert np.array_equal(loaded[0], maps[0]) and np.array_equal(loaded[1], maps[1])
+    monkeypatch.undo()
+
+    # ไฟล์เสีย -> คำนวณใหม่แล้วเขียนทับ
+    with open(path, "wb") as f:
+        f.write(b"broken")
+    again = cal.Undistorter(MODEL, cache_dir=str(tmp_path)).maps((MODEL.height, MODEL.width))
+    assert np.array_equal(again[0], maps[0])
+    # model ต่างกันได้ไฟล์ต่างกัน
+    assert first.cache_path(replace(MODEL, kappa=-500.0)) != path
+
+
+def test_remap_roi_matches_full_remap():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (MODEL.height, MODEL.width), dtype=np.uint8)
+    und = cal.Undistorter(MODEL, cache_dir=None)
+    full = und.remap(frame)
+    patch, (x0, y0) = und.remap_roi(frame, (-20, 100, 200, 260))
+    assert (x0, y0) == (0, 100)
+    assert np.array_equal(patch, full[100:260, 0:200])
+    empty, _ = und.remap_roi(frame, (700, 500, 800, 600))
+    assert empty.size == 0
+
+
+def test_undistort_pose_recomputes_angle_from_corrected_points():
+    und = cal.Undistorter(MODEL, cache_dir=None)
+    shape = (MODEL.height, MODEL.width, 3)
+    pose = {"c1": (600.0, 60.0), "c2": (560.0, 20.0), "angle": 0.0, "score": 0.9}
+    out = und.undistort_pose(pose, shape)
+    c1, c2 = cal.undistort_points([pose["c1"], pose["c2"]], MODEL)
+    assert out["c1"] == pytest.approx(tuple(c1)) and out["c2"] == pytest.approx(tuple(c2))
+    assert (out["c1_raw"], out["c2_raw"], out["score"]) == (pose["c1"], pose["c2"], 0.9)
+    assert out["angle"] == pytest.approx(angle_between(out["c1"], out["c2"], (out["c1"][0], out["c2"][1])))
+
+
+def test_model_from_config(tmp_path):
+    ini = tmp_path / "config.ini"
+    ini.write_text("[CALIBRATION]\nkappa = -450\nwidth = 1920\ncx = bad\ndist = -0.1, 0.02, 0, 0\n",
+                   encoding="utf-8")
+    model = cal.CameraModel.from_config(ini)
+    assert (model.kappa, model.width, model.cx) == (-450.0, 1920, cal.HDEV_CAMERA.cx)
+    assert model.dist == (-0.1, 0.02, 0.0, 0.0) and not model.identity
+    assert cal.CameraModel.from_config(tmp_path / "missing.ini").identity
@@ -0,0 +1,84 @@
+import glob
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from vision import shape_match as sm
+from vision.coarse_fine import CoarseToFineMatcher, downscale
+from vision.matcher_registry import MatcherRegistry
+from vision.pose import TwoTemplateMatcher
+
+PARAMS = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.5, angle=2.0)
+
+
+def _patch(seed, size):
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 255, (12, 12), dtype=np.uint8)
+    img = cv2.resize(img, (size, size), interpolation=cv2.INTER_NEAREST)
+    return cv2.cvtColor(cv2.GaussianBlur(img, (3, 3), 0), cv2.COLOR_GRAY2BGR)
+
+
+def _scene(t1, t2, c1, c2):
+    scene = np.full((480, 640, 3), 90, np.uint8)
+    for tpl, (cx, cy) in ((t2, c2), (t1, c1)):
+        h, w = tpl.shape[:2]
+        x0, y0 = int(cx - w // 2), int(cy - h // 2)
+        scene[y0:y0 + h, x0:x0 + w] = tpl
+    return scene
+
+
+def test_downscale_is_gray_and_floor_sized():
+    small = downscale(np.zeros((1081, 1921, 3), np.uint8), 4)
+    assert small.shape == (270, 480)
+    assert downscale(np.zeros((10, 10), np.uint8), 8).shape == (1, 1)
+
+
+@pytest.mark.parametrize("scale", [4, 8])
+def test_matches_like_the_full_resolution_matcher(scale):
+    t1, t2 = _patch(1, 96), _patch(2, 120)
+    scene = _scene(t1, t2, (380, 200), (330, 280))
+    ref = TwoTemplateMatcher(sm, t1, t2, PARAMS, PARAMS)
+    matcher = CoarseToFineMatcher(sm, t1, t2, PARAMS, PARAMS, scale=scale)
+    expected = ref.match(scene)
+    pose = matcher.match(scene)
+    assert expected is not None and pose is not None
+    assert pose["c1"] == pytest.approx(expected["c1"], abs=0.05)
+    assert pose["c2"] == pytest.approx(expected["c2"], abs=0.05)
+    # candidate จากภาพย่อ -> ภาพเต็ม คลาดไม่เกินหน้าต่างของขั้น fine
+    assert any(abs(x - pose["c1"][0]) <= matcher.fine_window / 2 and abs(y - pose["c1"][1]) <= matcher.fine_window / 2
+               for x, y in matcher.last_candidates)
+    assert set(matcher.last_timing) == {"coarse_ms", "template1_ms", "template2_ms", "wall_ms"}
+
+
+def test_no_part_gives_none():
+    t1, t2 = _patch(1, 96), _patch(2, 120)
+    matcher = CoarseToFineMatcher(sm, t1, t2, PARAMS, PARAMS)
+    assert matcher.match(np.full((480, 640, 3), 90, np.uint8)) is None
+    assert matcher.last_counts == (0, 0)
+
+
+def test_registry_leases_are_returned_on_release():
+    t1, t2 = _patch(1, 96), _patch(2, 120)
+    registry = MatcherRegistry(mt=sm)
+    matcher = CoarseToFineMatcher(sm, t1, t2, PARAMS, PARAMS, registry=registry)
+    assert registry.stats()["pinned"] == 3  # template1, template2, template1 ที่ย่อแล้ว
+    matcher.release()
+    assert registry.stats()["pinned"] == 0
+
+
+def test_bundled_images_match_two_template_matcher():
+    from vision.pose import PICTURE_DIR
+
+    files = sorted(glob.glob(os.path.join(PICTURE_DIR, "Image_*.png")))[::4]
+    if not files:
+        pytest.skip("bundled images not available")
+    ref = TwoTemplateMatcher.from_files(mt=sm)
+    matcher = CoarseToFineMatcher.from_files(mt=sm, scale=8)
+    for f in files:
+        img = cv2.imread(f)
+        expected, pose = ref.match(img), matcher.match(img)
+        assert pose is not None, f
+        assert pose["c1"] == pytest.approx(expected["c1"], abs=0.5), f
+        assert pose["c2"] == pytest.approx(expected["c2"], abs=0.5), f
@@ -0,0 +1,59 @@
+import numpy as np
+
+from vision import frame_gate as fg
+
+
+class CountingMatcher:
+    def __init__(self):
+        self.calls = 0
+
+    def match(self, frame):
+        self.calls += 1
+        return {"c1": (1.0, 2.0), "c2": (3.0, 4.0), "angle": 0.0, "score": 0.9, "call": self.calls}
+
+
+def _frame(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+
+
+def test_thumbnail_size_and_gray():
+    thumb = fg.thumbnail(_frame(), 64)
+    assert thumb.shape == (36, 64) and thumb.dtype == np.uint8
+
+
+def test_unchanged_frame_reuses_pose_without_matching():
+    base = CountingMatcher()
+    gate = fg.FrameGate(base)
+    frame = _frame()
+    first = gate.match(frame)
+    second = gate.match(frame.copy())
+    assert base.calls == 1
+    assert second == dict(first, cached=True)
+    assert gate.stats()["gate_hits"] == 1
+
+
+def test_changed_frame_matches_again():
+    base = CountingMatcher()
+    gate = fg.FrameGate(base)
+    gate.match(_frame(0))
+    assert gate.match(_frame(1))["call"] == 2
+    assert gate.last_change > gate.changed_ratio
+
+
+def test_max_age_and_reset_force_a_new_match():
+    base = CountingMatcher()
+    gate = fg.FrameGate(base, max_age_s=1e-9)
+    frame = _frame()
+    gate.match(frame)
+    gate.match(frame)
+    assert base.calls == 2
+    gate = fg.FrameGate(base)
+    gate.match(frame)
+    gate.reset()
+    gate.match(frame)
+    assert base.calls == 4
+
+
+def test_changed_fraction_shape_mismatch():
+    assert fg.changed_fraction(np.zeros((2, 2), np.uint8), np.zeros((2, 3), np.uint8)) == 1.0
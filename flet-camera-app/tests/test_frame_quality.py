@@ -0,0 +1,114 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from components import framing, pose_pipeline as pp
+from vision.frame_quality import FrameQuality, QualityParams
+from vision.pose import PROJECT_ROOT
+
+SAMPLE = os.path.join(PROJECT_ROOT, "image_comppressor_picture", "Image_02.png")
+ROBOT_CFG = {"calpick": 1.0, "offsetpickx": 0.0, "offsetpicky": 0.0, "angle": 0.0, "pick_transform": None}
+
+
+def _sharp():
+    # ฉาก backlight แบบย่อ: พื้นขาว + ชิ้นงานมืดที่มีขอบคม
+    rng = np.random.default_rng(2)
+    img = np.full((540, 960), 245, np.uint8)
+    for _ in range(40):
+        x, y = rng.integers(0, 900), rng.integers(0, 500)
+        cv2.rectangle(img, (int(x), int(y)), (int(x) + 40, int(y) + 25), int(rng.integers(20, 120)), -1)
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+
+def test_sharp_frame_passes():
+    q = FrameQuality(QualityParams())
+    out = q.check(_sharp())
+    assert out["ok"] and out["reason"] == ""
+    assert out["sharpness"] > QualityParams.min_sharpness
+
+
+@pytest.mark.parametrize("make, reason", [
+    (lambda f: cv2.GaussianBlur(f, (0, 0), 8), "blur"),
+    (lambda f: (f * 0.1).astype(np.uint8), "dark"),
+    (lambda f: np.full_like(f, 255), "bright"),
+])
+def test_bad_frames_are_rejected_with_reason(make, reason):
+    q = FrameQuality(QualityParams())
+    out = q.check(make(_sharp()))
+    assert not out["ok"] and out["reason"] == reason
+    stats = q.stats()
+    assert stats["checked"] == stats["rejected"] == 1 and stats["reasons"][reason] == 1
+
+
+def test_bundled_frame_passes_and_blurred_copy_does_not():
+    frame = cv2.imread(SAMPLE)
+    if frame is None:
+        pytest.skip("bundled images not available")
+    q = FrameQuality(QualityParams())
+    assert q.check(frame)["ok"]
+    assert q.check(cv2.GaussianBlur(frame, (0, 0), 15))["reason"] == "blur"
+    assert q.stats()["reject_rate"] == 0.5
+
+
+def test_gray_and_decimation_agree():
+    gray = cv2.cvtColor(_sharp(), cv2.COLOR_BGR2GRAY)
+    a = FrameQuality(QualityParams()).measure(gray)
+    b = FrameQuality(QualityParams()).measure(_sharp())
+    assert a == pytest.approx(b)
+    full = FrameQuality(QualityParams(step=1)).measure(gray)
+    assert full["mean"] == pytest.approx(a["mean"], abs=2.0)
+
+
+def test_params_from_config(tmp_path):
+    ini = tmp_path / "config.ini"
+    ini.write_text("[QUALITY]\nstep = 2\nmin_sharpness = 1000\nmax_dark = oops\n", encoding="utf-8")
+    p = QualityParams.from_config(ini)
+    assert (p.step, p.min_sharpness) == (2, 1000.0)
+    assert p.max_dark == QualityParams.max_dark
+    assert QualityParams.from_config(tmp_path / "missing.ini") == QualityParams()
+
+
+def test_pipeline_retriggers_until_a_good_frame():
+    frames = [cv2.GaussianBlur(_sharp(), (0, 0), 8)]
+    triggers = []
+
+    def retrigger():
+        triggers.append(1)
+        frames.append(_sharp())
+
+    class Matcher:
+        def match(self, frame):
+            return {"c1": (10.0, 20.0), "c2": (30.0, 40.0), "angle": 0.0, "score": 0.9}
+
+    q = FrameQuality(QualityParams())
+    pipeline = pp.PosePipeline(lambda: frames[-1], Matcher(), ROBOT_CFG, deadline_ms=2000,
+                               quality=q.check, retrigger=retrigger)
+    try:
+        assert pipeline.handle("Capture:1")["status"] == framing.STATUS_OK
+        assert triggers == [1]
+        stats = pipeline.stats()
+        assert stats["quality_rejects"] == 1 and stats["quality"]["checked"] == 2
+    finally:
+        pipeline.close()
+
+
+def test_pipeline_answers_retry_when_frames_stay_bad():
+    blurred = cv2.GaussianBlur(_sharp(), (0, 0), 8)
+    frames = [blurred]
+    matched = []
+
+    class Matcher:
+        def match(self, frame):
+            matched.append(frame)
+
+    pipeline = pp.PosePipeline(lambda: frames[-1], Matcher(), ROBOT_CFG, deadline_ms=2000,
+                               quality=FrameQuality(QualityParams()).check,
+                               retrigger=lambda: frames.append(blurred.copy()))
+    try:
+        assert pipeline.handle("Capture:1")["status"] == framing.STATUS_RETRY
+        assert not matched
+        assert pipeline.stats()["quality_rejects"] == pp.QUALITY_RETRIES + 1
+    finally:
+        pipeline.close()
@@ -0,0 +1,77 @@
+import socket
+
+import pytest
+
+from components import framing
+
+
+@pytest.mark.parametrize("mode", [framing.MODE_LINE, framing.MODE_LENGTH])
+def test_decoder_splits_stream_at_any_byte(mode):
+    messages = [b"Capture:1", b"finnish", b"COUNT,12"]
+    stream = b"".join(framing.encode_frame(m, mode) for m in messages)
+    decoder = framing.FrameDecoder(mode)
+    frames = []
+    for i in range(len(stream)):
+        frames += decoder.feed(stream[i:i + 1])
+    assert frames == messages
+    assert decoder.pending() == 0
+
+
+def test_line_mode_strips_crlf_and_skips_blank_lines():
+    decoder = framing.FrameDecoder(framing.MODE_LINE)
+    assert decoder.feed(b"Capture:1\r\n\r\nfinn") == [b"Capture:1"]
+    assert decoder.feed(b"ish\n") == [b"finnish"]
+
+
+def test_raw_mode_is_one_frame_per_recv():
+    decoder = framing.FrameDecoder(framing.MODE_RAW)
+    assert decoder.feed(b"Capture:1finnish") == [b"Capture:1finnish"]
+
+
+def test_oversized_frames_raise():
+    line = framing.FrameDecoder(framing.MODE_LINE, max_frame=8)
+    with pytest.raises(framing.FramingError):
+        line.feed(b"x" * 9)
+    length = framing.FrameDecoder(framing.MODE_LENGTH, max_frame=8)
+    with pytest.raises(framing.FramingError):
+        length.feed(framing.LENGTH_HEADER.pack(9))
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        framing.FrameDecoder("xml")
+    with pytest.raises(ValueError):
+        framing.encode_frame("x", "xml")
+
+
+def test_binary_result_round_trip():
+    buf = framing.pack_result(x=12.5, y=-3.25, angle=90.0, score=0.875, frame=7, status=framing.STATUS_REJECT)
+    assert len(buf) == framing.RESULT_SIZE
+    out = framing.unpack_result(buf)
+    assert (out["x"], out["y"], out["angle"], out["score"]) == (12.5, -3.25, 90.0, 0.875)
+    assert (out["frame"], out["status"]) == (7, framing.STATUS_REJECT)
+    with pytest.raises(framing.FramingError):
+        framing.unpack_result(b"\0" * framing.RESULT_SIZE)
+
+
+def test_text_result_round_trip():
+    text = framing.format_result_text(x=1.0, y=2.0, angle=-45.0, score=0.5, frame=3, status=framing.STATUS_RETRY)
+    assert text == "RETRY,1.000,2.000,-45.00,0.500,3"
+    out = framing.parse_result_text(text)
+    assert out["status"] == framing.STATUS_RETRY and out["frame"] == 3
+
+
+def test_read_frame_raises_timeout_and_keeps_partial_frame():
+    a, b = socket.socketpair()
+    with a, b:
+        a.settimeout(0.1)
+        reader = framing.FrameReader(a, framing.MODE_LINE)
+        b.sendall(b"parti")
+        with pytest.raises(socket.timeout):
+            reader.read_frame()
+        b.sendall(b"al\nnext\n")
+        assert reader.read_frame() == b"partial"
+        assert reader.read_frame() == b"next"
+        assert reader.read() == []  # read() ยังเป็นแบบ poll: timeout -> list ว่าง
+        b.close()
+        assert reader.read_frame() is None
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from vision import matcher_registry as mr
+
+
+class FakeBackend:
+    def __init__(self):
+        self.built = 0
+        self.released = []
+
+    def create_matcher_for_template(self, template_img, dll_path, params):
+        self.built += 1
+        return object()
+
+    def release_matcher(self, matcher):
+        self.released.append(matcher)
+
+
+def _tpl(value):
+    return np.full((4, 4), value, np.uint8)
+
+
+def test_same_template_and_params_builds_once():
+    mt = FakeBackend()
+    reg = mr.MatcherRegistry(mt)
+    assert reg.get(_tpl(1), None) is reg.get(_tpl(1), None)
+    assert mt.built == 1 and reg.stats()["hits"] == 1
+
+
+def test_lru_eviction_releases_unpinned_only():
+    mt = FakeBackend()
+    reg = mr.MatcherRegistry(mt, max_entries=1)
+    held = reg.acquire(_tpl(1), None)
+    borrowed = reg.get(_tpl(2), None)
+    assert mt.released == []  # ตัวที่ acquire อยู่ไม่ถูกไล่ออก
+    reg.get(_tpl(3), None)
+    assert mt.released == [borrowed]
+    assert reg.stats()["pinned"] == 1
+    reg.release(held)
+    assert held in mt.released and len(reg) == 1
+
+
+def test_clear_keeps_leased_entries():
+    mt = FakeBackend()
+    reg = mr.MatcherRegistry(mt)
+    held = reg.acquire(_tpl(1), None)
+    other = reg.get(_tpl(2), None)
+    reg.clear()
+    assert mt.released == [other] and len(reg) == 1
+    reg.release(held)
+    reg.clear()
+    assert mt.released == [other, held] and len(reg) == 0
+
+
+def test_get_registry_rejects_different_arguments(monkeypatch):
+    monkeypatch.setattr(mr, "_default", None)
+    mt = FakeBackend()
+    reg = mr.get_registry(mt=mt, max_entries=4)
+    assert mr.get_registry() is reg
+    assert mr.get_registry(mt=mt, max_entries=4) is reg
+    with pytest.raises(ValueError):
+        mr.get_registry(max_entries=8)
+    with pytest.raises(ValueError):
+        mr.get_registry(mt=FakeBackend())
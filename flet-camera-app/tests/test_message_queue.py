@@ -0,0 +1,62 @@
+import queue
+import threading
+
+import pytest
+
+from components import message_queue as mq
+
+
+def test_capture_is_served_before_chatter():
+    q = mq.BoundedMessageQueue(8)
+    for item in ("status", "finnish", "Capture:1", "status2"):
+        q.put(item)
+    assert [q.get_nowait() for _ in range(4)] == ["Capture:1", "finnish", "status", "status2"]
+    with pytest.raises(queue.Empty):
+        q.get_nowait()
+
+
+def test_drop_oldest_evicts_only_default_priority():
+    q = mq.BoundedMessageQueue(3, policy=mq.POLICY_DROP_OLDEST)
+    q.put("old chatter")
+    q.put("finnish")
+    q.put("new chatter")
+    q.put("Capture:1")  # ทิ้ง chatter ที่เก่าสุด
+    assert q.stats()["dropped"] == 1
+    assert [q.get_nowait() for _ in range(3)] == ["Capture:1", "finnish", "new chatter"]
+
+
+def test_drop_oldest_never_evicts_stateful_commands():
+    q = mq.BoundedMessageQueue(2, policy=mq.POLICY_DROP_OLDEST)
+    q.put("finnish")
+    q.put("Capture:1")
+    with pytest.raises(queue.Full):  # tcpserver ตอบ BUSY
+        q.put("Capture:1")
+    q.put("chatter")  # ไม่มีที่ -> ทิ้งข้อความใหม่เงียบ ๆ
+    stats = q.stats()
+    assert stats["depth_by_priority"][:2] == [1, 1]
+    assert (stats["rejected"], stats["dropped"]) == (1, 1)
+
+
+def test_reject_policy_raises_when_full():
+    q = mq.BoundedMessageQueue(1, policy=mq.POLICY_REJECT)
+    q.put("a")
+    with pytest.raises(queue.Full):
+        q.put("b")
+    assert q.stats()["rejected"] == 1
+
+
+def test_block_policy_waits_for_space():
+    q = mq.BoundedMessageQueue(1, policy=mq.POLICY_BLOCK)
+    q.put("a")
+    with pytest.raises(queue.Full):
+        q.put("b", timeout=0.05)
+    threading.Timer(0.05, q.get).start()
+    q.put("c", timeout=2.0)
+    assert q.get_nowait() == "c"
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        mq.BoundedMessageQueue(4, policy="lifo")
+    with pytest.raises(ValueError):
+        mq.BoundedMessageQueue(0)
@@ -0,0 +1,76 @@
+import json
+import urllib.request
+
+from components import metrics
+
+SNAPSHOT = {
+    "time": 0.0,
+    "process": {"cpu_seconds_total": 1.5, "resident_memory_bytes": None, "threads": 7},
+    "counters": {"frames_matched_total": 12},
+    "rates": {"encode-fps": 29.5},
+    "stages": {"match": {"count": 4, "mean_ms": 50.0, "max_ms": 80.0,
+                         "p50_ms": 45.0, "p95_ms": None, "p99_ms": 80.0}},
+    "sources": {"queue": {"depth": 3, "dropped_total": 2, "policy": "drop_oldest",
+                          "levels": {"busy": True}}},
+}
+
+
+def _samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+
+def test_render_prometheus_families_and_values():
+    text = metrics.render_prometheus(SNAPSHOT)
+    samples = _samples(text)
+    assert samples["vision_process_cpu_seconds_total"] == "1.5"
+    assert "vision_process_resident_memory_bytes" not in samples  # None ไม่ออก
+    assert samples["vision_frames_matched_total"] == "12"
+    assert samples["vision_encode_fps"] == "29.5"
+    assert samples['vision_stage_seconds{stage="match",quantile="0.5"}'] == "0.045"
+    assert samples['vision_stage_seconds{stage="match",quantile="0.95"}'] == "NaN"
+    assert samples['vision_stage_seconds_sum{stage="match"}'] == "0.2"
+    assert samples['vision_stage_seconds_count{stage="match"}'] == "4"
+    assert samples["vision_queue_depth"] == "3"
+    assert samples["vision_queue_levels_busy"] == "1"
+    assert "vision_queue_policy" not in samples  # ไม่ใช่ตัวเลข
+    assert "# TYPE vision_queue_dropped_total counter" in text
+    assert "# TYPE vision_queue_depth gauge" in text
+    assert "# TYPE vision_stage_seconds summary" in text
+    assert text.endswith("\n")
+
+
+def test_every_family_has_help_and_type_once():
+    lines = metrics.render_prometheus(SNAPSHOT).splitlines()
+    types = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    helps = [line.split()[2] for line in lines if line.startswith("# HELP")]
+    assert types == helps and len(types) == len(set(types))
+
+
+def test_counter_and_collector_errors_do_not_break_stats():
+    metrics.counter("test_events_total").inc(3)
+    metrics.register_collector("test_broken", lambda: 1 / 0)
+    try:
+        s = metrics.stats()
+        assert s["counters"]["test_events_total"] >= 3
+        assert "error" in s["sources"]["test_broken"]
+        metrics.render_prometheus(s)
+    finally:
+        metrics.unregister_collector("test_broken")
+
+
+def test_load_metrics_config(tmp_path):
+    path = tmp_path / "config.ini"
+    path.write_text("[METRICS]\nhost = 127.0.0.1\nport = abc\n", encoding="utf-8")
+    assert metrics.load_metrics_config(path) == {"host": "127.0.0.1", "port": metrics.METRICS_PORT}
+
+
+def test_http_endpoints():
+    server = metrics.start_metrics_server("127.0.0.1", 0)
+    try:
+        with urllib.request.urlopen(server.url + "/metrics", timeout=5) as r:
+            assert r.headers["Content-Type"] == metrics.CONTENT_TYPE_PROMETHEUS
+            assert b"vision_process_threads" in r.read()
+        with urllib.request.urlopen(server.url + "/stats.json", timeout=5) as r:
+            assert "stages" in json.loads(r.read())
+    finally:
+        server.stop()
@@ -0,0 +1,132 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from vision import model_file as mf
+from vision import shape_match as sm
+from vision.matcher_registry import template_hash
+
+
+def _template():
+    img = np.full((64, 80, 3), 30, np.uint8)
+    cv2.rectangle(img, (10, 12), (60, 50), (220, 220, 220), -1)
+    cv2.circle(img, (62, 20), 9, (120, 120, 120), -1)
+    return img
+
+
+def _scene(template):
+    scene = np.full((200, 240, 3), 30, np.uint8)
+    scene[70:134, 90:170] = template
+    return scene
+
+
+def _params(**kwargs):
+    fields = dict(maxCount=1, scoreThreshold=0.5, angle=10.0, method=sm.METHOD_SHAPE)
+    fields.update(kwargs)
+    return sm.MatchingParams(**fields)
+
+
+def test_saved_model_loads_and_matches_like_the_built_one(tmp_path):
+    tpl = _template()
+    built, loaded = mf.load_or_build(tpl, _params(), model_dir=tmp_path)
+    assert loaded is False
+    again, loaded = mf.load_or_build(tpl, _params(), model_dir=tmp_path)
+    assert loaded is True
+    scene = _scene(tpl)
+    a = built.match(scene)
+    b = again.match(scene)
+    assert len(a) == len(b) == 1
+    assert (b[0].centerX, b[0].centerY, b[0].angle) == pytest.approx((a[0].centerX, a[0].centerY, a[0].angle))
+    assert (a[0].centerX, a[0].centerY) == pytest.approx((129.5, 101.5), abs=1.0)
+
+
+def test_search_only_params_share_the_file(tmp_path):
+    tpl = _template()
+    mf.load_or_build(tpl, _params(), model_dir=tmp_path)
+    matcher, loaded = mf.load_or_build(tpl, _params(scoreThreshold=0.7), model_dir=tmp_path)
+    assert loaded is True and matcher.params.scoreThreshold == 0.7
+
+
+def test_mismatched_template_or_build_params_are_rejected(tmp_path):
+    tpl = _template()
+    matcher, _ = mf.load_or_build(tpl, _params(), model_dir=tmp_path)
+    path = mf.model_path(tmp_path, template_hash(tpl), _params())
+    with pytest.raises(mf.ModelFileError):
+        mf.load_model(path, _params(), source_hash="0" * 40)
+    with pytest.raises(mf.ModelFileError):
+        mf.load_model(path, sm.MatchingParams(angle=20.0, method=sm.METHOD_SHAPE))
+
+
+def test_corrupt_files_raise(tmp_path):
+    bad = tmp_path / "bad.smf"
+    bad.write_bytes(b"NOTMODEL" + b"\0" * 16)
+    with pytest.raises(mf.ModelFileError):
+        mf.read_header(str(bad))
+    short = tmp_path / "short.smf"
+    short.write_bytes(mf.MAGIC)
+    with pytest.raises(mf.ModelFileError):
+        mf.read_header(str(short))
+
+
+def test_ncc_bank_is_saved_and_loaded(tmp_path, monkeypatch):
+    # method ค่าเริ่มต้น (ncc) = matcher ของแอป: template หมุนทุกมุมอยู่ในไฟล์ โหลดแล้วไม่ต้องหมุนใหม่
+    from vision import ncc_match
+
+    tpl = _template()
+    params = sm.MatchingParams(maxCount=1, scoreThreshold=0.5, angle=10.0)
+    built, loaded = mf.load_or_build(tpl, params, model_dir=tmp_path)
+    assert loaded is False and isinstance(built, ncc_match.NccMatcher)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def no_rotation(*args, **kwargs):
+        raise AssertionError("template rotated after loading")
+
+    monkeypatch.setattr(ncc_match, "rotate_template", no_rotation)
+    again, loaded = mf.load_or_build(tpl, params, model_dir=tmp_path)
+    assert loaded is True and isinstance(again, ncc_match.NccMatcher)
+    scene = _scene(tpl)
+    a = built.match(scene)
+    b = again.match(scene)
+    assert len(a) == len(b) == 1
+    assert (b[0].centerX, b[0].centerY, b[0].angle, b[0].score) == \
+        pytest.approx((a[0].centerX, a[0].centerY, a[0].angle, a[0].score))
+    # ncc กับ shape ของ template เดียวกันเป็นคนละไฟล์
+    path = mf.model_path(tmp_path, template_hash(tpl), params)
+    with pytest.raises(mf.ModelFileError):
+        mf.load_model(path, _params(angle=10.0))
+
+
+def test_lazy_ncc_levels_are_not_stored(tmp_path, monkeypatch):
+    from vision import ncc_match
+
+    monkeypatch.setattr(ncc_match, "MAX_BANK_BYTES", 0)
+    tpl = _template()
+    params = sm.MatchingParams(maxCount=1, scoreThreshold=0.5, angle=180.0)
+    built, _ = mf.load_or_build(tpl, params, model_dir=tmp_path)
+    header, _ = mf.read_header(str(mf.model_path(tmp_path, template_hash(tpl), params)))
+    assert header["rotated"][:-1] == [0] * (built.num_levels - 1) and header["rotated"][-1] > 0
+    again, loaded = mf.load_or_build(tpl, params, model_dir=tmp_path)
+    assert loaded is True and again.bank[0].lazy
+    a = built.match(_scene(tpl))
+    b = again.match(_scene(tpl))
+    assert (b[0].centerX, b[0].centerY, b[0].angle) == pytest.approx((a[0].centerX, a[0].centerY, a[0].angle))
+
+
+def test_app_matcher_writes_and_reloads_model_files(tmp_path):
+    from vision.matcher_registry import MatcherRegistry
+    from vision.pose import DEFAULT_TEMPLATE1, DEFAULT_TEMPLATE2
+    from vision.roi_search import TwoStageMatcher
+
+    if not (os.path.exists(DEFAULT_TEMPLATE1) and os.path.exists(DEFAULT_TEMPLATE2)):
+        pytest.skip("bundled templates not available")
+    first = TwoStageMatcher.from_files(mt=sm, registry=MatcherRegistry(mt=sm, model_dir=str(tmp_path)))
+    first.release()
+    assert len(list(tmp_path.glob("*" + mf.MODEL_EXT))) == 2
+    registry = MatcherRegistry(mt=sm, model_dir=str(tmp_path))
+    second = TwoStageMatcher.from_files(mt=sm, registry=registry)
+    try:
+        assert registry.stats()["loaded"] == 2
+    finally:
+        second.release()
@@ -0,0 +1,142 @@
+import cv2
+import numpy as np
+import pytest
+
+from vision import shape_match as sm
+from vision.ncc_match import NccMatcher
+
+
+def _template():
+    rng = np.random.default_rng(5)
+    img = np.full((70, 90), 40, np.uint8)
+    cv2.rectangle(img, (8, 10), (70, 58), 200, -1)
+    cv2.circle(img, (72, 22), 11, 110, -1)
+    cv2.line(img, (12, 50), (60, 18), 20, 3)
+    img = cv2.add(img, rng.integers(0, 12, img.shape, dtype=np.uint8))
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+
+def _scene(template, center, angle):
+    scene = np.full((300, 360, 3), 40, np.uint8)
+    h, w = template.shape[:2]
+    m = cv2.getRotationMatrix2D(((w - 1) / 2.0, (h - 1) / 2.0), angle, 1.0)
+    m[:, 2] += np.array(center) - ((w - 1) / 2.0, (h - 1) / 2.0)
+    mask = cv2.warpAffine(np.full((h, w), 255, np.uint8), m, scene.shape[1::-1], flags=cv2.INTER_NEAREST)
+    warped = cv2.warpAffine(template, m, scene.shape[1::-1], flags=cv2.INTER_LINEAR)
+    scene[mask > 0] = warped[mask > 0]
+    return scene
+
+
+def test_default_method_is_ncc():
+    matcher = sm.create_matcher_for_template(_template(), None, sm.MatchingParams(angle=5.0))
+    assert isinstance(matcher, NccMatcher)
+    with pytest.raises(ValueError):
+        sm.create_matcher_for_template(_template(), None, sm.MatchingParams(method="sift"))
+
+
+@pytest.mark.parametrize("angle", [0.0, 30.0, -75.0])
+def test_finds_rotated_part(angle):
+    tpl = _template()
+    matcher = NccMatcher(tpl, sm.MatchingParams(maxCount=1, scoreThreshold=0.5, angle=90.0))
+    results = matcher.match(_scene(tpl, (180.0, 150.0), angle))
+    assert len(results) == 1
+    r = results[0]
+    assert (r.centerX, r.centerY) == pytest.approx((180.0, 150.0), abs=1.5)
+    assert abs((r.angle - angle + 180.0) % 360.0 - 180.0) <= 2.0
+    assert r.score > 0.8
+
+
+def test_narrow_angle_range_like_native_params():
+    # params ของแอป: template2 ±1° score 0.4 -> ชิ้นที่หมุนน้อยยังเจอ, ที่หมุนเกินช่วงไม่ได้ score สูง
+    tpl = _template()
+    matcher = NccMatcher(tpl, sm.MatchingParams(maxCount=1, scoreThreshold=0.4, angle=1.0))
+    found = matcher.match(_scene(tpl, (150.0, 140.0), 0.5))
+    assert found and found[0].score > 0.8
+    assert abs(found[0].centerX - 150.0) <= 1.5 and abs(found[0].centerY - 140.0) <= 1.5
+    rotated = matcher.match(_scene(tpl, (150.0, 140.0), 60.0))
+    assert not rotated or rotated[0].score < found[0].score
+
+
+def test_blank_image_has_no_match():
+    matcher = NccMatcher(_template(), sm.MatchingParams(scoreThreshold=0.5, angle=10.0))
+    assert matcher.match(np.full((200, 200, 3), 40, np.uint8)) == []
+
+
+def test_bundled_images_with_shipped_template2_params():
+    # เดิม builtin เจอ temp3 แค่ 4/49 ด้วย params2 ของแอป (score 0.4, ±1°)
+    import glob
+    import os
+    from vision.pose import DEFAULT_TEMPLATE2, PROJECT_ROOT
+
+    files = sorted(glob.glob(os.path.join(PROJECT_ROOT, "image_comppressor_picture", "Image_*.png")))
+    template = cv2.imread(DEFAULT_TEMPLATE2)
+    if not files or template is None:
+        pytest.skip("bundled images/templates not available")
+    matcher = sm.create_matcher_for_template(
+        template, None, sm.MatchingParams(maxCount=1, scoreThreshold=0.4, iouThreshold=0.6, angle=1.0))
+    found = sum(1 for f in files if sm.run_match(matcher, cv2.imread(f))[0] > 0)
+    assert found >= 0.95 * len(files)
+
+
+def test_rotated_templates_are_built_once(monkeypatch):
+    # ทุกมุมใน grid หมุนไว้ตอน build: match ไม่ warp template/ภาพอีก
+    from vision import ncc_match
+    tpl = _template()
+    matcher = NccMatcher(tpl, sm.MatchingParams(maxCount=1, scoreThreshold=0.5, angle=10.0))
+    assert all(not level.lazy and len(level._entries) == level.angles.size for level in matcher.bank)
+    scene = _scene(tpl, (170.0, 140.0), 6.0)
+
+    def no_warp(*args, **kwargs):
+        raise AssertionError("template rotated during match")
+
+    monkeypatch.setattr(ncc_match, "rotate_template", no_warp)
+    monkeypatch.setattr(ncc_match.cv2, "warpAffine", no_warp)
+    results = matcher.match(scene)
+    assert len(results) == 1 and abs(results[0].angle - 6.0) <= 1.0
+
+
+def test_cached_top_scores_give_the_same_result():
+    tpl = _template()
+    matcher = NccMatcher(tpl, sm.MatchingParams(maxCount=1, scoreThreshold=0.5, angle=45.0))
+    scene = _scene(tpl, (160.0, 130.0), -20.0)
+    pyramid = sm.frame_pyramid(scene, matcher.num_levels)
+    top = matcher.top_scores(pyramid[matcher.num_levels - 1])
+    a = matcher.match(scene)
+    b = matcher.match(scene, pyramid=pyramid, top_scores=top)
+    assert len(a) == len(b) == 1
+    assert (b[0].centerX, b[0].centerY, b[0].angle, b[0].score) == (a[0].centerX, a[0].centerY, a[0].angle,
+                                                                      a[0].score)
+
+
+def test_full_circle_bank_is_built_lazily(monkeypatch):
+    from vision import ncc_match
+    monkeypatch.setattr(ncc_match, "MAX_BANK_BYTES", 0)
+    tpl = _template()
+    matcher = NccMatcher(tpl, sm.MatchingParams(maxCount=1, scoreThreshold=0.5, angle=180.0))
+    assert matcher.bank[0].lazy and matcher.bank[0].nbytes() == 0
+    results = matcher.match(_scene(tpl, (180.0, 150.0), 150.0))
+    assert len(results) == 1
+    assert abs((results[0].angle - 150.0 + 180.0) % 360.0 - 180.0) <= 2.0
+    assert 0 < len(matcher.bank[0]._entries) < matcher.bank[0].angles.size
+
+
+SUBPIXEL_POSES = [(180.3, 150.7, 0.0), (175.6, 140.2, 3.3), (190.85, 160.45, -4.6), (170.5, 145.25, 7.1)]
+
+
+def _pose_errors(mode):
+    tpl = _template()
+    matcher = NccMatcher(tpl, sm.MatchingParams(maxCount=1, scoreThreshold=0.5, angle=10.0, subPixel=mode))
+    pos, ang = [], []
+    for cx, cy, angle in SUBPIXEL_POSES:
+        r = matcher.match(_scene(tpl, (cx, cy), angle))[0]
+        pos.append(np.hypot(r.centerX - cx, r.centerY - cy))
+        ang.append(abs(r.angle - angle))
+    return max(pos), max(ang)
+
+
+@pytest.mark.parametrize("mode", ["least_squares", "least_squares_high"])
+def test_least_squares_refinement_is_sub_pixel_and_sub_degree(mode):
+    pos, ang = _pose_errors(mode)
+    assert pos < 0.1 and ang < 0.1
+    parabola_pos, parabola_ang = _pose_errors("interpolation")
+    assert pos < parabola_pos and ang < parabola_ang
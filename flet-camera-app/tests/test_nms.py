@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+import pytest
+
+from vision import nms
+
+
+def _quad(cx, cy, w, h, angle):
+    return cv2.boxPoints(((cx, cy), (w, h), angle))
+
+
+def test_iou_matches_opencv_rotated_intersection():
+    rng = np.random.default_rng(1)
+    rects = [((float(x), float(y)), (float(w), float(h)), float(a)) for x, y, w, h, a in
+             zip(rng.uniform(0, 60, 12), rng.uniform(0, 60, 12), rng.uniform(10, 40, 12),
+                 rng.uniform(10, 40, 12), rng.uniform(-90, 90, 12))]
+    iou = nms.rotated_iou_matrix(np.stack([cv2.boxPoints(r) for r in rects]))
+    for i in range(len(rects)):
+        for j in range(i + 1, len(rects)):
+            ret, pts = cv2.rotatedRectangleIntersection(rects[i], rects[j])
+            inter = cv2.contourArea(cv2.convexHull(pts)) if ret != cv2.INTERSECT_NONE and pts is not None else 0.0
+            area_i = rects[i][1][0] * rects[i][1][1]
+            area_j = rects[j][1][0] * rects[j][1][1]
+            assert iou[i, j] == pytest.approx(inter / (area_i + area_j - inter), abs=1e-3)
+            assert iou[i, j] == iou[j, i]
+
+
+def test_orientation_does_not_matter():
+    q = _quad(10, 10, 20, 10, 30)
+    iou = nms.rotated_iou_matrix(np.stack([q, q[::-1]]))
+    assert iou[0, 1] == pytest.approx(1.0)
+
+
+def test_nms_keeps_best_of_overlapping_and_all_disjoint():
+    quads = np.stack([_quad(0, 0, 20, 20, 0), _quad(2, 0, 20, 20, 5), _quad(100, 100, 20, 20, 45)])
+    keep = nms.rotated_nms(quads, [0.7, 0.9, 0.8], 0.3)
+    assert list(keep) == [1, 2]
+    assert list(nms.rotated_nms(quads, [0.7, 0.9, 0.8], 0.3, max_keep=1)) == [1]
+
+
+def test_nms_empty():
+    assert nms.rotated_nms(np.zeros((0, 4, 2)), [], 0.5).size == 0
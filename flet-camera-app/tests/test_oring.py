@@ -0,0 +1,99 @@
+import cv2
+import numpy as np
+import pytest
+
+from components import framing, pose_pipeline as pp
+from vision.oring import OringFinder, OringParams, draw_oring, oring_roi
+
+PARAMS = OringParams(large_area=3000, dif_zone=0, h_oring=60, w_oring=90)
+
+
+def _frame(center=None, axes=(60, 40), thickness=8):
+    img = np.full((480, 640, 3), 60, np.uint8)
+    if center is not None:
+        cv2.ellipse(img, center, axes, 0, 0, 360, (220, 220, 220), thickness)
+    return img
+
+
+def test_ring_found_at_its_center():
+    result = OringFinder(PARAMS).find(_frame((300, 240)))
+    assert result["present"] and result["ok"] and result["candidates"] == 1
+    assert result["center"] == pytest.approx((300.0, 240.0), abs=4.0)
+    bx, by, bw, bh = result["bbox"]
+    assert bw >= PARAMS.w_oring and bh >= PARAMS.h_oring
+
+
+def test_missing_or_small_ring_is_not_present():
+    finder = OringFinder(PARAMS)
+    assert not finder.find(_frame())["present"]
+    small = finder.find(_frame((300, 240), axes=(30, 20), thickness=4))
+    assert not small["present"] and not small["ok"] and small["candidates"] == 0
+
+
+def test_position_check_uses_dif_zone():
+    finder = OringFinder(OringParams(large_area=3000, dif_zone=10, h_oring=60, w_oring=90))
+    near = finder.find(_frame((300, 240)), expected=(305.0, 243.0))
+    assert near["present"] and near["position_ok"] and near["ok"]
+    far = finder.find(_frame((300, 240)), expected=(340.0, 240.0))
+    assert far["present"] and not far["position_ok"] and not far["ok"]
+    assert far["offset"] == pytest.approx(40.0, abs=4.0)
+
+
+def test_roi_limits_the_search_and_is_clipped():
+    finder = OringFinder(PARAMS)
+    frame = _frame((150, 240))
+    assert not finder.find(frame, roi=(320, 0, 640, 480))["present"]
+    inside = finder.find(frame, roi=(-50, -50, 320, 480))
+    assert inside["present"] and inside["roi"] == (0, 0, 320, 480)
+    # ROI นอกภาพทั้งหมด -> ไม่มีอะไรให้ตรวจ
+    assert not finder.find(frame, roi=(700, 500, 800, 600))["present"]
+
+
+def test_gray_input_and_reused_buffers():
+    finder = OringFinder(PARAMS)
+    gray = cv2.cvtColor(_frame((300, 240)), cv2.COLOR_BGR2GRAY)
+    assert finder.find(gray)["present"]
+    buffers = finder._blur
+    assert finder.find(_frame((310, 250)))["center"] == pytest.approx((310.0, 250.0), abs=4.0)
+    assert finder._blur is buffers
+
+
+def test_inspect_uses_roi_around_template1():
+    finder = OringFinder(PARAMS)
+    frame = _frame((300, 240))
+    assert oring_roi((300.0, 240.0), PARAMS) == (210, 150, 390, 330)
+    ok = finder.inspect(frame, {"c1": (302.0, 238.0)})
+    assert ok["ok"] and ok["roi"] == oring_roi((302.0, 238.0), PARAMS)
+    assert not finder.inspect(frame, {"c1": (560.0, 100.0)})["present"]
+    assert draw_oring(frame.copy(), ok).shape == frame.shape
+
+
+def test_params_from_config_manager_object():
+    class FakeConfig:
+        large_area = "4000"
+        dif_zone = 12
+        w_oring = "bad"  # แปลงไม่ได้ -> ค่าเริ่มต้น
+
+    params = OringParams.from_config(FakeConfig())
+    assert (params.large_area, params.dif_zone) == (4000, 12)
+    assert params.w_oring == OringParams.w_oring and params.canny_thresh1 == OringParams.canny_thresh1
+
+
+def test_pipeline_rejects_part_without_ring():
+    robot_cfg = {"calpick": 1.0, "offsetpickx": 0.0, "offsetpicky": 0.0, "angle": 0.0, "pick_transform": None}
+
+    class Matcher:
+        def match(self, frame):
+            return {"c1": (300.0, 240.0), "c2": (320.0, 260.0), "angle": 0.0, "score": 0.9}
+
+    frames = [_frame((300, 240)), _frame()]
+    finder = OringFinder(PARAMS)
+    pipeline = pp.PosePipeline(lambda: frames[0], Matcher(), robot_cfg, deadline_ms=2000, inspect=finder.inspect)
+    try:
+        assert pipeline.handle("Capture:1")["status"] == framing.STATUS_OK
+        frames.pop(0)
+        reply = pipeline.handle("Capture:1")
+        assert reply["status"] == framing.STATUS_REJECT and reply["x"] == 300.0
+        assert not pipeline.last_inspection["present"]
+    finally:
+        pipeline.close()
@@ -0,0 +1,86 @@
+import types
+
+import numpy as np
+
+from vision import pallet
+
+PITCH = 100.0
+
+
+class FakeBackend:
+    """run_match คืนชิ้นงานตามกริด rows x cols (template1 อยู่ซ้ายของศูนย์กลาง template2 10 px)"""
+
+    def __init__(self, rows, cols):
+        self.c2 = [(50.0 + c * PITCH, 40.0 + r * PITCH) for r in range(rows) for c in range(cols)]
+        self.runs = 0
+
+    def MatchingParams(self, **kwargs):
+        return types.SimpleNamespace(**kwargs)
+
+    def create_matcher_for_template(self, template_img, dll_path, params):
+        return template_img.shape[0]  # 10 = template1, 60 = template2
+
+    def run_match(self, matcher, frame):
+        self.runs += 1
+        centers = [(x - 10.0, y) for x, y in self.c2] if matcher == 10 else list(self.c2)
+        results = [{"score": 0.9} for _ in centers]
+        return len(centers), results, centers
+
+
+def _layer(rows=2, cols=3):
+    mt = FakeBackend(rows, cols)
+    matcher = pallet.LayerMatcher(mt, np.zeros((10, 10, 3), np.uint8), np.zeros((60, 60, 3), np.uint8),
+                                  rows=rows, cols=cols)
+    return matcher, mt
+
+
+def test_pair_parts_greedy_by_distance():
+    pairs = pallet.pair_parts([(0, 0), (100, 0)], [(98, 1), (2, 1), (500, 500)], max_distance=10)
+    assert sorted(pairs) == [(0, 1), (1, 0)]
+    assert pallet.pair_parts([], [(0, 0)], 10) == []
+
+
+def test_assign_to_grid_tolerates_picked_cells_and_tilt():
+    theta = np.radians(5.0)
+    rot = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    poses = []
+    for r in range(3):
+        for c in range(4):
+            if (r, c) in ((0, 0), (1, 2)):
+                continue  # หยิบไปแล้ว
+            x, y = rot @ np.array([c * PITCH, r * PITCH])
+            poses.append({"c2": (x + 300.0, y + 200.0), "score": 0.8, "rc": (r, c)})
+    cells = pallet.assign_to_grid(poses, rows=3, cols=4, tol=30.0)
+    assert len(cells) == 10
+    assert all(key == pose["rc"] for key, pose in cells.items())
+
+
+def test_layer_serves_same_cell_until_confirmed():
+    layer, mt = _layer()
+    first = layer.match(None)
+    assert first["cell"] == (0, 0) and first["cached"] is False
+    again = layer.match(None)
+    assert again["cell"] == (0, 0) and again["cached"] is True
+    assert layer.remaining() == 6
+    layer.confirm()
+    assert layer.match(None)["cell"] == (0, 1)
+    assert mt.runs == 2  # ค้นครั้งเดียวทั้งชั้น
+    assert layer.stats()["repeats"] == 1
+
+
+def test_layer_detects_again_after_all_cells_are_picked():
+    layer, mt = _layer(rows=1, cols=2)
+    for _ in range(2):
+        layer.match(None)
+        layer.confirm()
+    assert layer.remaining() == 0
+    layer.match(None)
+    assert mt.runs == 4 and layer.stats()["layers"] == 2
+
+
+def test_reset_drops_the_current_cell():
+    layer, mt = _layer()
+    layer.match(None)
+    layer.reset()
+    layer.confirm()  # ไม่มีช่องค้าง -> ไม่ทำอะไร
+    assert layer.match(None)["cell"] == (0, 0) and mt.runs == 4
@@ -0,0 +1,66 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from vision import pick_order as po
+
+
+def _grid(rows, cols, pitch=100.0):
+    cells = [(r, c) for r in range(rows) for c in range(cols)]
+    return cells, np.array([(c * pitch, r * pitch) for r, c in cells], dtype=np.float64)
+
+
+def _is_permutation(order, n):
+    return sorted(np.asarray(order).tolist()) == list(range(n))
+
+
+def test_path_length_includes_start_leg():
+    pts = [(0, 0), (3, 4), (3, 0)]
+    assert po.path_length(pts, [0, 1, 2]) == pytest.approx(9.0)
+    assert po.path_length(pts, [1], start=(0, 0)) == pytest.approx(5.0)
+
+
+def test_serpentine_is_optimal_on_a_full_grid():
+    cells, pts = _grid(4, 5)
+    order = po.serpentine_order(cells, pts, start=pts[0])
+    assert _is_permutation(order, len(pts))
+    assert po.path_length(pts, order, pts[0]) == pytest.approx(19 * 100.0)
+
+
+def test_nearest_neighbour_and_two_opt_never_get_longer():
+    rng = np.random.default_rng(3)
+    pts = rng.uniform(0, 1000, (120, 2))
+    nn = po.nearest_neighbour_order(pts, start=(0, 0))
+    assert _is_permutation(nn, len(pts))
+    improved = po.two_opt(pts, nn, start=(0, 0), budget_ms=200)
+    assert _is_permutation(improved, len(pts))
+    assert po.path_length(pts, improved, (0, 0)) <= po.path_length(pts, nn, (0, 0)) + 1e-9
+
+
+def test_two_opt_matches_brute_force_on_small_sets():
+    rng = np.random.default_rng(7)
+    pts = rng.uniform(0, 100, (7, 2))
+    start = (0.0, 0.0)
+    best = min(po.path_length(pts, p, start) for p in itertools.permutations(range(len(pts))))
+    order = po.two_opt(pts, po.nearest_neighbour_order(pts, start), start, budget_ms=200)
+    assert po.path_length(pts, order, start) <= best * 1.05
+
+
+def test_plan_picks_upper_layer_first_and_beats_row_order():
+    cells, pts = _grid(3, 4)
+    planner = po.PickPlanner(mm_per_unit=1.0)
+    all_pts = np.vstack([pts, pts])
+    layers = np.repeat([0, 1], len(pts))
+    plan = planner.plan(all_pts, start=(0, 0), cells=cells + cells, layers=layers)
+    assert _is_permutation(plan.order, len(all_pts))
+    assert (plan.order[:len(pts)] >= len(pts)).all()  # ชั้น 1 (บน) ก่อน
+    assert plan.length < plan.baseline_length and plan.saved_s > 0
+
+
+def test_order_cells_starts_near_last_pick():
+    cells, pts = _grid(2, 3)
+    poses = {cell: {"c1": tuple(p)} for cell, p in zip(cells, pts)}
+    ordered = po.PickPlanner().order_cells(poses, start=(200.0, 100.0))
+    assert ordered[0][0] == (1, 2)
+    assert sorted(cell for cell, _ in ordered) == cells
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import numpy as np
+
+from components import framing, pose_pipeline as pp
+
+ROBOT_CFG = {"calpick": 0.5, "offsetpickx": 10.0, "offsetpicky": -5.0, "angle": 1.0, "pick_transform": None}
+POSE = {"c1": (100.0, 40.0), "c2": (120.0, 60.0), "angle": 30.0, "score": 0.9}
+
+
+class SlowMatcher:
+    def __init__(self, delays):
+        self.delays = list(delays)
+
+    def match(self, frame):
+        time.sleep(self.delays.pop(0) if self.delays else 0.0)
+        return dict(POSE)
+
+
+def _frame():
+    return np.zeros((8, 8, 3), np.uint8)
+
+
+def test_pixel_to_pick_scale_and_offset():
+    assert pp.pixel_to_pick(POSE, ROBOT_CFG) == (60.0, 15.0, 31.0)
+
+
+def test_ok_reply_and_non_capture_message():
+    pipeline = pp.PosePipeline(_frame, SlowMatcher([]), ROBOT_CFG, deadline_ms=1000)
+    try:
+        assert pipeline.handle("finnish") is None
+        reply = pipeline.handle("Capture:1")
+        assert reply == {"x": 60.0, "y": 15.0, "angle": 31.0, "score": 0.9, "frame": 1,
+                         "status": framing.STATUS_OK}
+    finally:
+        pipeline.close()
+
+
+def test_timed_out_work_is_abandoned_before_inspect():
+    inspected = []
+    pipeline = pp.PosePipeline(_frame, SlowMatcher([0.4]), ROBOT_CFG, deadline_ms=300,
+                               inspect=lambda frame, pose: inspected.append(pose) or {"ok": True})
+    try:
+        assert pipeline.handle("Capture:1")["status"] == framing.STATUS_TIMEOUT
+        # Capture ถัดไปรอแค่ match ที่ค้างอยู่ ไม่ต้องรอ inspect ของงานที่ถูกทิ้ง
+        reply = pipeline.handle("Capture:1")
+        assert (reply["frame"], reply["status"]) == (2, framing.STATUS_OK)
+        assert len(inspected) == 1
+        assert pipeline.stats()["abandoned"] == 1
+    finally:
+        pipeline.close()
+
+
+def test_frame_numbers_and_counts_are_consistent_across_threads():
+    pipeline = pp.PosePipeline(_frame, SlowMatcher([]), ROBOT_CFG, deadline_ms=2000)
+    frames = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(10):
+            reply = pipeline.handle("Capture:1")
+            with lock:
+                frames.append(reply["frame"])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        pipeline.close()
+    assert sorted(frames) == list(range(1, 41))
+    stats = pipeline.stats()
+    assert stats["ok"] == stats["requests"] == 40
+
+
+class CellMatcher:
+    """LayerMatcher แบบย่อ: ตอบช่องเดิมจนกว่าจะ confirm()"""
+
+    def __init__(self):
+        self.cell = 0
+        self.log = []
+
+    def match(self, frame):
+        self.log.append(("match", self.cell))
+        return dict(POSE, c1=(100.0 + 10.0 * self.cell, 40.0))
+
+    def confirm(self):
+        self.log.append(("confirm", self.cell))
+        self.cell += 1
+
+
+def test_finnish_confirms_in_order_with_captures():
+    matcher = CellMatcher()
+    pipeline = pp.PosePipeline(_frame, matcher, ROBOT_CFG, deadline_ms=1000)
+    try:
+        xs = []
+        for message in ("Capture:1", "Capture:1", "finnish", "Capture:1", "finnish", "finnish", "Capture:1"):
+            reply = pipeline.handle(message)
+            if message == "finnish":
+                assert reply is None  # ack ตามปกติ
+            else:
+                xs.append(reply["x"])
+    finally:
+        pipeline.close()
+    # Capture ซ้ำก่อน finnish ได้ช่องเดิม; finnish แต่ละครั้งเลื่อนหนึ่งช่องทันที (ไม่รอ consumer ของคิว)
+    assert xs == [60.0, 60.0, 65.0, 75.0]
+    assert [kind for kind, _ in matcher.log] == ["match", "match", "confirm", "match", "confirm", "confirm", "match"]
+    assert pipeline.stats()["requests"] == 4
+
+
+def test_finnish_before_first_capture_does_not_build_the_matcher():
+    built = []
+    pipeline = pp.PosePipeline(_frame, lambda: built.append(1) or CellMatcher(), ROBOT_CFG, deadline_ms=1000)
+    try:
+        assert pipeline.handle("finnish") is None
+        assert not built
+    finally:
+        pipeline.close()
@@ -0,0 +1,164 @@
+import configparser
+import importlib.util
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from components import pose_pipeline as pp
+from vision import robot_calib as rc
+from vision.roi_search import CONFIG_PATH
+
+DEMO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "demo"))
+
+# กล้องหมุน ~90° กับแกนหุ่น + กลับด้าน y: 0.162 mm/px แบบ calpick ใน config.ini
+AFFINE = np.array([[0.0, 0.162, -129.4], [0.161, 0.0, -53.1], [0.0, 0.0, 1.0]])
+HOMOGRAPHY = np.array([[0.16, 0.004, -120.0], [-0.003, 0.158, -50.0], [2e-5, -1e-5, 1.0]])
+
+
+def _pixels(n=20, seed=0):
+    return np.random.default_rng(seed).uniform((0, 0), (1920, 1080), (n, 2))
+
+
+def _project(matrix, px):
+    h = np.hstack([px, np.ones((len(px), 1))]) @ matrix.T
+    return h[:, :2] / h[:, 2:]
+
+
+def test_from_scale_matches_legacy_pixel_to_pick():
+    cfg = {"calpick": 0.162, "offsetpickx": -129.4, "offsetpicky": -53.1, "angle": 2.0, "pick_transform": None}
+    pose = {"c1": (812.5, 433.25), "angle": 17.0}
+    legacy = pp.pixel_to_pick(pose, cfg)
+    transform = rc.PixelToRobot.from_scale(0.162, -129.4, -53.1, angle_offset=2.0)
+    assert transform(pose) == pytest.approx(legacy)
+    assert pp.pixel_to_pick(pose, dict(cfg, pick_transform=transform)) == pytest.approx(legacy)
+
+
+@pytest.mark.parametrize("model, matrix", [(rc.MODEL_AFFINE, AFFINE), (rc.MODEL_HOMOGRAPHY, HOMOGRAPHY)])
+def test_fit_recovers_the_transform(model, matrix):
+    px = _pixels()
+    fit = rc.PixelToRobot.fit(px, _project(matrix, px), model)
+    assert fit.matrix == pytest.approx(matrix, rel=1e-6, abs=1e-9)
+    assert fit.rms < 1e-6 and fit.inliers.all()
+    assert fit.is_affine == (model == rc.MODEL_AFFINE)
+    grid = _pixels(50, seed=1)
+    assert fit.apply(grid) == pytest.approx(_project(matrix, grid), abs=1e-6)
+
+
+def test_ransac_drops_outliers():
+    px = _pixels(30)
+    robot = _project(AFFINE, px) + np.random.default_rng(2).normal(0, 0.05, (30, 2))
+    robot[[3, 11, 25]] += (15.0, -9.0)  # แตะผิดจุด
+    fit = rc.PixelToRobot.fit(px, robot)
+    assert not fit.inliers[[3, 11, 25]].any() and fit.inliers.sum() == 27
+    assert fit.rms < 0.15
+    grid = _pixels(50, seed=1)
+    assert np.abs(fit.apply(grid) - _project(AFFINE, grid)).max() < 0.1
+    # ไม่ใช้ RANSAC: outlier ดึง fit ออกไป
+    assert rc.PixelToRobot.fit(px, robot, threshold=0).rms > 1.0
+
+
+def test_homography_angles_follow_the_local_jacobian():
+    fit = rc.PixelToRobot(HOMOGRAPHY, rc.MODEL_HOMOGRAPHY, angle_offset=1.5)
+    pts = _pixels(10)
+    angles = np.linspace(-170.0, 170.0, 10)
+    # ทิศในภาพ (cos a, -sin a) เลื่อนไปนิดเดียว -> ทิศในพิกัดหุ่นจากผลต่างของจุด
+    a = np.radians(angles)
+    step = 1e-3 * np.stack([np.cos(a), -np.sin(a)], axis=1)
+    v = fit.apply(pts + step) - fit.apply(pts)
+    expected = np.degrees(np.arctan2(-v[:, 1], v[:, 0])) + 1.5
+    assert fit.apply_angles(pts, angles) == pytest.approx(expected, abs=1e-4)
+    # affine แบบหมุน 90° + กลับด้าน: มุมไม่เท่ามุมภาพอีกต่อไป
+    flip = rc.PixelToRobot(AFFINE)
+    assert flip.apply_angles([(0, 0)], [0.0])[0] == pytest.approx(-90.0, abs=0.5)
+
+
+def test_apply_poses_batches_and_skips_missing():
+    fit = rc.PixelToRobot(AFFINE, angle_offset=0.0)
+    poses = [{"c1": (100.0, 200.0), "angle": 10.0}, None, {"c1": (900.0, 50.0), "angle": -30.0}]
+    out = fit.apply_poses(poses)
+    assert np.isnan(out[1]).all()
+    for row, pose in zip(out[[0, 2]], (poses[0], poses[2])):
+        assert row == pytest.approx(fit(pose))
+
+
+@pytest.mark.parametrize("px, robot, model", [
+    ([(0, 0), (1, 0)], [(0, 0), (1, 0)], rc.MODEL_AFFINE),                      # ไม่พอ
+    ([(0, 0), (1, 0), (0, 1)], [(0, 0), (1, 0)], rc.MODEL_AFFINE),              # จำนวนไม่เท่ากัน
+    ([(0, 0), (1, 1), (2, 2)], [(0, 0), (1, 0), (0, 1)], rc.MODEL_AFFINE),      # เรียงเป็นเส้นตรง
+    ([(0, 0), (1, 0), (0, 1)], [(0, 0), (1, 0), (0, 1)], rc.MODEL_HOMOGRAPHY),  # homography ต้อง 4 คู่
+    ([(0, 0), (1, 0), (0, 1)], [(0, 0), (1, 0), (0, 1)], "spline"),
+])
+def test_bad_point_sets_raise(px, robot, model):
+    with pytest.raises(rc.CalibrationError):
+        rc.PixelToRobot.fit(px, robot, model)
+
+
+def test_write_transform_round_trips_through_config_ini(tmp_path):
+    path = tmp_path / "config.ini"
+    shutil.copy(CONFIG_PATH, path)
+    before = configparser.ConfigParser()
+    before.read(path, encoding="utf-8")
+
+    px = _pixels()
+    fit = rc.PixelToRobot.fit(px, _project(HOMOGRAPHY, px), rc.MODEL_HOMOGRAPHY)
+    assert rc.write_transform(fit, "pick", path) == str(path)
+    assert sorted(os.listdir(tmp_path)) == ["config.ini"]  # ไม่มีไฟล์ชั่วคราวค้าง
+
+    after = configparser.ConfigParser()
+    after.read(path, encoding="utf-8")
+    # section/key เดิมอยู่ครบ ค่าเดิมไม่เปลี่ยน
+    assert before.sections() == after.sections()
+    for section in before.sections():
+        for key, value in before.items(section):
+            assert after.get(section, key) == value
+    assert after.get("ROBOT", "pick_model") == rc.MODEL_HOMOGRAPHY
+    assert float(after.get("ROBOT", "pick_rms")) == pytest.approx(fit.rms, abs=1e-4)
+
+    loaded = rc.PixelToRobot.from_config(after, "pick", angle_offset=2.0)
+    assert loaded.model == rc.MODEL_HOMOGRAPHY and loaded.angle_offset == 2.0
+    assert loaded.apply(px) == pytest.approx(fit.apply(px), abs=1e-6)
+    assert rc.PixelToRobot.from_config(after, "place") is None
+
+    # pose pipeline ใช้ transform ที่เขียนไว้แทน calpick + offset
+    robot_cfg = pp.load_robot_config(path)
+    pose = {"c1": tuple(px[0]), "angle": 5.0}
+    x, y, _ = pp.pixel_to_pick(pose, robot_cfg)
+    assert (x, y) == pytest.approx(tuple(fit.apply(px[:1])[0]), abs=1e-6)
+
+
+def test_write_transform_creates_robot_section(tmp_path):
+    path = tmp_path / "new.ini"
+    path.write_text("[CAMERA]\ncamera_ip = 127.0.0.1\n", encoding="utf-8")
+    rc.write_transform(rc.PixelToRobot(AFFINE), "place", path)
+    cfg = configparser.ConfigParser()
+    cfg.read(path, encoding="utf-8")
+    assert cfg.get("CAMERA", "camera_ip") == "127.0.0.1"
+    assert rc.PixelToRobot.from_config(cfg, "place").matrix == pytest.approx(AFFINE)
+    assert not cfg.has_option("ROBOT", "place_rms")
+
+
+@pytest.mark.parametrize("value", ["1, 2, 3", "a, b, c, d, e, f, g, h, i"])
+def test_unreadable_config_transform_falls_back(value):
+    cfg = configparser.ConfigParser()
+    cfg.read_dict({"ROBOT": {"pick_transform": value}})
+    assert rc.PixelToRobot.from_config(cfg) is None
+
+
+def test_calibrate_robot_cli_fits_and_writes(tmp_path, capsys):
+    spec = importlib.util.spec_from_file_location("calibrate_robot", os.path.join(DEMO_DIR, "calibrate_robot.py"))
+    cli = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cli)
+    config = tmp_path / "config.ini"
+    shutil.copy(CONFIG_PATH, config)
+    px = _pixels(8)
+    robot = _project(AFFINE, px)
+    pairs = tmp_path / "points.csv"
+    pairs.write_text("px,py,rx,ry\n" + "".join(f"{a},{b},{c},{d}\n" for (a, b), (c, d) in zip(px, robot)),
+                     encoding="utf-8")
+    cli.main([str(pairs), "--write", "--config", str(config)])
+    assert "pick_transform" in capsys.readouterr().out
+    cfg = configparser.ConfigParser()
+    cfg.read(config, encoding="utf-8")
+    assert rc.PixelToRobot.from_config(cfg).matrix == pytest.approx(AFFINE, abs=1e-6)
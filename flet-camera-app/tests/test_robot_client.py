@@ -0,0 +1,70 @@
+import time
+
+from components import robot_client as rc
+
+
+def _wait(cond, timeout=3.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_coalesce_keeps_latest_pose_only():
+    client = rc.RobotClient("127.0.0.1", 9)  # ไม่ start: ดูแค่คิว
+    client.send("POSE,1", kind="pose")
+    client.send("COUNT,1", kind="counter")
+    client.send("POSE,2", kind="pose")
+    assert client.queue_depth() == 2
+    assert client.coalesced == 1
+    assert client._next_entry() == ["pose", b"POSE,2"]
+
+
+def test_full_queue_drops_oldest():
+    client = rc.RobotClient("127.0.0.1", 9, max_queue=2)
+    assert client.send("a") and client.send("b")
+    assert client.send("c") is False
+    assert (client.queue_depth(), client.dropped) == (2, 1)
+
+
+def test_rtt_comes_from_acks_not_connect():
+    robot = rc.StandInRobot()
+    client = rc.RobotClient(robot.host, robot.port, wait_ack=True).start()
+    try:
+        for i in range(3):
+            client.send(f"m{i}")
+        assert _wait(lambda: client.sent == 3)
+        stats = client.stats()
+        assert stats["connect_ms"] is not None
+        assert stats["rtt_ms"] is not None and stats["ack_timeouts"] == 0
+        assert robot.messages() == ["m0", "m1", "m2"]
+    finally:
+        client.stop()
+        robot.stop()
+
+
+def test_no_rtt_without_ack():
+    robot = rc.StandInRobot(ack=False)
+    client = rc.RobotClient(robot.host, robot.port).start()
+    try:
+        client.send("m0")
+        assert _wait(lambda: client.sent == 1)
+        assert client.stats()["rtt_ms"] is None
+    finally:
+        client.stop()
+        robot.stop()
+
+
+def test_missing_ack_times_out_and_reconnects():
+    robot = rc.StandInRobot(ack=False)
+    client = rc.RobotClient(robot.host, robot.port, wait_ack=True, ack_timeout=0.1,
+                            backoff_initial=0.05).start()
+    try:
+        client.send("m0")
+        assert _wait(lambda: client.ack_timeouts >= 2 and client.reconnects >= 1)
+        assert client.sent == 0  # ข้อความถูกใส่คืนคิวรอส่งซ้ำ
+    finally:
+        client.stop()
+        robot.stop()
@@ -0,0 +1,58 @@
+import importlib.util
+import json
+import os
+import socket
+
+import pytest
+
+from components import framing
+
+DEMO = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "demo", "robot_sim.py"))
+
+
+@pytest.fixture(scope="module")
+def sim():
+    spec = importlib.util.spec_from_file_location("robot_sim", DEMO)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_summarize_percentiles_and_totals(sim):
+    per_client = [{"latency_ms": [1.0, 2.0, 3.0], "errors": 0, "sent": 3},
+                  {"latency_ms": [4.0], "errors": 1, "sent": 2}]
+    out = sim.summarize(per_client, 2.0)
+    assert (out["clients"], out["sent"], out["replies"], out["errors"]) == (2, 5, 4, 1)
+    assert out["msgs_per_s"] == 2.0
+    assert out["p50_ms"] == 2.5 and out["max_ms"] == 4.0 and out["mean_ms"] == 2.5
+    assert "p50_ms" not in sim.summarize([{"latency_ms": [], "errors": 1, "sent": 0}], 1.0)
+
+
+def test_read_reply_binary_record(sim):
+    a, b = socket.socketpair()
+    with a, b:
+        record = framing.pack_result(frame=7, status=framing.STATUS_ACK)
+        # ส่งครึ่งหนึ่งก่อน: read_reply ต้องรอจนครบ record
+        a.sendall(record[:5])
+        a.sendall(record[5:])
+        assert sim.read_reply(b, None, framing.REPLY_BINARY) == record
+        a.close()
+        assert sim.read_reply(b, None, framing.REPLY_BINARY) is None
+
+
+@pytest.mark.parametrize("framing_mode,reply_mode", [(framing.MODE_LINE, framing.REPLY_TEXT),
+                                                     (framing.MODE_LENGTH, framing.REPLY_BINARY)])
+def test_spawned_server_answers_every_message(sim, tmp_path, framing_mode, reply_mode):
+    out = tmp_path / "summary.json"
+    code = sim.main(["--spawn-server", "--port", str(_free_port()), "--clients", "2", "--rate", "0",
+                     "--count", "6", "--framing", framing_mode, "--reply", reply_mode, "--json", str(out)])
+    summary = json.loads(out.read_text(encoding="utf-8"))
+    assert code == 0
+    assert (summary["sent"], summary["replies"], summary["errors"]) == (12, 12, 0)
+    assert summary["p99_ms"] >= summary["p50_ms"] > 0
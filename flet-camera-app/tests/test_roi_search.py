@@ -0,0 +1,93 @@
+import glob
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from vision import shape_match as sm
+from vision.pose import TwoTemplateMatcher
+from vision.roi_search import Roi, TwoStageMatcher, small_roi, small_roi_reach, wide_roi
+
+ROI_CFG = {"large_roi_width": 200, "large_roi_height": 200, "small_roi_width": 60, "small_roi_height": 160,
+           "small_roi_begin": 0}
+PARAMS = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.5, angle=2.0)
+
+
+def _patch(seed):
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 255, (12, 12), dtype=np.uint8)
+    img = cv2.resize(img, (48, 48), interpolation=cv2.INTER_NEAREST)
+    return cv2.cvtColor(cv2.GaussianBlur(img, (3, 3), 0), cv2.COLOR_GRAY2BGR)
+
+
+def _scene(t1, t2, c1, c2):
+    scene = np.full((400, 400, 3), 90, np.uint8)
+    for tpl, (cx, cy) in ((t1, c1), (t2, c2)):
+        h, w = tpl.shape[:2]
+        x0, y0 = int(cx - w // 2), int(cy - h // 2)
+        scene[y0:y0 + h, x0:x0 + w] = tpl
+    return scene
+
+
+def _matcher(t1, t2):
+    return TwoStageMatcher(sm, t1, t2, PARAMS, PARAMS, roi_cfg=ROI_CFG)
+
+
+def test_small_roi_follows_template1_angle():
+    roi = small_roi((100.0, 100.0), 90.0, {"small_roi_width": 20, "small_roi_height": 40, "small_roi_begin": 50})
+    assert (roi.cx, roi.cy) == pytest.approx((150.0, 100.0))
+    assert roi.contains(150.0 + 19.0, 100.0) and not roi.contains(150.0, 100.0 + 19.0)
+    assert Roi(0, 0, 10, 4, 90.0).bounds() == (-2, -5, 3, 6)
+
+
+def test_wide_roi_covers_small_roi_at_any_angle():
+    reach = small_roi_reach(ROI_CFG)
+    assert reach == pytest.approx(np.hypot(30, 80))
+    wide = wide_roi((200.0, 200.0), ROI_CFG)
+    for angle in range(0, 360, 15):
+        for x, y in small_roi((200.0, 200.0), angle, ROI_CFG).corners():
+            assert wide.contains(x, y)
+    assert wide_roi((200.0, 200.0), {"small_roi_width": 0, "small_roi_height": 10}) is None
+
+
+def test_template2_in_small_roi_is_found_directly():
+    t1, t2 = _patch(1), _patch(2)
+    matcher = _matcher(t1, t2)
+    pose = matcher.match(_scene(t1, t2, (200, 200), (210, 260)))
+    assert pose is not None and pose["c2"] == pytest.approx((209.5, 259.5), abs=1.0)
+    assert matcher.wide_searches == 0
+
+
+def test_rotated_part_outside_small_roi_falls_back_to_wide_search():
+    # c2 อยู่ขวาบนของ c1 (แบบ Image_20-30 ที่ pose ~ -59°): นอก small ROI แนวตั้ง แต่อยู่ในระยะ reach
+    t1, t2 = _patch(1), _patch(2)
+    matcher = _matcher(t1, t2)
+    scene = _scene(t1, t2, (200, 200), (270, 160))
+    expected = TwoTemplateMatcher(sm, t1, t2, PARAMS, PARAMS).match(scene)
+    pose = matcher.match(scene)
+    assert expected is not None and pose is not None
+    assert pose["c1"] == pytest.approx(expected["c1"], abs=0.5)
+    assert pose["c2"] == pytest.approx(expected["c2"], abs=0.5)
+    assert pose["angle"] == pytest.approx(expected["angle"], abs=0.5)
+    assert (matcher.wide_searches, matcher.wide_hits) == (1, 1)
+    assert matcher.last_rois[1].width == pytest.approx(2 * small_roi_reach(ROI_CFG))
+
+
+def test_template2_beyond_reach_is_not_accepted():
+    t1, t2 = _patch(1), _patch(2)
+    matcher = _matcher(t1, t2)
+    assert matcher.match(_scene(t1, t2, (200, 200), (300, 200))) is None
+    assert (matcher.wide_searches, matcher.wide_hits) == (1, 0)
+
+
+def test_bundled_images_match_two_template_matcher():
+    from vision.pose import PICTURE_DIR
+
+    files = sorted(glob.glob(os.path.join(PICTURE_DIR, "Image_*.png")))
+    if not files:
+        pytest.skip("bundled images not available")
+    matcher = TwoStageMatcher.from_files(mt=sm)
+    found = sum(matcher.match(cv2.imread(f)) is not None for f in files)
+    assert found == len(files)
+    assert matcher.wide_hits > 0  # Image_20-30: template2 อยู่นอก small ROI
@@ -0,0 +1,102 @@
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from vision import shape_match as sm
+from vision.pose import TwoTemplateMatcher
+from vision.scheduler import MatchScheduler
+
+PARAMS = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.5, angle=2.0)
+
+
+def _patch(seed):
+    rng = np.random.default_rng(seed)
+    img = cv2.resize(rng.integers(0, 255, (12, 12), dtype=np.uint8), (48, 48), interpolation=cv2.INTER_NEAREST)
+    return cv2.cvtColor(cv2.GaussianBlur(img, (3, 3), 0), cv2.COLOR_GRAY2BGR)
+
+
+def _scene(t1, t2):
+    scene = np.full((240, 320, 3), 90, np.uint8)
+    scene[60:108, 70:118] = t1
+    scene[130:178, 200:248] = t2
+    return scene
+
+
+class CountingBackend:
+    """sm ที่นับจำนวนครั้งที่สร้าง pyramid"""
+
+    def __init__(self):
+        self.pyramids = 0
+        self._lock = threading.Lock()
+
+    def frame_pyramid(self, image, levels):
+        with self._lock:
+            self.pyramids += 1
+        return sm.frame_pyramid(image, levels)
+
+    def __getattr__(self, name):
+        return getattr(sm, name)
+
+
+class NativeLike:
+    """matcher แบบ native: ไม่รับ pyramid/roi -> scheduler ต้องส่งภาพเดิม"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.images = []
+
+    def match(self, image, pyramid=None, roi=None, angles=None):
+        assert pyramid is None and roi is None
+        self.images.append(image)
+        return self.inner.match(image)
+
+
+def test_one_pyramid_per_frame_and_same_results_as_sequential():
+    t1, t2 = _patch(1), _patch(2)
+    backend = CountingBackend()
+    m1 = sm.create_matcher_for_template(t1, None, PARAMS)
+    m2 = sm.create_matcher_for_template(t2, None, PARAMS)
+    scene = _scene(t1, t2)
+    scheduler = MatchScheduler(backend)
+    try:
+        out = scheduler.run(scene, {"template1": m1, "template2": m2})
+    finally:
+        scheduler.close()
+    assert backend.pyramids == 1
+    for name, matcher in (("template1", m1), ("template2", m2)):
+        count, results, centers = out[name]
+        assert count == 1
+        assert centers == pytest.approx(sm.run_match(matcher, scene)[2])
+    assert out["template1"][2][0] == pytest.approx((93.5, 83.5), abs=1.0)
+    assert set(scheduler.last_timing) == {"pyramid_ms", "template1_ms", "template2_ms", "wall_ms"}
+
+
+def test_native_matcher_gets_the_image_and_roi_jobs_are_limited():
+    t1, t2 = _patch(1), _patch(2)
+    scene = _scene(t1, t2)
+    native = NativeLike(sm.create_matcher_for_template(t1, None, PARAMS))
+    builtin = sm.create_matcher_for_template(t2, None, PARAMS)
+    scheduler = MatchScheduler(sm)
+    try:
+        out = scheduler.run(scene, {"a": native, "b": (builtin, (0, 0, 160, 120))})
+    finally:
+        scheduler.close()
+    assert native.images == [scene] and out["a"][0] == 1
+    assert out["b"][0] == 0  # template2 อยู่นอก roi
+
+
+def test_concurrent_two_template_pose_matches_sequential():
+    t1, t2 = _patch(1), _patch(2)
+    scene = _scene(t1, t2)
+    sequential = TwoTemplateMatcher(sm, t1, t2, PARAMS, PARAMS).match(scene)
+    matcher = TwoTemplateMatcher(sm, t1, t2, PARAMS, PARAMS, concurrent=True)
+    try:
+        pose = matcher.match(scene)
+        assert "pyramid_ms" in matcher.last_timing
+    finally:
+        matcher.release()
+    assert pose["c1"] == pytest.approx(sequential["c1"])
+    assert pose["c2"] == pytest.approx(sequential["c2"])
+    assert pose["angle"] == pytest.approx(sequential["angle"])
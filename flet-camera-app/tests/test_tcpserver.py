@@ -0,0 +1,15 @@
+from components import framing, tcpserver
+
+
+def test_tcp_config_defaults_to_raw_text(tmp_path):
+    path = tmp_path / "config.ini"
+    path.write_text("[ROBOT]\nrobot_port = 5002\n", encoding="utf-8")
+    assert tcpserver.load_tcp_config(path) == {"framing_mode": framing.MODE_RAW,
+                                               "reply_mode": framing.REPLY_TEXT}
+
+
+def test_tcp_config_reads_section_and_rejects_unknown(tmp_path):
+    path = tmp_path / "config.ini"
+    path.write_text("[TCP]\nframing = Line\nreply = morse\n", encoding="utf-8")
+    cfg = tcpserver.load_tcp_config(path)
+    assert cfg == {"framing_mode": framing.MODE_LINE, "reply_mode": framing.REPLY_TEXT}
@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+import pytest
+
+from components import timing
+
+
+def test_bucket_bounds_contain_value_within_resolution():
+    rng = np.random.default_rng(0)
+    values = list(range(0, 200)) + [int(v) for v in rng.integers(1, 10 ** 12, 2000)]
+    for ns in values:
+        idx = timing.bucket_index(ns)
+        lo, hi = timing.bucket_bounds(idx)
+        assert lo <= ns < hi
+        assert (hi - lo) <= max(1, lo / timing.SUB_BUCKETS)
+
+
+def test_huge_values_fall_into_last_bucket():
+    assert timing.bucket_index(1 << 60) == timing.N_BUCKETS - 1
+
+
+def test_snapshot_percentiles_close_to_numpy():
+    hist = timing.Histogram("test")
+    rng = np.random.default_rng(1)
+    samples = rng.lognormal(mean=3.0, sigma=0.6, size=5000)  # ms
+    for ms in samples:
+        hist.record_ms(ms)
+    snap = hist.snapshot()
+    assert snap["count"] == len(samples)
+    assert snap["mean_ms"] == pytest.approx(samples.mean(), rel=1e-3)
+    for q in timing.PERCENTILES:
+        assert snap[f"p{q}_ms"] == pytest.approx(np.percentile(samples, q), rel=0.07)
+    assert snap["max_ms"] >= samples.max()
+
+
+def test_empty_snapshot_and_reset():
+    hist = timing.Histogram("empty")
+    assert hist.snapshot() == {"count": 0, "mean_ms": None, "max_ms": None,
+                               "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    hist.record_ms(1.0)
+    hist.reset()
+    assert hist.count == 0
+
+
+def test_records_from_many_threads_are_not_lost():
+    hist = timing.Histogram("threads")
+
+    def worker():
+        for _ in range(5000):
+            hist.record_ns(1000)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert hist.count == 20000
+
+
+def test_timed_and_stage_registry():
+    @timing.timed("test_timed_stage")
+    def work():
+        return 42
+
+    assert work() == 42
+    with timing.span("test_timed_stage"):
+        pass
+    assert timing.stage("test_timed_stage") is timing.stage("test_timed_stage")
+    assert timing.snapshot()["test_timed_stage"]["count"] == 2
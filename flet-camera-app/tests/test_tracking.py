@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+
+from vision import shape_match as sm
+from vision.pose import TwoTemplateMatcher
+from vision.tracking import GridModel, PoseTracker
+
+PARAMS = sm.MatchingParams(maxCount=1, scoreThreshold=0.6, iouThreshold=0.5, angle=5.0)
+
+
+def _patch(seed):
+    rng = np.random.default_rng(seed)
+    img = cv2.resize(rng.integers(0, 255, (12, 12), dtype=np.uint8), (48, 48), interpolation=cv2.INTER_NEAREST)
+    return cv2.cvtColor(cv2.GaussianBlur(img, (3, 3), 0), cv2.COLOR_GRAY2BGR)
+
+
+T1, T2 = _patch(1), _patch(2)
+
+
+def _scene(dx=0, dy=0):
+    scene = np.full((300, 400, 3), 90, np.uint8)
+    scene[60 + dy:108 + dy, 70 + dx:118 + dx] = T1
+    scene[100 + dy:148 + dy, 150 + dx:198 + dx] = T2
+    return scene
+
+
+def _tracker(index, grid=None):
+    base = TwoTemplateMatcher(sm, T1, T2, PARAMS, PARAMS)
+    return PoseTracker(base, grid=grid, index_fn=lambda: index[0], score1=0.6, score2=0.6)
+
+
+def test_grid_cells_and_shift():
+    grid = GridModel(2, 3, pitch_x=50.0, pitch_y=-20.0)
+    assert grid.cell(4) == (1, 1)
+    assert grid.cell(6) == (0, 0)  # วนรอบเมื่อขึ้นชั้นใหม่
+    assert grid.shift(0, 4) == (50.0, -20.0)
+    assert grid.shift(2, 3) == (-100.0, -20.0)
+
+
+def test_second_frame_is_tracked_around_the_previous_pose():
+    tracker = _tracker([0])
+    first = tracker.match(_scene())
+    assert tracker.last_mode == "global" and first is not None
+    second = tracker.match(_scene())
+    assert tracker.last_mode == "track"
+    assert second["c1"] == pytest.approx(first["c1"], abs=0.5)
+    assert second["c2"] == pytest.approx(first["c2"], abs=0.5)
+    stats = tracker.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 0, 1.0)
+
+
+def test_prediction_follows_the_grid_pitch():
+    index = [0]
+    tracker = _tracker(index, GridModel(1, 4, pitch_x=120.0))
+    tracker.match(_scene())
+    # ช่องถัดไปเลื่อน 120 px: นอกหน้าต่าง TRACK_WINDOW ถ้าไม่ทำนายตาม grid
+    index[0] = 1
+    pose = tracker.match(_scene(dx=120))
+    assert tracker.last_mode == "track"
+    assert pose["c1"] == pytest.approx((93.5 + 120, 83.5), abs=1.0)
+
+
+def test_lost_part_falls_back_to_global_search():
+    tracker = _tracker([0])
+    tracker.match(_scene())
+    moved = tracker.match(_scene(dx=150, dy=100))
+    assert tracker.last_mode == "global"
+    assert moved["c1"] == pytest.approx((93.5 + 150, 83.5 + 100), abs=1.0)
+    assert tracker.stats()["misses"] == 1
+    assert tracker.match(np.full((300, 400, 3), 90, np.uint8)) is None
+    assert tracker._prev is None  # ไม่เจอ -> เฟรมถัดไปเริ่ม global ใหม่
+    tracker.match(_scene())
+    assert tracker.last_mode == "global"
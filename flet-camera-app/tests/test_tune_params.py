@@ -0,0 +1,78 @@
+import importlib
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from vision import shape_match as sm
+from vision.ncc_match import NccMatcher
+
+DEMO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "demo"))
+
+
+@pytest.fixture(scope="module")
+def tune_params():
+    # import ตามชื่อ (ไม่ใช่จาก path) ให้ worker ของ process pool หา _evaluate เจอ
+    mp = pytest.MonkeyPatch()
+    mp.syspath_prepend(DEMO_DIR)
+    try:
+        yield importlib.import_module("tune_params")
+    finally:
+        mp.undo()
+
+
+def _write_set(tmp_path):
+    rng = np.random.default_rng(3)
+    tpl = cv2.resize(rng.integers(0, 255, (12, 12), dtype=np.uint8), (48, 48), interpolation=cv2.INTER_NEAREST)
+    tpl = cv2.cvtColor(cv2.GaussianBlur(tpl, (3, 3), 0), cv2.COLOR_GRAY2BGR)
+    cv2.imwrite(str(tmp_path / "tpl.png"), tpl)
+    rows = ["file,x1,y1,x2,y2"]
+    for i, center in enumerate([(60, 50), (130, 90), None]):
+        scene = np.full((160, 200, 3), 90, np.uint8)
+        if center is None:
+            rows.append(f"img{i}.png,,,,")
+        else:
+            x, y = center
+            scene[y - 24:y + 24, x - 24:x + 24] = tpl
+            rows.append(f"img{i}.png,{x - 0.5},{y - 0.5},,")
+        cv2.imwrite(str(tmp_path / f"img{i}.png"), scene)
+    (tmp_path / "labels.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return str(tmp_path / "labels.csv"), str(tmp_path / "tpl.png")
+
+
+def test_sweeps_the_app_matcher_by_default(tune_params, tmp_path, capsys):
+    labels, tpl = _write_set(tmp_path)
+    tune_params.main([labels, "--template", tpl, "--angles", "2", "--scores", "0.5,0.99",
+                      "--ious", "0.5", "--workers", "1"])
+    out = capsys.readouterr().out
+    assert f"method={sm.MatchingParams().method}:" in out
+    assert f"method={sm.MatchingParams().method!r})  100.0% detected" in out
+    assert "warning" not in out
+
+
+def test_warns_when_method_differs_from_the_app(tune_params, tmp_path, capsys):
+    labels, tpl = _write_set(tmp_path)
+    other = sm.METHOD_SHAPE if sm.MatchingParams().method != sm.METHOD_SHAPE else sm.METHOD_NCC
+    tune_params.main([labels, "--template", tpl, "--method", other, "--angles", "2", "--scores", "0.5",
+                      "--ious", "0.5", "--workers", "1"])
+    out = capsys.readouterr().out
+    assert f"method={other!r})" in out
+    assert out.count("warning") == 2
+
+
+def test_evaluate_counts_hits_per_setting(tune_params, tmp_path):
+    labels, tpl = _write_set(tmp_path)
+    items = tune_params.read_labels(labels, 1)
+    assert [e is not None for _, e in items] == [True, True, False]
+    threads = cv2.getNumThreads()  # _init_worker ตั้ง 1 thread ต่อ process
+    tune_params._init_worker({"template_path": tpl, "method": sm.METHOD_NCC, "angles": [2.0],
+                              "scores": [0.5], "ious": [0.5], "max_count": 1, "tolerance": 3.0})
+    try:
+        assert all(isinstance(m, NccMatcher) for m in tune_params._worker["matchers"].values())
+        rows = [tune_params._evaluate(item)[1] for item in items]
+    finally:
+        tune_params._worker.clear()
+        cv2.setNumThreads(threads)
+    # หนึ่งแถวต่อชุด: (angle, score, iou, hit, false_pos, ms)
+    assert [r[0][3:5] for r in rows] == [(True, 0), (True, 0), (False, 0)]